@@ -82,6 +82,7 @@ class CGTVideoControls(qw.QWidget, Ui_CGTVideoControls):
         self.set_slider_value(0)
         self.set_frame_currently_displayed(0)
         self.set_range(99)
+        self.set_marked_frames([])
 
     def setup_buttons(self):
         """
@@ -115,6 +116,14 @@ class CGTVideoControls(qw.QWidget, Ui_CGTVideoControls):
         self._gotoSpinBox.setRange(minimum, maximum-1)
         self._frameSlider.setTickInterval(int(maximum/10))
 
+    def set_marked_frames(self, frames):
+        """
+        mark frames, such as suggested key frames, on the slider
+            Args:
+                frames ([int]): the frame numbers
+        """
+        self._frameSlider.set_marks(frames)
+
     def get_range(self):
         """
         get the current frame rang of the controls
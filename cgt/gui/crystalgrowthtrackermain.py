@@ -48,15 +48,22 @@ from cgt.gui.penstore import PenStore
 from cgt.gui.resultswidget import ResultsWidget
 from cgt.util import config
 
-from cgt.io import (writecsvreports, readcsvreports)
-from cgt.io.htmlreport import ReportMaker
+from cgt.io import (binaryproject, projectjournal)
+from cgt.io.enhancementmaker import (EnhancementMaker, default_settings,
+                                     enhanced_video_path, enhancement_source,
+                                     use_enhanced_video)
+from cgt.io.htmlreport import (ReportMaker, ReportSnapshot)
 
 from cgt.io.videosource import VideoSource
 from cgt.io.videoanalyser import VideoAnalyser
 from cgt.io.regionvideocopy import RegionVideoCopy
+from cgt.io.regionframereader import RegionFrameReader
 
 from cgt.model.cgtproject import CGTProject
-from cgt.model.videoanalysisresultsstore import VideoAnalysisResultsStore
+from cgt.model.videoanalysisresultsstore import ChangeTypes
+from cgt.model.resultsstorefactory import make_results_store
+from cgt.model.speedscache import SpeedsCache
+from cgt.util.enhancement import (EQUALISATIONS, EnhanceSettings)
 
 # import UI
 from cgt.gui.Ui_crystalgrowthtrackermain import Ui_CrystalGrowthTrackerMain
@@ -91,9 +98,36 @@ class CrystalGrowthTrackerMain(qw.QMainWindow, Ui_CrystalGrowthTrackerMain):
         ## the project data structure
         self._project = None
 
+        ## the format of the project files on disk, None if not yet saved
+        self._project_format = None
+
         ## the pens
         self._pens = PenStore()
 
+        ## the speeds of the regions, shared by the results tab and the reports
+        self._speeds_cache = SpeedsCache()
+
+        ## the thread running the report maker, None if no report being made
+        self._report_thread = None
+
+        ## the report maker running in the background
+        self._report_maker = None
+
+        ## the thread running the enhancement maker, None if no video being enhanced
+        self._enhancement_thread = None
+
+        ## the enhancement maker running in the background
+        self._enhancement_maker = None
+
+        ## the progress dialog of the enhancement
+        self._enhancement_progress = None
+
+        ## button to cancel background jobs
+        self._cancelButton = qw.QPushButton(self.tr("Cancel"), self)
+        self._cancelButton.clicked.connect(self.cancel_report)
+        self._progressLayout.addWidget(self._cancelButton)
+        self._cancelButton.hide()
+
         self.setup_tabs()
         self._tabWidget.setCurrentIndex(0)
 
@@ -174,6 +208,14 @@ class CrystalGrowthTrackerMain(qw.QMainWindow, Ui_CrystalGrowthTrackerMain):
         """
         return self._pens
 
+    def get_speeds_cache(self):
+        """
+        getter for the cache of region speeds
+            Returns:
+                (SpeedsCache)
+        """
+        return self._speeds_cache
+
     @qc.pyqtSlot(int)
     def tab_changed(self, tab_index):
         """
@@ -307,10 +349,10 @@ class CrystalGrowthTrackerMain(qw.QMainWindow, Ui_CrystalGrowthTrackerMain):
                 dir_name (string): path to the direcrory
         """
         project = CGTProject()
-        project["results"] = VideoAnalysisResultsStore(self)
+        project["results"] = make_results_store(self)
         project["results"].data_changed.connect(self.data_changed)
         try:
-            readcsvreports.read_csv_project(dir_name, project, self.get_pens())
+            project_format = binaryproject.read_project(dir_name, project, self.get_pens())
         except (IOError, OSError, EOFError, FileNotFoundError) as exp:
             message = f"Could not load project: {exp}"
             qw.QMessageBox.warning(self,
@@ -318,11 +360,81 @@ class CrystalGrowthTrackerMain(qw.QMainWindow, Ui_CrystalGrowthTrackerMain):
                                    message)
             return
 
+        saved_digest = project["results"].get_results_digest()
+        entries = self.recover_journal(project)
+
+        self.stop_journal()
         self._project = project
+        self._project_format = project_format
         self._project["results"].data_changed.connect(self.data_changed)
         self._project.reset_changed()
+        if len(entries) > 0:
+            self._project.set_changed()
+
+        self.start_journal(saved_digest, entries)
         self.project_created_or_loaded()
 
+    def recover_journal(self, project):
+        """
+        if the project has a journal of unsaved changes offer to apply them
+            Args:
+                project (CGTProject): the newly read project
+            Returns:
+                ([dict]) the journal entries applied
+        """
+        journal_file = projectjournal.journal_file(project)
+        if not journal_file.exists() or journal_file.stat().st_size == 0:
+            return []
+
+        message = self.tr("The project has unsaved changes from a previous session.\nRecover them?")
+        mb_reply = qw.QMessageBox.question(self,
+                                           self.tr('CrystalGrowthTracker'),
+                                           message,
+                                           qw.QMessageBox.Yes | qw.QMessageBox.No,
+                                           qw.QMessageBox.Yes)
+
+        if mb_reply == qw.QMessageBox.No:
+            return []
+
+        try:
+            entries, total = projectjournal.replay_journal(journal_file,
+                                                           project["results"],
+                                                           self.get_pens())
+        except (IOError, OSError) as exp:
+            message = f"Could not recover changes: {exp}"
+            qw.QMessageBox.warning(self, "CGT Error Loading Project", message)
+            return []
+
+        if len(entries) < total:
+            message = f"Recovered {len(entries)} of {total} changes."
+            qw.QMessageBox.warning(self, "CGT Error Loading Project", message)
+
+        return entries
+
+    def start_journal(self, saved_digest, entries=()):
+        """
+        start recording the changes to the project's results in a journal
+            Args:
+                saved_digest (int): the results digest of the project files
+                entries ([dict]): recovered journal entries to be kept
+        """
+        journal = projectjournal.ProjectJournal(projectjournal.journal_file(self._project),
+                                                saved_digest,
+                                                entries)
+        self._project["results"].set_journal(journal)
+
+    def stop_journal(self):
+        """
+        stop the journal of the current project and delete the file
+        """
+        if self._project is None or self._project["results"] is None:
+            return
+
+        journal = self._project["results"].get_journal()
+        if journal is not None:
+            self._project["results"].set_journal(None)
+            journal.close()
+
     def reset_video_widgets(self):
         """
         clear and reset the video widgets and the frame queue
@@ -341,6 +453,11 @@ class CrystalGrowthTrackerMain(qw.QMainWindow, Ui_CrystalGrowthTrackerMain):
         """
         self.reset_tab_wigets()
 
+        results = self._project["results"]
+        self._speeds_cache.clear()
+        self._speeds_cache.set_results(results)
+        results.data_changed.connect(self._speeds_cache.data_changed)
+
         # dispaly project
         self.display_properties()
         self.set_title()
@@ -405,7 +522,7 @@ class CrystalGrowthTrackerMain(qw.QMainWindow, Ui_CrystalGrowthTrackerMain):
     @qc.pyqtSlot()
     def save_project(self):
         '''
-        Function to write all the csv files needed to define a project.
+        Function to write all the files needed to define a project, in the format set in config.
         Args:
             self    Needs to access the project dictionary.
         Returns:
@@ -418,8 +535,14 @@ class CrystalGrowthTrackerMain(qw.QMainWindow, Ui_CrystalGrowthTrackerMain):
             return
 
         try:
-            writecsvreports.save_csv_project(self._project)
+            changed_only = self._project_format == config.PROJECT_FORMAT
+            binaryproject.save_project(self._project, changed_only=changed_only)
+            self._project_format = config.PROJECT_FORMAT
             self._project.reset_changed()
+
+            journal = self._project["results"].get_journal()
+            if journal is not None:
+                journal.reset(self._project["results"].get_results_digest())
         except OSError as err:
             message = f"Error opening writing file: {err}"
             qw.QMessageBox.warning(self, "CGT File Error", message)
@@ -524,12 +647,15 @@ class CrystalGrowthTrackerMain(qw.QMainWindow, Ui_CrystalGrowthTrackerMain):
         else:
             project["stats_from_enhanced"] = False
 
-        project["results"] = VideoAnalysisResultsStore(self)
+        project["results"] = make_results_store(self)
         project["results"].data_changed.connect(self.data_changed)
 
+        self.stop_journal()
         self._project = project
+        self._project_format = None
         self.set_video_scale_parameters()
         self.save_project()
+        self.start_journal(project["results"].get_results_digest())
         self.project_created_or_loaded()
 
     @qc.pyqtSlot(int)
@@ -537,9 +663,9 @@ class CrystalGrowthTrackerMain(qw.QMainWindow, Ui_CrystalGrowthTrackerMain):
         """
         notify all widgets of a change in the data
             Args:
-                value (int) code for type of data changed, 0: any 1: region
+                value (int) the ChangeTypes flags of the data changed
         """
-        if value == 1:
+        if value & ChangeTypes.REGIONS:
             self._drawingWidget.update_data_display()
 
     @qc.pyqtSlot()
@@ -618,6 +744,15 @@ class CrystalGrowthTrackerMain(qw.QMainWindow, Ui_CrystalGrowthTrackerMain):
         """
         self._project["results"].add_region(region)
 
+    def update_region(self, region):
+        """
+        notify the results that a region has been edited in place
+            Args:
+                region (QGraphicsRectItem) the region
+        """
+        index = self._project["results"].get_regions().index(region)
+        self._project["results"].replace_region(region, index)
+
     def remove_region(self, region):
         """
         remove a region from the results and notify the crystal drawing widget
@@ -625,7 +760,8 @@ class CrystalGrowthTrackerMain(qw.QMainWindow, Ui_CrystalGrowthTrackerMain):
                 region (QRect) the region
         """
         index = self._project["results"].get_regions().index(region)
-        self._project["results"].remove_region(index)
+        with self._project["results"].batch():
+            self._project["results"].remove_region(index)
 
     def region_has_markers(self, region):
         """
@@ -885,24 +1021,227 @@ class CrystalGrowthTrackerMain(qw.QMainWindow, Ui_CrystalGrowthTrackerMain):
 
     def make_report(self):
         """
-        make a html report
+        start making a html report in the background from a snapshot of the
+        project, the report widget is updated when the report is complete
+            Returns:
+                True if the report was started, else False
         """
-        report_file = None
+        if self._report_thread is not None:
+            qw.QMessageBox.information(self,
+                                       self.tr("Report"),
+                                       self.tr("A report is already being made."))
+            return False
+
+        snapshot = ReportSnapshot(self)
 
-        self._progressBar.setMaximum(8)
-        maker = ReportMaker(self)
-        maker.stage_completed.connect(self._progressBar.setValue)
+        self._report_thread = qc.QThread(self)
+        self._report_maker = ReportMaker(snapshot)
+        self._report_maker.moveToThread(self._report_thread)
+
+        self._report_thread.started.connect(self._report_maker.run)
+        self._report_maker.images_completed.connect(self.report_progress)
+        self._report_maker.report_finished.connect(self.report_finished)
+        self._report_maker.report_failed.connect(self.report_failed)
+        self._report_maker.report_cancelled.connect(self.report_ended)
+
+        self._progressBar.setMaximum(0)
+        self._progressBar.setValue(0)
         self._progressBar.show()
+        self._cancelButton.show()
+        self._report_thread.start()
+
+        return True
+
+    @qc.pyqtSlot(int, int)
+    def report_progress(self, done, total):
+        """
+        show the progress of the report
+            Args:
+                done (int): the number of images completed
+                total (int): the total number of images
+        """
+        self._progressBar.setMaximum(total)
+        self._progressBar.setValue(done)
+
+    @qc.pyqtSlot()
+    def cancel_report(self):
+        """
+        cancel the report being made
+        """
+        if self._report_maker is not None:
+            self._report_maker.cancel()
+
+    @qc.pyqtSlot(str)
+    def report_finished(self, report_file):
+        """
+        record and display a completed report
+            Args:
+                report_file (str): the path of the html file
+        """
+        changed = self._project.has_been_changed()
+        self._project["latest_report"] = report_file
+        if not changed:
+            self._project.reset_changed()
+
+        self.report_ended()
+        self._reportWidget.load_html(pathlib.Path(report_file))
+
+    @qc.pyqtSlot(str)
+    def report_failed(self, message):
+        """
+        notify the user of a failed report
+            Args:
+                message (str): the error message
+        """
+        self.report_ended()
+        qw.QMessageBox.critical(self,
+                                self.tr("Auto Save Report"),
+                                message)
+
+    @qc.pyqtSlot()
+    def report_ended(self):
+        """
+        clean up after the background report has stopped
+        """
+        if self._report_thread is not None:
+            self._report_thread.quit()
+            self._report_thread.wait()
+            self._report_thread.deleteLater()
+            self._report_maker.deleteLater()
+
+        self._report_thread = None
+        self._report_maker = None
+
+        self._progressBar.hide()
+        self._cancelButton.hide()
+
+    @qc.pyqtSlot()
+    def enhance_video(self):
+        """
+        make, in the background, a contrast enhanced copy of the raw video and
+        use it as the project's enhanced video, a project without a raw video
+        keeps its current video as the raw video
+        """
+        if self._project is None or self._enhancement_thread is not None:
+            return
+
+        if self._project["enhanced_video"] is None:
+            return
+
+        title = self.tr("Enhance Video")
+        defaults = default_settings()
+
+        equalisation, okay = qw.QInputDialog.getItem(self,
+                                                     title,
+                                                     self.tr("Histogram equalisation"),
+                                                     EQUALISATIONS,
+                                                     EQUALISATIONS.index(defaults.equalisation),
+                                                     False)
+        if not okay:
+            return
+
+        gamma, okay = qw.QInputDialog.getDouble(self,
+                                                title,
+                                                self.tr("Gamma"),
+                                                defaults.gamma,
+                                                0.1,
+                                                10.0,
+                                                2)
+        if not okay:
+            return
+
+        median, okay = qw.QInputDialog.getInt(self,
+                                              title,
+                                              self.tr("Frames in temporal median (1 for none)"),
+                                              defaults.median,
+                                              1,
+                                              15,
+                                              2)
+        if not okay:
+            return
+
+        settings = EnhanceSettings(equalisation, gamma, defaults.tiles, median)
+        source = enhancement_source(self._project)
         try:
-            report_file = maker.save_html_report(self)
-        except (IOError, OSError, EOFError) as exception:
-            qw.QMessageBox.critical(self,
-                                    self.tr("Auto Save Report"),
-                                    str(exception))
-            report_file = None
-        finally:
-            self._progressBar.hide()
-        return report_file
+            reader = RegionFrameReader(str(source), float(self._project["frame_rate"]), None)
+        except (ffmpeg.Error, StopIteration, KeyError) as error:
+            qw.QMessageBox.critical(self, title, str(error))
+            return
+
+        self._enhancement_thread = qc.QThread(self)
+        self._enhancement_maker = EnhancementMaker(reader,
+                                                   enhanced_video_path(self._project),
+                                                   settings)
+        self._enhancement_maker.moveToThread(self._enhancement_thread)
+
+        self._enhancement_progress = qw.QProgressDialog(self.tr("Enhancing video"),
+                                                        self.tr("Cancel"),
+                                                        0,
+                                                        reader.get_video_data().get_frame_count(),
+                                                        self)
+        self._enhancement_progress.setWindowModality(qc.Qt.WindowModal)
+        self._enhancement_progress.canceled.connect(self.cancel_enhancement)
+
+        self._enhancement_thread.started.connect(self._enhancement_maker.run)
+        self._enhancement_maker.frames_read.connect(self._enhancement_progress.setValue)
+        self._enhancement_maker.enhancement_finished.connect(self.enhancement_finished)
+        self._enhancement_maker.enhancement_failed.connect(self.enhancement_failed)
+        self._enhancement_maker.enhancement_cancelled.connect(self.enhancement_ended)
+
+        self._enhancement_progress.show()
+        self._enhancement_thread.start()
+
+    @qc.pyqtSlot()
+    def cancel_enhancement(self):
+        """
+        stop the enhancement, called directly as the worker's thread is busy
+        """
+        if self._enhancement_maker is not None:
+            self._enhancement_maker.cancel()
+
+    @qc.pyqtSlot(str)
+    def enhancement_finished(self, video_file):
+        """
+        use the enhanced video in the project and display it
+            Args:
+                video_file (str): the path of the enhanced video
+        """
+        self.enhancement_ended()
+        use_enhanced_video(self._project, pathlib.Path(video_file))
+        self.save_project()
+        self.load_video()
+
+    @qc.pyqtSlot(str)
+    def enhancement_failed(self, message):
+        """
+        notify the user of a failed enhancement
+            Args:
+                message (str): the error message
+        """
+        self.enhancement_ended()
+        qw.QMessageBox.critical(self,
+                                self.tr("Enhance Video"),
+                                message)
+
+    @qc.pyqtSlot()
+    def enhancement_ended(self):
+        """
+        clean up after the enhancement worker has stopped
+        """
+        if self._enhancement_thread is not None:
+            self._enhancement_thread.quit()
+            self._enhancement_thread.wait()
+            self._enhancement_thread.deleteLater()
+            self._enhancement_maker.deleteLater()
+
+        if self._enhancement_progress is not None:
+            self._enhancement_progress.canceled.disconnect(self.cancel_enhancement)
+            self._enhancement_progress.close()
+            self._enhancement_progress.deleteLater()
+
+        self._enhancement_thread = None
+        self._enhancement_maker = None
+        self._enhancement_progress = None
 
     def get_video_stats(self):
         """
@@ -942,6 +1281,18 @@ class CrystalGrowthTrackerMain(qw.QMainWindow, Ui_CrystalGrowthTrackerMain):
 
         if mb_reply == qw.QMessageBox.Yes:
             #clean-up and exit signalling
+            self.cancel_report()
+            if self._report_thread is not None:
+                self._report_thread.quit()
+                self._report_thread.wait()
+
+            self.cancel_enhancement()
+            if self._enhancement_thread is not None:
+                self._enhancement_thread.quit()
+                self._enhancement_thread.wait()
+
+            self.stop_journal()
+
             # the event must be accepted
             event.accept()
 
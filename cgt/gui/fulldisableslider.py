@@ -29,9 +29,73 @@ import PyQt5.QtCore as qc
 
 class FullDisableSlider(qw.QSlider):
     """
-    a modified slider that will not respond to user input when disabled
+    a modified slider that will not respond to user input when disabled,
+    and on which chosen values can be marked
     """
 
+    def __init__(self, parent=None):
+        """
+        set up the object
+            Args:
+                parent (QWidget): the parent widget
+        """
+        super().__init__(parent)
+
+        ## the values marked on the slider
+        self._marks = []
+
+    def set_marks(self, values):
+        """
+        set the values to be marked on the slider
+            Args:
+                values ([int]): the values, those outside the range are not shown
+        """
+        self._marks = list(values)
+        self.update()
+
+    def get_marks(self):
+        """
+        getter for the values marked on the slider
+            Returns:
+                [int]
+        """
+        return self._marks
+
+    def paintEvent(self, event):
+        """
+        draw the slider, then the marks as short lines above the groove
+            Args:
+                event (QPaintEvent) the event
+        """
+        super().paintEvent(event)
+
+        if len(self._marks) == 0 or self.orientation() != qc.Qt.Horizontal:
+            return
+
+        option = qw.QStyleOptionSlider()
+        self.initStyleOption(option)
+        groove = self.style().subControlRect(qw.QStyle.CC_Slider,
+                                             option,
+                                             qw.QStyle.SC_SliderGroove,
+                                             self)
+        handle = self.style().subControlRect(qw.QStyle.CC_Slider,
+                                             option,
+                                             qw.QStyle.SC_SliderHandle,
+                                             self)
+        span = groove.width() - handle.width()
+        offset = groove.x() + handle.width()//2
+
+        painter = qg.QPainter(self)
+        painter.setPen(qg.QPen(qg.QColor(qc.Qt.red), 2))
+        for value in self._marks:
+            if self.minimum() <= value <= self.maximum():
+                x_pos = offset + qw.QStyle.sliderPositionFromValue(self.minimum(),
+                                                                   self.maximum(),
+                                                                   value,
+                                                                   span)
+                painter.drawLine(x_pos, self.rect().top(), x_pos, groove.top())
+        painter.end()
+
     @qc.pyqtSlot(qg.QMouseEvent)
     def mousePressEvent(self, event):
         """
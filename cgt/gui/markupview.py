@@ -175,6 +175,8 @@ class MarkUpView(VideoBaseView):
             if self._current_clone is None:
                 return
             self.scene().addItem(self._current_clone.marker)
+        elif self._state == MarkUpStates.CLONE_ITEM and event.button() == qc.Qt.RightButton:
+            self.auto_track_menu(event)
         elif self._state == MarkUpStates.DELETE_ITEM:
             if left_button:
                 target = self.select_marker(event)
@@ -185,6 +187,23 @@ class MarkUpView(VideoBaseView):
             target.setSelected(True)
             self.user_choice_delete_item(target)
 
+    def auto_track_menu(self, event):
+        """
+        offer to auto-track the marker under the event, if there is one
+            Args:
+                event (QMouseEvent) the event
+        """
+        target = self.select_marker(event)
+        if target is None:
+            return
+
+        menu = qw.QMenu(self)
+        track = menu.addAction(self.tr("Auto-track..."))
+        menu.addAction(self.tr("Cancel"))
+
+        if menu.exec_(self.mapToGlobal(event.pos())) == track:
+            self._parent.auto_track_marker(target)
+
     def menu_select_marker(self, event):
         """
         select a marker from a menu
@@ -32,10 +32,20 @@ import PyQt5.QtWidgets as qw
 import PyQt5.QtCore as qc
 import PyQt5.QtGui as qg
 
+import ffmpeg
+
 from cgt.gui.markupview import MarkUpStates
 from cgt.gui.resultsstoreproxy import ResultsStoreProxy
 from cgt.gui.videobasewidget import PlayStates
-from cgt.util.markers import (get_region,
+from cgt.io.autotracker import AutoTracker
+from cgt.io.keyframesuggester import KeyFrameSuggester, bounding_rect
+from cgt.io.regionframereader import RegionFrameReader
+from cgt.model.videoanalysisresultsstore import ChangeTypes
+from cgt.util import config
+from cgt.util.markers import (ItemDataTypes,
+                              MarkerTypes,
+                              get_marker_type,
+                              get_region,
                               get_frame,
                               hash_marker)
 
@@ -84,12 +94,40 @@ class MarkUpWidget(qw.QWidget, Ui_MarkUpWidget):
         ## pointer for the video source
         self._video_source = None
 
+        ## the thread running the auto-tracker, None if not tracking
+        self._tracker_thread = None
+
+        ## the auto-tracker
+        self._tracker = None
+
+        ## the progress of the auto-tracker
+        self._tracker_progress = None
+
+        ## the marker item being auto-tracked
+        self._tracked_item = None
+
+        ## the thread suggesting key frames, None if not running
+        self._suggest_thread = None
+
+        ## the key frame suggester
+        self._suggester = None
+
+        ## the progress of the key frame suggester
+        self._suggest_progress = None
+
+        ## the suggested key frames of each region, empty if none have been found
+        self._key_frame_suggestions = []
+
         self._entryView.set_parent_and_pens(self, self._data_source.get_pens())
         self._cloneView.set_parent_and_pens(self, self._data_source.get_pens())
         self._cloneView.assign_state(MarkUpStates.CLONE_ITEM)
 
         self.make_connections()
 
+        ## shortcuts to undo and redo changes to the results
+        self._undo_shortcuts = [qw.QShortcut(qg.QKeySequence.Undo, self, self.undo),
+                                qw.QShortcut(qg.QKeySequence.Redo, self, self.redo)]
+
         font = qg.QFont( "Monospace", 8, qg.QFont.DemiBold)
         self._frameLabel.setFont(font)
         self._frameLabel_2.setFont(font)
@@ -183,6 +221,7 @@ class MarkUpWidget(qw.QWidget, Ui_MarkUpWidget):
             self.region_changed_no_key_frames()
 
         self.fill_key_frame_combo()
+        self.show_key_frame_suggestions()
 
     def region_changed_with_key_frames(self):
         """
@@ -638,6 +677,352 @@ class MarkUpWidget(qw.QWidget, Ui_MarkUpWidget):
         else:
             self._results_proxy.remove_item_from_views(hash_marker(marker))
 
+    def auto_track_marker(self, item):
+        """
+        follow a marker through the frames after its own in the background,
+        the clones proposed are then offered to the user
+            Args:
+                item (QGraphicsItem) the marker item in the clone view
+        """
+        if self._tracker_thread is not None or self._video_source is None:
+            return
+
+        title = self.tr("Auto-track")
+        last_frame = self._video_source.get_video_data().get_frame_count() - 1
+        start = get_frame(item)
+        if start >= last_frame:
+            return
+
+        step, flag = qw.QInputDialog.getInt(self,
+                                            title,
+                                            self.tr("Frames between proposed key frames:"),
+                                            min(config.TRACK_FRAME_STEP, last_frame - start),
+                                            1,
+                                            last_frame - start)
+        if not flag:
+            return
+
+        end, flag = qw.QInputDialog.getInt(self,
+                                           title,
+                                           self.tr("Last frame to track:"),
+                                           last_frame,
+                                           start + step,
+                                           last_frame)
+        if not flag:
+            return
+
+        rect = self._results_proxy.get_regions()[get_region(item)].rect().toRect()
+        try:
+            reader = RegionFrameReader(self._video_source.get_name(),
+                                       float(self._data_source.get_project()["frame_rate"]),
+                                       (rect.x(), rect.y(), rect.width(), rect.height()))
+        except (ffmpeg.Error, StopIteration, KeyError) as error:
+            qw.QMessageBox.critical(self, title, str(error))
+            return
+
+        centre, normal = self.marker_centre(item)
+
+        self._tracked_item = item
+        self._tracker_thread = qc.QThread(self)
+        self._tracker = AutoTracker(reader, centre, start, end, step, normal)
+        self._tracker.moveToThread(self._tracker_thread)
+
+        self._tracker_progress = qw.QProgressDialog(self.tr("Tracking marker"),
+                                                    self.tr("Cancel"),
+                                                    0,
+                                                    end - start,
+                                                    self)
+        self._tracker_progress.setWindowModality(qc.Qt.WindowModal)
+        self._tracker_progress.canceled.connect(self.cancel_auto_track)
+
+        self._tracker_thread.started.connect(self._tracker.run)
+        self._tracker.frames_tracked.connect(self._tracker_progress.setValue)
+        self._tracker.tracking_finished.connect(self.review_auto_track)
+        self._tracker.tracking_failed.connect(self.auto_track_failed)
+        self._tracker.tracking_cancelled.connect(self.auto_track_ended)
+
+        self.block_user_entry()
+        self._tracker_progress.show()
+        self._tracker_thread.start()
+
+    @staticmethod
+    def marker_centre(item):
+        """
+        find the point of a marker item to be tracked
+            Args:
+                item (QGraphicsItem) the marker item
+            Returns:
+                ((float, float), (float, float)) the x and y of the point in the
+                    region, and for a line its unit normal, else None
+        """
+        if get_marker_type(item) == MarkerTypes.LINE:
+            line = item.line()
+            centre = line.center() + item.pos()
+            normal = None
+            if line.length() > 0.0:
+                normal = (line.dy()/line.length(), -line.dx()/line.length())
+            return (centre.x(), centre.y()), normal
+
+        centre = item.data(ItemDataTypes.CROSS_CENTRE) + item.pos()
+        return (centre.x(), centre.y()), None
+
+    @qc.pyqtSlot()
+    def cancel_auto_track(self):
+        """
+        stop the auto-tracker, called directly as the tracker's thread is busy
+        """
+        if self._tracker is not None:
+            self._tracker.cancel()
+
+    @qc.pyqtSlot(str)
+    def auto_track_failed(self, message):
+        """
+        notify the user of a failed auto-track
+            Args:
+                message (str): the error message
+        """
+        self.auto_track_ended()
+        qw.QMessageBox.critical(self, self.tr("Auto-track"), message)
+
+    @qc.pyqtSlot()
+    def auto_track_ended(self):
+        """
+        clean up after the auto-tracker has stopped
+        """
+        if self._tracker_thread is not None:
+            self._tracker_thread.quit()
+            self._tracker_thread.wait()
+            self._tracker_thread.deleteLater()
+            self._tracker.deleteLater()
+
+        if self._tracker_progress is not None:
+            self._tracker_progress.canceled.disconnect(self.cancel_auto_track)
+            self._tracker_progress.close()
+            self._tracker_progress.deleteLater()
+
+        self._tracker_thread = None
+        self._tracker = None
+        self._tracker_progress = None
+        self.unblock_user_entry()
+
+    @qc.pyqtSlot(list)
+    def review_auto_track(self, proposals):
+        """
+        offer each clone proposed by the auto-tracker to the user, the
+        clones accepted are added as one change to the results
+            Args:
+                proposals ([TrackedPosition]) the proposed clones in order of frame
+        """
+        item = self._tracked_item
+        self._tracked_item = None
+        self.auto_track_ended()
+
+        title = self.tr("Auto-track")
+        if len(proposals) == 0:
+            qw.QMessageBox.information(self,
+                                       title,
+                                       self.tr("The marker was lost before the first proposed key frame."))
+            return
+
+        parent = item
+        accept_all = False
+        with self._results_proxy.batch():
+            for proposal in proposals:
+                self.display_frame(proposal.frame)
+                clone = self._cloneView.moving_clone(parent)
+                clone.setPos(item.pos() + qc.QPointF(proposal.x, proposal.y))
+                if self._results_proxy.check_if_marker_already_has_key_frame(clone):
+                    continue
+
+                self._cloneView.scene().addItem(clone)
+                reply = qw.QMessageBox.Yes
+                if not accept_all:
+                    message = self.tr("Accept the marker tracked to frame {} (match {:.2f})?")
+                    reply = qw.QMessageBox.question(self,
+                                                    title,
+                                                    message.format(proposal.frame, proposal.score),
+                                                    (qw.QMessageBox.Yes|qw.QMessageBox.YesToAll|
+                                                     qw.QMessageBox.No|qw.QMessageBox.Cancel),
+                                                    qw.QMessageBox.Yes)
+
+                if reply not in (qw.QMessageBox.Yes, qw.QMessageBox.YesToAll):
+                    self._cloneView.scene().removeItem(clone)
+                    if reply == qw.QMessageBox.Cancel:
+                        break
+                    continue
+
+                accept_all = accept_all or reply == qw.QMessageBox.YesToAll
+                clone.setPen(self._data_source.get_pens().get_display_pen())
+                self._results_proxy.add_marker(clone)
+                parent = clone
+
+        self.fill_key_frame_combo(self._current_frame)
+
+    @qc.pyqtSlot()
+    @qc.pyqtSlot()
+    def suggest_key_frames(self):
+        """
+        find, in the background, frames at which each region has changed
+        enough from its previous key frame to be worth marking up
+        """
+        if (self._suggest_thread is not None or self._tracker_thread is not None
+                or self._video_source is None or self._results_proxy is None):
+            return
+
+        title = self.tr("Suggest Key-Frames")
+        regions = self._results_proxy.get_regions()
+        if len(regions) == 0:
+            return
+
+        threshold, flag = qw.QInputDialog.getDouble(self,
+                                                    title,
+                                                    self.tr("Mean squared change of grey level:"),
+                                                    config.KEY_FRAME_CHANGE_THRESHOLD,
+                                                    0.1,
+                                                    65025.0,
+                                                    1)
+        if not flag:
+            return
+
+        rects = []
+        for region in regions:
+            rect = region.rect().toRect()
+            rects.append((rect.x(), rect.y(), rect.width(), rect.height()))
+
+        last_frame = self._video_source.get_video_data().get_frame_count() - 1
+        try:
+            reader = RegionFrameReader(self._video_source.get_name(),
+                                       float(self._data_source.get_project()["frame_rate"]),
+                                       bounding_rect(rects))
+        except (ffmpeg.Error, StopIteration, KeyError) as error:
+            qw.QMessageBox.critical(self, title, str(error))
+            return
+
+        self._suggest_thread = qc.QThread(self)
+        self._suggester = KeyFrameSuggester(reader, rects, 0, last_frame, threshold)
+        self._suggester.moveToThread(self._suggest_thread)
+
+        self._suggest_progress = qw.QProgressDialog(self.tr("Finding changes in the regions"),
+                                                    self.tr("Cancel"),
+                                                    0,
+                                                    last_frame,
+                                                    self)
+        self._suggest_progress.setWindowModality(qc.Qt.WindowModal)
+        self._suggest_progress.canceled.connect(self.cancel_suggest_key_frames)
+
+        self._suggest_thread.started.connect(self._suggester.run)
+        self._suggester.frames_read.connect(self._suggest_progress.setValue)
+        self._suggester.suggestions_finished.connect(self.key_frames_suggested)
+        self._suggester.suggestions_failed.connect(self.suggest_key_frames_failed)
+        self._suggester.suggestions_cancelled.connect(self.suggest_key_frames_ended)
+
+        self.block_user_entry()
+        self._suggest_progress.show()
+        self._suggest_thread.start()
+
+    @qc.pyqtSlot()
+    def cancel_suggest_key_frames(self):
+        """
+        stop the key frame suggester, called directly as the suggester's thread is busy
+        """
+        if self._suggester is not None:
+            self._suggester.cancel()
+
+    @qc.pyqtSlot(str)
+    def suggest_key_frames_failed(self, message):
+        """
+        notify the user of a failure to suggest key frames
+            Args:
+                message (str): the error message
+        """
+        self.suggest_key_frames_ended()
+        qw.QMessageBox.critical(self, self.tr("Suggest Key-Frames"), message)
+
+    @qc.pyqtSlot()
+    def suggest_key_frames_ended(self):
+        """
+        clean up after the key frame suggester has stopped
+        """
+        if self._suggest_thread is not None:
+            self._suggest_thread.quit()
+            self._suggest_thread.wait()
+            self._suggest_thread.deleteLater()
+            self._suggester.deleteLater()
+
+        if self._suggest_progress is not None:
+            self._suggest_progress.canceled.disconnect(self.cancel_suggest_key_frames)
+            self._suggest_progress.close()
+            self._suggest_progress.deleteLater()
+
+        self._suggest_thread = None
+        self._suggester = None
+        self._suggest_progress = None
+        self.unblock_user_entry()
+
+    @qc.pyqtSlot(list)
+    def key_frames_suggested(self, suggestions):
+        """
+        store the suggested key frames and mark those of the current region
+            Args:
+                suggestions ([[int]]) for each region the suggested frames
+        """
+        self.suggest_key_frames_ended()
+        self._key_frame_suggestions = suggestions
+        self.show_key_frame_suggestions()
+
+    def show_key_frame_suggestions(self):
+        """
+        mark the suggested key frames of the current region on the frame sliders
+        """
+        index = self._regionsBox.currentIndex()
+        frames = []
+        if 0 <= index < len(self._key_frame_suggestions):
+            frames = self._key_frame_suggestions[index]
+
+        self._entryControls.set_marked_frames(frames)
+        self._cloneControls.set_marked_frames(frames)
+
+    def undo(self):
+        """
+        undo the latest change to the results
+        """
+        if self._results_proxy is None or not self._regionsBox.isEnabled():
+            return
+
+        self.show_history_change(self._results_proxy.undo(self._regionsBox.currentIndex()))
+
+    @qc.pyqtSlot()
+    def redo(self):
+        """
+        redo the latest change to the results that was undone
+        """
+        if self._results_proxy is None or not self._regionsBox.isEnabled():
+            return
+
+        self.show_history_change(self._results_proxy.redo(self._regionsBox.currentIndex()))
+
+    def show_history_change(self, change):
+        """
+        update the controls after an undo or redo, the region is only
+        redisplayed if the regions, or its having key frames, changed
+            Args:
+                change (HistoryChange) the change or None
+        """
+        if change is None:
+            return
+
+        if change.parts & ChangeTypes.REGIONS:
+            self.setup_regions_combobox()
+            return
+
+        key_frames = self._results_proxy.get_key_frames(self._regionsBox.currentIndex())
+        if (key_frames is None) != (self._base_key_frame is None):
+            if self._video_source is not None:
+                self.region_changed()
+            return
+
+        self.fill_key_frame_combo()
+
     def block_user_entry(self):
         """
         stop user drawing or cloning
@@ -679,6 +1064,10 @@ class MarkUpWidget(qw.QWidget, Ui_MarkUpWidget):
         <li>Draw lines and select points on the left image.</li>
         <li>Use right controls to find next frame.</li>
         <li>Select and drag lines and points on the left image.</li>
+        <li>Right click a line or point on the right image to auto-track it
+        through the later frames, accepting or rejecting each clone proposed.</li>
+        <li>Suggest Key-Frames marks on the frame sliders the frames at which
+        the region has changed enough since the previous mark to be worth a key-frame.</li>
         </ol>
         """
         self._help = qw.QTextBrowser()
@@ -694,6 +1083,8 @@ class MarkUpWidget(qw.QWidget, Ui_MarkUpWidget):
         self._cloneView.scene().clear()
         self._entryView.scene().clear()
         self._results_proxy = None
+        self._key_frame_suggestions = []
+        self.show_key_frame_suggestions()
 
     def grab_clone_image(self):
         """
@@ -0,0 +1,115 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+a view of a region on which a profile line, for a kymograph, can be drawn
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+# set up linting conditions
+# pylint: disable = c-extension-no-member
+# pylint: disable = import-error
+import PyQt5.QtGui as qg
+import PyQt5.QtCore as qc
+import PyQt5.QtWidgets as qw
+
+class ProfileView(qw.QGraphicsView):
+    """
+    a graphics view in which, when drawing is on, a line can be dragged out
+    """
+
+    ## signal that a profile line has been drawn, in scene coordinates
+    profile_drawn = qc.pyqtSignal(qc.QLineF)
+
+    def __init__(self, parent):
+        """
+        set up the object
+            Args:
+                parent (QWidget): the parent widget
+        """
+        super().__init__(parent)
+
+        ## if true the mouse draws a profile line
+        self._drawing = False
+
+        ## the profile line being drawn or last drawn
+        self._line_item = None
+
+        ## the pen for the profile line
+        self._pen = qg.QPen(qg.QColor(qc.Qt.cyan), 1)
+        self._pen.setCosmetic(True)
+
+    def set_drawing(self, flag):
+        """
+        turn the drawing of profile lines on or off
+            Args:
+                flag (bool): if true the mouse draws lines
+        """
+        self._drawing = flag
+
+    def clear_profile(self):
+        """
+        remove the profile line, if it is in the scene
+        """
+        if self._line_item is not None and self._line_item.scene() is not None:
+            self._line_item.scene().removeItem(self._line_item)
+        self._line_item = None
+
+    def mousePressEvent(self, event):
+        """
+        callback for a mouse press, starts a new profile line
+            Args:
+                event (QMouseEvent) the event
+        """
+        if not self._drawing or event.button() != qc.Qt.LeftButton or self.scene() is None:
+            super().mousePressEvent(event)
+            return
+
+        self.clear_profile()
+        start = self.mapToScene(event.pos())
+        self._line_item = self.scene().addLine(qc.QLineF(start, start), self._pen)
+
+    def mouseMoveEvent(self, event):
+        """
+        callback for a mouse movement, moves the end of the profile line
+            Args:
+                event (QMouseEvent) the event
+        """
+        if not self._drawing or self._line_item is None or self._line_item.scene() is None:
+            super().mouseMoveEvent(event)
+            return
+
+        line = self._line_item.line()
+        line.setP2(self.mapToScene(event.pos()))
+        self._line_item.setLine(line)
+
+    def mouseReleaseEvent(self, event):
+        """
+        callback for a mouse button release, the profile line is finished
+            Args:
+                event (QMouseEvent) the event
+        """
+        if not self._drawing or self._line_item is None or self._line_item.scene() is None:
+            super().mouseReleaseEvent(event)
+            return
+
+        line = self._line_item.line()
+        line.setP2(self.mapToScene(event.pos()))
+        self._line_item.setLine(line)
+
+        if line.length() > 1.0:
+            self.profile_drawn.emit(line)
+        else:
+            self.clear_profile()
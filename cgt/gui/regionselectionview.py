@@ -371,7 +371,9 @@ class RegionSelectionView(VideoBaseView):
         if self._draw_rect is None:
             return
 
+        region = self._draw_rect.graphics_rect
         self.mouse_event_edit(event)
+        self._data_source.update_region(region)
         self._draw_rect = None
 
     def display_selected(self):
@@ -27,7 +27,6 @@ import PyQt5.QtCore as qc
 import PyQt5.QtWebEngineWidgets as qe
 
 from cgt.util.utils import make_report_file_names
-from cgt.util.markers import hash_results
 
 # import UI
 from cgt.gui.Ui_reportwidget import Ui_ReportWidget
@@ -107,7 +106,7 @@ class ReportWidget(qw.QWidget, Ui_ReportWidget):
 
         if data is not None:
             if "results_hash" in data:
-                if data["results_hash"] == hash_results(project["results"]):
+                if data["results_hash"] == project["results"].get_results_digest():
                     return ReportStatus.UPTO_DATE_REPORT
 
                 return ReportStatus.OUT_OF_DATE_REPORT
@@ -188,8 +187,7 @@ class ReportWidget(qw.QWidget, Ui_ReportWidget):
 
     def make_report(self):
         """
-        make a html report
+        start making a html report, the data source displays the
+        report, using load_html, when it is complete
         """
-        report_file = self._data_source.make_report()
-
-        self.load_html(report_file)
+        self._data_source.make_report()
@@ -85,13 +85,11 @@ class ResultsStoreProxy():
             Returns:
                 [(QGraphicsLineItem)]
         """
-        lines = self._results_store.get_lines()
-        tmp = []
-        for line in lines:
-            if get_region(line[0]) == index:
-                tmp.append(line)
+        lines = self._results_store.get_lines_for_region(index)
+        if lines is None:
+            return []
 
-        return tmp
+        return lines
 
     def get_points(self):
         """
@@ -109,13 +107,11 @@ class ResultsStoreProxy():
             Returns:
                 [(QGraphicsPathItem)]
         """
-        points = self._results_store.get_points()
-        tmp = []
-        for point in points:
-            if get_region(point[0]) == index:
-                tmp.append(point)
+        points = self._results_store.get_points_for_region(index)
+        if points is None:
+            return []
 
-        return tmp
+        return points
 
     def get_key_frames(self, region_index):
         """
@@ -154,7 +150,8 @@ class ResultsStoreProxy():
         self.copy_line_to_view(marker[0], False)
 
         for line in marker:
-            self._clone_view.scene().addItem(line)
+            if line.scene() is None:
+                self._clone_view.scene().addItem(line)
 
         for i, line in enumerate(marker[1:]):
             self.add_arrow_to_lines(marker[i], line)
@@ -168,11 +165,82 @@ class ResultsStoreProxy():
         self.copy_point_to_view(marker[0], False)
 
         for point in marker:
-            self._clone_view.scene().addItem(point)
+            if point.scene() is None:
+                self._clone_view.scene().addItem(point)
 
         for i, point in enumerate(marker[1:]):
             self.add_arrow_to_points(marker[i], point)
 
+    def undo(self, region):
+        """
+        undo the latest change to the store and update the affected items
+            Args:
+                region (int) the index of the region displayed
+            Returns:
+                (HistoryChange) the change undone, or None
+        """
+        change = self._results_store.undo()
+        if change is not None:
+            self.redisplay_changes(change, region)
+
+        return change
+
+    def redo(self, region):
+        """
+        redo the latest change undone and update the affected items
+            Args:
+                region (int) the index of the region displayed
+            Returns:
+                (HistoryChange) the change redone, or None
+        """
+        change = self._results_store.redo()
+        if change is not None:
+            self.redisplay_changes(change, region)
+
+        return change
+
+    def redisplay_changes(self, change, region):
+        """
+        remove the items taken out of the store from the views and redraw
+        the markers changed, the rest of the display is left alone
+            Args:
+                change (HistoryChange) the items removed and markers changed
+                region (int) the index of the region displayed
+        """
+        removed = set(change.removed)
+        for item in change.removed:
+            self.delete_marker_arrows(item)
+            if item.scene() is not None:
+                self._clone_view.delete_graphics_item(item)
+            self._entry_view.delete_marker_with_hash(hash_marker(item))
+
+        show = self.get_key_frames(region) is not None
+        redrawn = set()
+        for marker in change.markers:
+            if id(marker) in redrawn or marker[0] in removed:
+                continue
+            redrawn.add(id(marker))
+
+            self.delete_arrows(marker)
+            for item in marker:
+                self._entry_view.delete_marker_with_hash(hash_marker(item))
+
+            if not show or get_region(marker[0]) != region:
+                continue
+
+            if get_marker_type(marker[0]) == MarkerTypes.LINE:
+                self.redraw_line_marker(marker)
+            else:
+                self.redraw_point_marker(marker)
+
+    def batch(self):
+        """
+        group changes to the store into one signal and one undo step
+            Returns:
+                (context manager) the store's batch
+        """
+        return self._results_store.batch()
+
     def add_marker(self, marker):
         """
         add a marker to the store
@@ -335,27 +403,26 @@ class ResultsStoreProxy():
         if item_type not in (MarkerTypes.LINE, MarkerTypes.POINT):
             return
 
-        if item_type == MarkerTypes.LINE:
-            index = self._results_store.find_list_for_old_line(marker)
-            lines = self._results_store.get_lines()
-            for line in lines[index]:
-                self._clone_view.delete_graphics_item(line)
-                if line in self._marker_arrow_map:
-                    self._clone_view.delete_graphics_items(self._marker_arrow_map[line])
+        with self._results_store.batch():
+            if item_type == MarkerTypes.LINE:
+                index = self._results_store.find_list_for_old_line(marker)
+                for line in self._results_store.get_line_marker(index):
+                    self._clone_view.delete_graphics_item(line)
+                    if line in self._marker_arrow_map:
+                        self._clone_view.delete_graphics_items(self._marker_arrow_map.pop(line))
 
-                self._entry_view.delete_marker_with_hash(hash_graphics_line(line))
+                    self._entry_view.delete_marker_with_hash(hash_graphics_line(line))
 
-        if item_type == MarkerTypes.POINT:
-            index = self._results_store.find_list_for_old_point(marker)
-            points = self._results_store.get_points()
-            for point in points[index]:
-                self._clone_view.delete_graphics_item(point)
-                if point in self._marker_arrow_map:
-                    self._clone_view.delete_graphics_items(self._marker_arrow_map[point])
+            if item_type == MarkerTypes.POINT:
+                index = self._results_store.find_list_for_old_point(marker)
+                for point in self._results_store.get_point_marker(index):
+                    self._clone_view.delete_graphics_item(point)
+                    if point in self._marker_arrow_map:
+                        self._clone_view.delete_graphics_items(self._marker_arrow_map.pop(point))
 
-                self._entry_view.delete_marker_with_hash(hash_graphics_point(point))
+                    self._entry_view.delete_marker_with_hash(hash_graphics_point(point))
 
-        self._results_store.delete_marker(marker)
+            self._results_store.delete_marker(marker)
 
     def delete_marker_in_frame(self, marker):
         """
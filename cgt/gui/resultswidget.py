@@ -21,13 +21,25 @@ This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
 # pylint: disable = import-error
 import itertools
 
+import ffmpeg
 import PyQt5.QtWidgets as qw
 import PyQt5.QtCore as qc
 import PyQt5.QtGui as qg
 
-from cgt.model.velocitiescalculator import calculate_speeds
 
-from cgt.io.mpl import make_mplcanvas, draw_displacements
+from cgt.io.driftmaker import DriftMaker
+from cgt.io.keyframesuggester import bounding_rect
+from cgt.io.kymographmaker import KymographMaker
+from cgt.io.mpl import (make_mplcanvas,
+                        draw_displacements,
+                        draw_kymograph,
+                        draw_segmentation)
+from cgt.io.regionframereader import RegionFrameReader
+from cgt.io.segmentationmaker import SegmentationMaker
+from cgt.util import config
+from cgt.util.kymograph import ProfileLine, fit_kymograph_edge
+from cgt.model.velocitiescalculator import format_statistic
+from cgt.util.scenegraphitems import make_cross_path
 from cgt.util.markers import (ItemDataTypes,
                               MarkerTypes,
                               get_region,
@@ -76,19 +88,98 @@ class ResultsWidget(qw.QWidget, Ui_ResultsWidget):
         # the start points
         self._points = None
 
+        ## the tabs holding the displacement graph, the kymograph and the crystal area graph
+        self._graphTabs = None
+
+        ## the canvas for the kymograph
+        self._kymograph_canvas = None
+
+        ## the toolbar of the kymograph canvas
+        self._kymograph_toolbar = None
+
+        ## label for instructions and the fitted velocity
+        self._kymograph_label = None
+
+        ## the frame numbers and data of the kymograph, or None
+        self._kymograph = None
+
+        ## the points on an edge clicked in the kymograph, as (row, sample)
+        self._kymograph_clicks = []
+
+        ## the thread building a kymograph
+        self._kymograph_thread = None
+
+        ## the worker building a kymograph
+        self._kymograph_maker = None
+
+        ## the progress of building a kymograph
+        self._kymograph_progress = None
+
+        ## the canvas for the crystal area graph
+        self._segmentation_canvas = None
+
+        ## the thread segmenting the crystals
+        self._segment_thread = None
+
+        ## the worker segmenting the crystals
+        self._segmenter = None
+
+        ## the progress of segmenting the crystals
+        self._segment_progress = None
+
+        ## the thread finding the stage drift
+        self._drift_thread = None
+
+        ## the worker finding the stage drift
+        self._drift_maker = None
+
+        ## the progress of finding the stage drift
+        self._drift_progress = None
+
+        ## timer stepping the frames during play
+        self._play_timer = qc.QTimer(self)
+        self._play_timer.timeout.connect(self.next_frame)
+
         # ensure view has a scene graph
         self._regionView.setScene(qw.QGraphicsScene())
+        self._regionView.profile_drawn.connect(self.make_kymograph)
 
         self.make_graph_canvas()
 
     def  make_graph_canvas(self):
         """
-        make the canvas for the displacment graphs
+        make the canvases for the displacment graphs, the kymograph and the
+        crystal area graph, on separate tabs
         """
+        self._graphTabs = qw.QTabWidget(self._graphScrollArea)
+
         self._graph, toolbar = make_mplcanvas()
-        layout = qw.QVBoxLayout(self._graphScrollArea)
+        page = qw.QWidget()
+        layout = qw.QVBoxLayout(page)
         layout.addWidget(toolbar)
         layout.addWidget(self._graph)
+        self._graphTabs.addTab(page, self.tr("Displacements"))
+
+        self._kymograph_canvas, self._kymograph_toolbar = make_mplcanvas()
+        self._kymograph_canvas.mpl_connect("button_press_event", self.kymograph_clicked)
+        self._kymograph_label = qw.QLabel(self.tr("Use Draw Profile to drag a line across the region"))
+        self._kymograph_label.setWordWrap(True)
+        page = qw.QWidget()
+        layout = qw.QVBoxLayout(page)
+        layout.addWidget(self._kymograph_toolbar)
+        layout.addWidget(self._kymograph_canvas)
+        layout.addWidget(self._kymograph_label)
+        self._graphTabs.addTab(page, self.tr("Kymograph"))
+
+        self._segmentation_canvas, toolbar = make_mplcanvas()
+        page = qw.QWidget()
+        layout = qw.QVBoxLayout(page)
+        layout.addWidget(toolbar)
+        layout.addWidget(self._segmentation_canvas)
+        self._graphTabs.addTab(page, self.tr("Crystal Area"))
+
+        layout = qw.QVBoxLayout(self._graphScrollArea)
+        layout.addWidget(self._graphTabs)
         self._graphScrollArea.setLayout(layout)
 
     def setEnabled(self, enabled):
@@ -105,6 +196,7 @@ class ResultsWidget(qw.QWidget, Ui_ResultsWidget):
             super().setEnabled(True)
             self.setup_display()
         elif not enabled:
+            self._playButton.setChecked(False)
             for item in self._regionView.scene().items():
                 self._regionView.scene().removeItem(item)
             super().setEnabled(False)
@@ -136,6 +228,7 @@ class ResultsWidget(qw.QWidget, Ui_ResultsWidget):
         """
         self.fill_table(index)
         self.draw_graph_of_region(index)
+        self.draw_segmentation_of_region(index)
         self.display_region(index)
 
     def display_region(self, index):
@@ -159,14 +252,16 @@ class ResultsWidget(qw.QWidget, Ui_ResultsWidget):
             for marker in point_markers:
                 self._points.append(marker[0])
 
-        self.display_image(self._video_source.get_pixmap(0))
+        self.display_image(self._video_source.get_pixmap(self._frameSlider.value()))
 
     def display_image(self, pixmap):
         """
-        callback function to display an image from a source
+        callback function to display an image from a source, with the start
+        of each marker and the markers interpolated to the current frame
             Args:
                 pixmap (QPixmap) the pixmap to be displayed
         """
+        self._regionView.clear_profile()
         scene = self._regionView.scene()
         scene.clear()
 
@@ -179,6 +274,67 @@ class ResultsWidget(qw.QWidget, Ui_ResultsWidget):
         for point in self._points:
             scene.addItem(clone_point(point, pen))
 
+        self.draw_marker_tracks(self._frameSlider.value())
+
+    def draw_marker_tracks(self, frame):
+        """
+        draw the markers of the current region interpolated to a frame, only
+        markers whose key frames are either side of the frame are drawn
+            Args:
+                frame (int): the frame number
+        """
+        index = self._regionBox.currentIndex()
+        if index < 0:
+            return
+
+        tracks = self._data_source.get_results().get_marker_tracks(index)
+        scene = self._regionView.scene()
+        pen = self._data_source.get_pens().get_highlight_pen()
+
+        for line in tracks.lines_at(frame)[["x1", "y1", "x2", "y2"]].tolist():
+            item = scene.addLine(*line, pen)
+            item.setZValue(2.0)
+
+        for point in tracks.points_at(frame)[["x", "y"]].tolist():
+            item = scene.addPath(make_cross_path(qc.QPointF(*point)), pen)
+            item.setZValue(2.0)
+
+    @qc.pyqtSlot(int)
+    def show_frame(self, frame):
+        """
+        show a frame of the current region with the interpolated markers
+            Args:
+                frame (int): the frame number
+        """
+        if self._current_region is None or self._video_source is None:
+            return
+
+        self.display_image(self._video_source.get_pixmap(frame))
+
+    @qc.pyqtSlot(bool)
+    def play_frames(self, play):
+        """
+        start or stop stepping through the frames
+            Args:
+                play (bool): if True play from the current frame
+        """
+        if not play or self._video_source is None:
+            self._play_timer.stop()
+            return
+
+        step = self._video_source.get_video_data().get_user_time_step()
+        self._play_timer.start(max(int(step*1000), 1))
+
+    @qc.pyqtSlot()
+    def next_frame(self):
+        """
+        move to the next frame, looping to the first at the end
+        """
+        frame = self._frameSlider.value() + 1
+        if frame > self._frameSlider.maximum():
+            frame = self._frameSlider.minimum()
+        self._frameSlider.setValue(frame)
+
     @qc.pyqtSlot(float)
     def zoom_changed(self, value):
         """
@@ -191,47 +347,52 @@ class ResultsWidget(qw.QWidget, Ui_ResultsWidget):
 
     def fill_table(self, index):
         """
-        fill the tree widget
+        fill the tree widget, the average and least-squares speeds of each
+        marker are shown in the row of its first displacement
         """
         self._resultsTable.clear()
 
-        headers = ["Marker", "Start Frame", "End Frame", "Displacement"]
-        self._resultsTable.setColumnCount(4)
+        headers = ["Marker", "Start Frame", "End Frame", "Displacement",
+                   "Average Speed", "Fitted Speed", "95% Interval", "R\u00b2"]
+        self._resultsTable.setColumnCount(len(headers))
         self._resultsTable.setHorizontalHeaderLabels(headers)
 
-        self._resultsTable.setRowCount(10)
-
-        calc = calculate_speeds(index,
+        cache = self._data_source.get_speeds_cache()
+        calc = cache.get_speeds(index,
                                 self._data_source.get_results(),
                                 self._data_source.get_project()["frame_rate"],
                                 self._data_source.get_project()["resolution"])
         lines = calc.get_line_displacements()
         points = calc.get_point_displacements()
 
+        speeds = {}
+        for average, fit in zip(calc.get_average_speeds(), calc.get_fitted_speeds()):
+            speeds[(average.m_type, average.ID)] = (average.speed,
+                                                    fit.speed,
+                                                    fit.interval,
+                                                    fit.r_squared)
+
+        self._resultsTable.setRowCount(sum(len(x) for x in lines) + sum(len(x) for x in points))
+
         row_count = itertools.count()
-        for j, line in enumerate(lines):
-            for displacement in line:
-                row = next(row_count)
-                self._resultsTable.setItem(row, 0,
-                                           qw.QTableWidgetItem(self.tr(f"Line {j}")))
-                self._resultsTable.setItem(row, 1,
-                                           qw.QTableWidgetItem(str(displacement.get_start())))
-                self._resultsTable.setItem(row, 2,
-                                           qw.QTableWidgetItem(str(displacement.get_end())))
-                self._resultsTable.setItem(row, 3,
-                                           qw.QTableWidgetItem( f"{displacement.get_length():.2f}"))
-
-        for j, point in enumerate(points):
-            for displacement in point:
-                row = next(row_count)
-                self._resultsTable.setItem(row, 0,
-                                           qw.QTableWidgetItem(self.tr(f"Point {j}")))
-                self._resultsTable.setItem(row, 1,
-                                           qw.QTableWidgetItem(str(displacement.get_start())))
-                self._resultsTable.setItem(row, 2,
-                                           qw.QTableWidgetItem(str(displacement.get_end())))
-                self._resultsTable.setItem(row, 3,
-                                           qw.QTableWidgetItem( f"{displacement.get_length():.2f}"))
+        for marker_type, markers, name in ((MarkerTypes.LINE, lines, "Line"),
+                                           (MarkerTypes.POINT, points, "Point")):
+            for j, marker in enumerate(markers):
+                for k, displacement in enumerate(marker):
+                    row = next(row_count)
+                    self._resultsTable.setItem(row, 0,
+                                               qw.QTableWidgetItem(self.tr(f"{name} {j}")))
+                    self._resultsTable.setItem(row, 1,
+                                               qw.QTableWidgetItem(str(displacement.get_start())))
+                    self._resultsTable.setItem(row, 2,
+                                               qw.QTableWidgetItem(str(displacement.get_end())))
+                    self._resultsTable.setItem(row, 3,
+                                               qw.QTableWidgetItem( f"{displacement.get_length():.2f}"))
+
+                    if k == 0:
+                        for column, value in enumerate(speeds[(marker_type, j)], 4):
+                            self._resultsTable.setItem(row, column,
+                                                       qw.QTableWidgetItem(format_statistic(value)))
 
     def draw_graph_of_region(self, index):
         """
@@ -239,7 +400,8 @@ class ResultsWidget(qw.QWidget, Ui_ResultsWidget):
             Args:
                 index (int): the array index of the region
         """
-        calc = calculate_speeds(index,
+        cache = self._data_source.get_speeds_cache()
+        calc = cache.get_speeds(index,
                                 self._data_source.get_results(),
                                 self._data_source.get_project()["frame_rate"],
                                 self._data_source.get_project()["resolution"])
@@ -248,6 +410,18 @@ class ResultsWidget(qw.QWidget, Ui_ResultsWidget):
         points = calc.get_point_displacements()
         draw_displacements(self._graph, lines, points, index)
 
+    def draw_segmentation_of_region(self, index):
+        """
+        draw the area and perimeter of the crystal in a region
+            Args:
+                index (int): the array index of the region
+        """
+        rows = self._data_source.get_results().get_segmentation_for_region(index)
+        draw_segmentation(self._segmentation_canvas,
+                          rows,
+                          index,
+                          float(self._data_source.get_project()["resolution"]))
+
     def set_video_source(self, video_source):
         """
         set the video_source object, set length for controls
@@ -256,6 +430,398 @@ class ResultsWidget(qw.QWidget, Ui_ResultsWidget):
         """
         self._video_source = video_source
 
+        self._frameSlider.blockSignals(True)
+        self._frameSlider.setRange(0, video_source.get_video_data().get_frame_count() - 1)
+        self._frameSlider.setValue(0)
+        self._frameSlider.blockSignals(False)
+
+    @qc.pyqtSlot(bool)
+    def profile_drawing(self, flag):
+        """
+        turn the drawing of profile lines on the region on or off
+            Args:
+                flag (bool): if true the mouse draws a profile line
+        """
+        self._regionView.set_drawing(flag)
+        if not flag:
+            self._regionView.clear_profile()
+
+    @qc.pyqtSlot(qc.QLineF)
+    def make_kymograph(self, line):
+        """
+        build, in the background, the kymograph along a profile line drawn on the region
+            Args:
+                line (QLineF): the profile line, in the coordinates of the region
+        """
+        if self._kymograph_thread is not None or self._video_source is None:
+            return
+
+        title = self.tr("Kymograph")
+        last_frame = self._video_source.get_video_data().get_frame_count() - 1
+        reply = qw.QMessageBox.question(self,
+                                        title,
+                                        self.tr(f"Build the kymograph of frames 0 to {last_frame}?"))
+        if reply != qw.QMessageBox.Yes:
+            self._regionView.clear_profile()
+            return
+
+        rect = self._current_region.rect().toRect()
+        try:
+            reader = RegionFrameReader(self._video_source.get_name(),
+                                       float(self._data_source.get_project()["frame_rate"]),
+                                       (rect.x(), rect.y(), rect.width(), rect.height()))
+        except (ffmpeg.Error, StopIteration, KeyError) as error:
+            qw.QMessageBox.critical(self, title, str(error))
+            return
+
+        profile = ProfileLine(line.x1(), line.y1(), line.x2(), line.y2())
+
+        self._kymograph_thread = qc.QThread(self)
+        self._kymograph_maker = KymographMaker(reader, [profile], 0, last_frame)
+        self._kymograph_maker.moveToThread(self._kymograph_thread)
+
+        self._kymograph_progress = qw.QProgressDialog(self.tr("Building kymograph"),
+                                                      self.tr("Cancel"),
+                                                      0,
+                                                      last_frame,
+                                                      self)
+        self._kymograph_progress.setWindowModality(qc.Qt.WindowModal)
+        self._kymograph_progress.canceled.connect(self.cancel_kymograph)
+
+        self._kymograph_thread.started.connect(self._kymograph_maker.run)
+        self._kymograph_maker.frames_read.connect(self._kymograph_progress.setValue)
+        self._kymograph_maker.kymographs_finished.connect(self.show_kymograph)
+        self._kymograph_maker.kymographs_failed.connect(self.kymograph_failed)
+        self._kymograph_maker.kymographs_cancelled.connect(self.kymograph_ended)
+
+        self._kymograph_progress.show()
+        self._kymograph_thread.start()
+
+    @qc.pyqtSlot()
+    def cancel_kymograph(self):
+        """
+        stop building the kymograph, called directly as the builder's thread is busy
+        """
+        if self._kymograph_maker is not None:
+            self._kymograph_maker.cancel()
+
+    @qc.pyqtSlot(str)
+    def kymograph_failed(self, message):
+        """
+        notify the user of a failure to build a kymograph
+            Args:
+                message (str): the error message
+        """
+        self.kymograph_ended()
+        qw.QMessageBox.critical(self, self.tr("Kymograph"), message)
+
+    @qc.pyqtSlot()
+    def kymograph_ended(self):
+        """
+        clean up after the kymograph builder has stopped
+        """
+        if self._kymograph_thread is not None:
+            self._kymograph_thread.quit()
+            self._kymograph_thread.wait()
+            self._kymograph_thread.deleteLater()
+            self._kymograph_maker.deleteLater()
+
+        if self._kymograph_progress is not None:
+            self._kymograph_progress.canceled.disconnect(self.cancel_kymograph)
+            self._kymograph_progress.close()
+            self._kymograph_progress.deleteLater()
+
+        self._kymograph_thread = None
+        self._kymograph_maker = None
+        self._kymograph_progress = None
+
+    @qc.pyqtSlot(object, list)
+    def show_kymograph(self, frames, kymographs):
+        """
+        display a newly built kymograph
+            Args:
+                frames (np.array): the frame number of each row
+                kymographs ([np.array]): the kymograph of the profile line
+        """
+        self.kymograph_ended()
+
+        self._kymograph = (frames, kymographs[0])
+        self._kymograph_clicks = []
+        draw_kymograph(self._kymograph_canvas, kymographs[0], frames)
+        self._kymograph_label.setText(self.tr("Click two points on an edge to fit its velocity"))
+        self._graphTabs.setCurrentIndex(1)
+
+    def kymograph_clicked(self, event):
+        """
+        callback for a click on the kymograph, a second click on an edge
+        fits a straight track to it and the velocity is shown
+            Args:
+                event (matplotlib.backend_bases.MouseEvent): the event
+        """
+        if (self._kymograph is None or event.inaxes is None
+                or event.xdata is None or self._kymograph_toolbar.mode):
+            return
+
+        frames, kymograph = self._kymograph
+        if len(frames) == 0:
+            return
+
+        self._kymograph_clicks.append((event.ydata - frames[0], event.xdata))
+        if len(self._kymograph_clicks) < 2:
+            return
+
+        start, end = self._kymograph_clicks
+        self._kymograph_clicks = []
+        try:
+            fit = fit_kymograph_edge(kymograph, start, end)
+        except ValueError as error:
+            self._kymograph_label.setText(str(error))
+            return
+
+        draw_kymograph(self._kymograph_canvas, kymograph, frames, fit=fit)
+
+        project = self._data_source.get_project()
+        scale = float(project["resolution"])*float(project["frame_rate"])
+        units = project["resolution_units"]
+        velocity = format_statistic(abs(fit.slope)*scale)
+        error = format_statistic(fit.std_error*scale)
+        self._kymograph_label.setText(self.tr(f"Velocity {velocity} \u00b1 {error} {units}/s"))
+
+    @qc.pyqtSlot()
+    def segment_crystals(self):
+        """
+        measure, in the background, the area, perimeter and centroid of the
+        crystal in every region and frame by segmentation
+        """
+        if self._segment_thread is not None or self._video_source is None:
+            return
+
+        results = self._data_source.get_results()
+        if results is None or len(results.get_regions()) == 0:
+            return
+
+        title = self.tr("Segment Crystals")
+        polarities = [self.tr("Brighter than background"), self.tr("Darker than background")]
+        polarity, flag = qw.QInputDialog.getItem(self,
+                                                 title,
+                                                 self.tr("The crystals are:"),
+                                                 polarities,
+                                                 0 if config.SEGMENT_BRIGHT_CRYSTAL else 1,
+                                                 False)
+        if not flag:
+            return
+
+        threshold, flag = qw.QInputDialog.getDouble(self,
+                                                    title,
+                                                    self.tr("Grey level threshold, 0 for automatic:"),
+                                                    0.0,
+                                                    0.0,
+                                                    255.0,
+                                                    1)
+        if not flag:
+            return
+
+        rects = []
+        for region in results.get_regions():
+            rect = region.rect().toRect()
+            rects.append((rect.x(), rect.y(), rect.width(), rect.height()))
+
+        last_frame = self._video_source.get_video_data().get_frame_count() - 1
+        try:
+            reader = RegionFrameReader(self._video_source.get_name(),
+                                       float(self._data_source.get_project()["frame_rate"]),
+                                       bounding_rect(rects))
+        except (ffmpeg.Error, StopIteration, KeyError) as error:
+            qw.QMessageBox.critical(self, title, str(error))
+            return
+
+        self._segment_thread = qc.QThread(self)
+        self._segmenter = SegmentationMaker(reader,
+                                            rects,
+                                            0,
+                                            last_frame,
+                                            threshold if threshold > 0.0 else None,
+                                            polarity == polarities[0])
+        self._segmenter.moveToThread(self._segment_thread)
+
+        self._segment_progress = qw.QProgressDialog(self.tr("Segmenting crystals"),
+                                                    self.tr("Cancel"),
+                                                    0,
+                                                    last_frame,
+                                                    self)
+        self._segment_progress.setWindowModality(qc.Qt.WindowModal)
+        self._segment_progress.canceled.connect(self.cancel_segment_crystals)
+
+        self._segment_thread.started.connect(self._segmenter.run)
+        self._segmenter.frames_read.connect(self._segment_progress.setValue)
+        self._segmenter.segmentation_finished.connect(self.crystals_segmented)
+        self._segmenter.segmentation_failed.connect(self.segment_crystals_failed)
+        self._segmenter.segmentation_cancelled.connect(self.segment_crystals_ended)
+
+        self._segment_progress.show()
+        self._segment_thread.start()
+
+    @qc.pyqtSlot()
+    def cancel_segment_crystals(self):
+        """
+        stop the segmentation, called directly as the segmenter's thread is busy
+        """
+        if self._segmenter is not None:
+            self._segmenter.cancel()
+
+    @qc.pyqtSlot(str)
+    def segment_crystals_failed(self, message):
+        """
+        notify the user of a failure to segment the crystals
+            Args:
+                message (str): the error message
+        """
+        self.segment_crystals_ended()
+        qw.QMessageBox.critical(self, self.tr("Segment Crystals"), message)
+
+    @qc.pyqtSlot()
+    def segment_crystals_ended(self):
+        """
+        clean up after the segmenter has stopped
+        """
+        if self._segment_thread is not None:
+            self._segment_thread.quit()
+            self._segment_thread.wait()
+            self._segment_thread.deleteLater()
+            self._segmenter.deleteLater()
+
+        if self._segment_progress is not None:
+            self._segment_progress.canceled.disconnect(self.cancel_segment_crystals)
+            self._segment_progress.close()
+            self._segment_progress.deleteLater()
+
+        self._segment_thread = None
+        self._segmenter = None
+        self._segment_progress = None
+
+    @qc.pyqtSlot(object)
+    def crystals_segmented(self, rows):
+        """
+        store the measurements of the crystals and draw those of the current region
+            Args:
+                rows (np.array): the measurements, of SEGMENT_DTYPE
+        """
+        self.segment_crystals_ended()
+        self._data_source.get_results().set_segmentation(rows)
+
+        index = max(self._regionBox.currentIndex(), 0)
+        self.draw_segmentation_of_region(index)
+        self._graphTabs.setCurrentIndex(2)
+
+    @qc.pyqtSlot()
+    def stage_drift(self):
+        """
+        find, in the background, the drift of the sample stage in every
+        frame from the first, or remove the drift already found, the marker
+        speeds are compensated for the drift held by the results
+        """
+        if self._drift_thread is not None or self._video_source is None:
+            return
+
+        results = self._data_source.get_results()
+        if results is None:
+            return
+
+        title = self.tr("Stage Drift")
+        last_frame = self._video_source.get_video_data().get_frame_count() - 1
+        message = self.tr(f"Find the stage drift of frames 0 to {last_frame}?")
+        buttons = qw.QMessageBox.Yes | qw.QMessageBox.Cancel
+        if results.get_drift() is not None:
+            message = self.tr("Find the stage drift again, or remove it from the marker speeds?")
+            buttons |= qw.QMessageBox.Discard
+
+        reply = qw.QMessageBox.question(self, title, message, buttons, qw.QMessageBox.Cancel)
+        if reply == qw.QMessageBox.Discard:
+            self.drift_found(None)
+            return
+        if reply != qw.QMessageBox.Yes:
+            return
+
+        try:
+            reader = RegionFrameReader(self._video_source.get_name(),
+                                       float(self._data_source.get_project()["frame_rate"]),
+                                       None)
+        except (ffmpeg.Error, StopIteration, KeyError) as error:
+            qw.QMessageBox.critical(self, title, str(error))
+            return
+
+        self._drift_thread = qc.QThread(self)
+        self._drift_maker = DriftMaker(reader, 0, last_frame)
+        self._drift_maker.moveToThread(self._drift_thread)
+
+        self._drift_progress = qw.QProgressDialog(self.tr("Finding stage drift"),
+                                                  self.tr("Cancel"),
+                                                  0,
+                                                  last_frame,
+                                                  self)
+        self._drift_progress.setWindowModality(qc.Qt.WindowModal)
+        self._drift_progress.canceled.connect(self.cancel_stage_drift)
+
+        self._drift_thread.started.connect(self._drift_maker.run)
+        self._drift_maker.frames_read.connect(self._drift_progress.setValue)
+        self._drift_maker.drift_finished.connect(self.drift_found)
+        self._drift_maker.drift_failed.connect(self.stage_drift_failed)
+        self._drift_maker.drift_cancelled.connect(self.stage_drift_ended)
+
+        self._drift_progress.show()
+        self._drift_thread.start()
+
+    @qc.pyqtSlot()
+    def cancel_stage_drift(self):
+        """
+        stop finding the drift, called directly as the worker's thread is busy
+        """
+        if self._drift_maker is not None:
+            self._drift_maker.cancel()
+
+    @qc.pyqtSlot(str)
+    def stage_drift_failed(self, message):
+        """
+        notify the user of a failure to find the drift
+            Args:
+                message (str): the error message
+        """
+        self.stage_drift_ended()
+        qw.QMessageBox.critical(self, self.tr("Stage Drift"), message)
+
+    @qc.pyqtSlot()
+    def stage_drift_ended(self):
+        """
+        clean up after the drift worker has stopped
+        """
+        if self._drift_thread is not None:
+            self._drift_thread.quit()
+            self._drift_thread.wait()
+            self._drift_thread.deleteLater()
+            self._drift_maker.deleteLater()
+
+        if self._drift_progress is not None:
+            self._drift_progress.canceled.disconnect(self.cancel_stage_drift)
+            self._drift_progress.close()
+            self._drift_progress.deleteLater()
+
+        self._drift_thread = None
+        self._drift_maker = None
+        self._drift_progress = None
+
+    @qc.pyqtSlot(object)
+    def drift_found(self, drift):
+        """
+        store the stage drift and show the compensated speeds
+            Args:
+                drift (np.array): DRIFT_DTYPE rows, or None to remove the drift
+        """
+        self.stage_drift_ended()
+        self._data_source.get_results().set_drift(drift)
+
+        if self._regionBox.currentIndex() >= 0:
+            self.show_results(self._regionBox.currentIndex())
+
 def clone_line(marker, pen):
     """
     clone a line
@@ -0,0 +1,156 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+follow a marker through the frames of its region by template matching, in a
+background thread, proposing clones of the marker at regular frame steps
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+# set up linting conditions
+# pylint: disable = c-extension-no-member
+# pylint: disable = import-error
+import threading
+from collections import namedtuple
+
+import numpy as np
+import ffmpeg
+
+import PyQt5.QtCore as qc
+
+from cgt.util.templatematching import TemplateTracker
+
+## a proposed clone of a tracked marker, x and y are the move from the
+## marker's position in the first frame and score the match in the frame
+TrackedPosition = namedtuple("TrackedPosition", ["frame", "x", "y", "score"])
+
+def track_frames(frames, centre, step, normal=None, cancelled=None, progress=None):
+    """
+    follow a feature through a sequence of frames, the template is renewed
+    at each proposal to follow gradual changes of appearance
+        Args:
+            frames (iterator): (frame number, np.array) pairs, the feature is defined in the first
+            centre ((float, float)): the x and y of the feature in the first frame
+            step (int): the number of frames between proposals
+            normal ((float, float)): if not None only the move along this unit vector is kept
+            cancelled (threading.Event): if not None tracking stops when it is set
+            progress (function): if not None called with the number of frames tracked
+        Returns:
+            ([TrackedPosition]) the proposals, ending where the feature was lost
+    """
+    proposals = []
+    tracker = None
+    start = None
+    for count, (frame, image) in enumerate(frames):
+        if cancelled is not None and cancelled.is_set():
+            break
+
+        if tracker is None:
+            tracker = TemplateTracker(image, centre)
+            start = frame
+            continue
+
+        position = tracker.track(image)
+        if position is None:
+            break
+
+        if (frame - start)%step == 0:
+            move = position - np.asarray(centre, dtype=np.float64)
+            if normal is not None:
+                move = np.dot(move, normal)*np.asarray(normal, dtype=np.float64)
+            proposals.append(TrackedPosition(frame, float(move[0]), float(move[1]),
+                                             tracker.get_score()))
+            tracker.refresh_template(image)
+
+        if progress is not None and count%10 == 0:
+            progress(count)
+
+    return proposals
+
+class AutoTracker(qc.QObject):
+    """
+    worker following a marker through the frames of a region, to be moved to a QThread
+    """
+
+    ## the number of frames tracked so far
+    frames_tracked = qc.pyqtSignal(int)
+
+    ## the proposals, a list of TrackedPosition
+    tracking_finished = qc.pyqtSignal(list)
+
+    ## tracking failed, with a message
+    tracking_failed = qc.pyqtSignal(str)
+
+    ## tracking was cancelled
+    tracking_cancelled = qc.pyqtSignal()
+
+    def __init__(self, reader, centre, start, end, step, normal=None, parent=None):
+        """
+        initialize the object
+            Args:
+                reader (RegionFrameReader): the source of the region's frames
+                centre ((float, float)): the x and y of the marker in the region at the start
+                start (int): the frame in which the marker is defined
+                end (int): the last frame to be tracked
+                step (int): the number of frames between proposals
+                normal ((float, float)): for a line its unit normal, else None
+                parent (QObject): parent object
+        """
+        super().__init__(parent)
+
+        ## the source of frames
+        self._reader = reader
+
+        ## the position of the marker
+        self._centre = centre
+
+        ## the first and last frames
+        self._frames = (start, end)
+
+        ## the number of frames between proposals
+        self._step = step
+
+        ## the direction along which a line moves
+        self._normal = normal
+
+        ## set to stop the tracking
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """
+        stop the tracking, safe to call from any thread
+        """
+        self._cancelled.set()
+
+    @qc.pyqtSlot()
+    def run(self):
+        """
+        track the marker and signal the outcome
+        """
+        try:
+            proposals = track_frames(self._reader.read_frames(*self._frames),
+                                     self._centre,
+                                     self._step,
+                                     self._normal,
+                                     self._cancelled,
+                                     self.frames_tracked.emit)
+        except (OSError, ValueError, ffmpeg.Error) as error:
+            self.tracking_failed.emit(str(error))
+            return
+
+        if self._cancelled.is_set():
+            self.tracking_cancelled.emit()
+        else:
+            self.tracking_finished.emit(proposals)
@@ -0,0 +1,436 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+functions for processing project directories without the GUI, so that
+statistics, speeds and reports can be made on a server with no display
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+# set up linting conditions
+# pylint: disable = import-error
+# pylint: disable = broad-except
+
+import os
+import pathlib
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import (ProcessPoolExecutor, as_completed)
+
+import numpy as np
+
+# no windows are made, but Qt must never try to open a display
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# pylint: disable = wrong-import-position
+from cgt.gui.penstore import PenStore
+from cgt.io import (binaryproject, writecsvreports)
+from cgt.io.htmlreport import (ReportMaker, ReportSnapshot)
+from cgt.io.driftmaker import estimate_video_drift
+from cgt.io.enhancementmaker import (enhanced_video_path, enhancement_source,
+                                     make_enhanced_video, use_enhanced_video)
+from cgt.io.keyframesuggester import bounding_rect
+from cgt.io.regionframereader import RegionFrameReader
+from cgt.io.videosource import VideoSource
+from cgt.io.videoanalyser import VideoAnalyser
+from cgt.model.cgtproject import CGTProject
+from cgt.model.resultsdata import SEGMENT_DTYPE
+from cgt.model.speedscache import SpeedsCache
+from cgt.model.videoanalysisresultsstore import VideoAnalysisResultsStore
+from cgt.util import config
+from cgt.util.kymograph import (build_kymographs, normal_profile)
+from cgt.util.markers import MarkerTypes
+from cgt.util.segmentation import segment_frames
+
+## the outcome of processing one project directory
+BatchResult = namedtuple("BatchResult", ["project_dir", "success", "message"])
+
+## make the video statistics, if they do not already exist
+STATISTICS = "statistics"
+
+## replace existing video statistics
+FORCE_STATISTICS = "force_statistics"
+
+## write the marker speeds csv file
+SPEEDS = "speeds"
+
+## write the csv files of the markers interpolated to every frame
+TRACKS = "tracks"
+
+## write the html report
+REPORT = "report"
+
+## build kymographs across the line markers
+KYMOGRAPHS = "kymographs"
+
+## measure the crystal in every region and frame by segmentation
+SEGMENTATION = "segmentation"
+
+## find the stage drift, so the marker speeds are compensated for it
+DRIFT = "drift"
+
+## make the enhanced video from the raw video with the settings in config
+ENHANCE = "enhance"
+
+## save the project as csv files
+SAVE_CSV = "save_csv"
+
+## save the project as a single binary file
+SAVE_BINARY = "save_binary"
+
+class BatchDataSource():
+    """
+    holder for a project and its video, in the manner of the main window
+    """
+
+    def __init__(self, project):
+        """
+        initialize the object
+            Args:
+                project (CGTProject): the project
+        """
+        ## the project
+        self._project = project
+
+        ## the pens
+        self._pens = PenStore()
+
+        ## the reader for the enhanced video, made on first use
+        self._reader = None
+
+        ## the cache of region speeds, over the project's results
+        self._speeds_cache = SpeedsCache()
+        self._speeds_cache.set_results(project["results"])
+        project["results"].data_changed.connect(self._speeds_cache.data_changed)
+
+    def get_project(self):
+        """
+        getter for the project
+        """
+        return self._project
+
+    def get_results(self):
+        """
+        getter for the results
+        """
+        return self._project["results"]
+
+    def get_pens(self):
+        """
+        getter for the pens
+        """
+        return self._pens
+
+    def get_enhanced_reader(self):
+        """
+        getter for the enhanced video reader
+            Throws:
+                (ffmpeg.Error): can't probe video
+        """
+        if self._reader is None:
+            self._reader = VideoSource(str(self._project["enhanced_video"]),
+                                       float(self._project["frame_rate"]))
+
+        return self._reader
+
+    def get_speeds_cache(self):
+        """
+        getter for the cache of region speeds
+            Returns:
+                (SpeedsCache)
+        """
+        return self._speeds_cache
+
+def load_project(project_dir):
+    """
+    read a project directory
+        Args:
+            project_dir (str): path to the directory
+        Returns:
+            (CGTProject, str) the project and the format it was read from
+        Throws:
+            IOException if error reading files
+    """
+    project = CGTProject()
+    project["results"] = VideoAnalysisResultsStore(None)
+    project_format = binaryproject.read_project(project_dir, project, PenStore())
+
+    # the directory may have been moved since the project was saved
+    project["proj_full_path"] = str(pathlib.Path(project_dir).resolve())
+    project.reset_changed()
+
+    return project, project_format
+
+def make_statistics(project):
+    """
+    calculate the intensity statistics for the video, using the
+    raw video if there is one
+        Args:
+            project (CGTProject): the project
+    """
+    video = project["enhanced_video"]
+    if project["raw_video"] is not None and not project["stats_from_enhanced"]:
+        video = project["raw_video"]
+
+    analyser = VideoAnalyser(str(video))
+    project["results"].set_video_statistics(analyser.stats_whole_film())
+
+def make_kymographs(project):
+    """
+    build a kymograph along the normal through the midpoint of the first key
+    frame of every line marker, all from one decode of the enhanced video,
+    and save them to a compressed numpy file, keyed frames for the frame
+    numbers and region_<r>_line_<m> for the kymographs
+        Args:
+            project (CGTProject): the project
+        Returns:
+            (int) the number of kymographs built
+        Throws:
+            (ffmpeg.Error): can't probe video
+            IOException if file cannot be opened
+    """
+    results = project["results"]
+    names = []
+    lines = []
+    for index, region in enumerate(results.get_regions()):
+        rect = region.rect()
+        for marker in results.get_marker_rows_for_region(MarkerTypes.LINE, index):
+            first = marker[np.argmin(marker["frame"])]
+            left = rect.x() + first["pos_x"]
+            top = rect.y() + first["pos_y"]
+            try:
+                lines.append(normal_profile(left + first["x1"],
+                                            top + first["y1"],
+                                            left + first["x2"],
+                                            top + first["y2"],
+                                            config.KYMOGRAPH_PROFILE_LENGTH))
+            except ValueError:
+                continue
+            names.append(f"region_{index}_line_{first['ID']}")
+
+    if len(lines) == 0:
+        return 0
+
+    reader = RegionFrameReader(str(project["enhanced_video"]), float(project["frame_rate"]), None)
+    last_frame = reader.get_video_data().get_frame_count() - 1
+    frames, kymographs = build_kymographs(reader.read_frames(0, last_frame), lines)
+
+    np.savez_compressed(writecsvreports.csv_file_path(project, "kymographs.npz"),
+                        frames=frames,
+                        **dict(zip(names, kymographs)))
+
+    return len(lines)
+
+def make_segmentation(project):
+    """
+    measure the crystal in every region and frame of the enhanced video, from
+    one decode, with thresholds found by Otsu's method, and store the results
+        Args:
+            project (CGTProject): the project
+        Returns:
+            (int) the number of regions measured
+        Throws:
+            (ffmpeg.Error): can't probe video
+            IOException if file cannot be opened
+    """
+    results = project["results"]
+    rects = []
+    for region in results.get_regions():
+        rect = region.rect().toRect()
+        rects.append((rect.x(), rect.y(), rect.width(), rect.height()))
+
+    if len(rects) == 0:
+        return 0
+
+    reader = RegionFrameReader(str(project["enhanced_video"]),
+                               float(project["frame_rate"]),
+                               bounding_rect(rects))
+    left, top, _, _ = reader.get_rect()
+    rects = [(x[0] - left, x[1] - top, x[2], x[3]) for x in rects]
+    last_frame = reader.get_video_data().get_frame_count() - 1
+
+    rows = segment_frames(reader.read_frames(0, last_frame),
+                          rects,
+                          bright=config.SEGMENT_BRIGHT_CRYSTAL)
+    results.set_segmentation(np.array(rows, dtype=SEGMENT_DTYPE))
+
+    return len(rects)
+
+def make_drift(project):
+    """
+    find the stage drift of every frame of the enhanced video from the first
+    and store it, the projects are processed in parallel so the frames are
+    read as one run
+        Args:
+            project (CGTProject): the project
+        Returns:
+            (int) the number of frames
+        Throws:
+            (ffmpeg.Error): can't probe video
+            IOException if file cannot be opened
+    """
+    reader = RegionFrameReader(str(project["enhanced_video"]), float(project["frame_rate"]), None)
+    last_frame = reader.get_video_data().get_frame_count() - 1
+
+    drift = estimate_video_drift(reader, 0, last_frame, segments=1)
+    project["results"].set_drift(drift)
+
+    return len(drift)
+
+def make_enhancement(project):
+    """
+    make the enhanced video from the raw video, with the settings in config,
+    and use it as the project's enhanced video, the projects are processed
+    in parallel so the frames are read and encoded as one run
+        Args:
+            project (CGTProject): the project
+        Returns:
+            (int) the number of frames
+        Throws:
+            (ffmpeg.Error): can't probe or join the video
+            IOException if file cannot be opened or written
+    """
+    reader = RegionFrameReader(str(enhancement_source(project)), float(project["frame_rate"]), None)
+    video = enhanced_video_path(project)
+
+    count = make_enhanced_video(reader, video, segments=1)
+    use_enhanced_video(project, video)
+
+    return count
+
+def init_worker(use_ffmpeg_log):
+    """
+    initializer for worker processes, the projects are already being
+    processed in parallel so each report is rendered in its own process
+        Args:
+            use_ffmpeg_log (bool): the parent's config.USE_FFMPEG_LOG
+    """
+    config.REPORT_WORKERS = 1
+    config.USE_FFMPEG_LOG = use_ffmpeg_log
+
+def process_project(project_dir, tasks, report_options=None):
+    """
+    carry out the tasks on a project directory, intended to be run in a worker process
+        Args:
+            project_dir (str): path to the directory
+            tasks ([str]): the tasks to be carried out
+            report_options (ReportOptions): the output mode of reports, None for config
+        Returns:
+            (BatchResult) the outcome
+    """
+    done = []
+    try:
+        project, project_format = load_project(project_dir)
+
+        if ENHANCE in tasks:
+            count = make_enhancement(project)
+            done.append(f"enhanced {count} frames")
+
+        stats = project["results"].get_video_statistics()
+        if FORCE_STATISTICS in tasks or (STATISTICS in tasks and stats is None):
+            make_statistics(project)
+            if project_format == binaryproject.CSV_FORMAT:
+                writecsvreports.save_csv_project(project, changed_only=True)
+                project.reset_changed()
+            done.append("statistics")
+
+        if DRIFT in tasks:
+            count = make_drift(project)
+            done.append(f"drift of {count} frames")
+
+        if SPEEDS in tasks:
+            writecsvreports.save_csv_speeds(project)
+            done.append("speeds")
+
+        if TRACKS in tasks:
+            writecsvreports.save_csv_marker_tracks(project)
+            done.append("marker tracks")
+
+        if KYMOGRAPHS in tasks:
+            count = make_kymographs(project)
+            done.append(f"{count} kymographs")
+
+        if SEGMENTATION in tasks:
+            count = make_segmentation(project)
+            done.append(f"{count} regions segmented")
+
+        if REPORT in tasks:
+            maker = ReportMaker(options=report_options)
+            report_file = maker.save_html_report(ReportSnapshot(BatchDataSource(project)))
+            project["latest_report"] = str(report_file)
+            done.append("report")
+
+        if SAVE_CSV in tasks:
+            writecsvreports.save_csv_project(project)
+            project_format = binaryproject.CSV_FORMAT
+            project.reset_changed()
+            done.append("saved csv")
+
+        if SAVE_BINARY in tasks:
+            binaryproject.save_binary_project(project)
+            project_format = binaryproject.BINARY_FORMAT
+            project.reset_changed()
+            done.append("saved binary")
+
+        if project.has_been_changed():
+            if project_format == binaryproject.BINARY_FORMAT:
+                binaryproject.save_binary_project(project)
+            else:
+                writecsvreports.save_csv_project(project, changed_only=True)
+
+    except Exception as error:
+        return BatchResult(project_dir, False, f"{type(error).__name__}: {error}")
+
+    if len(done) == 0:
+        return BatchResult(project_dir, True, "nothing to do")
+
+    return BatchResult(project_dir, True, ", ".join(done))
+
+def run_batch(project_dirs, tasks, workers=None, result_ready=None, report_options=None):
+    """
+    process a list of project directories in parallel
+        Args:
+            project_dirs ([str]): the directories
+            tasks ([str]): the tasks to carry out on each directory
+            workers (int): the number of worker processes, None for one per cpu
+            result_ready (callable): called with each BatchResult as it becomes available
+            report_options (ReportOptions): the output mode of reports, None for config
+        Returns:
+            ([BatchResult]) the outcomes in the order of project_dirs
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(project_dirs)))
+
+    results = [None]*len(project_dirs)
+    if workers == 1:
+        for i, project_dir in enumerate(project_dirs):
+            results[i] = process_project(project_dir, tasks, report_options)
+            if result_ready is not None:
+                result_ready(results[i])
+    else:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(workers,
+                                 mp_context=context,
+                                 initializer=init_worker,
+                                 initargs=(config.USE_FFMPEG_LOG,)) as executor:
+            futures = {executor.submit(process_project, x, tasks, report_options): i
+                       for i, x in enumerate(project_dirs)}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                if result_ready is not None:
+                    result_ready(future.result())
+
+    return results
@@ -0,0 +1,287 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+functions for saving and reading a project as a single binary file, a zip
+archive of numpy .npy arrays and a json file of the project information,
+holding the same data as the csv files
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+# set up linting conditions
+# pylint: disable = c-extension-no-member
+
+import os
+import io
+import json
+import pathlib
+import tempfile
+import zipfile
+
+import numpy as np
+
+import PyQt5.QtCore as qc
+import PyQt5.QtWidgets as qw
+
+from cgt.io import (readcsvreports, writecsvreports)
+from cgt.model.markerrecord import MarkerRecord
+from cgt.model.resultsdata import (LINE_DTYPE,
+                                   POINT_DTYPE,
+                                   SEGMENT_DTYPE,
+                                   DRIFT_DTYPE,
+                                   split_marker_rows)
+from cgt.util import config
+from cgt.util.framestats import (FrameStats, VideoIntensityStats)
+from cgt.util.markers import MarkerTypes
+from cgt.util.scenegraphitems import rect_to_tuple
+
+## the file extension of binary projects
+BINARY_SUFFIX = ".cgtz"
+
+## the project format using csv files
+CSV_FORMAT = "csv"
+
+## the project format using a single binary file
+BINARY_FORMAT = "binary"
+
+## the version of the binary layout
+BINARY_VERSION = 1
+
+def binary_project_file(project):
+    """
+    get the path of the binary file of a project
+        Args:
+            project (CGTProject): the project
+        Returns:
+            (pathlib.Path)
+    """
+    path = pathlib.Path(project["proj_full_path"])
+    return path.joinpath(project["prog"] + r"_" + project["proj_name"] + r"_project" + BINARY_SUFFIX)
+
+def find_binary_project(project_dir):
+    """
+    find the binary file in a project directory
+        Args:
+            project_dir (str): the directory
+        Returns:
+            (pathlib.Path) the file, or None if there is none
+        Throws:
+            IOError if there is more than one
+    """
+    path = pathlib.Path(project_dir)
+    files = [x for x in path.glob("*" + BINARY_SUFFIX) if x.is_file()]
+
+    if len(files) > 1:
+        raise IOError(f"Directory {path} has more than one {BINARY_SUFFIX} file.")
+
+    if len(files) == 0:
+        return None
+
+    return files[0]
+
+def save_array(archive, name, array):
+    """
+    write an array to an archive as a .npy file
+        Args:
+            archive (zipfile.ZipFile): the open archive
+            name (str): the name in the archive without extension
+            array (np.array): the array, must not hold python objects
+    """
+    with archive.open(name + ".npy", "w", force_zip64=True) as fout:
+        np.save(fout, array, allow_pickle=False)
+
+def load_array(archive, name):
+    """
+    read an array from an archive
+        Args:
+            archive (zipfile.ZipFile): the open archive
+            name (str): the name in the archive without extension
+        Returns:
+            (np.array) the array, or None if not in the archive
+    """
+    if name + ".npy" not in archive.namelist():
+        return None
+
+    with archive.open(name + ".npy") as fin:
+        return np.load(io.BytesIO(fin.read()), allow_pickle=False)
+
+def save_binary_project(project):
+    """
+    save a project as a single binary file, the file is written to a
+    temporary file that replaces the old file only when complete
+        Args:
+            project (CGTProject): the project, must have results
+        Returns:
+            (pathlib.Path) the file
+        Throws:
+            IOException if the file cannot be written
+    """
+    out_file = binary_project_file(project)
+    results = project["results"]
+
+    info = [[key, "" if value is None else str(value)]
+            for key, value in project.items() if key != "results"]
+    metadata = {"version": BINARY_VERSION, "info": info}
+
+    regions = np.array([rect_to_tuple(x.rect()) for x in results.get_regions()],
+                       dtype=np.float64).reshape(-1, 4)
+
+    handle, tmp_name = tempfile.mkstemp(suffix=".tmp", dir=out_file.parent)
+    try:
+        with os.fdopen(handle, "wb") as fout:
+            with zipfile.ZipFile(fout, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+                archive.writestr("project.json", json.dumps(metadata))
+                save_array(archive, "regions", regions)
+                save_array(archive, "lines", results.get_marker_rows(MarkerTypes.LINE))
+                save_array(archive, "points", results.get_marker_rows(MarkerTypes.POINT))
+
+                stats = results.get_video_statistics()
+                if stats is not None:
+                    frames = np.array([[x.mean, x.std_deviation, *x.bin_counts]
+                                       for x in stats.get_frames()],
+                                      dtype=np.float64)
+                    save_array(archive, "statistics_bins", np.array(stats.get_bins(),
+                                                                    dtype=np.float64))
+                    save_array(archive, "statistics", frames)
+
+                segmentation = results.get_segmentation()
+                if segmentation is not None:
+                    save_array(archive, "segmentation", segmentation)
+
+                drift = results.get_drift()
+                if drift is not None:
+                    save_array(archive, "drift", drift)
+
+            fout.flush()
+            os.fsync(fout.fileno())
+
+        os.replace(tmp_name, out_file)
+    except BaseException:
+        pathlib.Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+    return out_file
+
+def read_binary_project(file_path, new_project, pens):
+    """
+    read a project from a binary file
+        Args:
+            file_path (pathlib.Path): the file
+            new_project (CGTProject): an empty project with an empty results store
+            pens (PenStore): the current set of pens
+        Throws:
+            IOException if error reading file
+    """
+    try:
+        with zipfile.ZipFile(file_path, "r") as archive:
+            metadata = json.loads(archive.read("project.json"))
+            regions = load_array(archive, "regions")
+            lines = load_array(archive, "lines")
+            points = load_array(archive, "points")
+            bins = load_array(archive, "statistics_bins")
+            frames = load_array(archive, "statistics")
+            segmentation = load_array(archive, "segmentation")
+            drift = load_array(archive, "drift")
+    except (zipfile.BadZipFile, KeyError, ValueError) as error:
+        raise IOError(f"File {file_path} is not a readable project file: {error}") from error
+
+    if metadata["version"] > BINARY_VERSION:
+        raise IOError(f"File {file_path} was written by a later version.")
+
+    if regions is None or lines is None or points is None:
+        raise IOError(f"File {file_path} is incomplete.")
+
+    readcsvreports.set_info_items(new_project, metadata["info"])
+
+    results = new_project["results"]
+    with results.batch():
+        if bins is not None:
+            stats = VideoIntensityStats(bins.tolist())
+            for row in frames.tolist():
+                stats.append_frame(FrameStats(row[0], row[1], row[2:]))
+            results.set_video_statistics(stats)
+
+        if segmentation is not None:
+            results.set_segmentation(segmentation.astype(SEGMENT_DTYPE))
+
+        if drift is not None:
+            results.set_drift(drift.astype(DRIFT_DTYPE))
+
+        for row in regions.tolist():
+            results.add_region(qw.QGraphicsRectItem(qc.QRectF(*row)))
+
+        points = points.astype(POINT_DTYPE)
+        lines = lines.astype(LINE_DTYPE)
+        for marker_rows in split_marker_rows(points):
+            results.insert_marker_record(MarkerRecord(MarkerTypes.POINT,
+                                                      marker_rows,
+                                                      pens.get_display_pen()))
+        for marker_rows in split_marker_rows(lines):
+            results.insert_marker_record(MarkerRecord(MarkerTypes.LINE,
+                                                      marker_rows,
+                                                      pens.get_display_pen()))
+
+        readcsvreports.extract_key_frames(results, [points, lines])
+
+    results.clear_history()
+    new_project.ensure_numeric()
+
+def read_project(project_dir, new_project, pens):
+    """
+    read a project directory in whichever format was saved last
+        Args:
+            project_dir (str): the directory
+            new_project (CGTProject): an empty project with an empty results store
+            pens (PenStore): the current set of pens
+        Returns:
+            (str) the format read, CSV_FORMAT or BINARY_FORMAT
+        Throws:
+            IOException if error reading files
+    """
+    binary_file = find_binary_project(project_dir)
+    if binary_file is None:
+        readcsvreports.read_csv_project(project_dir, new_project, pens)
+        return CSV_FORMAT
+
+    info_files = list(pathlib.Path(project_dir).glob("*project_info.csv"))
+    csv_time = max([x.stat().st_mtime for x in info_files], default=None)
+    if csv_time is not None and csv_time > binary_file.stat().st_mtime:
+        readcsvreports.read_csv_project(project_dir, new_project, pens)
+        return CSV_FORMAT
+
+    read_binary_project(binary_file, new_project, pens)
+    return BINARY_FORMAT
+
+def save_project(project, project_format=None, changed_only=False):
+    """
+    save a project
+        Args:
+            project (CGTProject): the project
+            project_format (str): CSV_FORMAT or BINARY_FORMAT, if None config.PROJECT_FORMAT
+            changed_only (bool): if True only csv files of the parts changed since the last
+                                 save are written, the binary file is always written whole
+        Throws:
+            IOException if a file cannot be written
+    """
+    if project is None:
+        return
+
+    if project_format is None:
+        project_format = config.PROJECT_FORMAT
+
+    if project_format == BINARY_FORMAT:
+        save_binary_project(project)
+    else:
+        writecsvreports.save_csv_project(project, changed_only)
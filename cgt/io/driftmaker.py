@@ -0,0 +1,173 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+find the stage drift of every frame of a video, in a background thread, the
+frames are split into runs each decoded and correlated in parallel
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+# set up linting conditions
+# pylint: disable = c-extension-no-member
+# pylint: disable = import-error
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import ffmpeg
+
+import PyQt5.QtCore as qc
+
+from cgt.io.regionframereader import counted_frames
+from cgt.model.resultsdata import DRIFT_DTYPE
+from cgt.util import config
+from cgt.util.drift import estimate_drift
+
+def segment_bounds(start, end, count):
+    """
+    split a run of frames into runs of nearly equal length
+        Args:
+            start (int): the first frame
+            end (int): the last frame
+            count (int): the number of runs
+        Returns:
+            ([(int, int)]) the first and last frame of each run, none empty
+    """
+    edges = np.linspace(start, end + 1, max(int(count), 1) + 1).round().astype(np.int64)
+    return [(int(x), int(y) - 1) for x, y in zip(edges[:-1], edges[1:]) if y > x]
+
+def estimate_video_drift(reader, start, end, segments=None, factor=None,
+                         cancelled=None, progress=None):
+    """
+    find the drift of a run of frames from the first, the run is split into
+    segments whose frames are read and correlated in parallel threads, the
+    decoding is done by a separate ffmpeg process for each segment
+        Args:
+            reader (RegionFrameReader): the source of frames
+            start (int): the first frame, the reference
+            end (int): the last frame
+            segments (int): the number of parallel runs, None for config.DRIFT_SEGMENTS
+            factor (int): the reduction of frames before correlation, None for config.DRIFT_DOWNSAMPLE
+            cancelled (threading.Event): if not None reading stops when it is set
+            progress (function): if not None called with the total number of frames read
+        Returns:
+            (np.array) DRIFT_DTYPE rows in order of frame
+        Throws:
+            ValueError if the reference frame cannot be read
+    """
+    if segments is None:
+        segments = config.DRIFT_SEGMENTS
+
+    frames = reader.read_frames(start, start)
+    first = next(frames, None)
+    frames.close()
+    if first is None:
+        raise ValueError(f"frame {start} could not be read")
+    reference = first[1]
+
+    bounds = segment_bounds(start, end, segments)
+    counts = [0]*len(bounds)
+    lock = threading.Lock()
+
+    def run_segment(number):
+        def segment_progress(count):
+            if progress is None:
+                return
+            with lock:
+                counts[number] = count
+                total = sum(counts)
+            progress(total)
+
+        frames = counted_frames(reader.read_frames(*bounds[number]), cancelled, segment_progress)
+        return estimate_drift(frames, reference, factor)
+
+    with ThreadPoolExecutor(len(bounds)) as pool:
+        parts = list(pool.map(run_segment, range(len(bounds))))
+
+    drift = np.empty(sum(len(x[0]) for x in parts), dtype=DRIFT_DTYPE)
+    if len(drift) > 0:
+        drift["frame"] = np.concatenate([x[0] for x in parts])
+        offsets = np.concatenate([x[1] for x in parts])
+        drift["x"] = offsets[:, 0]
+        drift["y"] = offsets[:, 1]
+
+    return drift
+
+class DriftMaker(qc.QObject):
+    """
+    worker finding the stage drift of a video, to be moved to a QThread
+    """
+
+    ## the number of frames read so far
+    frames_read = qc.pyqtSignal(int)
+
+    ## the drift, an array of DRIFT_DTYPE
+    drift_finished = qc.pyqtSignal(object)
+
+    ## finding the drift failed, with a message
+    drift_failed = qc.pyqtSignal(str)
+
+    ## finding the drift was cancelled
+    drift_cancelled = qc.pyqtSignal()
+
+    def __init__(self, reader, start, end, segments=None, parent=None):
+        """
+        initialize the object
+            Args:
+                reader (RegionFrameReader): the source of frames
+                start (int): the first frame, the reference
+                end (int): the last frame
+                segments (int): the number of parallel runs, None for config.DRIFT_SEGMENTS
+                parent (QObject): parent object
+        """
+        super().__init__(parent)
+
+        ## the source of frames
+        self._reader = reader
+
+        ## the first and last frames
+        self._frames = (start, end)
+
+        ## the number of parallel runs
+        self._segments = segments
+
+        ## set to stop the analysis
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """
+        stop the analysis, safe to call from any thread
+        """
+        self._cancelled.set()
+
+    @qc.pyqtSlot()
+    def run(self):
+        """
+        find the drift and signal the outcome
+        """
+        try:
+            drift = estimate_video_drift(self._reader,
+                                         *self._frames,
+                                         segments=self._segments,
+                                         cancelled=self._cancelled,
+                                         progress=self.frames_read.emit)
+        except (OSError, ValueError, ffmpeg.Error) as error:
+            self.drift_failed.emit(str(error))
+            return
+
+        if self._cancelled.is_set():
+            self.drift_cancelled.emit()
+        else:
+            self.drift_finished.emit(drift)
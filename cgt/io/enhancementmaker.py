@@ -0,0 +1,318 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+make the enhanced video of a project from its raw video, the frames are
+split into runs each decoded, enhanced and encoded in parallel, and the runs
+joined into one video without encoding again
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+# set up linting conditions
+# pylint: disable = c-extension-no-member
+# pylint: disable = import-error
+import os
+import pathlib
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import ffmpeg
+
+import PyQt5.QtCore as qc
+
+from cgt.io.driftmaker import segment_bounds
+from cgt.io.regionframereader import counted_frames
+from cgt.util import config
+from cgt.util.enhancement import (ContrastEnhancer, EnhanceSettings, temporal_median)
+
+def default_settings():
+    """
+    get the enhancement settings held in config
+        Returns:
+            (EnhanceSettings)
+    """
+    return EnhanceSettings(config.ENHANCE_EQUALISATION,
+                           config.ENHANCE_GAMMA,
+                           config.ENHANCE_TILES,
+                           config.ENHANCE_MEDIAN)
+
+def enhancement_source(project):
+    """
+    get the video from which a project's enhanced video is made
+        Args:
+            project (CGTProject): the project
+        Returns:
+            (pathlib.Path) the raw video, or the enhanced video if there is no raw video
+    """
+    if project["raw_video"] is not None:
+        return pathlib.Path(project["raw_video"])
+
+    return pathlib.Path(project["enhanced_video"])
+
+def enhanced_video_path(project):
+    """
+    get the path of the enhanced video made for a project
+        Args:
+            project (CGTProject): the project
+        Returns:
+            (pathlib.Path) a file in the project directory named after the source
+    """
+    source = enhancement_source(project)
+    return pathlib.Path(project["proj_full_path"]).joinpath(source.stem + "_enhanced.avi")
+
+def use_enhanced_video(project, video):
+    """
+    make a video the project's enhanced video, if the project has no raw
+    video the old enhanced video, from which the new one was made, becomes
+    the raw video
+        Args:
+            project (CGTProject): the project
+            video (pathlib.Path): the new enhanced video
+    """
+    if project["raw_video"] is None:
+        raw_video = pathlib.Path(project["enhanced_video"])
+        project["raw_video"] = raw_video
+        project["raw_video_path"] = raw_video.parent
+        project["raw_video_no_path"] = raw_video.name
+        project["raw_video_no_extension"] = raw_video.stem
+
+    video = pathlib.Path(video)
+    project["enhanced_video"] = video
+    project["enhanced_video_path"] = video.parent
+    project["enhanced_video_no_path"] = video.name
+    project["enhanced_video_no_extension"] = video.stem
+
+def sample_frames(reader, start, end, count):
+    """
+    read frames evenly spaced through a run
+        Args:
+            reader (RegionFrameReader): the source of frames
+            start (int): the first frame
+            end (int): the last frame
+            count (int): the number of frames
+        Returns:
+            ([np.array]) the frames
+    """
+    samples = []
+    for number in np.unique(np.linspace(start, end, max(int(count), 1)).round().astype(np.int64)):
+        frames = reader.read_frames(int(number), int(number))
+        frame = next(frames, None)
+        frames.close()
+        if frame is not None:
+            samples.append(frame[1])
+
+    return samples
+
+def encode_args(file_path, shape, frame_rate):
+    """
+    make the ffmpeg command encoding grayscale frames read from a pipe
+        Args:
+            file_path (pathlib.Path): the output video
+            shape ((int, int)): the rows and columns of the frames
+            frame_rate (float): the frames per second
+        Returns:
+            ([str]) the command
+    """
+    return (ffmpeg
+            .input('pipe:',
+                   format='rawvideo',
+                   pix_fmt='gray',
+                   s=f"{shape[1]}x{shape[0]}",
+                   framerate=frame_rate)
+            .output(str(file_path),
+                    vcodec=config.ENHANCE_CODEC,
+                    **{"q:v": config.ENHANCE_QUALITY})
+            .overwrite_output()
+            .compile())
+
+def enhance_segment(reader, enhancer, median, bounds, file_path, frame_rate,
+                    cancelled=None, progress=None):
+    """
+    enhance a run of frames and encode them as a video
+        Args:
+            reader (RegionFrameReader): the source of frames
+            enhancer (ContrastEnhancer): the enhancement
+            median (int): the number of frames in the temporal median
+            bounds ((int, int)): the first and last frame
+            file_path (pathlib.Path): the output video
+            frame_rate (float): the frames per second
+            cancelled (threading.Event): if not None reading stops when it is set
+            progress (function): if not None called with the number of frames read
+        Returns:
+            (int) the number of frames encoded
+        Throws:
+            OSError if the encoder fails
+    """
+    half = max(int(median), 1)//2
+    frames = reader.read_frames(max(bounds[0] - half, 0), bounds[1] + half)
+    frames = temporal_median(counted_frames(frames, cancelled, progress), median, *bounds)
+
+    count = 0
+    args = encode_args(file_path, enhancer.get_shape(), frame_rate)
+    with open(os.devnull, 'w', encoding="UTF-8") as f_err:
+        with subprocess.Popen(args, stdin=subprocess.PIPE, stderr=f_err) as process:
+            for _, image in frames:
+                process.stdin.write(enhancer.enhance(image).tobytes())
+                count += 1
+            process.stdin.close()
+            if process.wait() != 0:
+                raise OSError(f"encoding {file_path.name} failed")
+
+    return count
+
+def make_enhanced_video(reader, file_path, settings=None, segments=None,
+                        cancelled=None, progress=None):
+    """
+    enhance every frame of a video and encode the result, the frames are
+    split into segments decoded, enhanced and encoded by parallel threads,
+    each with its own ffmpeg processes, then joined without encoding again,
+    the video is only replaced when complete
+        Args:
+            reader (RegionFrameReader): the source of whole frames
+            file_path (pathlib.Path): the output video
+            settings (EnhanceSettings): the enhancement, None for the settings in config
+            segments (int): the number of parallel runs, None for config.ENHANCE_SEGMENTS
+            cancelled (threading.Event): if not None the enhancement stops when it is set
+            progress (function): if not None called with the total number of frames read
+        Returns:
+            (int) the number of frames, or None if cancelled
+        Throws:
+            ValueError if the frames cannot be read or the settings are invalid
+            OSError if the video cannot be written
+            (ffmpeg.Error) if the segments cannot be joined
+    """
+    if settings is None:
+        settings = default_settings()
+    if segments is None:
+        segments = config.ENHANCE_SEGMENTS
+
+    file_path = pathlib.Path(file_path)
+    video_data = reader.get_video_data()
+    last_frame = video_data.get_frame_count() - 1
+    frame_rate = video_data.get_frame_rate_internal()
+
+    enhancer = ContrastEnhancer(settings,
+                                sample_frames(reader, 0, last_frame, config.ENHANCE_SAMPLE_FRAMES))
+
+    bounds = segment_bounds(0, last_frame, segments)
+    counts = [0]*len(bounds)
+    lock = threading.Lock()
+
+    with tempfile.TemporaryDirectory(dir=file_path.parent) as tmp_dir:
+        paths = [pathlib.Path(tmp_dir).joinpath(f"segment_{i:0>3}{file_path.suffix}")
+                 for i in range(len(bounds))]
+
+        def run_segment(number):
+            def segment_progress(count):
+                if progress is None:
+                    return
+                with lock:
+                    counts[number] = count
+                    total = sum(counts)
+                progress(total)
+
+            return enhance_segment(reader, enhancer, settings.median, bounds[number],
+                                   paths[number], frame_rate, cancelled, segment_progress)
+
+        with ThreadPoolExecutor(len(bounds)) as pool:
+            encoded = sum(pool.map(run_segment, range(len(bounds))))
+
+        if cancelled is not None and cancelled.is_set():
+            return None
+
+        list_path = pathlib.Path(tmp_dir).joinpath("segments.txt")
+        with open(list_path, 'w', encoding="UTF-8") as fout:
+            for path in paths:
+                fout.write(f"file '{path.as_posix()}'\n")
+
+        joined = pathlib.Path(tmp_dir).joinpath("joined" + file_path.suffix)
+        (ffmpeg
+         .input(str(list_path), format='concat', safe=0)
+         .output(str(joined), c='copy')
+         .overwrite_output()
+         .run(capture_stderr=True))
+
+        os.replace(joined, file_path)
+
+    return encoded
+
+class EnhancementMaker(qc.QObject):
+    """
+    worker making an enhanced video, to be moved to a QThread
+    """
+
+    ## the number of frames read so far
+    frames_read = qc.pyqtSignal(int)
+
+    ## the enhanced video is complete, with its path
+    enhancement_finished = qc.pyqtSignal(str)
+
+    ## the enhancement failed, with a message
+    enhancement_failed = qc.pyqtSignal(str)
+
+    ## the enhancement was cancelled
+    enhancement_cancelled = qc.pyqtSignal()
+
+    def __init__(self, reader, file_path, settings=None, parent=None):
+        """
+        initialize the object
+            Args:
+                reader (RegionFrameReader): the source of whole frames
+                file_path (pathlib.Path): the output video
+                settings (EnhanceSettings): the enhancement, None for the settings in config
+                parent (QObject): parent object
+        """
+        super().__init__(parent)
+
+        ## the source of frames
+        self._reader = reader
+
+        ## the output video
+        self._file_path = pathlib.Path(file_path)
+
+        ## the enhancement
+        self._settings = settings
+
+        ## set to stop the enhancement
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """
+        stop the enhancement, safe to call from any thread
+        """
+        self._cancelled.set()
+
+    @qc.pyqtSlot()
+    def run(self):
+        """
+        make the video and signal the outcome
+        """
+        try:
+            count = make_enhanced_video(self._reader,
+                                        self._file_path,
+                                        self._settings,
+                                        cancelled=self._cancelled,
+                                        progress=self.frames_read.emit)
+        except (OSError, ValueError, ffmpeg.Error) as error:
+            self.enhancement_failed.emit(str(error))
+            return
+
+        if count is None:
+            self.enhancement_cancelled.emit()
+        else:
+            self.enhancement_finished.emit(str(self._file_path))
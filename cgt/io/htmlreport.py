@@ -24,103 +24,477 @@ This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
 # pylint: disable = too-many-arguments
 
 import json
+import re
+import base64
+from collections import namedtuple
 from datetime import datetime
-import pathlib
 import itertools
 import getpass
+import pathlib
+import shutil
+import tempfile
+import threading
+
+import numpy as np
 
 import PyQt5.QtGui as qg
 import PyQt5.QtCore as qc
 
-from cgt.model.velocitiescalculator import (VelocitiesCalculator,
-                                            calculate_speeds)
-from cgt.io.mpl import (OffScreenRender,
-                        render_intesities_graph,
-                        draw_displacements)
+from cgt.model.cgtproject import CGTProject
+from cgt.model.velocitiescalculator import format_statistic
+from cgt.io.reportrender import (RenderPool,
+                                 RenderCancelled,
+                                 displacement_series,
+                                 render_displacements_png,
+                                 render_intensities_png,
+                                 render_segmentation_png,
+                                 save_image_array,
+                                 save_image_tiers)
+from cgt.util import config
+from cgt.util.images import qimage_to_rgb_nparray
 from cgt.util.utils import make_report_file_names
-from cgt.util.scenegraphitems import get_rect_even_dimensions
-from cgt.util.markers import (hash_results, get_region)
+from cgt.util.scenegraphitems import (get_rect_even_dimensions, drift_rect)
+
+## the output mode of a report
+##    compact: frames are saved as thumbnails, loaded lazily, linked to the full size image
+##    embed: all images are embedded in the html file, which is the only file
+##    frame_format: the file type of video frames in compact or embedded reports (jpg or webp)
+##    thumbnail_width: the maximum width of thumbnails in pixels
+ReportOptions = namedtuple("ReportOptions",
+                           ["compact", "embed", "frame_format", "thumbnail_width"],
+                           defaults=[False, False, "jpg", 320])
+
+## the mime types of the image files used in reports
+IMAGE_MIME_TYPES = {".png":"image/png",
+                    ".jpg":"image/jpeg",
+                    ".webp":"image/webp"}
+
+def make_report_options():
+    """
+    make the report options from the configuration
+        Returns:
+            (ReportOptions)
+    """
+    return ReportOptions(config.REPORT_COMPACT,
+                         config.REPORT_EMBED,
+                         config.REPORT_FRAME_FORMAT,
+                         config.REPORT_THUMBNAIL_WIDTH)
+
+def frame_file_suffix(options):
+    """
+    get the file suffix for images of video frames
+        Args:
+            options (ReportOptions): the report options
+        Returns:
+            (str) the suffix, png unless a compact or embedded report
+    """
+    if options.compact or options.embed:
+        return "." + options.frame_format
+
+    return ".png"
+
+def thumbnail_path(image):
+    """
+    get the path of the thumbnail of a frame image
+        Args:
+            image (pathlib.Path): the image path, relative to the report directory
+        Returns:
+            (pathlib.Path) the thumbnail path
+    """
+    return image.parent.joinpath("thumbs", image.name)
+
+def submit_frame_image(pool, report_dir, image, array, options):
+    """
+    submit the encoding of an image of video, and in compact reports its thumbnail
+        Args:
+            pool (RenderPool): the pool encoding the images
+            report_dir (pathlib.Path): the report directory
+            image (pathlib.Path): the image path, relative to the report directory
+            array (np.array uint8): the image
+            options (ReportOptions): the report options
+        Returns:
+            (pathlib.Path) the image path
+    """
+    out_file = report_dir.joinpath(image)
+    if options.compact and not options.embed:
+        thumb_file = report_dir.joinpath(thumbnail_path(image))
+        thumb_file.parent.mkdir(parents=True, exist_ok=True)
+        pool.submit(save_image_tiers,
+                    str(out_file),
+                    str(thumb_file),
+                    array,
+                    options.thumbnail_width)
+    else:
+        pool.submit(save_image_array, str(out_file), array)
+
+    return image
+
+def html_frame_image(image, width, options):
+    """
+    make the html for an image of video
+        Args:
+            image (pathlib.Path): the image path, relative to the report directory
+            width (str): the display width
+            options (ReportOptions): the report options
+        Returns:
+            (str) the html
+    """
+    if options.embed:
+        return (f"<img src=\"{image.as_posix()}\" width=\"{width}\" class=\"zoom\""
+                " onclick=\"this.classList.toggle('zoomed')\">\n")
+
+    if options.compact:
+        thumb = thumbnail_path(image).as_posix()
+        return (f"<a href=\"{image.as_posix()}\" target=\"_blank\">"
+                f"<img src=\"{thumb}\" width=\"{width}\" loading=\"lazy\"></a>\n")
+
+    return f"<img src=\"{image.as_posix()}\" width=\"{width}\">\n"
+
+def html_plot_image(image, width, options):
+    """
+    make the html for a graph
+        Args:
+            image (pathlib.Path): the image path, relative to the report directory
+            width (str): the display width
+            options (ReportOptions): the report options
+        Returns:
+            (str) the html
+    """
+    if options.compact and not options.embed:
+        return f"<img src=\"{image.as_posix()}\" width=\"{width}\" loading=\"lazy\">\n"
+
+    return f"<img src=\"{image.as_posix()}\" width=\"{width}\">\n"
+
+def embed_report_images(html_file, report_dir):
+    """
+    replace the links to image files in a report with the encoded images,
+    and delete the image files
+        Args:
+            html_file (pathlib.Path): the html file
+            report_dir (pathlib.Path): the report directory
+    """
+    def encode(match):
+        image = report_dir.joinpath(match.group(2))
+        mime = IMAGE_MIME_TYPES[image.suffix.lower()]
+        data = base64.b64encode(image.read_bytes()).decode("ascii")
+        return f"{match.group(1)}=\"data:{mime};base64,{data}\""
+
+    html = html_file.read_text(encoding="UTF-8")
+    html = re.sub(r'(src|href)="(images/[^"]+)"', encode, html)
+    html_file.write_text(html, encoding="UTF-8")
+
+    shutil.rmtree(report_dir.joinpath("images"), ignore_errors=True)
+
+class ReportSnapshot():
+    """
+    a copy of the data needed to make a report, taken on the GUI thread so
+    that the report can be made in the background while the user continues
+    """
+
+    def __init__(self, data_source):
+        """
+        copy the data
+            Args:
+                data_source (CrystalGrowthTrackerMain): holder for all the data and video.
+        """
+        project = data_source.get_project()
+
+        ## copy of the project with a copy of the results
+        self._project = CGTProject()
+        for key, value in project.items():
+            self._project[key] = value
+        self._project["results"] = project["results"].make_copy()
+
+        ## the reader for the enhanced video
+        self._reader = data_source.get_enhanced_reader()
+
+        ## the pen for drawing the regions
+        self._display_pen = qg.QPen(data_source.get_pens().get_display_pen())
+
+        ## the cache of region speeds shared with the main window
+        self._speeds_cache = data_source.get_speeds_cache()
+
+    def get_project(self):
+        """
+        getter for the project copy
+        """
+        return self._project
+
+    def get_results(self):
+        """
+        getter for the results copy
+        """
+        return self._project["results"]
+
+    def get_enhanced_reader(self):
+        """
+        getter for the enhanced video reader
+        """
+        return self._reader
+
+    def get_display_pen(self):
+        """
+        getter for the pen used to draw the regions
+        """
+        return self._display_pen
+
+    def get_speeds_cache(self):
+        """
+        getter for the cache of region speeds
+        """
+        return self._speeds_cache
+
+def count_report_images(results):
+    """
+    find the number of images a report will contain
+        Args:
+            results (VideoAnalysisResultsStore): the results
+        Returns:
+            (int) the number of images
+    """
+    number_regions = len(results.get_regions())
+
+    # location images, region start images and displacement graphs
+    count = 3 + 2*number_regions
+
+    for index in range(number_regions):
+        key_frames = results.get_key_frames(index)
+        if key_frames is not None:
+            count += len(key_frames)
+
+    if results.get_video_statistics() is not None:
+        count += 1
+
+    segmentation = results.get_segmentation()
+    if segmentation is not None:
+        count += len(np.unique(segmentation["region"]))
+
+    return count
+
+def swap_report_directory(build_dir, report_dir):
+    """
+    replace the report directory with a newly built one, the old
+    report is only deleted after the new one is in place
+        Args:
+            build_dir (pathlib.Path): the new report
+            report_dir (pathlib.Path): the report location
+    """
+    old_dir = None
+    if report_dir.exists():
+        old_dir = pathlib.Path(tempfile.mkdtemp(prefix=".report_old_", dir=report_dir.parent))
+        old_dir.rmdir()
+        report_dir.rename(old_dir)
+
+    try:
+        build_dir.rename(report_dir)
+    except OSError:
+        if old_dir is not None:
+            old_dir.rename(report_dir)
+        raise
+
+    if old_dir is not None:
+        shutil.rmtree(old_dir, ignore_errors=True)
 
 class ReportMaker(qc.QObject):
     """
-    provide ability to signal in Qt
+    makes the html report from a ReportSnapshot, can be run in a
+    background thread via the run slot
     """
 
     ## the progress signal
     stage_completed = qc.pyqtSignal(int)
 
+    ## the fine grained progress signal (images completed, total images)
+    images_completed = qc.pyqtSignal(int, int)
+
+    ## the report is complete, the path of the html file
+    report_finished = qc.pyqtSignal(str)
+
+    ## the report failed, the error message
+    report_failed = qc.pyqtSignal(str)
+
+    ## the report was cancelled
+    report_cancelled = qc.pyqtSignal()
+
+    def __init__(self, snapshot=None, parent=None, options=None):
+        """
+        initialize the object
+            Args:
+                snapshot (ReportSnapshot): the data for the run slot
+                parent (QObject): the parent object
+                options (ReportOptions): the output mode, if None taken from config
+        """
+        super().__init__(parent)
+
+        if options is None:
+            options = make_report_options()
+
+        ## the output mode
+        self._options = options
+
+        ## the data to be reported by the run slot
+        self._snapshot = snapshot
+
+        ## the pool rendering the images
+        self._pool = None
+
+        ## set if the report has been cancelled
+        self._cancelled = threading.Event()
+
+        ## count of images completed and its lock
+        self._images_done = 0
+        self._images_lock = threading.Lock()
+
+        ## total number of images
+        self._images_total = 0
+
+    @qc.pyqtSlot()
+    def run(self):
+        """
+        make the report from the snapshot and signal the outcome, every
+        failure is signalled so the owner can always clean up the thread
+        """
+        try:
+            html_outfile = self.save_html_report(self._snapshot)
+            self.report_finished.emit(str(html_outfile))
+        except RenderCancelled:
+            self.report_cancelled.emit()
+        except (IOError, OSError, EOFError, ValueError) as exception:
+            self.report_failed.emit(str(exception))
+        except Exception as exception: # pylint: disable = broad-except
+            self.report_failed.emit(f"{type(exception).__name__}: {exception}")
+
+    def cancel(self):
+        """
+        cancel the report, can be called from any thread
+        """
+        self._cancelled.set()
+        pool = self._pool
+        if pool is not None:
+            pool.cancel()
+
+    def image_done(self):
+        """
+        record the completion of an image, may be called from any thread
+        """
+        with self._images_lock:
+            self._images_done += 1
+            done = self._images_done
+
+        self.images_completed.emit(done, self._images_total)
+
     def save_html_report(self, data_source):
         '''
         Creates and co-ordinates the html report file creation and on the file handle to
-        other functions that write/create the relevant sections.
+        other functions that write/create the relevant sections. The report is built in a
+        temporary directory that replaces the old report only when complete.
             Args:
-                data_source (crystalgrowthtrackermain): holder for all the data and video.
+                data_source (ReportSnapshot): holder for all the data and video.
             Returns:
                 the report file (pathlib.Path)
             Throws:
                 Error if the report directory cannot be made, or file cannot be opened
+                RenderCancelled if the report was cancelled
         '''
         project = data_source.get_project()
         report_dir, html_outfile, hash_file = make_report_file_names(project["proj_full_path"])
 
-        if not report_dir.exists():
-            report_dir.mkdir()
+        self._images_done = 0
+        self._images_total = count_report_images(data_source.get_results())
 
-        stage = itertools.count(1)
-        with open(html_outfile, "w", encoding="UTF-8") as fout:
-            write_html_report_start(fout, project)
-            self.stage_completed.emit(next(stage))
-            image_files = save_region_location_images(report_dir, data_source)
-            self.stage_completed.emit(next(stage))
-            graph_files = save_displacement_graph_files(report_dir, data_source)
-            self.stage_completed.emit(next(stage))
-            region_files = save_region_start_images(report_dir, data_source)
-            self.stage_completed.emit(next(stage))
-            key_frame_files = save_region_keyframe_images(report_dir, data_source)
-            self.stage_completed.emit(next(stage))
-            save_time_evolution_video_statistics(report_dir, data_source)
-            self.stage_completed.emit(next(stage))
-            #write_html_overview(fout, image_files)
-            write_html_stats(fout, report_dir)
-            self.stage_completed.emit(next(stage))
-            write_html_regions(fout, project, image_files, region_files, graph_files, key_frame_files)
-            self.stage_completed.emit(next(stage))
-            write_html_report_end(fout)
-            self.stage_completed.emit(next(stage))
-
-        with open(hash_file, 'w', encoding="UTF-8") as fout:
-            hash_code = hash_results(project["results"])
-            data = {"results_hash": hash_code}
-            json.dump(data, fout)
-
-        changed = project.has_been_changed()
-        project["latest_report"] = str(html_outfile)
-        if not changed:
-            project.reset_changed()
+        build_dir = pathlib.Path(tempfile.mkdtemp(prefix=".report_new_",
+                                                  dir=report_dir.parent))
+        try:
+            self.build_report(data_source, build_dir, html_outfile.name)
+            with open(build_dir.joinpath(hash_file.name), 'w', encoding="UTF-8") as fout:
+                hash_code = project["results"].get_results_digest()
+                data = {"results_hash": hash_code}
+                json.dump(data, fout)
+
+            if self._cancelled.is_set():
+                raise RenderCancelled("report cancelled")
+
+            swap_report_directory(build_dir, report_dir)
+        finally:
+            if build_dir.exists():
+                shutil.rmtree(build_dir, ignore_errors=True)
 
         return html_outfile
 
-def write_html_stats(fout, report_dir):
+    def build_report(self, data_source, report_dir, html_name):
+        """
+        write the html and images to a directory
+            Args:
+                data_source (ReportSnapshot): holder for all the data and video.
+                report_dir (pathlib.Path): the directory
+                html_name (str): the name of the html file
+            Throws:
+                RenderCancelled if the report was cancelled
+        """
+        project = data_source.get_project()
+        html_outfile = report_dir.joinpath(html_name)
+        options = self._options
+
+        stage = itertools.count(1)
+        self._pool = RenderPool(config.REPORT_WORKERS, self.image_done)
+        if self._cancelled.is_set():
+            self._pool.cancel()
+
+        try:
+            with self._pool as pool:
+                with open(html_outfile, "w", encoding="UTF-8") as fout:
+                    write_html_report_start(fout, project)
+                    self.stage_completed.emit(next(stage))
+                    image_files = save_region_location_images(report_dir, data_source, pool, options)
+                    self.stage_completed.emit(next(stage))
+                    graph_files = save_displacement_graph_files(report_dir, data_source, pool)
+                    segment_files = save_segmentation_graph_files(report_dir, data_source, pool)
+                    self.stage_completed.emit(next(stage))
+                    region_files = save_region_start_images(report_dir, data_source, pool, options)
+                    self.stage_completed.emit(next(stage))
+                    key_frame_files = save_region_keyframe_images(report_dir, data_source, pool, options)
+                    self.stage_completed.emit(next(stage))
+                    stats_file = save_time_evolution_video_statistics(report_dir, data_source, pool)
+                    self.stage_completed.emit(next(stage))
+                    write_html_stats(fout, stats_file, options)
+                    self.stage_completed.emit(next(stage))
+                    write_html_regions(fout,
+                                       data_source,
+                                       image_files,
+                                       region_files,
+                                       graph_files,
+                                       key_frame_files,
+                                       segment_files,
+                                       options)
+                    write_html_report_end(fout)
+
+                # the images must all be written before the report is complete
+                pool.wait()
+                if options.embed:
+                    embed_report_images(html_outfile, report_dir)
+                self.stage_completed.emit(next(stage))
+        finally:
+            self._pool = None
+
+def write_html_stats(fout, stats_file, options):
     """
     write the statistics section
         Args:
             fout (file): the open output file
-            report_dir (string): path to report dir
+            stats_file (pathlib.Path): the statistics graph, None if not available
+            options (ReportOptions): the report options
     """
     fout.write("<h1>Image Statistics</h1>\n")
     fout.write("<p>This section describes the evolution of image intensity statistics during the video.</p>")
 
     fout.write("<p align=\"center\"><i></i></p>")
 
-    path = pathlib.Path(report_dir).joinpath("images")
-    path = path.joinpath("video_statistics.png")
-
     fout.write("<figure><br>")
 
-    if not path.exists():
+    if stats_file is None:
         fout.write("<p>Not available</p>")
     else:
-        fout.write(f"<img src=\"{path}\" width=\"80%\">\n")
+        fout.write(html_plot_image(stats_file, "80%", options))
 
     fout.write("<br><figcaption>Fig 1. The mean grayscale value of each frame plotted"
                " against the frame number. The gray boxed areas represent the time limits"
@@ -137,13 +511,22 @@ def make_html_speeds_table(calculator, units, speed_table_count):
     """
     calculator.process_latest_data()
     average_speeds = calculator.get_average_speeds()
+    fitted_speeds = calculator.get_fitted_speeds()
 
     html_table = ["<table style=\"margin-bottom:5mm;\" class=\"hg-pdf\">"]
-    html_table.append(f"""<caption>Table {next(speed_table_count)}. Speeds of the markers.</caption>\n""")
-
-    html_table.append(f"<tr><th>Marker ID</th><th>Type</th><th>Speed ({units} s<sup>-1</sup>)</th></tr>")
-    for item in average_speeds:
-        html_table.append(f"<tr><td>{item.ID}</td><td>{item.m_type.name}</td><td>{item.speed:.2f}</td></tr>")
+    html_table.append(f"""<caption>Table {next(speed_table_count)}. Speeds of the markers, """
+                      """the mean of the speeds between key frames and the least-squares """
+                      """fit of distance moved against time, with its standard error, """
+                      """95% confidence interval and R<sup>2</sup>.</caption>\n""")
+
+    html_table.append(f"<tr><th>Marker ID</th><th>Type</th><th>Speed ({units} s<sup>-1</sup>)</th>"
+                      f"<th>Fitted Speed ({units} s<sup>-1</sup>)</th><th>Standard Error</th>"
+                      f"<th>95% Interval</th><th>R<sup>2</sup></th></tr>")
+    for item, fit in zip(average_speeds, fitted_speeds):
+        html_table.append(f"<tr><td>{item.ID}</td><td>{item.m_type.name}</td><td>{item.speed:.2f}</td>"
+                          f"<td>{fit.speed:.2f}</td><td>{format_statistic(fit.std_error)}</td>"
+                          f"<td>&plusmn;{format_statistic(fit.interval)}</td>"
+                          f"<td>{format_statistic(fit.r_squared, 3)}</td></tr>")
 
     html_table.append("</table>")
 
@@ -191,6 +574,8 @@ def write_html_report_start(fout, project):
     fout.write("}\n")
     fout.write("caption {\n\tfont-style: italic;\n\tfont-size: 20px;\n\tpadding: 2px;\n\ttext-align: left;\n}")
     fout.write("figcaption {\n\tfont-style: italic;\n\tfont-size: 20px;\n\tpadding: 2px;\n\ttext-align: left;\n}")
+    fout.write("img.zoom {\n\tcursor: zoom-in;\n}")
+    fout.write("img.zoomed {\n\twidth: 100%;\n\tcursor: zoom-out;\n}")
     fout.write("</style>\n")
 
     enhanced_path = project['enhanced_video_no_path']
@@ -220,23 +605,33 @@ def write_html_report_start(fout, project):
                 +"are changed in the video header when the video is being "
                 +"pre-processed.</p>\n")
 
-def write_html_regions(fout, project, image_files, region_image_files, graph_files, frame_image_files):
+def write_html_regions(fout,
+                       data_source,
+                       image_files,
+                       region_image_files,
+                       graph_files,
+                       frame_image_files,
+                       segment_files,
+                       options):
     """
     write out the results for the regions to file
         Args:
             fout (TextIOWrapper): output file stream
-            project (CGTProject): The project data
+            data_source (ReportSnapshot): holder for all the data and video
             image_files ([pathlib.Path]): path to images of first, middel and last frames in each regions
             region_image_files ([pathlib.Path]): paths to images of each region
             graph_files ([pathlib.Path]): paths to the images of the displacement/time graphs
             frame_image_files ([pathlib.Path]): paths to images of each region at key frames
+            segment_files ([pathlib.Path]): paths to the crystal area graphs, None for unsegmented regions
+            options (ReportOptions): the report options
     """
+    project = data_source.get_project()
     results = project["results"]
     fout.write("<h1 align=\"left\">Regions</h2>\n")
     fout.write("<p>The regions chosen for analysis are described.</p>")
     fout.write("<figure><br>")
     for name in image_files:
-        fout.write(f"<img src=\"{name}\" width=\"30%\">\n")
+        fout.write(html_frame_image(name, "30%", options))
     fout.write("<br><figcaption>Fig 2. First, middel and last frames showing the regions.</figcaption>")
     fout.write("</figure>")
 
@@ -256,68 +651,75 @@ def write_html_regions(fout, project, image_files, region_image_files, graph_fil
     fout.write('\n'.join(html_table))
     fout.write("<figure><br>")
     for image in region_image_files:
-        fout.write(f"<img src=\"{image}\" width=\"10%\">\n")
+        fout.write(html_frame_image(image, "10%", options))
     fout.write("<br><figcaption>Fig 3. First frame of each region.</figcaption>")
     fout.write("</figure>")
 
     speeds_table_count = itertools.count(3)
     for index in range(len(results.get_regions())):
+        calculator = data_source.get_speeds_cache().get_speeds(index,
+                                                               results,
+                                                               project["frame_rate"],
+                                                               project["resolution"])
         write_html_region(fout,
-                          results,
+                          calculator,
                           index,
                           speeds_table_count,
                           frame_image_files[index],
                           graph_files[index],
-                          project["frame_rate"],
-                          project["resolution"],
-                          project["resolution_units"])
-
-def write_html_region(fout, results, index, speeds_table_count, images, speeds_graph, fps, scale, units):
+                          segment_files[index],
+                          project["resolution_units"],
+                          options)
+
+def write_html_region(fout,
+                      calculator,
+                      index,
+                      speeds_table_count,
+                      images,
+                      speeds_graph,
+                      segment_graph,
+                      units,
+                      options):
     '''
     Creates the section for each region in the html report.
         Args:
             fout (TextIOWrapper): output file stream
-            results (VideoAnalysisResultsStore): The project results data
+            calculator (VelocitiesCalculator): the speeds of the region's markers
             index (int): The index for the crystal that is being reported.
             speeds_table_count (itertools.count): counter for table number
             images ([pathlib.Path]): paths to images of region at each key frame
             speeds_graph (pathlib.Path): path to image of speeds graph
-            fps (np.float64): the number of frames per second
-            scale (np.float64): the size of a pixel
+            segment_graph (pathlib.Path): path to image of the crystal area graph, or None
             units (str): the distance units
+            options (ReportOptions): the report options
     '''
     fout.write(f"<h2 align=\"left\">Region {index}:</h3>\n")
 
-    lines = []
-    for marker in results.get_lines():
-        if get_region(marker[0]) == index:
-            lines.append(marker)
-
-    points = []
-    for marker in results.get_points():
-        if get_region(marker[0]) == index:
-            points.append(marker)
-
-    calculator = VelocitiesCalculator(lines, points, fps, scale)
+    fig_number = 4 + (index*3)
     counts = calculator.number_markers()
     if counts[0] > 0 or counts[1] > 0:
-        fig_number = 4 + (index*2)
         fout.write("<figure>")
         for image in images:
-            fout.write(f"<img src=\"{image}\" width=\"10%\">\n")
+            fout.write(html_frame_image(image, "10%", options))
         fout.write(f"<br><figcaption>Fig {fig_number}. The region at each key frame.</figcaption>")
         fout.write("</figure>")
 
         fout.write(make_html_speeds_table(calculator, units, speeds_table_count))
 
         fout.write("<figure>")
-        fout.write(f"<img src=\"{speeds_graph}\" width=\"50%\">\n")
-        fig_number += 1
-        fout.write(f"<br><figcaption>Fig {fig_number}. Marker displacements vs time.</figcaption>")
+        fout.write(html_plot_image(speeds_graph, "50%", options))
+        fout.write(f"<br><figcaption>Fig {fig_number + 1}. Marker displacements vs time.</figcaption>")
         fout.write("</figure>")
     else:
         fout.write("<p>No markers defined in the region.")
 
+    if segment_graph is not None:
+        fout.write("<figure>")
+        fout.write(html_plot_image(segment_graph, "50%", options))
+        fout.write(f"<br><figcaption>Fig {fig_number + 2}. Crystal area ({units}\u00b2) ")
+        fout.write(f"and perimeter ({units}) vs time, by segmentation.</figcaption>")
+        fout.write("</figure>")
+
 def write_html_report_end(fout):
     '''
     Ends and closes a html report.
@@ -351,12 +753,15 @@ def to_date_and_time(timestamp):
 
     return date, time
 
-def save_time_evolution_video_statistics(report_dir, data_source):
+def save_time_evolution_video_statistics(report_dir, data_source, pool):
     """
     save image of time evolution of mean pixel intensity
         Args:
             report_dir (libpath.Path): the directory to hold images
-            data_source (CrystlGrowthTrackerMain): the holder of the data
+            data_source (ReportSnapshot): the holder of the data
+            pool (RenderPool): the pool rendering the image
+        Returns:
+            (pathlib.Path): the image file, or None if no statistics
     """
     statistics = data_source.get_results().get_video_statistics()
     if statistics is None:
@@ -365,75 +770,142 @@ def save_time_evolution_video_statistics(report_dir, data_source):
     images_dir = report_dir.joinpath("images")
     file_name = images_dir.joinpath("video_statistics.png")
 
-    canvas = OffScreenRender()
-    render_intesities_graph(statistics.get_frames(), canvas)
-    canvas.print_png(str(file_name))
+    means = [x.mean for x in statistics.get_frames()]
+    std_dev = [x.std_deviation for x in statistics.get_frames()]
+    pool.submit(render_intensities_png, str(file_name), means, std_dev)
+
+    return file_name.relative_to(report_dir)
 
-    return file_name
+def get_frame_array(data_source, frame):
+    """
+    get a frame of the enhanced video as an array
+        Args:
+            data_source (ReportSnapshot): the holder of the data
+            frame (int): the frame number
+        Returns:
+            (np.array uint8): the image (height, width, 3)
+    """
+    image = data_source.get_enhanced_reader().get_image(frame)
+    return qimage_to_rgb_nparray(image)
 
-def save_region_start_images(report_dir, data_source):
+def crop_array(array, rect):
     """
-    save image of each region
+    crop an image array to a rectangle, clipped to the image
+        Args:
+            array (np.array): the image (height, width, 3)
+            rect (QRect): the rectangle
+        Returns:
+            (np.array): the cropped image
+    """
+    top = max(0, rect.top())
+    left = max(0, rect.left())
+    bottom = max(0, rect.top()+rect.height())
+    right = max(0, rect.left()+rect.width())
+
+    return array[top:bottom, left:right]
+
+def save_region_start_images(report_dir, data_source, pool, options):
+    """
+    save image of each region, the crops follow the stage drift
         Args:
             report_dir (libpath.Path): the directory to hold images
-            data_source (CrystlGrowthTrackerMain): the holder of the data
+            data_source (ReportSnapshot): the holder of the data
+            pool (RenderPool): the pool encoding the images
+            options (ReportOptions): the report options
     """
-    images_dir = report_dir.joinpath("images")
-    raw_image = data_source.get_enhanced_reader().get_pixmap(0)
+    suffix = frame_file_suffix(options)
+    raw_image = get_frame_array(data_source, 0)
     files = []
 
     results = data_source.get_results()
+    offset = results.get_drift_offset(0)
     for i, region in enumerate(results.get_regions()):
-        rect = get_rect_even_dimensions(region)
-        pixmap = raw_image.copy(rect)
-        out_file = images_dir.joinpath(f"region_{i}.png")
-        pixmap.save(str(out_file))
-        files.append(out_file)
+        rect = drift_rect(get_rect_even_dimensions(region), offset)
+        image = pathlib.Path("images", f"region_{i}{suffix}")
+        files.append(submit_frame_image(pool,
+                                        report_dir,
+                                        image,
+                                        crop_array(raw_image, rect),
+                                        options))
 
     return files
 
-def save_displacement_graph_files(report_dir, data_source):
+def save_displacement_graph_files(report_dir, data_source, pool):
     """
     save the graphs showing the displacements of the markers
         Args:
             report_dir (libpath.Path): the directory to hold images
-            data_source (CrystlGrowthTrackerMain): the holder of the data
+            data_source (ReportSnapshot): the holder of the data
+            pool (RenderPool): the pool rendering the graphs
         Returns:
             (list): the graph image file paths
     """
-    print("Hi")
     images_dir = report_dir.joinpath("images")
 
     region_files = []
 
     results = data_source.get_results()
     for i, _ in enumerate(results.get_regions()):
-        calc = calculate_speeds(i,
-                                data_source.get_results(),
-                                data_source.get_project()["frame_rate"],
-                                data_source.get_project()["resolution"])
-        lines = calc.get_line_displacements()
-        points = calc.get_point_displacements()
-
-        canvas = OffScreenRender()
-        draw_displacements(canvas, lines, points, i)
+        calc = data_source.get_speeds_cache().get_speeds(i,
+                                                         results,
+                                                         data_source.get_project()["frame_rate"],
+                                                         data_source.get_project()["resolution"])
+        lines = [displacement_series(x) for x in calc.get_line_displacements()]
+        points = [displacement_series(x) for x in calc.get_point_displacements()]
+
         file_name = images_dir.joinpath(f"speeds_graph_region_{i}.png")
-        canvas.print_png(str(file_name))
-        region_files.append(file_name)
+        pool.submit(render_displacements_png, str(file_name), lines, points, i)
+        region_files.append(file_name.relative_to(report_dir))
 
     return region_files
 
-def save_region_location_images(report_dir, data_source):
+def save_segmentation_graph_files(report_dir, data_source, pool):
+    """
+    save the graphs showing the area and perimeter of the crystal in each region
+        Args:
+            report_dir (libpath.Path): the directory to hold images
+            data_source (ReportSnapshot): the holder of the data
+            pool (RenderPool): the pool rendering the graphs
+        Returns:
+            (list): the graph image file paths, None for regions not segmented
+    """
+    images_dir = report_dir.joinpath("images")
+    resolution = float(data_source.get_project()["resolution"])
+
+    region_files = []
+
+    results = data_source.get_results()
+    for i, _ in enumerate(results.get_regions()):
+        rows = results.get_segmentation_for_region(i)
+        if len(rows) == 0:
+            region_files.append(None)
+            continue
+
+        file_name = images_dir.joinpath(f"segmentation_graph_region_{i}.png")
+        pool.submit(render_segmentation_png,
+                    str(file_name),
+                    rows["frame"],
+                    rows["area"]*resolution*resolution,
+                    rows["perimeter"]*resolution,
+                    i)
+        region_files.append(file_name.relative_to(report_dir))
+
+    return region_files
+
+def save_region_location_images(report_dir, data_source, pool, options):
     """
     save start, middle and final frames of video with the regions marked
         Args:
             report_dir (libpath.Path): the directory to hold images
-            data_source (CrystlGrowthTrackerMain): the holder of the data
+            data_source (ReportSnapshot): the holder of the data
+            pool (RenderPool): the pool encoding the images
+            options (ReportOptions): the report options
     """
     images_dir = report_dir.joinpath("images")
-    start_file = images_dir.joinpath("regions_start.png")
-    middle_file = images_dir.joinpath("regions_middle.png")
-    last_file = images_dir.joinpath("regions_end.png")
+    suffix = frame_file_suffix(options)
+    start_file = pathlib.Path("images", f"regions_start{suffix}")
+    middle_file = pathlib.Path("images", f"regions_middle{suffix}")
+    last_file = pathlib.Path("images", f"regions_end{suffix}")
 
     last = data_source.get_enhanced_reader().get_video_data().get_frame_count()-1
     middle = int(last/2)
@@ -442,24 +914,28 @@ def save_region_location_images(report_dir, data_source):
     if not images_dir.exists():
         images_dir.mkdir()
 
-    save_image_with_regions(first, start_file, data_source)
-    save_image_with_regions(middle, middle_file, data_source)
-    save_image_with_regions(middle, last_file, data_source)
+    save_image_with_regions(first, report_dir, start_file, data_source, pool, options)
+    save_image_with_regions(middle, report_dir, middle_file, data_source, pool, options)
+    save_image_with_regions(last, report_dir, last_file, data_source, pool, options)
 
     return [start_file, middle_file, last_file]
 
-def save_image_with_regions(frame, out_file, data_source):
+def save_image_with_regions(frame, report_dir, out_file, data_source, pool, options):
     """
     save frame to file
         Args:
             frame (int): frame number
-            out_file (pathlib.Path):
-            data_source (CrystalGrowthTrackeMain): holder of the data
+            report_dir (libpath.Path): the report directory
+            out_file (pathlib.Path): the image path, relative to the report directory
+            data_source (ReportSnapshot): holder of the data
+            pool (RenderPool): the pool encoding the image
+            options (ReportOptions): the report options
     """
-    pixmap = data_source.get_enhanced_reader().get_pixmap(frame)
+    image = data_source.get_enhanced_reader().get_image(frame)
+    image = image.convertToFormat(qg.QImage.Format_RGB32)
 
-    painter = qg.QPainter(pixmap)
-    painter.setPen(data_source.get_pens().get_display_pen())
+    painter = qg.QPainter(image)
+    painter.setPen(data_source.get_display_pen())
     results = data_source.get_results()
     for region in results.get_regions():
         rect = get_rect_even_dimensions(region, False)
@@ -467,47 +943,45 @@ def save_image_with_regions(frame, out_file, data_source):
 
     painter.end()
 
-    pixmap.save(str(out_file))
+    submit_frame_image(pool, report_dir, out_file, qimage_to_rgb_nparray(image), options)
 
-def save_region_keyframe_images(report_dir, data_source):
+def save_region_keyframe_images(report_dir, data_source, pool, options):
     """
-    save image of each region
+    save image of each region at each of its key frames, each frame
+    is read from the video once however many regions use it, the crops
+    follow the stage drift
         Args:
             report_dir (libpath.Path): the directory to hold images
-            data_source (CrystlGrowthTrackerMain): the holder of the data
+            data_source (ReportSnapshot): the holder of the data
+            pool (RenderPool): the pool encoding the images
+            options (ReportOptions): the report options
+        Returns:
+            ([[pathlib.Path]]): the image files of each region
     """
-    images_dir = report_dir.joinpath("images")
-    files = []
-
+    suffix = frame_file_suffix(options)
     results = data_source.get_results()
-    for index in range(len(results.get_regions())):
-        files.append(save_keyframe_images(images_dir,
-                                          data_source,
-                                          index))
+    regions = results.get_regions()
 
-    return files
-
-def save_keyframe_images(images_dir, data_source, region_index):
-    """
-    save image of the region at each key frame
-        Args:
-            images_dir,
-            data_source, region_index
-    """
-    results = data_source.get_results()
-    region = results.get_regions()[region_index]
-    key_frames = results.get_key_frames(region_index)
-    rect = get_rect_even_dimensions(region)
     files = []
-
-    if key_frames is None:
-        return files
-
-    for frame in key_frames:
-        raw_image = data_source.get_enhanced_reader().get_pixmap(frame)
-        pixmap = raw_image.copy(rect)
-        out_file = images_dir.joinpath(f"region_{region_index}_frame_{frame}.png")
-        pixmap.save(str(out_file))
-        files.append(out_file)
+    frame_users = {}
+    for index in range(len(regions)):
+        key_frames = results.get_key_frames(index)
+        if key_frames is None:
+            key_frames = []
+
+        region_files = []
+        for frame in key_frames:
+            frame_users.setdefault(frame, []).append(index)
+            region_files.append(pathlib.Path("images", f"region_{index}_frame_{frame}{suffix}"))
+
+        files.append(region_files)
+
+    for frame in sorted(frame_users):
+        raw_image = get_frame_array(data_source, frame)
+        offset = results.get_drift_offset(frame)
+        for index in frame_users[frame]:
+            rect = drift_rect(get_rect_even_dimensions(regions[index]), offset)
+            image = pathlib.Path("images", f"region_{index}_frame_{frame}{suffix}")
+            submit_frame_image(pool, report_dir, image, crop_array(raw_image, rect), options)
 
     return files
@@ -0,0 +1,119 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+suggest key frames for all the regions of a video, by change detection on one
+streaming decode, in a background thread
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+# set up linting conditions
+# pylint: disable = c-extension-no-member
+# pylint: disable = import-error
+import threading
+
+import ffmpeg
+
+import PyQt5.QtCore as qc
+
+from cgt.io.regionframereader import counted_frames
+from cgt.util.changedetection import suggest_key_frames
+
+def bounding_rect(rects):
+    """
+    find the smallest rectangle holding a number of rectangles
+        Args:
+            rects ([(int, int, int, int)]): the left, top, width and height of each rectangle
+        Returns:
+            (int, int, int, int) the left, top, width and height
+    """
+    left = min(x[0] for x in rects)
+    top = min(x[1] for x in rects)
+    right = max(x[0] + x[2] for x in rects)
+    bottom = max(x[1] + x[3] for x in rects)
+
+    return left, top, right - left, bottom - top
+
+class KeyFrameSuggester(qc.QObject):
+    """
+    worker suggesting key frames for regions, to be moved to a QThread
+    """
+
+    ## the number of frames read so far
+    frames_read = qc.pyqtSignal(int)
+
+    ## the suggestions, a list for each region of frame numbers
+    suggestions_finished = qc.pyqtSignal(list)
+
+    ## suggesting failed, with a message
+    suggestions_failed = qc.pyqtSignal(str)
+
+    ## suggesting was cancelled
+    suggestions_cancelled = qc.pyqtSignal()
+
+    def __init__(self, reader, rects, start, end, threshold=None, parent=None):
+        """
+        initialize the object
+            Args:
+                reader (RegionFrameReader): the source of frames, cropped to the bounding_rect of the regions
+                rects ([(int, int, int, int)]): the left, top, width and height of each region in the video
+                start (int): the first frame
+                end (int): the last frame
+                threshold (float): the mean squared difference at which a key frame is
+                                   suggested, None for config.KEY_FRAME_CHANGE_THRESHOLD
+                parent (QObject): parent object
+        """
+        super().__init__(parent)
+
+        ## the source of frames
+        self._reader = reader
+
+        ## the regions, in the coordinates of the reader's crop
+        left, top, _, _ = reader.get_rect()
+        self._rects = [(x[0] - left, x[1] - top, x[2], x[3]) for x in rects]
+
+        ## the first and last frames
+        self._frames = (start, end)
+
+        ## the mean squared difference at which a key frame is suggested
+        self._threshold = threshold
+
+        ## set to stop the analysis
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """
+        stop the analysis, safe to call from any thread
+        """
+        self._cancelled.set()
+
+    @qc.pyqtSlot()
+    def run(self):
+        """
+        find the suggestions and signal the outcome
+        """
+        try:
+            frames = counted_frames(self._reader.read_frames(*self._frames),
+                                    self._cancelled,
+                                    self.frames_read.emit)
+            suggestions = suggest_key_frames(frames, self._rects, self._threshold)
+        except (OSError, ValueError, ffmpeg.Error) as error:
+            self.suggestions_failed.emit(str(error))
+            return
+
+        if self._cancelled.is_set():
+            self.suggestions_cancelled.emit()
+        else:
+            self.suggestions_finished.emit(suggestions)
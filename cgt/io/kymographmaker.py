@@ -0,0 +1,102 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+build kymographs along profile lines from one streaming decode of a video,
+in a background thread
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+# set up linting conditions
+# pylint: disable = c-extension-no-member
+# pylint: disable = import-error
+import threading
+
+import ffmpeg
+
+import PyQt5.QtCore as qc
+
+from cgt.io.regionframereader import counted_frames
+from cgt.util.kymograph import build_kymographs
+
+class KymographMaker(qc.QObject):
+    """
+    worker building kymographs along profile lines, to be moved to a QThread
+    """
+
+    ## the number of frames read so far
+    frames_read = qc.pyqtSignal(int)
+
+    ## the frame numbers, as np.array, and a list of kymographs, one for each line
+    kymographs_finished = qc.pyqtSignal(object, list)
+
+    ## building failed, with a message
+    kymographs_failed = qc.pyqtSignal(str)
+
+    ## building was cancelled
+    kymographs_cancelled = qc.pyqtSignal()
+
+    def __init__(self, reader, lines, start, end, spacing=1.0, parent=None):
+        """
+        initialize the object
+            Args:
+                reader (RegionFrameReader): the source of the frames
+                lines ([ProfileLine]): the profile lines, in the coordinates of the reader's frames
+                start (int): the first frame
+                end (int): the last frame
+                spacing (float): the distance between samples in pixels
+                parent (QObject): parent object
+        """
+        super().__init__(parent)
+
+        ## the source of frames
+        self._reader = reader
+
+        ## the profile lines
+        self._lines = lines
+
+        ## the first and last frames
+        self._frames = (start, end)
+
+        ## the distance between samples
+        self._spacing = spacing
+
+        ## set to stop the building
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """
+        stop the building, safe to call from any thread
+        """
+        self._cancelled.set()
+
+    @qc.pyqtSlot()
+    def run(self):
+        """
+        build the kymographs and signal the outcome
+        """
+        try:
+            frames = counted_frames(self._reader.read_frames(*self._frames),
+                                    self._cancelled,
+                                    self.frames_read.emit)
+            numbers, kymographs = build_kymographs(frames, self._lines, self._spacing)
+        except (OSError, ValueError, ffmpeg.Error) as error:
+            self.kymographs_failed.emit(str(error))
+            return
+
+        if self._cancelled.is_set():
+            self.kymographs_cancelled.emit()
+        else:
+            self.kymographs_finished.emit(numbers, kymographs)
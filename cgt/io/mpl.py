@@ -21,6 +21,12 @@ from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as Navigatio
 from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.figure import Figure
 
+from cgt.io.reportrender import (displacement_series,
+                                 plot_displacements,
+                                 plot_intensities,
+                                 plot_segmentation,
+                                 label_intensities)
+
 class MplCanvas(FigureCanvasQTAgg):
     """
     matplotlib drawing area for use with qt
@@ -91,14 +97,7 @@ def render_intesities_graph(frames, canvas, frame=None):
     means = [x.mean for x in frames]
     std_dev = [x.std_deviation for x in frames]
 
-    upper = [means[a]+x for a, x in enumerate(std_dev)]
-    lower = [means[a]-x for a, x in enumerate(std_dev)]
-    x_vals = range(0, len(means))
-
-    canvas.axes.plot(x_vals, means, label=r'$\mu$')
-    canvas.axes.plot(x_vals, lower, label=r"-$\sigma$")
-    canvas.axes.plot(x_vals, upper, label=r"$\sigma$")
-    canvas.axes.fill_between(x_vals, lower, upper, alpha=0.2)
+    plot_intensities(canvas.axes, means, std_dev)
 
     frame_line = None
     if frame is not None and not frame < 0 and not frame >= len(frames):
@@ -106,12 +105,7 @@ def render_intesities_graph(frames, canvas, frame=None):
         line_y = [5, 250]
         frame_line = canvas.axes.plot(line_x, line_y)
 
-    canvas.axes.set_xlabel('Frame')
-    canvas.axes.set_ylabel('Pixel Intensity')
-    canvas.axes.set_title('Mean Intensitites')
-    canvas.axes.set_ylim(0, 256)
-
-    canvas.axes.legend()
+    label_intensities(canvas.axes)
 
     canvas.draw()
 
@@ -183,32 +177,56 @@ def draw_displacements(canvas, lines, points, region):
             points (): array of grahics point
             region (int): the region
     """
-    canvas.axes.cla()
-    canvas.axes.set_title(f'Marker Displacements Frame {region}')
-    canvas.axes.set_ylabel("Displacement (micron)")
-    canvas.axes.set_xlabel("Frame (number)")
-
-    for i, marker in enumerate(lines):
-        displacements = [0.0]
-        frames = [0]
-        for dis in marker:
-            new_dis = displacements[-1] + dis.get_length()
-            displacements.append(new_dis)
-            frames.append(dis.get_end())
-
-        canvas.axes.plot(frames, displacements, label=f"Line {i}")
-
-    for i, marker in enumerate(points):
-        displacements = [0.0]
-        frames = [0]
-        for dis in marker:
-            new_dis = displacements[-1] + dis.get_length()
-            displacements.append(new_dis)
-            frames.append(dis.get_end())
-
-        canvas.axes.plot(frames, displacements, label=f"Point {i}")
-
-    if len(lines) or len(points):
-        canvas.axes.legend()
+    line_series = [displacement_series(x) for x in lines]
+    point_series = [displacement_series(x) for x in points]
+
+    plot_displacements(canvas.axes, line_series, point_series, region)
+
+    canvas.draw()
+
+def draw_segmentation(canvas, rows, region, resolution=1.0):
+    """
+    draw the area and perimeter of a region's crystal against time
+        Args:
+            canvas (MplCanvas): the drawing canvas
+            rows (np.array): the region's measurements, of SEGMENT_DTYPE in order of frame
+            region (int): the region
+            resolution (float): the size of a pixel in microns
+    """
+    plot_segmentation(canvas.axes,
+                      rows["frame"],
+                      rows["area"]*resolution*resolution,
+                      rows["perimeter"]*resolution,
+                      region)
+
+    canvas.draw()
+
+def draw_kymograph(canvas, kymograph, frames, spacing=1.0, fit=None):
+    """
+    draw a kymograph, position along the profile across and frame down
+        Args:
+            canvas (MplCanvas): the drawing canvas
+            kymograph (np.array): frames by samples
+            frames (np.array): the frame number of each row
+            spacing (float): the distance between samples in pixels
+            fit (KymographFit): if not None the fitted edge is drawn over the kymograph
+    """
+    canvas.axes.clear()
+
+    if len(frames) > 0:
+        extent = (-0.5*spacing,
+                  (kymograph.shape[1] - 0.5)*spacing,
+                  frames[-1] + 0.5,
+                  frames[0] - 0.5)
+        canvas.axes.imshow(kymograph, cmap="gray", aspect="auto", extent=extent)
+
+        if fit is not None:
+            rows = fit.frames[[0, -1]]
+            canvas.axes.plot(fit.positions*spacing, frames[fit.frames], ".", markersize=2)
+            canvas.axes.plot((fit.intercept + fit.slope*rows)*spacing, frames[rows], "-")
+
+    canvas.axes.set_xlabel("Position along profile (pixels)")
+    canvas.axes.set_ylabel("Frame")
+    canvas.axes.set_title("Kymograph")
 
     canvas.draw()
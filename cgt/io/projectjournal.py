@@ -0,0 +1,524 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+an append-only journal of the changes made to a results store since the
+project was last saved, written by a background thread so that unsaved
+work can be recovered after a crash
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+# set up linting conditions
+# pylint: disable = c-extension-no-member
+
+import os
+import json
+import queue
+import pathlib
+import threading
+
+import numpy as np
+
+import PyQt5.QtCore as qc
+import PyQt5.QtWidgets as qw
+
+from cgt.io import readcsvreports
+from cgt.model.markerrecord import MarkerRecord
+from cgt.model.resultsdata import (LINE_DTYPE,
+                                   POINT_DTYPE,
+                                   SEGMENT_DTYPE,
+                                   DRIFT_DTYPE,
+                                   split_marker_rows)
+from cgt.util import config
+from cgt.util.framestats import (FrameStats, VideoIntensityStats)
+from cgt.util.markers import (ItemDataTypes,
+                              MarkerTypes,
+                              hash_graphics_line,
+                              hash_graphics_point)
+from cgt.util.scenegraphitems import (list_to_g_line,
+                                      list_to_g_point)
+
+## the file name ending of journals
+JOURNAL_SUFFIX = "_journal.jsonl"
+
+def journal_file(project):
+    """
+    get the path of the journal of a project
+        Args:
+            project (CGTProject): the project
+        Returns:
+            (pathlib.Path)
+    """
+    path = pathlib.Path(project["proj_full_path"])
+    return path.joinpath(project["prog"] + r"_" + project["proj_name"] + JOURNAL_SUFFIX)
+
+def encode_statistics(stats):
+    """
+    convert video statistics to json compatible lists
+        Args:
+            stats (VideoIntensityStats): the statistics, may be None
+        Returns:
+            (dict) the bins and the frames, or None
+    """
+    if stats is None:
+        return None
+
+    frames = [[x.mean, x.std_deviation, *x.bin_counts] for x in stats.get_frames()]
+    return {"bins": [float(x) for x in stats.get_bins()],
+            "frames": np.array(frames, dtype=np.float64).tolist()}
+
+def decode_statistics(data):
+    """
+    convert json lists to video statistics
+        Args:
+            data (dict): the output of encode_statistics, may be None
+        Returns:
+            (VideoIntensityStats) or None
+    """
+    if data is None:
+        return None
+
+    stats = VideoIntensityStats(data["bins"])
+    for row in data["frames"]:
+        stats.append_frame(FrameStats(row[0], row[1], row[2:]))
+
+    return stats
+
+def decode_segmentation(data):
+    """
+    convert json lists to crystal measurements
+        Args:
+            data (list): the rows as lists, may be None
+        Returns:
+            (np.array) SEGMENT_DTYPE rows or None
+    """
+    if data is None:
+        return None
+
+    return np.array([tuple(x) for x in data], dtype=SEGMENT_DTYPE)
+
+def decode_drift(data):
+    """
+    convert json lists to stage drift
+        Args:
+            data (list): the rows as lists, may be None
+        Returns:
+            (np.array) DRIFT_DTYPE rows or None
+    """
+    if data is None:
+        return None
+
+    return np.array([tuple(x) for x in data], dtype=DRIFT_DTYPE)
+
+class ProjectJournal():
+    """
+    append-only journal of the changes to a results store, each entry is one
+    line of json, the file is written and compacted by a background thread
+    """
+
+    def __init__(self, file_path, base_digest, entries=()):
+        """
+        initialize the object and start a new journal file
+            Args:
+                file_path (pathlib.Path): the journal file
+                base_digest (int): the results digest of the last full save
+                entries ([dict]): entries recovered from a previous journal, to be kept
+        """
+        ## the journal file
+        self._file_path = pathlib.Path(file_path)
+
+        ## the results digest of the last full save
+        self._base_digest = base_digest
+
+        ## the entries waiting to be written, None stops the writer
+        self._queue = queue.Queue()
+
+        ## the number of entries since the journal was started or compacted
+        self._count = len(entries)
+
+        ## the latest video statistics recorded, retained through compaction
+        self._statistics = None
+
+        ## True if video statistics have been recorded since the base
+        self._has_statistics = False
+
+        for entry in entries:
+            if "statistics" in entry["data"]:
+                self._statistics = entry["data"]["statistics"]
+                self._has_statistics = True
+
+        ## the writer thread
+        self._writer = threading.Thread(target=self.write_entries, daemon=True)
+
+        self._queue.put(("replace", [{"base": base_digest}, *entries]))
+        self._writer.start()
+
+    def get_file_path(self):
+        """
+        getter for the journal file
+            Returns:
+                (pathlib.Path)
+        """
+        return self._file_path
+
+    def record(self, operation, data, digest):
+        """
+        append an entry, called after the change has been made
+            Args:
+                operation (str): the name of the store method
+                data (dict): the arguments, must not be changed after the call
+                digest (int): the results digest after the change
+        """
+        if operation == "set_video_statistics":
+            self._statistics = data["statistics"]
+            self._has_statistics = True
+
+        self._queue.put(("entry", {"op": operation, "data": data, "digest": digest}))
+        self._count += 1
+
+    def needs_compaction(self):
+        """
+        find if the journal is long enough to be compacted
+            Returns:
+                True if the number of entries has reached config.JOURNAL_COMPACT_ENTRIES
+        """
+        return self._count >= config.JOURNAL_COMPACT_ENTRIES
+
+    def compact(self, snapshot, digest):
+        """
+        replace the journal with one snapshot of the results
+            Args:
+                snapshot (dict): the regions and marker rows, from VideoAnalysisResultsStore
+                digest (int): the current results digest
+        """
+        data = dict(snapshot)
+        if self._has_statistics:
+            data["statistics"] = self._statistics
+
+        entries = [{"base": self._base_digest},
+                   {"op": "snapshot", "data": data, "digest": digest}]
+
+        self._queue.put(("replace", entries))
+        self._count = 0
+
+    def reset(self, base_digest):
+        """
+        empty the journal after a full save
+            Args:
+                base_digest (int): the results digest of the save
+        """
+        self._base_digest = base_digest
+        self._statistics = None
+        self._has_statistics = False
+        self._count = 0
+        self._queue.put(("replace", [{"base": base_digest}]))
+
+    def flush(self):
+        """
+        wait until every entry has been written
+        """
+        self._queue.join()
+
+    def close(self, delete=True):
+        """
+        stop the writer thread
+            Args:
+                delete (bool): if True the journal file is deleted
+        """
+        self._queue.put(None)
+        self._writer.join()
+
+        if delete:
+            self._file_path.unlink(missing_ok=True)
+
+    def write_entries(self):
+        """
+        the writer thread, entries are appended and synced to disk when
+        the queue is empty, so the cost of each write is that of the change
+        """
+        fout = None
+        try:
+            while True:
+                item = self._queue.get()
+                try:
+                    if item is None:
+                        return
+
+                    kind, payload = item
+                    if kind == "replace":
+                        fout = self.replace_file(fout, payload)
+                    else:
+                        fout.write(self.encode(payload))
+
+                    if self._queue.empty():
+                        fout.flush()
+                        os.fsync(fout.fileno())
+                finally:
+                    self._queue.task_done()
+        finally:
+            if fout is not None:
+                fout.close()
+
+    def replace_file(self, fout, entries):
+        """
+        atomically replace the journal file, called by the writer thread
+            Args:
+                fout (file): the open journal, or None
+                entries ([dict]): the entries of the new journal
+            Returns:
+                (file) the new journal open for appending
+        """
+        if fout is not None:
+            fout.close()
+
+        tmp_file = self._file_path.with_suffix(".tmp")
+        with open(tmp_file, "w", encoding="UTF-8") as tmp_out:
+            for entry in entries:
+                tmp_out.write(self.encode(entry))
+            tmp_out.flush()
+            os.fsync(tmp_out.fileno())
+
+        os.replace(tmp_file, self._file_path)
+
+        return open(self._file_path, "a", encoding="UTF-8")
+
+    @staticmethod
+    def encode(entry):
+        """
+        convert an entry to a line of json
+            Args:
+                entry (dict): the entry
+            Returns:
+                (str)
+        """
+        data = entry.get("data")
+        if data is not None and isinstance(data.get("statistics"), VideoIntensityStats):
+            entry = dict(entry)
+            entry["data"] = dict(data)
+            entry["data"]["statistics"] = encode_statistics(data["statistics"])
+
+        for name in ("segmentation", "drift"):
+            if data is not None and isinstance(data.get(name), np.ndarray):
+                entry = dict(entry)
+                entry["data"] = dict(entry["data"])
+                entry["data"][name] = data[name].tolist()
+
+        return json.dumps(entry, separators=(',', ':')) + "\n"
+
+def read_journal(file_path):
+    """
+    read the entries of a journal, a final line left incomplete by a crash is ignored
+        Args:
+            file_path (pathlib.Path): the journal file
+        Returns:
+            (int, [dict]) the base digest and the entries
+        Throws:
+            IOError if the file cannot be read or has no header
+    """
+    entries = []
+    with open(file_path, "r", encoding="UTF-8") as fin:
+        lines = fin.readlines()
+
+    if len(lines) == 0:
+        raise IOError(f"Journal {file_path} is empty.")
+
+    try:
+        base = json.loads(lines[0])["base"]
+    except (ValueError, KeyError) as error:
+        raise IOError(f"Journal {file_path} has no header.") from error
+
+    for line in lines[1:]:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            break
+
+    return base, entries
+
+def make_item(marker_type, values, parent, pen):
+    """
+    make a graphics item from journal values
+        Args:
+            marker_type (MarkerTypes): LINE or POINT
+            values ([float]): the values from g_line_to_tuple or g_point_to_tuple
+            parent (int or str): the parent hash
+            pen (QPen): the drawing pen
+        Returns:
+            (QGraphicsItem)
+    """
+    if marker_type == MarkerTypes.LINE:
+        item = list_to_g_line([0] + values, pen)
+    else:
+        item = list_to_g_point([0] + values, pen)
+
+    item.setData(ItemDataTypes.PARENT_HASH, parent)
+    return item
+
+def find_stored_item(results, marker_type, values, pen):
+    """
+    find the item in the store matching journal values
+        Args:
+            results (VideoAnalysisResultsStore): the store
+            marker_type (MarkerTypes): LINE or POINT
+            values ([float]): the values from g_line_to_tuple or g_point_to_tuple
+            pen (QPen): the drawing pen
+        Returns:
+            (QGraphicsItem, int) the item and the array index of its marker
+        Throws:
+            LookupError if there is no match
+    """
+    target = make_item(marker_type, values, None, pen)
+    if marker_type == MarkerTypes.LINE:
+        index = results.find_list_for_old_line(target)
+        marker = None if index is None else results.get_line_marker(index)
+        hash_function = hash_graphics_line
+    else:
+        index = results.find_list_for_old_point(target)
+        marker = None if index is None else results.get_point_marker(index)
+        hash_function = hash_graphics_point
+
+    if marker is None:
+        raise LookupError("journal entry does not match any marker")
+
+    code = hash_function(target)
+    return [x for x in marker if hash_function(x) == code][-1], index
+
+def apply_snapshot(results, snapshot, pen):
+    """
+    replace the regions and markers of a store by a snapshot
+        Args:
+            results (VideoAnalysisResultsStore): the store
+            snapshot (dict): the regions, lines and points
+            pen (QPen): the drawing pen
+    """
+    results.clear_markers_and_regions()
+
+    if "statistics" in snapshot:
+        results.set_video_statistics(decode_statistics(snapshot["statistics"]))
+
+    if "segmentation" in snapshot:
+        results.set_segmentation(decode_segmentation(snapshot["segmentation"]))
+
+    if "drift" in snapshot:
+        results.set_drift(decode_drift(snapshot["drift"]))
+
+    for rect in snapshot["regions"]:
+        results.add_region(qw.QGraphicsRectItem(qc.QRectF(*rect)))
+
+    points = np.array([tuple(x) for x in snapshot["points"]], dtype=POINT_DTYPE)
+    lines = np.array([tuple(x) for x in snapshot["lines"]], dtype=LINE_DTYPE)
+    for marker_rows in split_marker_rows(points):
+        results.insert_marker_record(MarkerRecord(MarkerTypes.POINT, marker_rows, pen))
+    for marker_rows in split_marker_rows(lines):
+        results.insert_marker_record(MarkerRecord(MarkerTypes.LINE, marker_rows, pen))
+
+    readcsvreports.extract_key_frames(results, [points, lines])
+
+def apply_entry(results, entry, pen):
+    """
+    repeat a change recorded in a journal
+        Args:
+            results (VideoAnalysisResultsStore): the store
+            entry (dict): the journal entry
+            pen (QPen): the drawing pen
+        Throws:
+            LookupError, IndexError or KeyError if the entry does not fit the store
+    """
+    # pylint: disable = too-many-branches
+    operation = entry["op"]
+    data = entry["data"]
+
+    if operation == "snapshot":
+        apply_snapshot(results, data, pen)
+    elif operation == "add_region":
+        results.add_region(qw.QGraphicsRectItem(qc.QRectF(*data["rect"])))
+    elif operation == "replace_region":
+        region = qw.QGraphicsRectItem(qc.QRectF(*data["rect"]))
+        results.replace_region(region, data["index"])
+    elif operation == "remove_region":
+        results.remove_region(data["index"])
+    elif operation == "restore_region":
+        region = qw.QGraphicsRectItem(qc.QRectF(*data["rect"]))
+        results.restore_region(data["index"],
+                               region,
+                               [],
+                               data["key_frames"],
+                               decode_segmentation(data["segmentation"]))
+    elif operation == "restore_marker":
+        marker_type = MarkerTypes(data["type"])
+        dtype = LINE_DTYPE if marker_type == MarkerTypes.LINE else POINT_DTYPE
+        rows = np.array([tuple(x) for x in data["rows"]], dtype=dtype)
+        markers = results.select_markers(marker_type)[0]
+        results.restore_marker(marker_type,
+                               min(data["index"], len(markers)),
+                               MarkerRecord(marker_type, rows, pen))
+    elif operation == "add_line":
+        results.add_line(make_item(MarkerTypes.LINE, data["values"], data["parent"], pen))
+    elif operation == "add_point":
+        results.add_point(make_item(MarkerTypes.POINT, data["values"], data["parent"], pen))
+    elif operation == "delete_marker":
+        item, _ = find_stored_item(results, MarkerTypes(data["type"]), data["values"], pen)
+        results.delete_marker(item)
+    elif operation == "remove_line":
+        results.remove_line(data["hash"])
+    elif operation == "remove_point":
+        results.remove_point(data["hash"])
+    elif operation == "delete_line":
+        item, index = find_stored_item(results, MarkerTypes.LINE, data["values"], pen)
+        results.delete_line(item, index)
+    elif operation == "delete_point":
+        item, index = find_stored_item(results, MarkerTypes.POINT, data["values"], pen)
+        results.delete_point(item, index)
+    elif operation == "set_video_statistics":
+        results.set_video_statistics(decode_statistics(data["statistics"]))
+    elif operation == "set_segmentation":
+        results.set_segmentation(decode_segmentation(data["segmentation"]))
+    elif operation == "set_drift":
+        results.set_drift(decode_drift(data["drift"]))
+    else:
+        raise KeyError(f"unknown journal operation {operation}")
+
+def replay_journal(file_path, results, pens):
+    """
+    apply the changes in a journal to the results of the last full save,
+    replay stops at the first entry that does not reproduce its recorded digest
+        Args:
+            file_path (pathlib.Path): the journal file
+            results (VideoAnalysisResultsStore): the results read from the project files
+            pens (PenStore): the current pens
+        Returns:
+            ([dict], int) the entries applied and the number in the journal
+        Throws:
+            IOError if the journal does not start from the saved results
+    """
+    base, entries = read_journal(file_path)
+    if base != results.get_results_digest():
+        raise IOError(f"Journal {file_path} does not match the saved project.")
+
+    applied = []
+    with results.batch():
+        for entry in entries:
+            try:
+                apply_entry(results, entry, pens.get_display_pen())
+            except (LookupError, AttributeError, TypeError, ValueError):
+                break
+
+            if results.get_results_digest() != entry["digest"]:
+                break
+
+            applied.append(entry)
+
+    results.clear_history()
+    return applied, len(entries)
@@ -26,18 +26,20 @@ This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
 
 import csv
 import pathlib
-import operator
-import itertools
+import warnings
 import numpy as np
 
 import PyQt5.QtCore as qc
 import PyQt5.QtWidgets as qw
 
+from cgt.model.markerrecord import MarkerRecord
+from cgt.model.resultsdata import (LINE_DTYPE,
+                                   POINT_DTYPE,
+                                   SEGMENT_DTYPE,
+                                   DRIFT_DTYPE,
+                                   split_marker_rows)
 from cgt.util.framestats import FrameStats, VideoIntensityStats
-from cgt.util.markers import(get_region,
-                             get_frame)
-from cgt.util.scenegraphitems import (list_to_g_point,
-                                      list_to_g_line)
+from cgt.util.markers import MarkerTypes
 
 def read_csv_project(results_dir, new_project, pens):
     '''Coordinates the reading of a selection of csv reports.
@@ -56,15 +58,17 @@ def read_csv_project(results_dir, new_project, pens):
 
     read_csv_info(new_project, files, results_path)
 
-    old_signal_state = new_project["results"].blockSignals(True)
-    read_csv_video_statistics(new_project, files, results_path)
+    with new_project["results"].batch():
+        read_csv_video_statistics(new_project, files, results_path)
+        read_csv_segmentation(new_project, files, results_path)
+        read_csv_drift(new_project, files, results_path)
 
-    if read_csv_regions(new_project, files, results_path):
-        read_csv_points(new_project, files, results_path, pens)
-        read_csv_lines(new_project, files, results_path, pens)
-        extract_key_frames(new_project["results"])
-    new_project["results"].blockSignals(old_signal_state)
+        if read_csv_regions(new_project, files, results_path):
+            points = read_csv_points(new_project, files, results_path, pens)
+            lines = read_csv_lines(new_project, files, results_path, pens)
+            extract_key_frames(new_project["results"], [points, lines])
 
+    new_project["results"].clear_history()
     new_project.ensure_numeric()
 
 def read_csv_info(new_project, files, path):
@@ -87,14 +91,20 @@ def read_csv_info(new_project, files, path):
 
     with tmp[0].open('r') as file_in:
         reader = csv.reader(file_in)
-        for row in reader:
-            if len(row) == 2:
-                key = row[0]
-                value = row[1]
-                if value == "":
-                    new_project[key] = None
-                else:
-                    new_project[key] = value
+        set_info_items(new_project, [row for row in reader if len(row) == 2])
+
+def set_info_items(new_project, items):
+    """
+    set the project information from its saved text form
+        Args:
+            new_project (CGTProject): the project object
+            items ([(str, str)]): the keys and values, empty values are None
+    """
+    for key, value in items:
+        if value == "":
+            new_project[key] = None
+        else:
+            new_project[key] = value
 
     if new_project["stats_from_enhanced"] == "True":
         new_project["stats_from_enhanced"] = True
@@ -139,6 +149,46 @@ def read_csv_video_statistics(new_project, files, path):
     tmp = new_project["results"]
     new_project["results"].set_video_statistics(stats)
 
+def read_csv_segmentation(new_project, files, path):
+    """
+    read the crystal measurements, if they exist
+        Args:
+            new_project (CGTProject): the project object
+            files ([pathlib.Path]): list of files in directory
+            path (pathlib.Path): the working directory
+        Throws:
+            IOException if error reading file
+    """
+    tmp = [x for x in files if str(x).endswith("segmentation.csv")]
+
+    if len(tmp) < 1:
+        return
+
+    if len(tmp) > 1:
+        raise IOError(f"Directory {path} has more than one segmentation.csv file.")
+
+    new_project["results"].set_segmentation(read_csv_array(tmp[0], SEGMENT_DTYPE))
+
+def read_csv_drift(new_project, files, path):
+    """
+    read the stage drift, if it exists
+        Args:
+            new_project (CGTProject): the project object
+            files ([pathlib.Path]): list of files in directory
+            path (pathlib.Path): the working directory
+        Throws:
+            IOException if error reading file
+    """
+    tmp = [x for x in files if str(x).endswith("drift.csv")]
+
+    if len(tmp) < 1:
+        return
+
+    if len(tmp) > 1:
+        raise IOError(f"Directory {path} has more than one drift.csv file.")
+
+    new_project["results"].set_drift(read_csv_array(tmp[0], DRIFT_DTYPE))
+
 def read_csv_regions(new_project, files, path):
     """
     read the video regions, if it exists
@@ -174,110 +224,94 @@ def read_csv_regions(new_project, files, path):
 
 def read_csv_points(new_project, files, path, pens):
     """
-    read the points file, if it exists
+    read the points file, if it exists, the graphics items are made when
+    the points are first displayed
         Args:
             new_project (CGTProject): the project object
             files ([pathlib.Path]): list of files in directory
             path (pathlib.Path): the working directory
+            pens (PenStore): the current pens set
+        Returns:
+            (np.array) the rows of the file, POINT_DTYPE
         Throws:
             IOException if error reading file
     """
     tmp = [x for x in files if str(x).endswith("points.csv")]
 
     if len(tmp) < 1:
-        return
+        return np.empty(0, dtype=POINT_DTYPE)
 
     if len(tmp) > 1:
         raise IOError(f"Directory {path} has more than one points.csv file.")
 
-    rows = []
-    with tmp[0].open('r') as file_in:
-        reader = csv.reader(file_in)
-        next(reader) # remove headers
-        for row in reader:
-            tmp = [int(row[0])]
-            tmp += [float(x) for x in row[1:5]]
-            tmp += [int(x) for x in row[5:]]
-            rows.append(tmp)
-
-    rows.sort(key=operator.itemgetter(6))
+    rows = read_csv_array(tmp[0], POINT_DTYPE)
 
-    for _, region_iterator in itertools.groupby(rows, operator.itemgetter(6)):
-        region_group = list(region_iterator)
-        region_group.sort(key=operator.itemgetter(0))
-        for _, point_iterator in itertools.groupby(region_group, operator.itemgetter(0)):
-            point_group = list(point_iterator)
-            point_group.sort(key=operator.itemgetter(5))
-            g_marker = []
-            for row in point_group:
-                g_marker.append(list_to_g_point(row, pens.get_display_pen()))
+    for marker_rows in split_marker_rows(rows):
+        record = MarkerRecord(MarkerTypes.POINT, marker_rows, pens.get_display_pen())
+        new_project["results"].insert_marker_record(record)
 
-            new_project["results"].insert_point_marker(g_marker)
+    return rows
 
 def read_csv_lines(new_project, files, path, pens):
     """
-    read the lines file, if it exists
+    read the lines file, if it exists, the graphics items are made when
+    the lines are first displayed
         Args:
             new_project (CGTProject): the project object
             files ([pathlib.Path]): list of files in directory
             path (pathlib.Path): the working directory
             pens (PenStore): the current pens set
+        Returns:
+            (np.array) the rows of the file, LINE_DTYPE
         Throws:
             IOException if error reading file
     """
     tmp = [x for x in files if str(x).endswith("lines.csv")]
 
     if len(tmp) < 1:
-        return
+        return np.empty(0, dtype=LINE_DTYPE)
 
     if len(tmp) > 1:
-        raise IOError(f"Directory {path} has more than one regions.csv file.")
+        raise IOError(f"Directory {path} has more than one lines.csv file.")
 
-    with tmp[0].open('r') as file_in:
-        reader = csv.reader(file_in)
-        next(reader) # remove headers
-        rows = []
-        for row in reader:
-            tmp = [int(row[0])]
-            tmp += [float(x) for x in row[1:7]]
-            tmp += [int(x) for x in row[7:]]
-            rows.append(tmp)
-
-    rows.sort(key=operator.itemgetter(8))
-
-    for _, region_iterator in itertools.groupby(rows, operator.itemgetter(8)):
-        region_group = list(region_iterator)
-        region_group.sort(key=operator.itemgetter(0))
-        for _, line_iterator in itertools.groupby(region_group, operator.itemgetter(0)):
-            line_group = list(line_iterator)
-            line_group.sort(key=operator.itemgetter(7))
-            g_marker = []
-            for row in line_group:
-                g_marker.append(list_to_g_line(row, pens.get_display_pen()))
-
-            new_project["results"].insert_line_marker(g_marker)
-
-def extract_key_frames(results):
+    rows = read_csv_array(tmp[0], LINE_DTYPE)
+
+    for marker_rows in split_marker_rows(rows):
+        record = MarkerRecord(MarkerTypes.LINE, marker_rows, pens.get_display_pen())
+        new_project["results"].insert_marker_record(record)
+
+    return rows
+
+def read_csv_array(file_path, dtype):
+    """
+    read a csv file with one header line into a structured array
+        Args:
+            file_path (pathlib.Path): the file
+            dtype (np.dtype): the structured type, one field per column
+        Returns:
+            (np.array) the rows
+        Throws:
+            IOException if error reading file
+    """
+    with warnings.catch_warnings():
+        # a file holding only the headers is not an error
+        warnings.simplefilter("ignore", UserWarning)
+        return np.loadtxt(file_path,
+                          dtype=dtype,
+                          delimiter=',',
+                          skiprows=1,
+                          ndmin=1)
+
+def extract_key_frames(results, marker_rows):
     """
-    fill the region to key-frame map from the lines
+    fill the region to key-frame map from the lines and points
         Args:
             results (VideoAnalysisResultsStore) the results object
+            marker_rows ([np.array]) the rows of the lines and points files
     """
+    regions = np.concatenate([x["region"] for x in marker_rows])
+    frames = np.concatenate([x["frame"] for x in marker_rows])
 
-    frames = []
-
-    for line_set in results.get_lines():
-        for line in line_set:
-            frames.append((get_region(line), get_frame(line)))
-
-    for point_set in results.get_points():
-        for point in point_set:
-            frames.append((get_region(point), get_frame(point)))
-
-    frames.sort(key=operator.itemgetter(0))
-
-    for region, group in itertools.groupby(frames, operator.itemgetter(0)):
-        tmp = list(group)
-        tmp.sort(key=operator.itemgetter(1))
-        for key_frame, _ in itertools.groupby(tmp, operator.itemgetter(1)):
-            results.add_key_frame(region, key_frame)
+    pairs = np.unique(np.stack((regions, frames), axis=1), axis=0)
+    for region, key_frame in pairs.tolist():
+        results.add_key_frame(region, key_frame)
@@ -0,0 +1,136 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+a reader streaming grayscale crops of a region of a video, frame by frame,
+from a single ffmpeg process
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+# set up linting conditions
+# pylint: disable = c-extension-no-member
+# pylint: disable = import-error
+import subprocess
+import os
+import pathlib
+
+import numpy as np
+import ffmpeg
+
+from cgt.io.ffmpegbase import FfmpegBase
+from cgt.util import config
+
+def counted_frames(frames, cancelled=None, progress=None):
+    """
+    pass on frames, stopping if cancelled and reporting the number passed
+        Args:
+            frames (iterator): (frame number, np.array) pairs
+            cancelled (threading.Event): if not None the frames stop when it is set
+            progress (function): if not None called with the number of frames passed
+        Yields:
+            (int, np.array) the frame number and frame
+    """
+    for count, frame in enumerate(frames):
+        if cancelled is not None and cancelled.is_set():
+            return
+
+        yield frame
+
+        if progress is not None and count%10 == 0:
+            progress(count)
+
+class RegionFrameReader(FfmpegBase):
+    """
+    stream the frames of a region of a video as grayscale arrays, the crop
+    and conversion are done by ffmpeg so only the region is piped
+    """
+
+    ## the pixel format and number of bytes
+    PIX_FMT = ('gray', 1)
+
+    def __init__(self, file_name, user_frame_rate, rect, parent=None):
+        """
+        set up the object
+            Args:
+                file_name (str): the path and name of video file
+                user_frame_rate (float): the frame rate provided by user
+                rect ((int, int, int, int)): the left, top, width and height of the region,
+                                             None for the whole frame
+                parent (QObject): parent object
+        """
+        super().__init__(file_name, parent)
+
+        self.probe_video(user_frame_rate, RegionFrameReader.PIX_FMT[1])
+
+        if rect is None:
+            rect = (0, 0, self._video_data.get_width(), self._video_data.get_height())
+
+        left = max(int(rect[0]), 0)
+        top = max(int(rect[1]), 0)
+
+        ## the left, top, width and height of the crop, within the frame
+        self._rect = (left,
+                      top,
+                      min(int(rect[2]), self._video_data.get_width() - left),
+                      min(int(rect[3]), self._video_data.get_height() - top))
+
+    def get_rect(self):
+        """
+        getter for the crop
+            Returns:
+                (int, int, int, int) the left, top, width and height
+        """
+        return self._rect
+
+    def read_frames(self, start, end):
+        """
+        generate the crops of a run of frames, the ffmpeg process is
+        stopped if the generator is closed early
+            Args:
+                start (int): the first frame
+                end (int): the last frame
+            Yields:
+                (int, np.array) the frame number and the crop, rows by columns of uint8
+        """
+        left, top, width, height = self._rect
+        end = min(end, self._video_data.get_frame_count() - 1)
+        if end < start or width < 1 or height < 1:
+            return
+
+        args = (ffmpeg
+                .input(self._file_name, ss=self._video_data.frame_to_internal_time(start))
+                .crop(left, top, width, height)
+                .output('pipe:',
+                        format='rawvideo',
+                        pix_fmt=RegionFrameReader.PIX_FMT[0],
+                        vframes=end - start + 1)
+                .compile())
+
+        # make path for ffmpeg's logs
+        error_path = pathlib.Path(os.devnull)
+        if config.USE_FFMPEG_LOG:
+            error_path = pathlib.Path("ffmpeg_log.txt")
+
+        frame_size = width*height
+        with error_path.open('a') as f_err:
+            with subprocess.Popen(args, stdout=subprocess.PIPE, stderr=f_err) as process:
+                try:
+                    for frame in range(start, end + 1):
+                        in_bytes = process.stdout.read(frame_size)
+                        if len(in_bytes) < frame_size:
+                            return
+                        yield frame, np.frombuffer(in_bytes, dtype=np.uint8).reshape(height, width)
+                finally:
+                    process.kill()
@@ -30,7 +30,7 @@ import ffmpeg
 import PyQt5.QtGui as qg
 
 from cgt.io.ffmpegbase import FfmpegBase
-from cgt.util.scenegraphitems import get_rect_even_dimensions
+from cgt.util.scenegraphitems import (get_rect_even_dimensions, drift_rect)
 
 class RegionVideoCopy(FfmpegBase):
     """
@@ -111,18 +111,19 @@ class RegionVideoCopy(FfmpegBase):
 
     def save_frame(self, in_bytes, frame_number):
         """
-        save the region images in the frame
+        save the region images in the frame, the crops follow the stage drift
             Args:
                 in_bytes (bytes): the raw frame
                 frame_number (int): the frame number
         """
-        regions = self._project["results"].get_regions()
+        results = self._project["results"]
+        offset = results.get_drift_offset(frame_number)
         frame = f"_{frame_number:0>4}.png"
         image = self.make_image(in_bytes)
-        for i, region in enumerate(regions):
+        for i, region in enumerate(results.get_regions()):
             name = f"{self._name_root}_{i}{frame}"
             file_path = pathlib.Path(self._tmp_dir.name).joinpath(name)
-            out_image = image.copy(get_rect_even_dimensions(region))
+            out_image = image.copy(drift_rect(get_rect_even_dimensions(region), offset))
             out_image.save(str(file_path))
 
     def finish_conversion(self):
@@ -0,0 +1,391 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+functions for rendering the report graphs and images in worker processes,
+only matplotlib's Agg backend and numpy are used so no GUI is required
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+import os
+import threading
+import multiprocessing
+from concurrent.futures import (Future, ProcessPoolExecutor)
+
+import numpy as np
+import matplotlib.image as mpimg
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+def displacement_series(marker):
+    """
+    convert the displacements of a marker to cumulative plotting data
+        Args:
+            marker ([ScreenDisplacement]): the displacements of one marker
+        Returns:
+            ([int], [float]): the frame numbers and cumulative displacements
+    """
+    displacements = [0.0]
+    frames = [0]
+    for dis in marker:
+        displacements.append(displacements[-1] + dis.get_length())
+        frames.append(dis.get_end())
+
+    return frames, displacements
+
+def plot_displacements(axes, line_series, point_series, region):
+    """
+    plot the time displacement graphs
+        Args:
+            axes (matplotlib.axes.Axes): the axes
+            line_series ([([int], [float])]): frames and displacements of each line
+            point_series ([([int], [float])]): frames and displacements of each point
+            region (int): the region
+    """
+    axes.cla()
+    axes.set_title(f'Marker Displacements Frame {region}')
+    axes.set_ylabel("Displacement (micron)")
+    axes.set_xlabel("Frame (number)")
+
+    for i, series in enumerate(line_series):
+        axes.plot(series[0], series[1], label=f"Line {i}")
+
+    for i, series in enumerate(point_series):
+        axes.plot(series[0], series[1], label=f"Point {i}")
+
+    if len(line_series) or len(point_series):
+        axes.legend()
+
+def plot_intensities(axes, means, std_dev):
+    """
+    plot the mean intensities, and standard deviation bounds, against time
+        Args:
+            axes (matplotlib.axes.Axes): the axes
+            means ([float]): the mean intensity of each frame
+            std_dev ([float]): the standard deviation of intensity of each frame
+    """
+    upper = [means[a]+x for a, x in enumerate(std_dev)]
+    lower = [means[a]-x for a, x in enumerate(std_dev)]
+    x_vals = range(0, len(means))
+
+    axes.plot(x_vals, means, label=r'$\mu$')
+    axes.plot(x_vals, lower, label=r"-$\sigma$")
+    axes.plot(x_vals, upper, label=r"$\sigma$")
+    axes.fill_between(x_vals, lower, upper, alpha=0.2)
+
+def label_intensities(axes):
+    """
+    add the axes labels, title and legend to an intensities graph
+        Args:
+            axes (matplotlib.axes.Axes): the axes
+    """
+    axes.set_xlabel('Frame')
+    axes.set_ylabel('Pixel Intensity')
+    axes.set_title('Mean Intensitites')
+    axes.set_ylim(0, 256)
+
+    axes.legend()
+
+def plot_segmentation(axes, frames, areas, perimeters, region):
+    """
+    plot the area, and on a second axis the perimeter, of a region's crystal against time
+        Args:
+            axes (matplotlib.axes.Axes): the axes
+            frames ([int]): the frame numbers
+            areas ([float]): the area of the crystal in each frame, micron squared
+            perimeters ([float]): the perimeter of the crystal in each frame, micron
+            region (int): the region
+    """
+    for extra in axes.figure.axes:
+        if extra is not axes:
+            extra.remove()
+
+    axes.cla()
+    axes.set_title(f'Crystal Area Region {region}')
+    axes.set_ylabel("Area (micron squared)")
+    axes.set_xlabel("Frame (number)")
+    area_line = axes.plot(frames, areas, color="tab:blue", label="Area")
+
+    perimeter_axes = axes.twinx()
+    perimeter_axes.set_ylabel("Perimeter (micron)")
+    perimeter_line = perimeter_axes.plot(frames, perimeters, color="tab:orange", label="Perimeter")
+
+    if len(frames) > 0:
+        lines = area_line + perimeter_line
+        axes.legend(lines, [x.get_label() for x in lines])
+
+def make_figure(width=5, height=4, dpi=100):
+    """
+    make an Agg canvas holding a figure with one set of axes
+        Args:
+            width (float): width in inches
+            height (float); height in inches
+            dpi (float): dots per inch
+        Returns:
+            (FigureCanvasAgg, matplotlib.axes.Axes)
+    """
+    fig = Figure(figsize=(width, height), dpi=dpi)
+    axes = fig.add_subplot(111)
+    return FigureCanvasAgg(fig), axes
+
+def render_displacements_png(file_name, line_series, point_series, region):
+    """
+    render a displacements graph to a png file
+        Args:
+            file_name (str): the output file
+            line_series ([([int], [float])]): frames and displacements of each line
+            point_series ([([int], [float])]): frames and displacements of each point
+            region (int): the region
+        Returns:
+            (str): the file name
+    """
+    canvas, axes = make_figure()
+    plot_displacements(axes, line_series, point_series, region)
+    canvas.print_png(file_name)
+
+    return file_name
+
+def render_segmentation_png(file_name, frames, areas, perimeters, region):
+    """
+    render a crystal area graph to a png file
+        Args:
+            file_name (str): the output file
+            frames ([int]): the frame numbers
+            areas ([float]): the area of the crystal in each frame, micron squared
+            perimeters ([float]): the perimeter of the crystal in each frame, micron
+            region (int): the region
+        Returns:
+            (str): the file name
+    """
+    canvas, axes = make_figure()
+    plot_segmentation(axes, frames, areas, perimeters, region)
+    canvas.print_png(file_name)
+
+    return file_name
+
+def render_intensities_png(file_name, means, std_dev):
+    """
+    render the intensities graph to a png file
+        Args:
+            file_name (str): the output file
+            means ([float]): the mean intensity of each frame
+            std_dev ([float]): the standard deviation of intensity of each frame
+        Returns:
+            (str): the file name
+    """
+    canvas, axes = make_figure()
+    plot_intensities(axes, means, std_dev)
+    label_intensities(axes)
+    canvas.print_png(file_name)
+
+    return file_name
+
+def save_image_array(file_name, array, quality=85):
+    """
+    encode an image to file, format from the file extension
+        Args:
+            file_name (str): the output file
+            array (np.array uint8): the image (height, width, 3)
+            quality (int): the quality of lossy (jpg, webp) encodings
+        Returns:
+            (str): the file name
+    """
+    pil_kwargs = None
+    if str(file_name).lower().endswith((".jpg", ".jpeg", ".webp")):
+        pil_kwargs = {"quality": quality}
+
+    mpimg.imsave(file_name, array, pil_kwargs=pil_kwargs)
+
+    return file_name
+
+def downscale_array(array, width):
+    """
+    reduce an image to at most width pixels wide by averaging blocks of pixels
+        Args:
+            array (np.array uint8): the image (height, width, 3)
+            width (int): the maximum width
+        Returns:
+            (np.array uint8): the reduced image, the original if already small enough
+    """
+    factor = -(-array.shape[1]//width)
+    if factor <= 1:
+        return array
+
+    height = (array.shape[0]//factor)*factor
+    length = (array.shape[1]//factor)*factor
+    if height == 0:
+        return array[::factor, ::factor]
+
+    blocks = array[:height, :length].reshape(height//factor, factor,
+                                             length//factor, factor,
+                                             array.shape[2])
+    return blocks.mean(axis=(1, 3)).round().astype(np.uint8)
+
+def save_image_tiers(file_name, thumbnail_name, array, width, quality=85):
+    """
+    encode an image and its thumbnail to file, formats from the file extensions
+        Args:
+            file_name (str): the output file
+            thumbnail_name (str): the output file for the thumbnail
+            array (np.array uint8): the image (height, width, 3)
+            width (int): the maximum width of the thumbnail
+            quality (int): the quality of lossy (jpg, webp) encodings
+        Returns:
+            (str): the file name
+    """
+    save_image_array(file_name, array, quality)
+    save_image_array(thumbnail_name, downscale_array(array, width), quality)
+
+    return file_name
+
+class RenderCancelled(Exception):
+    """
+    raised when work is submitted to a pool that has been cancelled
+    """
+
+class RenderPool():
+    """
+    a process pool for rendering, with one worker the jobs are run
+    in the calling process
+    """
+
+    def __init__(self, workers=None, job_done=None):
+        """
+        initialize the object
+            Args:
+                workers (int): the number of processes, None for one per cpu
+                job_done (callable): called with no arguments as each job
+                                     finishes, possibly from another thread
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        ## the number of worker processes
+        self._workers = max(1, workers)
+
+        ## the pool, made on first use
+        self._executor = None
+
+        ## futures of jobs submitted and not yet collected
+        self._pending = []
+
+        ## function called as each job finishes
+        self._job_done = job_done
+
+        ## set if the pool has been cancelled
+        self._cancelled = threading.Event()
+
+    def __enter__(self):
+        """
+        enter a context
+        """
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        exit a context, waiting for any remaining jobs
+        """
+        self.shutdown(exc_type is not None)
+
+    def submit(self, function, *args):
+        """
+        submit a job, function must be a picklable module level function
+            Args:
+                function (callable): the job
+                args: arguments for the function
+            Returns:
+                (concurrent.futures.Future)
+            Throws:
+                RenderCancelled: if the pool has been cancelled
+        """
+        if self._cancelled.is_set():
+            raise RenderCancelled("rendering cancelled")
+
+        if self._workers == 1:
+            future = Future()
+            try:
+                future.set_result(function(*args))
+            except Exception as error: # pylint: disable = broad-except
+                future.set_exception(error)
+        else:
+            if self._executor is None:
+                context = multiprocessing.get_context("spawn")
+                self._executor = ProcessPoolExecutor(self._workers, mp_context=context)
+            future = self._executor.submit(function, *args)
+
+        if self._job_done is not None:
+            future.add_done_callback(self.notify_done)
+
+        self._pending.append(future)
+        return future
+
+    def notify_done(self, future):
+        """
+        pass on the completion of a job
+            Args:
+                future (concurrent.futures.Future): the finished job
+        """
+        if not future.cancelled():
+            self._job_done()
+
+    def cancel(self):
+        """
+        cancel the pool, can be called from any thread, jobs that have not
+        started are abandoned and further submissions raise RenderCancelled
+        """
+        self._cancelled.set()
+        for future in list(self._pending):
+            future.cancel()
+
+    def is_cancelled(self):
+        """
+        getter for the cancelled state
+            Returns:
+                True if the pool has been cancelled, else False
+        """
+        return self._cancelled.is_set()
+
+    def wait(self):
+        """
+        wait for all submitted jobs to finish
+            Throws:
+                RenderCancelled: if the pool was cancelled
+                any exception raised by a job
+        """
+        pending = self._pending
+        self._pending = []
+        for future in pending:
+            if future.cancelled():
+                continue
+            future.result()
+
+        if self._cancelled.is_set():
+            raise RenderCancelled("rendering cancelled")
+
+    def shutdown(self, cancel=False):
+        """
+        stop the pool
+            Args:
+                cancel (bool): if True jobs not yet started are cancelled
+        """
+        cancel = cancel or self._cancelled.is_set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=cancel)
+            self._executor = None
+
+        if not cancel:
+            self.wait()
+
+        self._pending = []
@@ -0,0 +1,110 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+measure the crystal in every region of a video by segmentation, in a background
+thread, from a single decode of the frames
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+# set up linting conditions
+# pylint: disable = c-extension-no-member
+# pylint: disable = import-error
+import threading
+
+import numpy as np
+import ffmpeg
+
+import PyQt5.QtCore as qc
+
+from cgt.io.regionframereader import counted_frames
+from cgt.model.resultsdata import SEGMENT_DTYPE
+from cgt.util.segmentation import segment_frames
+
+class SegmentationMaker(qc.QObject):
+    """
+    worker measuring the crystal in each region, to be moved to a QThread
+    """
+
+    ## the number of frames read so far
+    frames_read = qc.pyqtSignal(int)
+
+    ## the measurements, an array of SEGMENT_DTYPE
+    segmentation_finished = qc.pyqtSignal(object)
+
+    ## segmentation failed, with a message
+    segmentation_failed = qc.pyqtSignal(str)
+
+    ## segmentation was cancelled
+    segmentation_cancelled = qc.pyqtSignal()
+
+    def __init__(self, reader, rects, start, end, threshold=None, bright=True, parent=None):
+        """
+        initialize the object
+            Args:
+                reader (RegionFrameReader): the source of frames, cropped to the bounding_rect of the regions
+                rects ([(int, int, int, int)]): the left, top, width and height of each region in the video
+                start (int): the first frame
+                end (int): the last frame
+                threshold (float): the grey level separating crystal and background,
+                                   None to find each region's by Otsu's method
+                bright (bool): if True the crystal is brighter than the background
+                parent (QObject): parent object
+        """
+        super().__init__(parent)
+
+        ## the source of frames
+        self._reader = reader
+
+        ## the regions, in the coordinates of the reader's crop
+        left, top, _, _ = reader.get_rect()
+        self._rects = [(x[0] - left, x[1] - top, x[2], x[3]) for x in rects]
+
+        ## the first and last frames
+        self._frames = (start, end)
+
+        ## the grey level separating crystal and background
+        self._threshold = threshold
+
+        ## True if the crystal is brighter than the background
+        self._bright = bright
+
+        ## set to stop the analysis
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """
+        stop the analysis, safe to call from any thread
+        """
+        self._cancelled.set()
+
+    @qc.pyqtSlot()
+    def run(self):
+        """
+        measure the crystals and signal the outcome
+        """
+        try:
+            frames = counted_frames(self._reader.read_frames(*self._frames),
+                                    self._cancelled,
+                                    self.frames_read.emit)
+            rows = segment_frames(frames, self._rects, self._threshold, self._bright)
+        except (OSError, ValueError, ffmpeg.Error) as error:
+            self.segmentation_failed.emit(str(error))
+            return
+
+        if self._cancelled.is_set():
+            self.segmentation_cancelled.emit()
+        else:
+            self.segmentation_finished.emit(np.array(rows, dtype=SEGMENT_DTYPE))
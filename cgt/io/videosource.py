@@ -71,6 +71,18 @@ class VideoSource(FfmpegBase):
         time = self._video_data.frame_to_internal_time(frame)
         return self.get_pixmap_at(time)
 
+    def get_image(self, frame):
+        """
+        get the image for the frame, unlike pixmaps images can be used
+        outside the GUI thread
+            Args:
+                frame (int): the time in user fps
+            Returns:
+                (QImage): the frame
+        """
+        time = self._video_data.frame_to_internal_time(frame)
+        return self.get_image_at(time)
+
     def get_pixmap_at(self, time):
         """
         getter for the pixmap at a given time (user frame rate):
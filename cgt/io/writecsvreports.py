@@ -19,18 +19,92 @@ This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
 @copyright 2020
 @author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
 '''
-import pathlib
+import os
 import csv
+import time
+import pathlib
+import tempfile
+import contextlib
+
+import numpy as np
+
+from cgt.model.markertracks import make_marker_tracks
+from cgt.model.velocitiescalculator import calculate_all_speeds
+from cgt.model.videoanalysisresultsstore import ChangeTypes
+from cgt.util import config
+from cgt.util.markers import MarkerTypes
+from cgt.util.scenegraphitems import rect_to_tuple
+
+## all the parts of a project saved in csv files
+ALL_PARTS = (ChangeTypes.REGIONS |
+             ChangeTypes.LINES |
+             ChangeTypes.POINTS |
+             ChangeTypes.STATISTICS |
+             ChangeTypes.SEGMENTATION |
+             ChangeTypes.DRIFT |
+             ChangeTypes.INFO)
+
+def csv_file_path(project, name):
+    """
+    get the path of one of a project's csv files
+        Args:
+            project (CGTProject): the project
+            name (str): the name of the file after the program and project names
+        Returns:
+            (pathlib.Path)
+    """
+    path = pathlib.Path(project["proj_full_path"])
+    return path.joinpath(project["prog"] + r"_" + project["proj_name"] + r"_" + name)
 
-from cgt.util.scenegraphitems import (rect_to_tuple,
-                                      g_point_to_tuple,
-                                      g_line_to_tuple)
+def needs_saving(project, parts, part, name):
+    """
+    find if a file must be written
+        Args:
+            project (CGTProject): the project
+            parts (ChangeTypes): the parts to be saved
+            part (ChangeTypes): the part held in the file
+            name (str): the name of the file after the program and project names
+        Returns:
+            True if the part is to be saved or the file does not exist
+    """
+    return part in parts or not csv_file_path(project, name).exists()
 
-def save_csv_project(project):
+@contextlib.contextmanager
+def open_atomic(file_path):
+    """
+    open a file for writing via a temporary file in the same directory,
+    which replaces the file only when it is complete
+        Args:
+            file_path (pathlib.Path): the file
+        Returns:
+            (file) the temporary file open for writing
+        Throws:
+            IOException if the file cannot be written
+    """
+    start = time.perf_counter()
+    handle, tmp_name = tempfile.mkstemp(suffix=".tmp", dir=file_path.parent)
+    try:
+        with os.fdopen(handle, "w", encoding="UTF-8") as fout:
+            yield fout
+            fout.flush()
+            os.fsync(fout.fileno())
+
+        os.replace(tmp_name, file_path)
+    except BaseException:
+        pathlib.Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+    if config.SAVE_TIMING_LOG:
+        with open("save_timing_log.txt", "a", encoding="UTF-8") as log:
+            log.write(f"{file_path.name}, {time.perf_counter() - start:.6f}\n")
+
+def save_csv_project(project, changed_only=False):
     """
     save a project as a selection of csv reports.
         Args:
             project (CGTProject) the project to be saved
+            changed_only (bool) if True only the files of parts changed since the
+                                last save, or missing files, are written
         Returns:
             None
         Throws:
@@ -39,14 +113,21 @@ def save_csv_project(project):
     if project is None:
         return
 
-    save_csv_results(project)
-    save_csv_info(project)
+    parts = ALL_PARTS
+    if changed_only:
+        parts = project.get_changed_parts()
+
+    save_csv_results(project, parts)
+
+    if needs_saving(project, parts, ChangeTypes.INFO, "project_info.csv"):
+        save_csv_info(project)
 
-def save_csv_results(project):
+def save_csv_results(project, parts=ALL_PARTS):
     '''
     Save the results, if any, from a project.
         Args:
             project (CGTProject): the project holding the results, must not be None
+            parts (ChangeTypes): the parts to be saved, missing files are always written
         Returns:
             None
         Throws:
@@ -57,10 +138,28 @@ def save_csv_results(project):
     if results is None:
         return
 
-    if results.get_video_statistics() is not None:
-        save_csv_video_statistics(project, results.get_video_statistics())
+    stats = results.get_video_statistics()
+    if stats is not None and needs_saving(project,
+                                          parts,
+                                          ChangeTypes.STATISTICS,
+                                          "video_statistics.csv"):
+        save_csv_video_statistics(project, stats)
 
-    save_csv_growth_rates(project)
+    segmentation = results.get_segmentation()
+    if segmentation is None:
+        if ChangeTypes.SEGMENTATION in parts:
+            csv_file_path(project, "segmentation.csv").unlink(missing_ok=True)
+    elif needs_saving(project, parts, ChangeTypes.SEGMENTATION, "segmentation.csv"):
+        save_csv_segmentation(project, segmentation)
+
+    drift = results.get_drift()
+    if drift is None:
+        if ChangeTypes.DRIFT in parts:
+            csv_file_path(project, "drift.csv").unlink(missing_ok=True)
+    elif needs_saving(project, parts, ChangeTypes.DRIFT, "drift.csv"):
+        save_csv_drift(project, drift)
+
+    save_csv_growth_rates(project, parts)
 
 def save_csv_video_statistics(project, stats):
     """
@@ -71,10 +170,7 @@ def save_csv_video_statistics(project, stats):
         Throws:
             IOException if file cannot be opened
     """
-    path = pathlib.Path(project["proj_full_path"])
-    csv_outfile_name = project["prog"] + r"_" + project["proj_name"] + r"_video_statistics.csv"
-
-    with open(path.joinpath(csv_outfile_name), "w", encoding="UTF-8") as fout:
+    with open_atomic(csv_file_path(project, "video_statistics.csv")) as fout:
         writer = csv.writer(fout, delimiter=',', lineterminator='\n')
         headers = ["Mean", "Std. Dev."]+[str(x) for x in stats.get_bins()[1:]]
         writer.writerow(headers)
@@ -85,17 +181,55 @@ def save_csv_video_statistics(project, stats):
             array.extend(item.bin_counts)
             writer.writerow(array)
 
-def save_csv_growth_rates(project):
+def save_csv_segmentation(project, segmentation):
+    """
+    save the crystal measurements, sizes are in pixels and centroids in region coordinates
+        Args:
+            project (CGTProject)
+            segmentation (np.array): SEGMENT_DTYPE rows
+        Throws:
+            IOException if file cannot be opened
+    """
+    headers = ["region", "frame", "area", "perimeter", "centroid_x", "centroid_y"]
+    with open_atomic(csv_file_path(project, "segmentation.csv")) as fout:
+        writer = csv.writer(fout, delimiter=',', lineterminator='\n')
+        writer.writerow(headers)
+
+        writer.writerows(segmentation.tolist())
+
+def save_csv_drift(project, drift):
+    """
+    save the stage drift, the shift in pixels of each frame from the reference frame
+        Args:
+            project (CGTProject)
+            drift (np.array): DRIFT_DTYPE rows
+        Throws:
+            IOException if file cannot be opened
+    """
+    headers = ["frame", "x", "y"]
+    with open_atomic(csv_file_path(project, "drift.csv")) as fout:
+        writer = csv.writer(fout, delimiter=',', lineterminator='\n')
+        writer.writerow(headers)
+
+        writer.writerows(drift.tolist())
+
+def save_csv_growth_rates(project, parts=ALL_PARTS):
     """
     save everything except the video statistics
         Args:
             project (CGTProject) the project object
+            parts (ChangeTypes) the parts to be saved, missing files are always written
         Throws:
             IOException if file cannot be opened
     """
-    save_csv_regions(project)
-    save_csv_lines(project)
-    save_csv_points(project)
+    if needs_saving(project, parts, ChangeTypes.REGIONS, "regions.csv"):
+        save_csv_regions(project)
+
+    if needs_saving(project, parts, ChangeTypes.LINES, "lines.csv"):
+        save_csv_lines(project)
+
+    if needs_saving(project, parts, ChangeTypes.POINTS, "points.csv"):
+        save_csv_points(project)
 
 def save_csv_info(info):
     '''Creates the csv report file for info.
@@ -104,10 +238,7 @@ def save_csv_info(info):
         Throws:
             IOException if file cannot be opened
     '''
-    path = pathlib.Path(info["proj_full_path"])
-    csv_outfile_name = info["prog"] + r"_" + info["proj_name"] + r"_project_info.csv"
-
-    with open(path.joinpath(csv_outfile_name), "w", encoding="UTF-8") as fout:
+    with open_atomic(csv_file_path(info, "project_info.csv")) as fout:
         writer = csv.writer(fout, delimiter=',', lineterminator='\n')
         for key, value in info.items():
             if not key == "results":
@@ -121,12 +252,11 @@ def save_csv_regions(project):
         Throws:
             IOException if file cannot be opened
     """
-    path = pathlib.Path(project["proj_full_path"])
-    csv_outfile_name = project["prog"] + r"_" + project["proj_name"] + r"_regions.csv"
+    csv_outfile = csv_file_path(project, "regions.csv")
     results = project["results"]
 
     headers = ["ID", "Left", "Top", "Width", "Height"]
-    with open(path.joinpath(csv_outfile_name), 'w', encoding="UTF-8") as fout:
+    with open_atomic(csv_outfile) as fout:
         writer = csv.writer(fout, delimiter=',', lineterminator='\n')
         writer.writerow(headers)
 
@@ -143,21 +273,15 @@ def save_csv_points(project):
         Throws:
             IOException if file cannot be opened
     """
-    path = pathlib.Path(project["proj_full_path"])
-    csv_outfile_name = project["prog"] + r"_" + project["proj_name"] + r"_points.csv"
+    csv_outfile = csv_file_path(project, "points.csv")
     results = project["results"]
 
     headers = ["ID", "x", "y", "pos_x", "pos_y", "frame", "region"]
-    with open(path.joinpath(csv_outfile_name), 'w', encoding="UTF-8") as fout:
+    with open_atomic(csv_outfile) as fout:
         writer = csv.writer(fout, delimiter=',', lineterminator='\n')
         writer.writerow(headers)
 
-        for i, points_array in enumerate(results.get_points()):
-            for point in points_array:
-                point_data = g_point_to_tuple(point)
-                point_data = [i] + point_data
-
-                writer.writerow(point_data)
+        writer.writerows(results.get_marker_rows(MarkerTypes.POINT).tolist())
 
 def save_csv_lines(project):
     """
@@ -167,18 +291,73 @@ def save_csv_lines(project):
         Throws:
             IOException if file cannot be opened
     """
-    path = pathlib.Path(project["proj_full_path"])
-    csv_outfile_name = project["prog"] + r"_" + project["proj_name"] + r"_lines.csv"
+    csv_outfile = csv_file_path(project, "lines.csv")
     results = project["results"]
 
     headers = ["ID", "x1", "y1", "x2", "y2", "pos_x", "pos_y", "frame", "region"]
-    with open(path.joinpath(csv_outfile_name), 'w', encoding="UTF-8") as fout:
+    with open_atomic(csv_outfile) as fout:
         writer = csv.writer(fout, delimiter=',', lineterminator='\n')
         writer.writerow(headers)
 
-        for i, line_array in enumerate(results.get_lines()):
-            for line in line_array:
-                line_data = g_line_to_tuple(line)
-                line_data = [i] + line_data
+        writer.writerows(results.get_marker_rows(MarkerTypes.LINE).tolist())
+
+def save_csv_speeds(project):
+    """
+    print out the average and least-squares speeds of the markers in each region to csv file
+        Args:
+            project (CGTProject) the project object
+        Throws:
+            IOException if file cannot be opened
+    """
+    csv_outfile = csv_file_path(project, "speeds.csv")
+    results = project["results"]
+
+    headers = ["region", "ID", "type", "speed",
+               "fitted_speed", "std_error", "interval_95", "r_squared"]
+    with open_atomic(csv_outfile) as fout:
+        writer = csv.writer(fout, delimiter=',', lineterminator='\n')
+        writer.writerow(headers)
+
+        speeds = calculate_all_speeds(results, project["frame_rate"], project["resolution"])
+        averages = speeds.get_average_speeds()
+        fits = speeds.get_fitted_speeds()
+        for region, marker_id, m_type, speed, *fit in zip(averages["region"].tolist(),
+                                                          averages["ID"].tolist(),
+                                                          averages["type"].tolist(),
+                                                          averages["speed"].tolist(),
+                                                          fits["speed"].tolist(),
+                                                          fits["std_error"].tolist(),
+                                                          fits["interval"].tolist(),
+                                                          fits["r_squared"].tolist()):
+            writer.writerow([region, marker_id, MarkerTypes(m_type).name, speed, *fit])
+
+def save_csv_marker_tracks(project):
+    """
+    print out the line and point markers of each region interpolated to every
+    frame between their first and last key frames, in the scene coordinates
+    of the regions
+        Args:
+            project (CGTProject) the project object
+        Throws:
+            IOException if file cannot be opened
+    """
+    results = project["results"]
+
+    line_headers = ["region", "ID", "frame", "x1", "y1", "x2", "y2", "angle", "distance"]
+    point_headers = ["region", "ID", "frame", "x", "y"]
+    with open_atomic(csv_file_path(project, "line_tracks.csv")) as line_out, \
+         open_atomic(csv_file_path(project, "point_tracks.csv")) as point_out:
+        line_writer = csv.writer(line_out, delimiter=',', lineterminator='\n')
+        line_writer.writerow(line_headers)
+        point_writer = csv.writer(point_out, delimiter=',', lineterminator='\n')
+        point_writer.writerow(point_headers)
+
+        for index in range(len(results.get_regions())):
+            tracks = make_marker_tracks(results, index)
+            frame_range = tracks.get_frame_range()
+            if frame_range is None:
+                continue
 
-                writer.writerow(line_data)
+            frames = np.arange(frame_range[0], frame_range[1] + 1)
+            line_writer.writerows(tracks.lines_at(frames).tolist())
+            point_writer.writerows(tracks.points_at(frames).tolist())
@@ -41,13 +41,154 @@ def get_python_args():
                         action='store_true',
                         help="if set write ffmpeg log files to file")
 
+    parser.add_argument("-b",
+                        "--binary",
+                        action='store_true',
+                        help="if set save projects as a single binary file")
+
+    parser.add_argument("--sqlite",
+                        action='store_true',
+                        help="if set hold the results of open projects in an sqlite database")
+
     parser.add_argument("-t",
                         "--test",
                         action='store_true',
                         help="run the test suite instead of main window")
 
+    subparsers = parser.add_subparsers(dest="command",
+                                       help="run without the main window, (default: gui)")
+
+    subparsers.add_parser("gui", help="run the main window")
+
+    report = subparsers.add_parser("report",
+                                   help="write the speeds csv file and html report of projects")
+    add_batch_arguments(report)
+    report.add_argument("-s",
+                        "--statistics",
+                        action='store_true',
+                        help="calculate the video statistics of projects that have none")
+    report.add_argument("--compact",
+                        action='store_true',
+                        help="show thumbnails of video frames linked to the full size images")
+    report.add_argument("--embed",
+                        action='store_true',
+                        help="write the report as a single html file with the images embedded")
+    report.add_argument("--frame-format",
+                        choices=["jpg", "webp"],
+                        default="jpg",
+                        help="file type of video frames in compact or embedded reports")
+
+    convert = subparsers.add_parser("convert",
+                                    help="save projects as csv files or a single binary file")
+    add_batch_arguments(convert)
+    convert.add_argument("--to",
+                         choices=["csv", "binary"],
+                         required=True,
+                         help="the format to be saved")
+
+    stats = subparsers.add_parser("stats",
+                                  help="calculate the video statistics of projects")
+    add_batch_arguments(stats)
+    stats.add_argument("--force",
+                       action='store_true',
+                       help="replace existing statistics")
+
+    kymographs = subparsers.add_parser("kymographs",
+                                       help="build kymographs across the line markers of projects")
+    add_batch_arguments(kymographs)
+
+    segment = subparsers.add_parser("segment",
+                                    help="measure the crystal area in every region of projects")
+    add_batch_arguments(segment)
+
+    tracks = subparsers.add_parser("tracks",
+                                   help="write the markers of projects interpolated to every frame as csv files")
+    add_batch_arguments(tracks)
+
+    drift = subparsers.add_parser("drift",
+                                  help="find the stage drift of projects, compensating their marker speeds")
+    add_batch_arguments(drift)
+
+    enhance = subparsers.add_parser("enhance",
+                                    help="make the enhanced videos of projects from their raw videos")
+    add_batch_arguments(enhance)
+
     return parser.parse_args()
 
+def add_batch_arguments(parser):
+    """
+    add the arguments common to commands that process project directories
+        Args:
+            parser (argparse.ArgumentParser): the command's parser
+    """
+    parser.add_argument("projects",
+                        type=str,
+                        nargs='+',
+                        help="project directory paths")
+
+    parser.add_argument("-w",
+                        "--workers",
+                        type=int,
+                        default=None,
+                        help="number of projects processed in parallel (default: one per cpu)")
+
+def run_batch_command(parsed_args):
+    """
+    process project directories without the main window
+        Args:
+            parsed_args (argparse.Namespace): parsed command line arguments
+        Returns:
+            (int) the exit status, 0 if every project was processed
+    """
+    from cgt.io import batchjobs
+    from cgt.io.htmlreport import ReportOptions
+    from cgt.util import config
+
+    if parsed_args.log_ffmpeg:
+        config.USE_FFMPEG_LOG = True
+
+    tasks = []
+    report_options = None
+    if parsed_args.command == "report":
+        tasks = [batchjobs.SPEEDS, batchjobs.REPORT]
+        if parsed_args.statistics:
+            tasks.append(batchjobs.STATISTICS)
+        report_options = ReportOptions(parsed_args.compact,
+                                       parsed_args.embed,
+                                       parsed_args.frame_format,
+                                       config.REPORT_THUMBNAIL_WIDTH)
+    elif parsed_args.command == "convert":
+        if parsed_args.to == "binary":
+            tasks = [batchjobs.SAVE_BINARY]
+        else:
+            tasks = [batchjobs.SAVE_CSV]
+    elif parsed_args.command == "kymographs":
+        tasks = [batchjobs.KYMOGRAPHS]
+    elif parsed_args.command == "segment":
+        tasks = [batchjobs.SEGMENTATION]
+    elif parsed_args.command == "tracks":
+        tasks = [batchjobs.TRACKS]
+    elif parsed_args.command == "drift":
+        tasks = [batchjobs.DRIFT]
+    elif parsed_args.command == "enhance":
+        tasks = [batchjobs.ENHANCE]
+    elif parsed_args.force:
+        tasks = [batchjobs.FORCE_STATISTICS]
+    else:
+        tasks = [batchjobs.STATISTICS]
+
+    def print_result(result):
+        status = "done" if result.success else "FAILED"
+        print(f"{result.project_dir}: {status}: {result.message}", flush=True)
+
+    results = batchjobs.run_batch(parsed_args.projects,
+                                  tasks,
+                                  parsed_args.workers,
+                                  print_result,
+                                  report_options)
+
+    return 0 if all(x.success for x in results) else 1
+
 def main():
     """
     run the application or the tests
@@ -55,19 +196,31 @@ def main():
     # imports in main function so that if the file is run as a script
     # the imports will not occure until the location of cgt directory
     # has been appended to sys.path
+    parsed_args = get_python_args()
+
+    if parsed_args.binary:
+        from cgt.util import config
+        config.PROJECT_FORMAT = "binary"
+
+    if parsed_args.sqlite:
+        from cgt.util import config
+        config.RESULTS_STORE = "sqlite"
+
+    if parsed_args.command in ("report", "stats", "convert", "kymographs",
+                               "segment", "drift", "tracks", "enhance"):
+        sys.exit(run_batch_command(parsed_args))
+
     from cgt.cgt_app import CGTApp
     from cgt.tests.videosource_ffmpeg_test import test_video_source
     from cgt.tests.run_unittests import run_all_tests
 
-    parsed_args = get_python_args()
-
     if parsed_args.test:
         print("Running FFmpeg tests\n------------------\n")
         test_video_source()
         print("\nRunning Unittests\n------------------\n")
         run_all_tests()
     else:
-        CGTApp(sys.argv, get_python_args())
+        CGTApp(sys.argv, parsed_args)
 
 if __name__ == "__main__":
     # if this file is run as a script location of the 
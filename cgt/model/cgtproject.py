@@ -25,6 +25,7 @@ import getpass
 import numpy as np
 
 from cgt.util.utils import timestamp, find_hostname_and_ip
+from cgt.model.videoanalysisresultsstore import ChangeTypes
 
 class CGTProject(dict):
     """
@@ -186,6 +187,22 @@ class CGTProject(dict):
         if self["results"] is not None:
             self["results"].reset_changed()
 
+    def get_changed_parts(self):
+        """
+        get the parts of the project changed since the last save
+
+            Return:
+                (ChangeTypes) the flags, INFO if the dictionary has changed
+        """
+        parts = ChangeTypes(0)
+        if self._changed:
+            parts |= ChangeTypes.INFO
+
+        if self["results"] is not None:
+            parts |= self["results"].get_changed_parts()
+
+        return parts
+
     def has_been_changed(self):
         """
         getter for the current changed status
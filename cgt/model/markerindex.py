@@ -0,0 +1,266 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+an index of the line or point markers, from the hash codes of the instances to
+their place in the markers array, so that an instance can be found without hashing
+every item, and from the region index to the markers in the region
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+import bisect
+
+class MarkerIndex():
+    """
+    maps the hash code of each instance to (marker index, position), where a
+    hash code occurs more than once the first marker holding it is given, with
+    the last position in that marker, matching a search of the markers array;
+    and maps each region index to the indices of its markers in ascending order
+    """
+
+    def __init__(self):
+        """
+        initialize an empty index
+        """
+        ## the hash codes of the instances of each marker, parallel to the markers array
+        self._hashes = []
+
+        ## map of hash code to (marker index, position)
+        self._index = {}
+
+        ## the number of instances with each hash code
+        self._counts = {}
+
+        ## the region index of each marker, parallel to the markers array
+        self._regions = []
+
+        ## map of region index to the ascending indices of the region's markers
+        self._region_markers = {}
+
+    def clear(self):
+        """
+        empty the index
+        """
+        self._hashes = []
+        self._index = {}
+        self._counts = {}
+        self._regions = []
+        self._region_markers = {}
+
+    def find(self, hash_code):
+        """
+        find an instance
+            Args:
+                hash_code (int): the hash code of the instance
+            Returns:
+                (int, int) the marker index and position, or None if not found
+        """
+        return self._index.get(hash_code)
+
+    def get_hashes(self, index):
+        """
+        getter for the hash codes of a marker, which must not be changed
+            Args:
+                index (int): the marker index
+            Returns:
+                ([int]) the hash codes in the order of the marker
+        """
+        return self._hashes[index]
+
+    def get_region_markers(self, region):
+        """
+        getter for the markers in a region, which must not be changed
+            Args:
+                region (int): the region index
+            Returns:
+                ([int]) the ascending marker indices
+        """
+        return self._region_markers.get(region, [])
+
+    def append_marker(self, hashes, region):
+        """
+        add a marker to the end of the array
+            Args:
+                hashes ([int]): the hash codes of the marker's instances in order
+                region (int): the region index of the marker
+        """
+        self._hashes.append(list(hashes))
+        self.add_entries(len(self._hashes) - 1)
+
+        self._regions.append(region)
+        self._region_markers.setdefault(region, []).append(len(self._regions) - 1)
+
+    def insert_marker(self, index, hashes, region):
+        """
+        insert a marker into the array, the markers from index on move up one place
+            Args:
+                index (int): the marker index
+                hashes ([int]): the hash codes of the marker's instances in order
+                region (int): the region index of the marker
+        """
+        for i in reversed(range(index, len(self._hashes))):
+            for position, hash_code in enumerate(self._hashes[i]):
+                if self._index.get(hash_code) == (i, position):
+                    self._index[hash_code] = (i + 1, position)
+
+        self._hashes.insert(index, list(hashes))
+        self.add_entries(index)
+
+        for markers in self._region_markers.values():
+            start = bisect.bisect_left(markers, index)
+            for i in range(start, len(markers)):
+                markers[i] += 1
+
+        self._regions.insert(index, region)
+        bisect.insort(self._region_markers.setdefault(region, []), index)
+
+    def set_marker(self, index, hashes):
+        """
+        replace the hash codes of a marker after it has been changed
+            Args:
+                index (int): the marker index
+                hashes ([int]): the hash codes of the marker's instances in order
+        """
+        old = self.remove_entries(index)
+        self._hashes[index] = list(hashes)
+        self.add_entries(index)
+        self.relocate(old)
+
+    def delete_marker(self, index):
+        """
+        remove a marker, the markers after it move down one place
+            Args:
+                index (int): the marker index
+        """
+        old = self.remove_entries(index)
+        del self._hashes[index]
+
+        for i in range(index, len(self._hashes)):
+            for position, hash_code in enumerate(self._hashes[i]):
+                if self._index.get(hash_code) == (i + 1, position):
+                    self._index[hash_code] = (i, position)
+
+        self.relocate(old)
+
+        region = self._regions.pop(index)
+        self._region_markers[region].remove(index)
+        if len(self._region_markers[region]) == 0:
+            del self._region_markers[region]
+
+        for markers in self._region_markers.values():
+            start = bisect.bisect_right(markers, index)
+            for i in range(start, len(markers)):
+                markers[i] -= 1
+
+    def remove_region(self, region):
+        """
+        renumber the regions after a region has been removed, the region
+        must hold no markers
+            Args:
+                region (int): the index of the region removed
+            Returns:
+                ([int]) the ascending indices of the markers whose region index was reduced
+        """
+        renumbered = []
+        region_markers = {}
+        for key, markers in self._region_markers.items():
+            if key > region:
+                renumbered.extend(markers)
+                region_markers[key - 1] = markers
+            else:
+                region_markers[key] = markers
+
+        self._region_markers = region_markers
+        renumbered.sort()
+        for i in renumbered:
+            self._regions[i] -= 1
+
+        return renumbered
+
+    def insert_region(self, region):
+        """
+        renumber the regions after a region has been inserted, reversing remove_region
+            Args:
+                region (int): the index of the region inserted
+            Returns:
+                ([int]) the ascending indices of the markers whose region index was increased
+        """
+        renumbered = []
+        region_markers = {}
+        for key, markers in self._region_markers.items():
+            if key >= region:
+                renumbered.extend(markers)
+                region_markers[key + 1] = markers
+            else:
+                region_markers[key] = markers
+
+        self._region_markers = region_markers
+        renumbered.sort()
+        for i in renumbered:
+            self._regions[i] += 1
+
+        return renumbered
+
+    def add_entries(self, index):
+        """
+        add the instances of a marker to the index
+            Args:
+                index (int): the marker index
+        """
+        for position, hash_code in enumerate(self._hashes[index]):
+            self._counts[hash_code] = self._counts.get(hash_code, 0) + 1
+
+            current = self._index.get(hash_code)
+            if current is None or current[0] >= index:
+                self._index[hash_code] = (index, position)
+
+    def remove_entries(self, index):
+        """
+        remove the instances of a marker from the index
+            Args:
+                index (int): the marker index
+            Returns:
+                ([int]) the hash codes removed
+        """
+        hashes = self._hashes[index]
+        for hash_code in hashes:
+            count = self._counts[hash_code] - 1
+            if count == 0:
+                del self._counts[hash_code]
+            else:
+                self._counts[hash_code] = count
+
+            current = self._index.get(hash_code)
+            if current is not None and current[0] == index:
+                del self._index[hash_code]
+
+        return hashes
+
+    def relocate(self, hashes):
+        """
+        find the remaining instances of hash codes that have lost their
+        entries, only hash codes held by more than one instance are searched for
+            Args:
+                hashes ([int]): the hash codes
+        """
+        for hash_code in hashes:
+            if hash_code in self._index or hash_code not in self._counts:
+                continue
+
+            for i, marker_hashes in enumerate(self._hashes):
+                if hash_code in marker_hashes:
+                    position = len(marker_hashes) - 1 - marker_hashes[::-1].index(hash_code)
+                    self._index[hash_code] = (i, position)
+                    break
@@ -0,0 +1,189 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+the saved data of a line or point marker held as a numpy structured array,
+so that the graphics items need not be made until the marker is displayed
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+import numpy as np
+
+from cgt.model.resultsdata import (LINE_DTYPE,
+                                   POINT_DTYPE,
+                                   rows_item_hashes,
+                                   rows_digest)
+from cgt.util.markers import MarkerTypes
+from cgt.util.scenegraphitems import (list_to_g_line,
+                                      list_to_g_point,
+                                      g_line_to_tuple,
+                                      g_point_to_tuple)
+
+class MarkerRecord():
+    """
+    the data of one line or point marker, in each of its key frames,
+    the object is not changed after construction
+    """
+
+    def __init__(self, marker_type, rows, pen, digest=None):
+        """
+        initialize the object
+            Args:
+                marker_type (MarkerTypes): LINE or POINT
+                rows (np.array): LINE_DTYPE or POINT_DTYPE rows, sorted by frame
+                pen (QPen): the pen for drawing the marker
+                digest (int): the digest of the rows, if None it is calculated
+        """
+        ## the type of marker
+        self._marker_type = marker_type
+
+        ## the rows, one per key frame
+        self._rows = rows
+
+        ## the drawing pen
+        self._pen = pen
+
+        ## the region index
+        self._region = int(rows["region"][0])
+
+        if digest is None:
+            digest = self.calculate_digest()
+
+        ## the sum of hash_marker_in_region for the items the record will make
+        self._digest = digest
+
+        ## the hash_graphics_line or hash_graphics_point of each item, made on first use
+        self._item_hashes = None
+
+    def calculate_digest(self):
+        """
+        find the digest of the rows without making the graphics items
+            Returns:
+                (int) the sum of hash_marker_in_region of the items
+        """
+        return rows_digest(self._marker_type, self._rows)
+
+    def get_item_hashes(self):
+        """
+        get the hash codes the graphics items will have, so that a marker can
+        be found by the hash of one of its items without building it
+            Returns:
+                ([int]) hash_graphics_line or hash_graphics_point of each row
+        """
+        if self._item_hashes is None:
+            self._item_hashes = rows_item_hashes(self._marker_type, self._rows)
+
+        return self._item_hashes
+
+    def get_marker_type(self):
+        """
+        getter for the marker type
+            Returns:
+                (MarkerTypes)
+        """
+        return self._marker_type
+
+    def get_region(self):
+        """
+        getter for the region index
+            Returns:
+                (int)
+        """
+        return self._region
+
+    def get_digest(self):
+        """
+        getter for the digest
+            Returns:
+                (int)
+        """
+        return self._digest
+
+    def get_pen(self):
+        """
+        getter for the drawing pen
+            Returns:
+                (QPen)
+        """
+        return self._pen
+
+    def get_rows(self):
+        """
+        getter for the rows, which must not be changed
+            Returns:
+                (np.array) LINE_DTYPE or POINT_DTYPE
+        """
+        return self._rows
+
+    def get_frames(self):
+        """
+        getter for the key frames of the marker
+            Returns:
+                ([int])
+        """
+        return self._rows["frame"].tolist()
+
+    def copy_with_pen(self, pen):
+        """
+        make a copy of the record with a different pen
+            Args:
+                pen (QPen): the new pen
+            Returns:
+                (MarkerRecord)
+        """
+        return MarkerRecord(self._marker_type, self._rows, pen, self._digest)
+
+    def copy_with_region(self, region):
+        """
+        make a copy of the record with a different region index
+            Args:
+                region (int): the new region index
+            Returns:
+                (MarkerRecord)
+        """
+        rows = self._rows.copy()
+        rows["region"] = region
+        return MarkerRecord(self._marker_type, rows, self._pen)
+
+    def build(self):
+        """
+        make the graphics items of the marker
+            Returns:
+                ([QGraphicsLineItem] or [QGraphicsPathItem]) the items in order of frame
+        """
+        if self._marker_type == MarkerTypes.LINE:
+            return [list_to_g_line(row, self._pen) for row in self._rows.tolist()]
+
+        return [list_to_g_point(row, self._pen) for row in self._rows.tolist()]
+
+def marker_to_rows(marker_type, marker, marker_id):
+    """
+    convert a marker to rows in the layout of the csv files
+        Args:
+            marker_type (MarkerTypes): LINE or POINT
+            marker ([QGraphicsItem] or MarkerRecord): the marker
+            marker_id (int): the ID of the marker
+        Returns:
+            (np.array) LINE_DTYPE or POINT_DTYPE rows
+    """
+    if isinstance(marker, MarkerRecord):
+        rows = marker.get_rows().copy()
+        rows["ID"] = marker_id
+        return rows
+
+    if marker_type == MarkerTypes.LINE:
+        return np.array([(marker_id, *g_line_to_tuple(x)) for x in marker], dtype=LINE_DTYPE)
+
+    return np.array([(marker_id, *g_point_to_tuple(x)) for x in marker], dtype=POINT_DTYPE)
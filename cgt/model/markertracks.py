@@ -0,0 +1,231 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+the positions of the line and point markers of a region at any frame,
+interpolated linearly between their key frames, the key frame values are
+held as flat arrays so the markers at a frame, or at many frames, are
+found in one vectorized pass
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+import numpy as np
+
+from cgt.model.velocitiescalculator import perpendicular_distances
+from cgt.util.markers import MarkerTypes
+
+## the columns of the line tracks csv file, end points are in the scene
+## coordinates of the region, the angle is in degrees in [0, 180) and the
+## distance is the perpendicular distance of the line's position in pixels
+LINE_TRACK_DTYPE = np.dtype([("region", np.int64),
+                             ("ID", np.int64),
+                             ("frame", np.int64),
+                             ("x1", np.float64),
+                             ("y1", np.float64),
+                             ("x2", np.float64),
+                             ("y2", np.float64),
+                             ("angle", np.float64),
+                             ("distance", np.float64)])
+
+## the columns of the point tracks csv file, in the scene coordinates of the region
+POINT_TRACK_DTYPE = np.dtype([("region", np.int64),
+                              ("ID", np.int64),
+                              ("frame", np.int64),
+                              ("x", np.float64),
+                              ("y", np.float64)])
+
+def track_steps(key_frames, starts, frames):
+    """
+    find for each pair of frame and marker, with the frame in the marker's
+    run of key frames, the key frames either side and the fraction between
+        Args:
+            key_frames (np.array): the frame of each row, by marker then frame
+            starts (np.array): the first row of each marker and the number of rows
+            frames (np.array): the frames wanted
+        Returns:
+            (np.array, np.array, np.array, np.array, np.array) the marker, frame,
+                the rows before and after, and the fraction, in order of frame then marker
+    """
+    count = len(starts) - 1
+    frame, marker = np.meshgrid(np.asarray(frames, dtype=np.int64),
+                                np.arange(count),
+                                indexing="ij")
+    frame = frame.reshape(-1)
+    marker = marker.reshape(-1)
+
+    inside = ((frame >= key_frames[starts[:-1]][marker]) &
+              (frame <= key_frames[starts[1:] - 1][marker]))
+    frame = frame[inside]
+    marker = marker[inside]
+
+    # offset each marker's frames so all the rows can be searched at once
+    lowest = key_frames.min()
+    span = int(key_frames.max() - lowest) + 1
+    keys = np.repeat(np.arange(count), np.diff(starts))*span + key_frames - lowest
+    before = np.searchsorted(keys, marker*span + frame - lowest, side="right") - 1
+    after = np.minimum(before + 1, starts[marker + 1] - 1)
+
+    gap = (key_frames[after] - key_frames[before]).astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = np.where(gap > 0.0, (frame - key_frames[before])/gap, 0.0)
+
+    return marker, frame, before, after, fraction
+
+class MarkerTracks():
+    """
+    the line and point markers of a region, interpolated to any frame within
+    each marker's first and last key frames, lines by their centre, length
+    and orientation and points by their position
+    """
+
+    def __init__(self, lines, points):
+        """
+        initialize the object
+            Args:
+                lines ([np.array]): the LINE_DTYPE rows of each line marker
+                points ([np.array]): the POINT_DTYPE rows of each point marker
+        """
+        lines = [x[np.argsort(x["frame"], kind="stable")] for x in lines if len(x) > 0]
+        points = [x[np.argsort(x["frame"], kind="stable")] for x in points if len(x) > 0]
+
+        ## the region, ID, key frames, row starts and values of the lines
+        self._lines = None
+        if len(lines) > 0:
+            rows = np.concatenate(lines)
+            del_x = rows["x2"] - rows["x1"]
+            del_y = rows["y2"] - rows["y1"]
+            values = np.stack((0.5*(rows["x1"] + rows["x2"]) + rows["pos_x"],
+                               0.5*(rows["y1"] + rows["y2"]) + rows["pos_y"],
+                               np.hypot(del_x, del_y),
+                               np.arctan2(del_y, del_x),
+                               perpendicular_distances(rows, 1.0)), axis=1)
+            self._lines = MarkerTracks.make_arrays(lines, rows, values)
+
+        ## the region, ID, key frames, row starts and values of the points
+        self._points = None
+        if len(points) > 0:
+            rows = np.concatenate(points)
+            values = np.stack((rows["x"] + rows["pos_x"], rows["y"] + rows["pos_y"]), axis=1)
+            self._points = MarkerTracks.make_arrays(points, rows, values)
+
+    @staticmethod
+    def make_arrays(markers, rows, values):
+        """
+        make the arrays used to interpolate one type of marker
+            Args:
+                markers ([np.array]): the rows of each marker, in order of frame
+                rows (np.array): the rows of all the markers
+                values (np.array): the values to interpolate, a row for each row
+            Returns:
+                (dict) the region and ID of each marker, and the frames, starts and values
+        """
+        starts = np.zeros(len(markers) + 1, dtype=np.int64)
+        starts[1:] = np.cumsum([len(x) for x in markers])
+
+        return {"region": rows["region"][starts[:-1]],
+                "ID": rows["ID"][starts[:-1]],
+                "frames": rows["frame"].astype(np.int64),
+                "starts": starts,
+                "values": values}
+
+    def get_frame_range(self):
+        """
+        get the first and last key frames of all the markers
+            Returns:
+                (int, int) or None if there are no markers
+        """
+        frames = [x["frames"] for x in (self._lines, self._points) if x is not None]
+        if len(frames) == 0:
+            return None
+
+        return (int(min(x.min() for x in frames)), int(max(x.max() for x in frames)))
+
+    def lines_at(self, frames):
+        """
+        find the lines at a number of frames
+            Args:
+                frames (np.array or int): the frames
+            Returns:
+                (np.array) LINE_TRACK_DTYPE in order of frame and marker
+        """
+        if self._lines is None:
+            return np.empty(0, dtype=LINE_TRACK_DTYPE)
+
+        arrays = self._lines
+        marker, frame, before, after, fraction = track_steps(arrays["frames"],
+                                                             arrays["starts"],
+                                                             np.atleast_1d(frames))
+        first = arrays["values"][before]
+        last = arrays["values"][after]
+        values = first + fraction[:, np.newaxis]*(last - first)
+
+        # orientations turn the shorter way, lines having no direction
+        turn = (last[:, 3] - first[:, 3] + 0.5*np.pi)%np.pi - 0.5*np.pi
+        angle = first[:, 3] + fraction*turn
+        half_x = 0.5*values[:, 2]*np.cos(angle)
+        half_y = 0.5*values[:, 2]*np.sin(angle)
+
+        tracks = np.empty(len(marker), dtype=LINE_TRACK_DTYPE)
+        tracks["region"] = arrays["region"][marker]
+        tracks["ID"] = arrays["ID"][marker]
+        tracks["frame"] = frame
+        tracks["x1"] = values[:, 0] - half_x
+        tracks["y1"] = values[:, 1] - half_y
+        tracks["x2"] = values[:, 0] + half_x
+        tracks["y2"] = values[:, 1] + half_y
+        tracks["angle"] = np.degrees(angle)%180.0
+        tracks["distance"] = values[:, 4]
+
+        return tracks
+
+    def points_at(self, frames):
+        """
+        find the points at a number of frames
+            Args:
+                frames (np.array or int): the frames
+            Returns:
+                (np.array) POINT_TRACK_DTYPE in order of frame and marker
+        """
+        if self._points is None:
+            return np.empty(0, dtype=POINT_TRACK_DTYPE)
+
+        arrays = self._points
+        marker, frame, before, after, fraction = track_steps(arrays["frames"],
+                                                             arrays["starts"],
+                                                             np.atleast_1d(frames))
+        first = arrays["values"][before]
+        last = arrays["values"][after]
+        values = first + fraction[:, np.newaxis]*(last - first)
+
+        tracks = np.empty(len(marker), dtype=POINT_TRACK_DTYPE)
+        tracks["region"] = arrays["region"][marker]
+        tracks["ID"] = arrays["ID"][marker]
+        tracks["frame"] = frame
+        tracks["x"] = values[:, 0]
+        tracks["y"] = values[:, 1]
+
+        return tracks
+
+def make_marker_tracks(results, index):
+    """
+    make the tracks of the markers of a region
+        Args:
+            results (VideoAnalysisResultsStore or ResultsData): the results
+            index (int): the region index
+        Returns:
+            (MarkerTracks)
+    """
+    return MarkerTracks(results.get_marker_rows_for_region(MarkerTypes.LINE, index),
+                        results.get_marker_rows_for_region(MarkerTypes.POINT, index))
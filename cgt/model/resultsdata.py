@@ -0,0 +1,378 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+the results of a video analysis held as numpy structured arrays, with no use
+of Qt, so that the results can be read, hashed and analysed without PyQt; the
+graphics items used for display are made from the rows when needed
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+import numpy as np
+
+from cgt.util.markers import (MarkerTypes,
+                              hash_line_values,
+                              hash_point_values,
+                              hash_region_values,
+                              hash_in_region,
+                              hash_videointensitystats,
+                              hash_drift,
+                              hash_segmentation,
+                              hash_results_parts,
+                              digest_values,
+                              combine_digests)
+
+## the columns of the lines csv file
+LINE_DTYPE = np.dtype([("ID", np.int64),
+                       ("x1", np.float64),
+                       ("y1", np.float64),
+                       ("x2", np.float64),
+                       ("y2", np.float64),
+                       ("pos_x", np.float64),
+                       ("pos_y", np.float64),
+                       ("frame", np.int64),
+                       ("region", np.int64)])
+
+## the columns of the points csv file
+POINT_DTYPE = np.dtype([("ID", np.int64),
+                        ("x", np.float64),
+                        ("y", np.float64),
+                        ("pos_x", np.float64),
+                        ("pos_y", np.float64),
+                        ("frame", np.int64),
+                        ("region", np.int64)])
+
+## the columns of the regions csv file
+REGION_DTYPE = np.dtype([("x", np.float64),
+                         ("y", np.float64),
+                         ("width", np.float64),
+                         ("height", np.float64)])
+
+## the columns of the segmentation csv file, sizes in pixels and the centroid in region coordinates
+SEGMENT_DTYPE = np.dtype([("region", np.int64),
+                          ("frame", np.int64),
+                          ("area", np.float64),
+                          ("perimeter", np.float64),
+                          ("centroid_x", np.float64),
+                          ("centroid_y", np.float64)])
+
+## the columns of the drift csv file, the shift in pixels of the content of
+## each frame from the reference frame
+DRIFT_DTYPE = np.dtype([("frame", np.int64),
+                        ("x", np.float64),
+                        ("y", np.float64)])
+
+def split_marker_rows(rows):
+    """
+    sort the rows of a csv file by region, ID and frame and split them into markers
+        Args:
+            rows (np.array): LINE_DTYPE or POINT_DTYPE rows
+        Returns:
+            ([np.array]) the rows of each marker, in order of region and ID
+    """
+    if len(rows) == 0:
+        return []
+
+    rows = rows[np.lexsort((rows["frame"], rows["ID"], rows["region"]))]
+    starts = np.flatnonzero((np.diff(rows["ID"]) != 0) | (np.diff(rows["region"]) != 0)) + 1
+
+    return np.split(rows, starts)
+
+def rows_item_hashes(marker_type, rows):
+    """
+    get the hash codes the graphics items made from rows would have
+        Args:
+            marker_type (MarkerTypes): LINE or POINT
+            rows (np.array): LINE_DTYPE or POINT_DTYPE rows
+        Returns:
+            ([int]) hash_graphics_line or hash_graphics_point of each row
+    """
+    if marker_type == MarkerTypes.LINE:
+        return [hash_line_values(*row[1:8]) for row in rows.tolist()]
+
+    return [hash_point_values(*row[1:6]) for row in rows.tolist()]
+
+def rows_digest(marker_type, rows):
+    """
+    find the digest of rows, equal to the sum of hash_marker_in_region for
+    the graphics items made from them
+        Args:
+            marker_type (MarkerTypes): LINE or POINT
+            rows (np.array): LINE_DTYPE or POINT_DTYPE rows
+        Returns:
+            (int) the digest
+    """
+    hashes = rows_item_hashes(marker_type, rows)
+    return combine_digests(hash_in_region(code, region)
+                           for code, region in zip(hashes, rows["region"].tolist()))
+
+def regions_digest(regions):
+    """
+    find the combined digest of regions, equal to the sum of hash_indexed_region
+        Args:
+            regions (np.array): REGION_DTYPE rows in order of index
+        Returns:
+            (int) the digest
+    """
+    return combine_digests(digest_values(hash_region_values(*row), i)
+                           for i, row in enumerate(regions.tolist()))
+
+def segmentation_for_region(segmentation, index):
+    """
+    select the crystal measurements of one region
+        Args:
+            segmentation (np.array): SEGMENT_DTYPE rows, or None
+            index (int): the region index
+        Returns:
+            (np.array) SEGMENT_DTYPE rows in order of frame, empty if none
+    """
+    if segmentation is None:
+        return np.empty(0, dtype=SEGMENT_DTYPE)
+
+    rows = segmentation[segmentation["region"] == index]
+    return rows[np.argsort(rows["frame"], kind="stable")]
+
+def drift_at_frames(drift, frames):
+    """
+    find the drift at a number of frames, interpolated between the frames
+    measured and held constant beyond them
+        Args:
+            drift (np.array): DRIFT_DTYPE rows in order of frame, or None
+            frames (np.array): the frame numbers
+        Returns:
+            (np.array, np.array) the x and y shifts, zero if there is no drift
+    """
+    frames = np.asarray(frames, dtype=np.float64)
+    if drift is None or len(drift) == 0:
+        return np.zeros(frames.shape), np.zeros(frames.shape)
+
+    return (np.interp(frames, drift["frame"], drift["x"]),
+            np.interp(frames, drift["frame"], drift["y"]))
+
+class ResultsData():
+    """
+    a copy of the contents of a results store as arrays of rows, the lines
+    and points of each region are found when the object is made
+    """
+
+    def __init__(self, regions, lines, points, key_frames=None, video_statistics=None,
+                 segmentation=None, drift=None):
+        """
+        initialize the object
+            Args:
+                regions (np.array): REGION_DTYPE rows in order of index
+                lines (np.array): LINE_DTYPE rows
+                points (np.array): POINT_DTYPE rows
+                key_frames (dict): region index to the list of key frames
+                video_statistics (VideoIntensityStats): the statistics or None
+                segmentation (np.array): SEGMENT_DTYPE rows or None
+                drift (np.array): DRIFT_DTYPE rows in order of frame or None
+        """
+        ## the regions
+        self._regions = regions
+
+        ## the line rows
+        self._lines = lines
+
+        ## the point rows
+        self._points = points
+
+        ## the key frames of each region
+        self._key_frames = {} if key_frames is None else key_frames
+
+        ## the intensity statistics of the video
+        self._video_statistics = video_statistics
+
+        ## the crystal area, perimeter and centroid of each region in each frame
+        self._segmentation = segmentation
+
+        ## the stage drift of each frame
+        self._drift = drift
+
+        ## the rows of each line marker, keyed by region index
+        self._region_lines = self.partition(lines)
+
+        ## the rows of each point marker, keyed by region index
+        self._region_points = self.partition(points)
+
+    @staticmethod
+    def from_store(store):
+        """
+        make a copy of the contents of a results store, without making any
+        graphics items for markers held as records
+            Args:
+                store (VideoAnalysisResultsStore): the store
+            Returns:
+                (ResultsData)
+        """
+        key_frames = {}
+        for region in range(len(store.get_regions())):
+            frames = store.get_key_frames(region)
+            if frames is not None:
+                key_frames[region] = list(frames)
+
+        return ResultsData(store.get_region_rows(),
+                           store.get_marker_rows(MarkerTypes.LINE),
+                           store.get_marker_rows(MarkerTypes.POINT),
+                           key_frames,
+                           store.get_video_statistics(),
+                           store.get_segmentation(),
+                           store.get_drift())
+
+    @staticmethod
+    def partition(rows):
+        """
+        split rows into markers and group the markers by region
+            Args:
+                rows (np.array): LINE_DTYPE or POINT_DTYPE rows
+            Returns:
+                (dict) region index to the list of marker rows, in order of ID
+        """
+        partition = {}
+        for marker in split_marker_rows(rows):
+            partition.setdefault(int(marker["region"][0]), []).append(marker)
+
+        return partition
+
+    def get_regions(self):
+        """
+        getter for the regions
+            Returns:
+                (np.array) REGION_DTYPE
+        """
+        return self._regions
+
+    def get_marker_rows(self, marker_type):
+        """
+        getter for all the lines or points
+            Args:
+                marker_type (MarkerTypes): LINE or POINT
+            Returns:
+                (np.array) LINE_DTYPE or POINT_DTYPE rows
+        """
+        if marker_type == MarkerTypes.LINE:
+            return self._lines
+
+        return self._points
+
+    def get_marker_rows_for_region(self, marker_type, index):
+        """
+        get the rows of each line or point marker in a region
+            Args:
+                marker_type (MarkerTypes): LINE or POINT
+                index (int): the region index
+            Returns:
+                ([np.array]) the rows of each marker, sorted by frame
+        """
+        if marker_type == MarkerTypes.LINE:
+            return self._region_lines.get(index, [])
+
+        return self._region_points.get(index, [])
+
+    def get_region_markers_digest(self, index):
+        """
+        find the digest of the line and point instances of a region, equal
+        to that of the store copied
+            Args:
+                index (int): the region index
+            Returns:
+                (int) the digest, 0 if the region has no markers
+        """
+        digests = [rows_digest(MarkerTypes.LINE, x) for x in self._region_lines.get(index, [])]
+        digests.extend(rows_digest(MarkerTypes.POINT, x) for x in self._region_points.get(index, []))
+
+        return combine_digests(digests)
+
+    def get_key_frames(self, region_index):
+        """
+        getter for the key frames of a region
+            Args:
+                region_index (int): the region index
+            Returns:
+                ([int]) the key frames or None
+        """
+        return self._key_frames.get(region_index)
+
+    def get_video_statistics(self):
+        """
+        getter for the video statistics
+            Returns:
+                (VideoIntensityStats) or None
+        """
+        return self._video_statistics
+
+    def get_segmentation(self):
+        """
+        getter for the crystal measurements
+            Returns:
+                (np.array) SEGMENT_DTYPE rows or None
+        """
+        return self._segmentation
+
+    def get_segmentation_for_region(self, index):
+        """
+        get the crystal measurements of a region
+            Args:
+                index (int): the region index
+            Returns:
+                (np.array) SEGMENT_DTYPE rows in order of frame, empty if none
+        """
+        return segmentation_for_region(self._segmentation, index)
+
+    def get_drift(self):
+        """
+        getter for the stage drift
+            Returns:
+                (np.array) DRIFT_DTYPE rows in order of frame or None
+        """
+        return self._drift
+
+    def get_drift_offset(self, frame):
+        """
+        get the shift of the content of a frame from the reference frame
+            Args:
+                frame (int): the frame number
+            Returns:
+                (float, float) the x and y shift in pixels, zero if there is no drift
+        """
+        del_x, del_y = drift_at_frames(self._drift, [frame])
+        return float(del_x[0]), float(del_y[0])
+
+    def get_drift_digest(self):
+        """
+        find the digest of the stage drift, equal to that of the store copied
+            Returns:
+                (int) the digest, 0 if there is no drift
+        """
+        return hash_drift(self._drift)
+
+    def get_results_digest(self):
+        """
+        find the digest of the results, equal to that of the store copied
+            Returns:
+                (int) the hash code
+        """
+        statistics = None
+        if self._video_statistics is not None:
+            statistics = hash_videointensitystats(self._video_statistics)
+
+        markers = (rows_digest(MarkerTypes.LINE, self._lines) +
+                   rows_digest(MarkerTypes.POINT, self._points))
+
+        return hash_results_parts(statistics,
+                                  combine_digests([markers]),
+                                  regions_digest(self._regions),
+                                  hash_segmentation(self._segmentation),
+                                  hash_drift(self._drift))
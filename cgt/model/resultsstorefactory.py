@@ -0,0 +1,36 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+make the results store set in config
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+from cgt.model.videoanalysisresultsstore import VideoAnalysisResultsStore
+from cgt.model.sqliteresultsstore import SQLiteResultsStore
+from cgt.util import config
+
+def make_results_store(parent=None):
+    """
+    make an empty results store of the type set by config.RESULTS_STORE
+        Args:
+            parent (QObject): the Qt parent
+        Returns:
+            (VideoAnalysisResultsStore) a VideoAnalysisResultsStore or SQLiteResultsStore
+    """
+    if config.RESULTS_STORE == "sqlite":
+        return SQLiteResultsStore(parent)
+
+    return VideoAnalysisResultsStore(parent)
@@ -0,0 +1,189 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+a cache of the speeds of the markers of each region, shared by the results
+tab and the reports, an entry is found by the region index and the digest of
+the region's markers so copies of a store, made for background jobs, can use
+the speeds calculated from the original
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+import threading
+from collections import (OrderedDict, namedtuple)
+
+from cgt.util import config
+from cgt.model.velocitiescalculator import calculate_speeds
+from cgt.model.videoanalysisresultsstore import ChangeTypes
+
+## the counts of the use of a speeds cache, hits includes validated
+CacheStatistics = namedtuple("CacheStatistics",
+                             ["hits", "misses", "validated", "invalidations", "size"])
+
+## the changes that can alter the speeds
+SPEEDS_CHANGES = (ChangeTypes.REGIONS |
+                  ChangeTypes.LINES |
+                  ChangeTypes.POINTS |
+                  ChangeTypes.DRIFT)
+
+class SpeedsCache():
+    """
+    the speeds of regions, keyed by region index, the digest of the region's
+    markers, the digest of the stage drift, the frame rate and the scale,
+    entries are found without finding the digest if the results store has
+    not signalled a change
+    """
+
+    def __init__(self, size=None):
+        """
+        initialize the object
+            Args:
+                size (int): the maximum number of entries, None for config.SPEEDS_CACHE_SIZE
+        """
+        ## the maximum number of entries
+        self._size = config.SPEEDS_CACHE_SIZE if size is None else size
+
+        ## the speeds tables in order of last use, keyed by (region, digest, drift digest, fps, scale)
+        self._entries = OrderedDict()
+
+        ## the results store whose data_changed signal is connected
+        self._results = None
+
+        ## the key of each region of the store known to be current, cleared
+        ## when the store changes
+        self._current = {}
+
+        ## lock, as reports use the cache from a background thread
+        self._lock = threading.Lock()
+
+        ## the numbers of hits, misses, hits found by digest and invalidations
+        self._counts = [0, 0, 0, 0]
+
+    def set_results(self, results):
+        """
+        set the results store whose data_changed signal is connected to data_changed
+            Args:
+                results (VideoAnalysisResultsStore): the store
+        """
+        with self._lock:
+            self._results = results
+            self._current.clear()
+
+    def data_changed(self, value):
+        """
+        callback for the data_changed signal of the store
+            Args:
+                value (int): the ChangeTypes flags of the parts changed
+        """
+        if not value & SPEEDS_CHANGES:
+            return
+
+        with self._lock:
+            self._current.clear()
+            self._counts[3] += 1
+
+    def clear(self):
+        """
+        remove all entries
+        """
+        with self._lock:
+            self._entries.clear()
+            self._current.clear()
+
+    def get_statistics(self):
+        """
+        getter for the counts of the use of the cache
+            Returns:
+                (CacheStatistics)
+        """
+        with self._lock:
+            return CacheStatistics(*self._counts, len(self._entries))
+
+    def get_speeds(self, index, results, fps, scale):
+        """
+        get the speeds of the markers in a region, calculating them if needed
+            Args:
+                index (int): the region index
+                results (VideoAnalysisResultsStore or ResultsData): the results
+                fps (float): the number of frames per second
+                scale (float): the size of a pixel
+            Returns:
+                (VelocitiesCalculator) the speeds of the region
+        """
+        key, table = self.find_table(index, results, fps, scale)
+        if table is None:
+            table = calculate_speeds(index, results, fps, scale).get_table()
+            self.add_table(key, table, results)
+
+        calculator = table.get_calculator(0)
+        calculator.process_latest_data()
+
+        return calculator
+
+    def find_table(self, index, results, fps, scale):
+        """
+        find the entry for a region, the digest of the region's markers is
+        only found if the store has changed or the results are a copy
+            Args:
+                index (int): the region index
+                results (VideoAnalysisResultsStore or ResultsData): the results
+                fps (float): the number of frames per second
+                scale (float): the size of a pixel
+            Returns:
+                (tuple, SpeedsTable) the key and the speeds, None if not held
+        """
+        with self._lock:
+            if results is self._results:
+                key = self._current.get(index)
+                if key is not None and key[3:] == (fps, scale) and key in self._entries:
+                    self._entries.move_to_end(key)
+                    self._counts[0] += 1
+                    return key, self._entries[key]
+
+        key = (index,
+               results.get_region_markers_digest(index),
+               results.get_drift_digest(),
+               fps,
+               scale)
+        with self._lock:
+            table = self._entries.get(key)
+            if table is None:
+                self._counts[1] += 1
+                return key, None
+
+            self._entries.move_to_end(key)
+            self._counts[0] += 1
+            self._counts[2] += 1
+            if results is self._results:
+                self._current[index] = key
+
+            return key, table
+
+    def add_table(self, key, table, results):
+        """
+        add an entry, removing the least recently used if the cache is full
+            Args:
+                key (tuple): region index, digests of the region's markers and the drift, fps and scale
+                table (SpeedsTable): the speeds of the region
+                results (VideoAnalysisResultsStore or ResultsData): the results used
+        """
+        with self._lock:
+            self._entries[key] = table
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+
+            if results is self._results:
+                self._current[key[0]] = key
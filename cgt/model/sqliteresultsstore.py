@@ -0,0 +1,1106 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+a results store holding the markers in an sqlite database, with indexed
+tables of regions, markers and marker instances, the graphics items are
+made when first needed and kept so that each instance has one item
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+# set up linting conditions
+# pylint: disable = too-many-public-methods
+# pylint: disable = c-extension-no-member
+import sqlite3
+import contextlib
+
+import numpy as np
+import PyQt5.QtGui as qg
+
+from cgt.model.markerrecord import MarkerRecord
+from cgt.model.resultsdata import (LINE_DTYPE, POINT_DTYPE)
+from cgt.model.videoanalysisresultsstore import (VideoAnalysisResultsStore,
+                                                 ChangeTypes)
+from cgt.util.scenegraphitems import (copy_graphics_region,
+                                      rect_to_tuple,
+                                      list_to_g_line,
+                                      list_to_g_point,
+                                      g_line_to_tuple,
+                                      g_point_to_tuple)
+from cgt.util.markers import (ItemDataTypes,
+                              MarkerTypes,
+                              get_parent_hash,
+                              get_frame,
+                              get_region,
+                              get_marker_type,
+                              hash_graphics_line,
+                              hash_graphics_point,
+                              hash_line_values,
+                              hash_point_values,
+                              hash_in_region,
+                              combine_digests,
+                              DIGEST_MODULUS)
+
+## the tables and indices
+SCHEMA = """
+CREATE TABLE regions (
+    id INTEGER PRIMARY KEY,
+    left REAL NOT NULL,
+    top REAL NOT NULL,
+    width REAL NOT NULL,
+    height REAL NOT NULL);
+
+CREATE TABLE markers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    type INTEGER NOT NULL,
+    region INTEGER NOT NULL);
+
+CREATE INDEX markers_by_region ON markers (type, region);
+
+CREATE TABLE instances (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    marker INTEGER NOT NULL REFERENCES markers (id),
+    type INTEGER NOT NULL,
+    hash INTEGER NOT NULL,
+    parent TEXT,
+    x1 REAL NOT NULL,
+    y1 REAL NOT NULL,
+    x2 REAL,
+    y2 REAL,
+    pos_x REAL NOT NULL,
+    pos_y REAL NOT NULL,
+    frame INTEGER NOT NULL,
+    region INTEGER NOT NULL);
+
+CREATE INDEX instances_by_hash ON instances (type, hash);
+CREATE INDEX instances_by_marker ON instances (marker, frame);
+CREATE INDEX instances_by_region ON instances (type, region, marker);
+"""
+
+## the columns of the instances table holding the values of a line
+LINE_COLUMNS = "x1, y1, x2, y2, pos_x, pos_y, frame, region"
+
+## the columns of the instances table holding the values of a point
+POINT_COLUMNS = "x1, y1, pos_x, pos_y, frame, region"
+
+## offset converting the unsigned 64 bit hash codes to sqlite's signed integers
+SIGNED_OFFSET = 2**63
+
+def to_signed(hash_code):
+    """
+    convert an unsigned 64 bit hash code to a value sqlite can hold
+        Args:
+            hash_code (int): the hash code
+        Returns:
+            (int) the signed value
+    """
+    return hash_code - SIGNED_OFFSET
+
+def encode_parent(parent):
+    """
+    convert a parent hash to text
+        Args:
+            parent (int or str): the parent hash, "p" for a progenitor, or None
+        Returns:
+            (str) or None
+    """
+    if parent is None:
+        return None
+
+    return str(parent)
+
+def decode_parent(text):
+    """
+    convert a parent hash read from the database
+        Args:
+            text (str): the parent hash as text, or None
+        Returns:
+            (int or str) the parent hash, or None
+    """
+    if text is None or text == "p":
+        return text
+
+    return int(text)
+
+class SQLiteResultsStore(VideoAnalysisResultsStore):
+    """
+    a results store keeping the line and point markers in an sqlite database,
+    the regions, key frames and video statistics are held as in the parent
+    """
+
+    def __init__(self, parent, database=":memory:"):
+        """
+        initalize an object
+            Args:
+                parent (QObject): the Qt parent
+                database (str): the database file, by default held in memory
+        """
+        super().__init__(parent)
+
+        # markers are ordered by their autoincrement id, so a marker cannot be
+        # put back in the middle of the array and changes cannot be undone
+        self._history = None
+
+        ## the database connection, transactions are begun explicitly
+        self._connection = sqlite3.connect(database, isolation_level=None)
+        self._connection.executescript(SCHEMA)
+
+        ## the depth of nested transactions
+        self._transaction_depth = 0
+
+        ## the state needed to undo the changes outside the database if
+        ## the current transaction is rolled back
+        self._rollback = None
+
+        ## the graphics items that have been made, keyed by instance id
+        self._items = {}
+
+        ## the instance ids of the graphics items that have been made
+        self._instance_ids = {}
+
+        ## the ids of the markers whose graphics items have been made
+        self._built_markers = set()
+
+        ## the pen for drawing items made from the database
+        self._pen = qg.QPen()
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        group changes to the database into one transaction, which is
+        committed when the outermost block exits and rolled back on an exception
+        """
+        if self._transaction_depth == 0:
+            self._connection.execute("BEGIN")
+            self._rollback = {"digest": self._markers_digest,
+                              "instance": self.query("SELECT MAX(id) FROM instances")[0][0] or 0,
+                              "marker": self.query("SELECT MAX(id) FROM markers")[0][0] or 0,
+                              "removed": [],
+                              "unbuilt": []}
+
+        self._transaction_depth += 1
+        try:
+            yield self._connection
+        except BaseException:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self._connection.execute("ROLLBACK")
+                self.roll_back_cache()
+            raise
+
+        self._transaction_depth -= 1
+        if self._transaction_depth == 0:
+            self._connection.execute("COMMIT")
+            self._rollback = None
+
+    def roll_back_cache(self):
+        """
+        undo the changes to the digest and the kept graphics items
+        made in a transaction that has been rolled back
+        """
+        state = self._rollback
+        self._rollback = None
+
+        self._markers_digest = state["digest"]
+
+        for instance_id in [x for x in self._items if x > state["instance"]]:
+            del self._instance_ids[self._items.pop(instance_id)]
+
+        for instance_id, item in state["removed"]:
+            self._items[instance_id] = item
+            self._instance_ids[item] = instance_id
+
+        self._built_markers = {x for x in self._built_markers if x <= state["marker"]}
+        self._built_markers.update(state["unbuilt"])
+
+    def query(self, sql, parameters=()):
+        """
+        run a query
+            Args:
+                sql (str): the query
+                parameters (tuple): the values of the query's parameters
+            Returns:
+                ([tuple]) the rows
+        """
+        return self._connection.execute(sql, parameters).fetchall()
+
+    def make_copy(self):
+        """
+        make an independent copy of the contents held in memory, so that
+        background jobs can read the results while the user continues editing
+            Returns:
+                (VideoAnalysisResultsStore): the copy, with no parent
+        """
+        store = VideoAnalysisResultsStore(None)
+
+        for region in self._regions:
+            store.add_region(copy_graphics_region(region))
+
+        # the markers keep their order, and so their array indices
+        for marker_type in (MarkerTypes.LINE, MarkerTypes.POINT):
+            rows = self.get_marker_rows(marker_type)
+            starts = np.flatnonzero(np.diff(rows["ID"])) + 1
+            for marker_rows in np.split(rows, starts) if len(rows) > 0 else []:
+                store.insert_marker_record(MarkerRecord(marker_type, marker_rows, self._pen))
+
+        for region_index, key_frames in self._key_frames.items():
+            for key_frame in key_frames:
+                store.add_key_frame(region_index, key_frame)
+
+        store.set_video_statistics(self._video_statistics)
+        store.set_segmentation(self._segmentation)
+        store.set_drift(self._drift)
+        store.reset_changed()
+
+        return store
+
+    def write_regions(self):
+        """
+        replace the contents of the regions table with the regions
+        """
+        with self.transaction() as connection:
+            connection.execute("DELETE FROM regions")
+            connection.executemany("INSERT INTO regions VALUES (?, ?, ?, ?, ?)",
+                                   [(i, *rect_to_tuple(x.rect()))
+                                    for i, x in enumerate(self._regions)])
+
+    def add_region(self, region):
+        """
+        add a region
+            Args:
+                region (QRect) the region
+        """
+        with self.transaction() as connection:
+            connection.execute("INSERT INTO regions VALUES (?, ?, ?, ?, ?)",
+                               (len(self._regions), *rect_to_tuple(region.rect())))
+            super().add_region(region)
+
+    def replace_region(self, region, index):
+        """
+        replace an existing region
+            Args:
+                rectangle (QRect) the new region
+                index (int) the list index
+            Throws:
+                IndexError: pop index out of range
+        """
+        with self.transaction():
+            super().replace_region(region, index)
+            self.write_regions()
+
+    def remove_region(self, index):
+        """
+        remove a region and its markers, the markers of the regions
+        after it have their region index reduced by one
+            Args:
+                index (int) the index of the item to be removed
+            Throws:
+                IndexError: pop index out of range
+        """
+        with self.transaction() as connection:
+            self._regions.pop(index)
+            self.update_region_digests(index)
+            self.write_regions()
+
+            for (marker_id,) in self.query("SELECT id FROM markers WHERE region = ?", (index,)):
+                self.discard_marker_id(marker_id)
+
+            renumbered = self.query("SELECT id, hash, region FROM instances WHERE region > ?",
+                                    (index,))
+            connection.execute("UPDATE instances SET region = region - 1 WHERE region > ?",
+                               (index,))
+            connection.execute("UPDATE markers SET region = region - 1 WHERE region > ?",
+                               (index,))
+
+        for instance_id, hash_code, region in renumbered:
+            hash_code += SIGNED_OFFSET
+            self.change_markers_digest(hash_in_region(hash_code, region - 1) -
+                                       hash_in_region(hash_code, region))
+
+            item = self._items.get(instance_id)
+            if item is not None:
+                item.setData(ItemDataTypes.REGION_INDEX, region - 1)
+
+        self.remove_region_key_frames(index)
+        self.remove_region_segmentation(index)
+
+        self.set_changed(ChangeTypes.REGIONS |
+                         ChangeTypes.LINES |
+                         ChangeTypes.POINTS |
+                         ChangeTypes.KEY_FRAMES)
+        self.record_change("remove_region", index=index)
+
+    def get_lines(self):
+        """
+        getter for the lines array, the graphics items of every line are made
+            Returns:
+                the lines array [[QGraphicsLineItem]]
+        """
+        return self.build_markers("type = ?", (int(MarkerTypes.LINE),))
+
+    def get_points(self):
+        """
+        getter for the points array, the graphics items of every point are made
+            Returns:
+                the points array [[QGraphicsLineItem]]
+        """
+        return self.build_markers("type = ?", (int(MarkerTypes.POINT),))
+
+    def get_line_marker(self, index):
+        """
+        getter for one line marker
+            Args:
+                index (int) the array index of the line marker
+            Returns:
+                [QGraphicsLineItem]
+            Throws:
+                IndexError if there is no such marker
+        """
+        return self.build_marker_id(self.marker_id_at(MarkerTypes.LINE, index))
+
+    def get_point_marker(self, index):
+        """
+        getter for one point marker
+            Args:
+                index (int) the array index of the point marker
+            Returns:
+                [QGraphicsPathItem]
+            Throws:
+                IndexError if there is no such marker
+        """
+        return self.build_marker_id(self.marker_id_at(MarkerTypes.POINT, index))
+
+    def marker_id_at(self, marker_type, index):
+        """
+        get the id of the marker at an array index
+            Args:
+                marker_type (MarkerTypes): LINE or POINT
+                index (int): the array index
+            Returns:
+                (int) the marker id
+            Throws:
+                IndexError if there is no such marker
+        """
+        if index is None or index < 0:
+            raise IndexError(f"marker index {index} out of range")
+
+        rows = self.query("SELECT id FROM markers WHERE type = ? ORDER BY id LIMIT 1 OFFSET ?",
+                          (int(marker_type), index))
+        if len(rows) == 0:
+            raise IndexError(f"marker index {index} out of range")
+
+        return rows[0][0]
+
+    def marker_index(self, marker_type, marker_id):
+        """
+        get the array index of a marker
+            Args:
+                marker_type (MarkerTypes): LINE or POINT
+                marker_id (int): the marker id
+            Returns:
+                (int) the array index
+        """
+        rows = self.query("SELECT COUNT(*) FROM markers WHERE type = ? AND id < ?",
+                          (int(marker_type), marker_id))
+        return rows[0][0]
+
+    def find_marker_id(self, marker_type, hash_code):
+        """
+        find the first marker holding an instance with a hash code
+            Args:
+                marker_type (MarkerTypes): LINE or POINT
+                hash_code (int): the hash code of the instance
+            Returns:
+                (int) the marker id, or None if not found
+        """
+        if not isinstance(hash_code, int):
+            return None
+
+        rows = self.query("SELECT MIN(marker) FROM instances WHERE type = ? AND hash = ?",
+                          (int(marker_type), to_signed(hash_code)))
+        return rows[0][0]
+
+    def find_index(self, marker_type, hash_code):
+        """
+        find the array index of the first marker holding an instance with a hash code
+            Args:
+                marker_type (MarkerTypes): LINE or POINT
+                hash_code (int): the hash code of the instance
+            Returns:
+                (int) the array index, or None if not found
+        """
+        marker_id = self.find_marker_id(marker_type, hash_code)
+        if marker_id is None:
+            return None
+
+        return self.marker_index(marker_type, marker_id)
+
+    def build_marker_id(self, marker_id):
+        """
+        get the graphics items of a marker, making those not yet made
+            Args:
+                marker_id (int): the marker id
+            Returns:
+                ([QGraphicsItem]) the items in order of frame
+        """
+        return self.build_markers("marker = ?", (marker_id,))[0]
+
+    def build_markers(self, condition, parameters):
+        """
+        get the graphics items of the markers whose instances meet a condition,
+        making those not yet made, with one query
+            Args:
+                condition (str): the sql condition on the instances table
+                parameters (tuple): the values of the condition's parameters
+            Returns:
+                ([[QGraphicsItem]]) the items of each marker in order of frame, the
+                                    markers in order of array index
+        """
+        rows = self.query("SELECT id, type, parent, " + LINE_COLUMNS + ", marker"
+                          " FROM instances WHERE " + condition + " ORDER BY marker, frame, id",
+                          parameters)
+
+        markers = []
+        marker_id = None
+        for row in rows:
+            if row[-1] != marker_id:
+                marker_id = row[-1]
+                markers.append([])
+                self._built_markers.add(marker_id)
+
+            item = self._items.get(row[0])
+            if item is None:
+                item = self.make_item(row[:-1])
+                self._items[row[0]] = item
+                self._instance_ids[item] = row[0]
+
+            markers[-1].append(item)
+
+        return markers
+
+    def make_item(self, row):
+        """
+        make a graphics item from a row of the instances table
+            Args:
+                row (tuple): id, type, parent and the LINE_COLUMNS
+            Returns:
+                (QGraphicsItem)
+        """
+        if row[1] == MarkerTypes.LINE:
+            item = list_to_g_line([0, *row[3:]], self._pen)
+        else:
+            x1, y1, _, _, pos_x, pos_y, frame, region = row[3:]
+            item = list_to_g_point([0, x1, y1, pos_x, pos_y, frame, region], self._pen)
+
+        item.setData(ItemDataTypes.PARENT_HASH, decode_parent(row[2]))
+
+        return item
+
+    def insert_values(self, marker_id, marker_type, values, parent):
+        """
+        add an instance to the database
+            Args:
+                marker_id (int): the marker id
+                marker_type (MarkerTypes): LINE or POINT
+                values ([float]): the values from g_line_to_tuple or g_point_to_tuple
+                parent (int or str): the parent hash or None
+            Returns:
+                (int) the instance id
+        """
+        if marker_type == MarkerTypes.LINE:
+            hash_code = hash_line_values(*values[:7])
+            row = values
+        else:
+            hash_code = hash_point_values(*values[:5])
+            row = [values[0], values[1], None, None, *values[2:]]
+
+        cursor = self._connection.execute(
+            "INSERT INTO instances (marker, type, hash, parent, " + LINE_COLUMNS + ")"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (marker_id, int(marker_type), to_signed(hash_code), encode_parent(parent), *row))
+
+        self.change_markers_digest(hash_in_region(hash_code, values[-1]))
+
+        return cursor.lastrowid
+
+    def insert_item(self, marker_id, item):
+        """
+        add a graphics item to the database and keep the item
+            Args:
+                marker_id (int): the marker id
+                item (QGraphicsItem): the line or point
+        """
+        marker_type = get_marker_type(item)
+        if marker_type == MarkerTypes.LINE:
+            values = g_line_to_tuple(item)
+        else:
+            values = g_point_to_tuple(item)
+
+        instance_id = self.insert_values(marker_id, marker_type, values, get_parent_hash(item))
+        self._items[instance_id] = item
+        self._instance_ids[item] = instance_id
+        self._pen = item.pen()
+
+    def new_marker(self, marker_type, region):
+        """
+        add an empty marker to the database
+            Args:
+                marker_type (MarkerTypes): LINE or POINT
+                region (int): the region index
+            Returns:
+                (int) the marker id
+        """
+        cursor = self._connection.execute("INSERT INTO markers (type, region) VALUES (?, ?)",
+                                          (int(marker_type), region))
+        return cursor.lastrowid
+
+    def change_markers_digest(self, change):
+        """
+        add to the running digest of markers
+            Args:
+                change (int): the amount to add, negative to remove
+        """
+        self._markers_digest = (self._markers_digest + change) % DIGEST_MODULUS
+
+    def get_region_markers_digest(self, index):
+        """
+        getter for the digest of the line and point instances of a region,
+        found from the database as the running digest is not kept by region
+            Args:
+                index (int): the region index
+            Returns:
+                (int) the digest, 0 if the region has no markers
+        """
+        rows = self.query("SELECT hash FROM instances WHERE region = ?", (index,))
+        return combine_digests(hash_in_region(x + SIGNED_OFFSET, index) for (x,) in rows)
+
+    def remove_instance(self, instance_id):
+        """
+        delete an instance from the database and the running digest
+            Args:
+                instance_id (int): the instance id
+        """
+        hash_code, region = self.query("SELECT hash, region FROM instances WHERE id = ?",
+                                       (instance_id,))[0]
+        self.change_markers_digest(-hash_in_region(hash_code + SIGNED_OFFSET, region))
+        self._connection.execute("DELETE FROM instances WHERE id = ?", (instance_id,))
+
+        item = self._items.pop(instance_id, None)
+        if item is not None:
+            del self._instance_ids[item]
+            self._rollback["removed"].append((instance_id, item))
+
+    def discard_marker_id(self, marker_id):
+        """
+        delete a marker and all its instances
+            Args:
+                marker_id (int): the marker id
+        """
+        with self.transaction() as connection:
+            for (instance_id,) in self.query("SELECT id FROM instances WHERE marker = ?",
+                                             (marker_id,)):
+                self.remove_instance(instance_id)
+
+            connection.execute("DELETE FROM markers WHERE id = ?", (marker_id,))
+            self.forget_marker(marker_id)
+
+    def forget_marker(self, marker_id):
+        """
+        remove a deleted marker from the set of built markers, must be
+        called in a transaction
+            Args:
+                marker_id (int): the marker id
+        """
+        if marker_id in self._built_markers:
+            self._built_markers.discard(marker_id)
+            self._rollback["unbuilt"].append(marker_id)
+
+    def get_marker_rows(self, marker_type):
+        """
+        get all the lines or points as one array, in the layout of the csv files
+        with the array index as ID, without making any graphics items
+            Args:
+                marker_type (MarkerTypes): LINE or POINT
+            Returns:
+                (np.array) LINE_DTYPE or POINT_DTYPE rows
+        """
+        if marker_type == MarkerTypes.LINE:
+            columns = LINE_COLUMNS
+            dtype = LINE_DTYPE
+        else:
+            columns = POINT_COLUMNS
+            dtype = POINT_DTYPE
+
+        rows = self.query("SELECT marker, " + columns +
+                          " FROM instances WHERE type = ? ORDER BY marker, frame, id",
+                          (int(marker_type),))
+
+        if len(rows) == 0:
+            return np.empty(0, dtype=dtype)
+
+        result = np.array(rows, dtype=dtype)
+        _, result["ID"] = np.unique(result["ID"], return_inverse=True)
+
+        return result
+
+    def get_marker_rows_for_region(self, marker_type, index):
+        """
+        get the rows of each line or point marker in a region, without
+        making any graphics items
+            Args:
+                marker_type (MarkerTypes): LINE or POINT
+                index (int): the region index
+            Returns:
+                ([np.array]) LINE_DTYPE or POINT_DTYPE rows of each marker,
+                             with the array index as ID
+        """
+        if marker_type == MarkerTypes.LINE:
+            columns = LINE_COLUMNS
+            dtype = LINE_DTYPE
+        else:
+            columns = POINT_COLUMNS
+            dtype = POINT_DTYPE
+
+        rows = self.query("SELECT marker, " + columns + " FROM instances"
+                          " WHERE type = ? AND region = ? ORDER BY marker, frame, id",
+                          (int(marker_type), index))
+
+        if len(rows) == 0:
+            return []
+
+        result = np.array(rows, dtype=dtype)
+        starts = np.flatnonzero(np.diff(result["ID"])) + 1
+        markers = np.split(result, starts)
+        for marker in markers:
+            marker["ID"] = self.marker_index(marker_type, int(marker["ID"][0]))
+
+        return markers
+
+    def count_unbuilt_markers(self):
+        """
+        get the number of markers whose graphics items have not been made
+            Returns:
+                (int)
+        """
+        total = self.query("SELECT COUNT(*) FROM markers")[0][0]
+        return total - len(self._built_markers)
+
+    def get_key_frames_for_points(self, index):
+        """
+        get a list of the key-frames for the point markers at index
+            Args:
+                index (int) the array index of the point marker
+            Returns:
+                array of key-frames [int]
+        """
+        return self.marker_frames(self.marker_id_at(MarkerTypes.POINT, index))
+
+    def get_key_frames_for_lines(self, index):
+        """
+        get a list of the key-frames for the line markers at index
+            Args:
+                index (int) the array index of the line marker
+            Returns:
+                array of key-frames [int]
+        """
+        return self.marker_frames(self.marker_id_at(MarkerTypes.LINE, index))
+
+    def marker_frames(self, marker_id):
+        """
+        get the frames of the instances of a marker
+            Args:
+                marker_id (int): the marker id
+            Returns:
+                ([int]) the frames in order
+        """
+        rows = self.query("SELECT frame FROM instances WHERE marker = ? ORDER BY frame, id",
+                          (marker_id,))
+        return [x[0] for x in rows]
+
+    def add_point(self, point):
+        """
+        add a new point
+            Args:
+                point (QGraphicsPathItem) the path item
+            Returns:
+                the previous point of the marker, or None
+        """
+        return self.add_item(point, MarkerTypes.POINT)
+
+    def add_line(self, line):
+        """
+        add a new line
+            Args:
+                line (QGraphicsLineItem) the line item
+            Returns:
+                the previous line of the marker, or None
+        """
+        return self.add_item(line, MarkerTypes.LINE)
+
+    def add_item(self, item, marker_type):
+        """
+        add a new line or point
+            Args:
+                item (QGraphicsItem) the line or point
+                marker_type (MarkerTypes): LINE or POINT
+            Returns:
+                the previous item of the marker, or None
+            Throws:
+                LookupError if the parent hash matches no stored item
+        """
+        if marker_type == MarkerTypes.LINE:
+            name = "line"
+            change = ChangeTypes.LINES
+            values = g_line_to_tuple(item)
+        else:
+            name = "point"
+            change = ChangeTypes.POINTS
+            values = g_point_to_tuple(item)
+
+        parent = get_parent_hash(item)
+        with self.transaction():
+            if parent == "p":
+                marker_id = self.new_marker(marker_type, get_region(item))
+            else:
+                marker_id = self.find_marker_id(marker_type, parent)
+                if marker_id is None:
+                    raise LookupError("Graphics item with parent hash not matching any in store")
+
+            self.insert_item(marker_id, item)
+
+        self.add_key_frame(get_region(item), get_frame(item))
+        self.set_changed(change)
+        self.record_change("add_" + name, values=values, parent=parent)
+
+        if parent == "p":
+            self._built_markers.add(marker_id)
+            return None
+
+        marker = self.build_marker_id(marker_id)
+        tmp = marker.index(item)
+        if tmp > 0:
+            return marker[tmp-1]
+
+        return None
+
+    def insert_line_marker(self, marker):
+        """
+        add a new marker to the lines with no change results call
+        """
+        self.insert_items(marker)
+
+    def insert_point_marker(self, marker):
+        """
+        add a new marker to the points with no change results call
+        """
+        self.insert_items(marker)
+
+    def insert_items(self, marker):
+        """
+        add a marker of graphics items with no change results call
+            Args:
+                marker ([QGraphicsItem]): the lines or points
+        """
+        with self.transaction():
+            marker_id = self.new_marker(get_marker_type(marker[0]), get_region(marker[0]))
+            for item in marker:
+                self.insert_item(marker_id, item)
+
+        self._built_markers.add(marker_id)
+
+    def insert_marker_record(self, record):
+        """
+        add a marker without making its graphics items, with no change results call
+            Args:
+                record (MarkerRecord): the marker
+        """
+        marker_type = record.get_marker_type()
+        rows = record.get_rows().tolist()
+        hashes = record.get_item_hashes()
+
+        if marker_type == MarkerTypes.LINE:
+            values = [(*x[1:5], *x[5:9]) for x in rows]
+        else:
+            values = [(x[1], x[2], None, None, *x[3:7]) for x in rows]
+
+        with self.transaction() as connection:
+            marker_id = self.new_marker(marker_type, record.get_region())
+            connection.executemany(
+                "INSERT INTO instances (marker, type, hash, parent, " + LINE_COLUMNS + ")"
+                " VALUES (?, ?, ?, NULL, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(marker_id, int(marker_type), to_signed(h), *v) for h, v in zip(hashes, values)])
+
+        self.change_markers_digest(record.get_digest())
+        self._pen = record.get_pen()
+
+    def find_list_for_new_line(self, line):
+        """
+        get the index of the list holding the parent of a line
+            Args
+                line (QGraphicsLineItem) the line, must not have data(0) == "p"
+            Returns:
+                index of the list holding the lines parent, or None
+        """
+        return self.find_index(MarkerTypes.LINE, get_parent_hash(line))
+
+    def find_list_for_old_line(self, line):
+        """
+        get the index of the list holding a line
+            Args
+                line (QGraphicsLineItem) the line
+            Returns:
+                index of the list holding the line, or None
+        """
+        return self.find_index(MarkerTypes.LINE, hash_graphics_line(line))
+
+    def find_list_for_new_point(self, point):
+        """
+        get the index of the list holding the parent of a point
+            Args
+                point (QGraphicsPathItem) the point, must not have data(0) == "p"
+            Returns:
+                index of the list holding the points parent, or None
+        """
+        return self.find_index(MarkerTypes.POINT, get_parent_hash(point))
+
+    def find_list_for_old_point(self, point):
+        """
+        get the index of the list holding a point
+            Args
+                point (QGraphicsPathItem) the point
+            Returns:
+                index of the list holding the point, or None
+        """
+        return self.find_index(MarkerTypes.POINT, hash_graphics_point(point))
+
+    def delete_marker(self, marker):
+        """
+        delete marker and all clones
+            Args:
+                marker (QGraphicsItem) the marker to be removed
+        """
+        m_type = get_marker_type(marker)
+
+        if m_type == MarkerTypes.LINE:
+            marker_id = self.find_marker_id(m_type, hash_graphics_line(marker))
+            values = g_line_to_tuple(marker)
+            change = ChangeTypes.LINES
+        elif m_type == MarkerTypes.POINT:
+            marker_id = self.find_marker_id(m_type, hash_graphics_point(marker))
+            values = g_point_to_tuple(marker)
+            change = ChangeTypes.POINTS
+        else:
+            return
+
+        if marker_id is None:
+            raise LookupError("marker not in store")
+
+        self.discard_marker_id(marker_id)
+        self.set_changed(change)
+        self.record_change("delete_marker", type=int(m_type), values=values)
+
+    def remove_point(self, hash_code):
+        """
+        remove the point with the given hash code
+            Args:
+                hash_code (int) the hash code of the point to be removed
+            Returns:
+                None if point was one frame, else remaining points
+        """
+        return self.remove_item(MarkerTypes.POINT, hash_code)
+
+    def remove_line(self, hash_code):
+        """
+        remove the line with the given hash code
+            Args:
+                hash_code (int) the hash code of the line to be removed
+            Returns:
+                None if line was one frame, else remaining lines
+        """
+        return self.remove_item(MarkerTypes.LINE, hash_code)
+
+    def remove_item(self, marker_type, hash_code):
+        """
+        remove the last instance, in frame order, with the given hash code
+        from the first marker holding it
+            Args:
+                marker_type (MarkerTypes): LINE or POINT
+                hash_code (int) the hash code of the instance to be removed
+            Returns:
+                None if the marker was one frame, else remaining items
+        """
+        marker_id = self.find_marker_id(marker_type, hash_code)
+        if marker_id is None:
+            return None
+
+        with self.transaction() as connection:
+            rows = self.query("SELECT id FROM instances WHERE marker = ? AND hash = ?"
+                              " ORDER BY frame DESC, id DESC LIMIT 1",
+                              (marker_id, to_signed(hash_code)))
+            self.remove_instance(rows[0][0])
+
+            remaining = self.query("SELECT COUNT(*) FROM instances WHERE marker = ?",
+                                   (marker_id,))[0][0]
+            if remaining == 0:
+                connection.execute("DELETE FROM markers WHERE id = ?", (marker_id,))
+                self.forget_marker(marker_id)
+
+        if marker_type == MarkerTypes.LINE:
+            self.set_changed(ChangeTypes.LINES)
+            self.record_change("remove_line", hash=hash_code)
+        else:
+            self.set_changed(ChangeTypes.POINTS)
+            self.record_change("remove_point", hash=hash_code)
+
+        if remaining == 0:
+            return None
+
+        return self.build_marker_id(marker_id)
+
+    def delete_line(self, line, index):
+        """
+        remove a line and fix the linked list
+            Args:
+                line (QGraphicsLineItem) the line
+                index (int) the array index of the list holding the line
+        """
+        self.delete_item(line, index, MarkerTypes.LINE)
+
+    def delete_point(self, point, index):
+        """
+        remove a point and fix the linked list
+            Args:
+                point (QGraphicsPathItem) the point
+                index (int) the array index of the list holding the point
+        """
+        self.delete_item(point, index, MarkerTypes.POINT)
+
+    def delete_item(self, item, index, marker_type):
+        """
+        remove a line or point and fix the linked list
+            Args:
+                item (QGraphicsItem) the line or point
+                index (int) the array index of the marker holding the item
+                marker_type (MarkerTypes): LINE or POINT
+        """
+        if marker_type == MarkerTypes.LINE:
+            name = "line"
+            change = ChangeTypes.LINES
+            values = g_line_to_tuple(item)
+            hash_function = hash_graphics_line
+        else:
+            name = "point"
+            change = ChangeTypes.POINTS
+            values = g_point_to_tuple(item)
+            hash_function = hash_graphics_point
+
+        marker_id = self.marker_id_at(marker_type, index)
+        marker = self.build_marker_id(marker_id)
+        if item not in self._instance_ids:
+            item = [x for x in marker if hash_function(x) == hash_function(item)][-1]
+
+        with self.transaction() as connection:
+            if get_parent_hash(item) == 'p' and len(marker) == 1:
+                self.discard_marker_id(marker_id)
+                self.set_changed(change)
+                self.record_change("delete_" + name, values=values)
+                return
+
+            root_hash = get_parent_hash(item)
+            p_hash = hash_function(item)
+
+            children = [x for x in marker if get_parent_hash(x) == p_hash]
+
+            if len(children) > 0:
+                new_p = children.pop(0)
+                self.set_parent(connection, new_p, root_hash)
+                p_hash = hash_function(new_p)
+
+                for child in children:
+                    self.set_parent(connection, child, p_hash)
+
+            self.remove_instance(self._instance_ids[item])
+
+        self.set_changed(change)
+        self.record_change("delete_" + name, values=values)
+
+    def set_parent(self, connection, item, parent):
+        """
+        change the parent hash of a stored item
+            Args:
+                connection (sqlite3.Connection): the open transaction
+                item (QGraphicsItem): the item
+                parent (int or str): the new parent hash
+        """
+        item.setData(ItemDataTypes.PARENT_HASH, parent)
+        connection.execute("UPDATE instances SET parent = ? WHERE id = ?",
+                           (encode_parent(parent), self._instance_ids[item]))
+
+    def get_lines_for_region(self, index):
+        """
+        get a list of lines associated with a region, the graphics
+        items of the region's lines are made
+            Args:
+                index (int) array index of region
+            Returns:
+                list of lines [line], or None if none found
+        """
+        tmp = self.build_markers("type = ? AND region = ?", (int(MarkerTypes.LINE), index))
+
+        if len(tmp) > 0:
+            return tmp
+
+        return None
+
+    def get_points_for_region(self, index):
+        """
+        get a list of points associated with a region, the graphics
+        items of the region's points are made
+            Args:
+                index (int) array index of region
+            Returns:
+                list of points [points], or None if none found
+        """
+        tmp = self.build_markers("type = ? AND region = ?", (int(MarkerTypes.POINT), index))
+
+        if len(tmp) > 0:
+            return tmp
+
+        return None
+
+    def change_marker_props(self, pens):
+        """
+        change the pen of exisiting items
+            Args:
+                pens (PenStore): the holder of the pens
+        """
+        self._pen = pens.get_display_pen()
+        for item in self._items.values():
+            item.setPen(self._pen)
+
+    def clear_markers_and_regions(self):
+        """
+        remove all the regions, markers and key frames, with no change results call
+        """
+        super().clear_markers_and_regions()
+
+        with self.transaction() as connection:
+            connection.execute("DELETE FROM instances")
+            connection.execute("DELETE FROM markers")
+            connection.execute("DELETE FROM regions")
+
+        self._items = {}
+        self._instance_ids = {}
+        self._built_markers = set()
@@ -0,0 +1,129 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+the undo and redo history of a results store, each step holds the operations
+that reverse and repeat a change, the operations refer to the graphics items
+and markers of the store rather than copies of them
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+from collections import (deque, namedtuple)
+
+## the graphics items removed from the store, the markers changed and the
+## ChangeTypes flags of the parts changed by an undo or redo, so that only
+## those items need be redisplayed
+HistoryChange = namedtuple("HistoryChange", ["removed", "markers", "parts"])
+
+class UndoHistory():
+    """
+    bounded stacks of undo and redo steps, an operation is a tuple of
+    (method name, arguments) to be applied to the results store
+    """
+
+    def __init__(self, limit):
+        """
+        initialize the object
+            Args:
+                limit (int): the maximum number of steps kept, None for no limit
+        """
+        ## the steps that can be undone, each (undo operations, redo operations)
+        self._undo = deque(maxlen=limit)
+
+        ## the steps that have been undone and can be redone
+        self._redo = deque(maxlen=limit)
+
+        ## the undo operations of the step being recorded
+        self._pending_undo = []
+
+        ## the redo operations of the step being recorded
+        self._pending_redo = []
+
+    def clear(self):
+        """
+        discard all steps
+        """
+        self._undo.clear()
+        self._redo.clear()
+        self._pending_undo = []
+        self._pending_redo = []
+
+    def add(self, undo, redo):
+        """
+        add an operation to the step being recorded
+            Args:
+                undo ((str, tuple)): the method and arguments reversing the operation
+                redo ((str, tuple)): the method and arguments repeating the operation
+        """
+        self._pending_undo.append(undo)
+        self._pending_redo.append(redo)
+
+    def commit(self):
+        """
+        end the step being recorded, which makes the redo steps invalid
+        """
+        if len(self._pending_undo) == 0:
+            return
+
+        self._undo.append((self._pending_undo, self._pending_redo))
+        self._redo.clear()
+        self._pending_undo = []
+        self._pending_redo = []
+
+    def can_undo(self):
+        """
+        test if there is a step to undo
+            Returns:
+                (bool)
+        """
+        return len(self._undo) > 0
+
+    def can_redo(self):
+        """
+        test if there is a step to redo
+            Returns:
+                (bool)
+        """
+        return len(self._redo) > 0
+
+    def undo(self):
+        """
+        move the latest step to the redo stack
+            Returns:
+                ([(str, tuple)]) the operations reversing the step in the order
+                                 they are to be applied, or None if there is no step
+        """
+        if not self.can_undo():
+            return None
+
+        step = self._undo.pop()
+        self._redo.append(step)
+
+        return list(reversed(step[0]))
+
+    def redo(self):
+        """
+        move the latest undone step back to the undo stack
+            Returns:
+                ([(str, tuple)]) the operations repeating the step in the order
+                                 they are to be applied, or None if there is no step
+        """
+        if not self.can_redo():
+            return None
+
+        step = self._redo.pop()
+        self._undo.append(step)
+
+        return list(step[1])
@@ -20,39 +20,426 @@ This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
 # pylint: disable = import-error
 
 from collections import namedtuple
-from math import sqrt
 
-from cgt.util.markers import (MarkerTypes,
-                              get_point_of_point,
-                              get_frame)
-from cgt.util.scenegraphitems import perpendicular_dist_to_position
-from cgt.util.markers import get_region
+import numpy as np
+
+from cgt.util.markers import MarkerTypes
+from cgt.model.resultsdata import (LINE_DTYPE, POINT_DTYPE, drift_at_frames)
+
+## the columns of the displacements between successive key frames of the
+## markers, ID numbers the markers of each type that move, within a region
+DISPLACEMENT_DTYPE = np.dtype([("region", np.int64),
+                               ("type", np.int64),
+                               ("ID", np.int64),
+                               ("start", np.int64),
+                               ("end", np.int64),
+                               ("length", np.float64),
+                               ("speed", np.float64)])
+
+## the columns of the average speeds of the markers
+AVERAGE_DTYPE = np.dtype([("region", np.int64),
+                          ("type", np.int64),
+                          ("ID", np.int64),
+                          ("speed", np.float64)])
+
+## the columns of the least-squares fits of distance moved against time of
+## the markers, the speed is the magnitude of the slope, interval is the half
+## width of the 95% confidence interval of the speed
+FIT_DTYPE = np.dtype([("region", np.int64),
+                      ("type", np.int64),
+                      ("ID", np.int64),
+                      ("samples", np.int64),
+                      ("speed", np.float64),
+                      ("std_error", np.float64),
+                      ("r_squared", np.float64),
+                      ("interval", np.float64)])
+
+## the 97.5% points of Student's t distribution for 1 to 30 degrees of
+## freedom, beyond which the normal value T_975_LIMIT is used
+T_975 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+         2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+         2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+
+## the 97.5% point of the normal distribution
+T_975_LIMIT = 1.960
 
 def calculate_speeds(index, results, fps, scale):
     """
-    carry out speeds calculation
+    carry out speeds calculation for one region, no graphics items are made,
+    the markers are compensated for the stage drift held by the results
         Args:
             index (int) the region
-            results (VideoAnalysisResultsStore) the results object
+            results (VideoAnalysisResultsStore or ResultsData) the results object
             fps (float) the number of frames per second
             scale (float) the size of a pixel
+        Returns:
+            (VelocitiesCalculator) the speeds of the region
     """
-    #results = self._data_source.get_results()
-    lines = []
-    for marker in results.get_lines():
-        if get_region(marker[0]) == index:
-            lines.append(marker)
-
-    points = []
-    for marker in results.get_points():
-        if get_region(marker[0]) == index:
-            points.append(marker)
-
-    calculator = VelocitiesCalculator(lines, points, fps, scale)
+    lines = results.get_marker_rows_for_region(MarkerTypes.LINE, index)
+    points = results.get_marker_rows_for_region(MarkerTypes.POINT, index)
+
+    calculator = VelocitiesCalculator(lines, points, fps, scale, results.get_drift())
     calculator.process_latest_data()
 
     return calculator
 
+def calculate_all_speeds(results, fps, scale):
+    """
+    carry out the speeds calculation for every region in one pass, the
+    markers are compensated for the stage drift held by the results
+        Args:
+            results (VideoAnalysisResultsStore or ResultsData) the results object
+            fps (float) the number of frames per second
+            scale (float) the size of a pixel
+        Returns:
+            (SpeedsTable) the speeds of all regions
+    """
+    return SpeedsTable(results.get_marker_rows(MarkerTypes.LINE),
+                       results.get_marker_rows(MarkerTypes.POINT),
+                       fps,
+                       scale,
+                       results.get_drift())
+
+def stack_markers(markers, dtype):
+    """
+    join the rows of a number of markers into one array, numbering the
+    markers in order, in region 0
+        Args:
+            markers ([np.array]): the rows of each marker
+            dtype (np.dtype): LINE_DTYPE or POINT_DTYPE
+        Returns:
+            (np.array) the rows
+    """
+    if len(markers) == 0:
+        return np.empty(0, dtype=dtype)
+
+    rows = np.concatenate(markers)
+    rows["ID"] = np.repeat(np.arange(len(markers)), [len(x) for x in markers])
+    rows["region"] = 0
+
+    return rows
+
+def compensate_drift(rows, drift):
+    """
+    remove the stage drift from the positions of markers
+        Args:
+            rows (np.array): LINE_DTYPE or POINT_DTYPE rows
+            drift (np.array): DRIFT_DTYPE rows in order of frame, or None
+        Returns:
+            (np.array) the rows, copied with the drift at each row's frame
+                taken from pos_x and pos_y if there is drift
+    """
+    if drift is None or len(drift) == 0:
+        return rows
+
+    del_x, del_y = drift_at_frames(drift, rows["frame"])
+    rows = rows.copy()
+    rows["pos_x"] -= del_x
+    rows["pos_y"] -= del_y
+
+    return rows
+
+def group_markers(rows):
+    """
+    sort rows by region, marker and frame
+        Args:
+            rows (np.array): LINE_DTYPE or POINT_DTYPE rows
+        Returns:
+            (np.array, np.array) the sorted rows, and True for the first row of each marker
+    """
+    rows = rows[np.lexsort((rows["frame"], rows["ID"], rows["region"]))]
+
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = (np.diff(rows["ID"]) != 0) | (np.diff(rows["region"]) != 0)
+
+    return rows, first
+
+class SpeedsTable():
+    """
+    the displacements and average speeds of all the markers in all regions,
+    found in one vectorized pass and held as columns
+    """
+
+    def __init__(self, lines, points, fps, scale, drift=None):
+        """
+        initialize the object and carry out the calculation
+            Args:
+                lines (np.array): LINE_DTYPE rows
+                points (np.array): POINT_DTYPE rows
+                fps (float): the number of frames per second
+                scale (float): the size of a pixel
+                drift (np.array): DRIFT_DTYPE rows removed from the marker positions, or None
+        """
+        ## the number of frames per second
+        self._fps = fps
+
+        lines = compensate_drift(lines, drift)
+        points = compensate_drift(points, drift)
+
+        ## the region of each line marker and each point marker
+        self._marker_regions = {}
+
+        lines, first = group_markers(lines)
+        self._marker_regions[MarkerTypes.LINE] = lines["region"][first]
+
+        # lines of zero length after the first of a marker are ignored
+        keep = first | (lines["x2"] != lines["x1"]) | (lines["y2"] != lines["y1"])
+        lines = lines[keep]
+        first = first[keep]
+        line_displacements = self.make_displacements(MarkerTypes.LINE,
+                                                     lines,
+                                                     first,
+                                                     np.diff(perpendicular_distances(lines, scale)))
+
+        points, first = group_markers(points)
+        self._marker_regions[MarkerTypes.POINT] = points["region"][first]
+
+        del_x = np.diff(points["x"] + points["pos_x"])*scale
+        del_y = np.diff(points["y"] + points["pos_y"])*scale
+        point_displacements = self.make_displacements(MarkerTypes.POINT,
+                                                      points,
+                                                      first,
+                                                      np.hypot(del_x, del_y))
+
+        displacements = np.concatenate((line_displacements, point_displacements))
+        order = np.lexsort((displacements["ID"], displacements["type"], displacements["region"]))
+
+        ## the displacements, in order of region, type, ID and frame
+        self._displacements = displacements[order]
+
+        ## the average speeds, in order of region, type and ID
+        self._averages = self.make_averages(self._displacements)
+
+        ## the fitted speeds, in the order of the averages
+        self._fits = self.make_fits(self._displacements, fps)
+
+    def make_displacements(self, marker_type, rows, first, lengths):
+        """
+        make the displacements between the successive rows of each marker
+            Args:
+                marker_type (MarkerTypes): LINE or POINT
+                rows (np.array): the rows sorted by region, marker and frame
+                first (np.array): True for the first row of each marker
+                lengths (np.array): the length between each row and the next
+            Returns:
+                (np.array) DISPLACEMENT_DTYPE
+        """
+        same = np.logical_not(first[1:])
+        starts = rows["frame"][:-1][same]
+        ends = rows["frame"][1:][same]
+
+        displacements = np.empty(len(starts), dtype=DISPLACEMENT_DTYPE)
+        displacements["region"] = rows["region"][1:][same]
+        displacements["type"] = int(marker_type)
+        displacements["start"] = np.minimum(starts, ends)
+        displacements["end"] = np.maximum(starts, ends)
+        displacements["length"] = lengths[same]
+
+        interval = (displacements["end"] - displacements["start"]).astype(np.float64)/self._fps
+        displacements["speed"] = np.abs(displacements["length"]/interval)
+
+        # the markers with displacements are numbered from 0 in each region
+        displacements["ID"] = self.number_markers_in_regions(rows["ID"][1:][same],
+                                                            displacements["region"])
+
+        return displacements
+
+    @staticmethod
+    def number_markers_in_regions(markers, regions):
+        """
+        number the markers of sorted displacements from 0 in each region
+            Args:
+                markers (np.array): the marker of each displacement
+                regions (np.array): the region of each displacement
+            Returns:
+                (np.array) the number of the marker of each displacement
+        """
+        if len(markers) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        new = np.ones(len(markers), dtype=bool)
+        new[1:] = (np.diff(markers) != 0) | (np.diff(regions) != 0)
+        numbers = np.cumsum(new) - 1
+
+        marker_regions = regions[new]
+        region_starts = np.searchsorted(marker_regions, marker_regions)
+
+        return (numbers - region_starts[numbers]).astype(np.int64)
+
+    @staticmethod
+    def find_marker_starts(displacements):
+        """
+        find the first displacement of each marker
+            Args:
+                displacements (np.array): DISPLACEMENT_DTYPE sorted by region, type and ID
+            Returns:
+                (np.array) the indices of the first displacements
+        """
+        new = np.ones(len(displacements), dtype=bool)
+        new[1:] = ((np.diff(displacements["ID"]) != 0) |
+                   (np.diff(displacements["type"]) != 0) |
+                   (np.diff(displacements["region"]) != 0))
+
+        return np.flatnonzero(new)
+
+    @staticmethod
+    def make_averages(displacements):
+        """
+        find the average speed of each marker
+            Args:
+                displacements (np.array): DISPLACEMENT_DTYPE sorted by region, type and ID
+            Returns:
+                (np.array) AVERAGE_DTYPE
+        """
+        starts = SpeedsTable.find_marker_starts(displacements)
+
+        averages = np.empty(len(starts), dtype=AVERAGE_DTYPE)
+        for name in ("region", "type", "ID"):
+            averages[name] = displacements[name][starts]
+
+        if len(starts) > 0:
+            totals = np.add.reduceat(displacements["speed"], starts)
+            averages["speed"] = totals/np.diff(np.append(starts, len(displacements)))
+
+        return averages
+
+    @staticmethod
+    def make_fits(displacements, fps):
+        """
+        fit a straight line to the distance moved against time of each
+        marker, the markers are padded to the same number of samples, with
+        padding given zero weight, so all are solved in one batched call
+            Args:
+                displacements (np.array): DISPLACEMENT_DTYPE sorted by region, type, ID and frame
+                fps (float): the number of frames per second
+            Returns:
+                (np.array) FIT_DTYPE, speeds are in distance per second
+        """
+        starts = SpeedsTable.find_marker_starts(displacements)
+        counts = np.diff(np.append(starts, len(displacements)))
+
+        fits = np.empty(len(starts), dtype=FIT_DTYPE)
+        for name in ("region", "type", "ID"):
+            fits[name] = displacements[name][starts]
+        fits["samples"] = counts + 1
+        if len(starts) == 0:
+            return fits
+
+        # sample 0 of each marker is its start, sample k the end of displacement k
+        marker = np.repeat(np.arange(len(starts)), counts)
+        sample = np.arange(len(displacements)) - starts[marker] + 1
+        totals = np.cumsum(displacements["length"])
+        offsets = totals[starts] - displacements["length"][starts]
+
+        times = np.zeros((len(starts), counts.max() + 1))
+        distances = np.zeros(times.shape)
+        weights = np.zeros(times.shape)
+        times[:, 0] = displacements["start"][starts]/fps
+        weights[:, 0] = 1.0
+        times[marker, sample] = displacements["end"]/fps
+        distances[marker, sample] = totals - offsets[marker]
+        weights[marker, sample] = 1.0
+
+        # times are taken from the first sample for conditioning
+        times = (times - times[:, :1])*weights
+        design = np.stack((weights, times), axis=-1)
+        inverse = np.linalg.inv(np.einsum("mki,mkj->mij", design, design))
+        coefficients = np.einsum("mij,mkj,mk->mi", inverse, design, distances)
+
+        residuals = (distances - np.einsum("mki,mi->mk", design, coefficients))*weights
+        sse = np.sum(residuals**2, axis=1)
+        means = np.sum(distances, axis=1)/fits["samples"]
+        sst = np.sum(((distances - means[:, np.newaxis])*weights)**2, axis=1)
+        dof = fits["samples"] - 2
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            std_errors = np.sqrt(sse/dof*inverse[:, 1, 1])
+            fits["r_squared"] = 1.0 - sse/sst
+
+        t_values = np.full(len(starts), T_975_LIMIT)
+        small = (dof > 0) & (dof <= len(T_975))
+        t_values[small] = np.array(T_975)[dof[small] - 1]
+
+        fits["speed"] = np.abs(coefficients[:, 1])
+        fits["std_error"] = np.where(dof > 0, std_errors, np.nan)
+        fits["interval"] = t_values*fits["std_error"]
+
+        return fits
+
+    def get_fps(self):
+        """
+        getter for the number of frames per second
+            Returns:
+                (float)
+        """
+        return self._fps
+
+    def get_displacements(self):
+        """
+        getter for the displacements of all markers
+            Returns:
+                (np.array) DISPLACEMENT_DTYPE in order of region, type, ID and frame
+        """
+        return self._displacements
+
+    def get_average_speeds(self):
+        """
+        getter for the average speeds of all markers
+            Returns:
+                (np.array) AVERAGE_DTYPE in order of region, type and ID
+        """
+        return self._averages
+
+    def get_fitted_speeds(self):
+        """
+        getter for the least-squares speeds of all markers
+            Returns:
+                (np.array) FIT_DTYPE in order of region, type and ID
+        """
+        return self._fits
+
+    def number_markers(self, region):
+        """
+        get the number of line and point markers in a region, including
+        those with no displacements
+            Args:
+                region (int): the region index
+            Returns:
+                tuple (number lines, number points)
+        """
+        return (int(np.count_nonzero(self._marker_regions[MarkerTypes.LINE] == region)),
+                int(np.count_nonzero(self._marker_regions[MarkerTypes.POINT] == region)))
+
+    def get_region_displacements(self, marker_type, region):
+        """
+        get the displacements of the line or point markers in a region
+            Args:
+                marker_type (MarkerTypes): LINE or POINT
+                region (int): the region index
+            Returns:
+                ([np.array]) the DISPLACEMENT_DTYPE rows of each marker in order of ID
+        """
+        mask = ((self._displacements["region"] == region) &
+                (self._displacements["type"] == int(marker_type)))
+        rows = self._displacements[mask]
+        if len(rows) == 0:
+            return []
+
+        return np.split(rows, np.flatnonzero(np.diff(rows["ID"])) + 1)
+
+    def get_calculator(self, region):
+        """
+        get a view of the speeds of one region
+            Args:
+                region (int): the region index
+            Returns:
+                (VelocitiesCalculator)
+        """
+        calculator = VelocitiesCalculator(None, None, self._fps, None)
+        calculator.set_table(self, region)
+
+        return calculator
+
 class ScreenDisplacement():
     """data type for a single marker displacement"""
 
@@ -115,19 +502,26 @@ class ScreenDisplacement():
 ## data type for the speed of a marker
 MarkerSpeed = namedtuple("MarkerSpeed", ["ID", "m_type", "speed"])
 
+## data type for the least-squares speed of a marker, interval is the half
+## width of the 95% confidence interval, std_error and interval are nan for
+## markers with two samples and r_squared is nan for markers that do not move
+MarkerFit = namedtuple("MarkerFit",
+                       ["ID", "m_type", "samples", "speed", "std_error", "r_squared", "interval"])
+
 class VelocitiesCalculator():
     """
-    calculate the velocities of the marker objects
+    a view of the velocities of the markers of one region, held in a SpeedsTable
     """
 
-    def __init__(self, lines, points, fps, scale):
+    def __init__(self, lines, points, fps, scale, drift=None):
         """
             initialize object
                 Args:
-                    lines ([]): array of line markers
-                    points ([]): array of point markers
+                    lines ([np.array]): LINE_DTYPE rows of each line marker, sorted by frame
+                    points ([np.array]): POINT_DTYPE rows of each point marker, sorted by frame
                     fps (float): the number of frames per second
                     scale (float): the size of a pixel
+                    drift (np.array): DRIFT_DTYPE rows removed from the marker positions, or None
         """
 
         ## the store of markers
@@ -136,12 +530,39 @@ class VelocitiesCalculator():
         self._frames_per_second = fps
         self._scale = scale
 
+        ## the stage drift removed from the markers
+        self._drift = drift
+
+        ## the table holding the speeds
+        self._table = None
+
+        ## the region of the table viewed
+        self._region = 0
+
         ## the velocities of the lines
         self._line_displacements = None
 
         ## the velocities of the points
         self._point_displacements = None
 
+    def set_table(self, table, region):
+        """
+        view the speeds of a region in a table already calculated
+            Args:
+                table (SpeedsTable): the table
+                region (int): the region index
+        """
+        self._table = table
+        self._region = region
+        self._lines = None
+        self._points = None
+
+    def get_table(self):
+        """
+        getter for the table holding the speeds, None before processing
+        """
+        return self._table
+
     def get_line_displacements(self):
         """
         getter for the array of line displacments
@@ -160,6 +581,9 @@ class VelocitiesCalculator():
             Returns:
                 tuple (number lines, number points)
         """
+        if self._table is not None:
+            return self._table.number_markers(self._region)
+
         return (len(self._lines),
                 len(self._points))
 
@@ -167,93 +591,98 @@ class VelocitiesCalculator():
         """
         get the latest data and calculate the screen displacements
         """
-        self.make_lines()
-        self.make_points()
-
-    def make_lines(self):
+        if self._lines is not None:
+            self._table = SpeedsTable(stack_markers(self._lines, LINE_DTYPE),
+                                      stack_markers(self._points, POINT_DTYPE),
+                                      self._frames_per_second,
+                                      self._scale,
+                                      self._drift)
+            self._region = 0
+
+        self._line_displacements = self.make_displacements(MarkerTypes.LINE)
+        self._point_displacements = self.make_displacements(MarkerTypes.POINT)
+
+    def make_displacements(self, marker_type):
         """
-        get and convert the marker lines to displacements
+        make the displacements of the markers of the region viewed
+            Args:
+                marker_type (MarkerTypes): LINE or POINT
+            Returns:
+                ([[ScreenDisplacement]]) the displacements of each marker that moves
         """
-        self._line_displacements = []
-        for marker in self._lines:
-            previous = marker[0]
-            marker_displacements = []
-
-            for i in range(1, len(marker)):
-                current = marker[i]
-
-                if not (current.line().dx() == 0.0 and current.line().dy() == 0.0):
-                    previous_dist = perpendicular_dist_to_position(previous, self._scale)
-                    current_dist = perpendicular_dist_to_position(current, self._scale)
-                    distance = current_dist - previous_dist
+        fps = self._table.get_fps()
+        return [[ScreenDisplacement(start, end, fps, length)
+                 for start, end, length in zip(marker["start"].tolist(),
+                                               marker["end"].tolist(),
+                                               marker["length"].tolist())]
+                for marker in self._table.get_region_displacements(marker_type, self._region)]
 
-                    start = get_frame(previous)
-                    end = get_frame(current)
-                    # start_frame, end_frame, fps, length
-                    displacement = ScreenDisplacement(start, end, self._frames_per_second, distance)
-                    marker_displacements.append(displacement)
-
-                    previous = current
-
-            if len(marker_displacements) > 0:
-                self._line_displacements.append(marker_displacements)
-
-    def make_points(self):
+    def get_average_speeds(self):
         """
-        get and convert the marker points to displacements
+        make a list of average speeds of all markers
+            Returns:
+                [MarkerSpeed] the averages
         """
-        self._point_displacements = []
-
-        for marker in self._points:
-            previous = marker[0]
-            marker_displacements = []
-
-            for i in range(1, len(marker)):
-                current = marker[i]
-                start = get_point_of_point(previous) + previous.pos()
-                end = get_point_of_point(current) + current.pos()
-                seperation =  start - end
+        averages = self._table.get_average_speeds()
+        averages = averages[averages["region"] == self._region]
 
-                del_x = seperation.x()*self._scale
-                del_y = seperation.y()*self._scale
+        return [MarkerSpeed(marker_id, MarkerTypes(m_type), speed)
+                for marker_id, m_type, speed in zip(averages["ID"].tolist(),
+                                                    averages["type"].tolist(),
+                                                    averages["speed"].tolist())]
 
-                length = sqrt(del_x*del_x + del_y*del_y)
-                start = get_frame(previous)
-                end = get_frame(current)
-
-                # start_frame, end_frame, fps, length
-                displacement = ScreenDisplacement(start, end, self._frames_per_second, length)
-                marker_displacements.append(displacement)
-
-                previous = current
-
-            if len(marker_displacements) > 0:
-                self._point_displacements.append(marker_displacements)
-
-    def get_average_speeds(self):
+    def get_fitted_speeds(self):
         """
-        make a list of average speeds of all markers
+        make a list of the least-squares speeds of all markers
             Returns:
-                [MarkerSpeed] the averages
+                [MarkerFit] the fits, in the order of the averages
         """
-        averages = []
+        fits = self._table.get_fitted_speeds()
+        fits = fits[fits["region"] == self._region]
 
-        for i, marker in enumerate(self._line_displacements):
-            speed = 0.0
-            for item in marker:
-                speed += item.get_speed()
+        columns = (fits["samples"].tolist(),
+                   fits["speed"].tolist(),
+                   fits["std_error"].tolist(),
+                   fits["r_squared"].tolist(),
+                   fits["interval"].tolist())
 
-            speed /= float(len(marker))
+        return [MarkerFit(marker_id, MarkerTypes(m_type), *values)
+                for marker_id, m_type, values in zip(fits["ID"].tolist(),
+                                                     fits["type"].tolist(),
+                                                     zip(*columns))]
 
-            averages.append(MarkerSpeed(i, MarkerTypes.LINE, speed))
+def format_statistic(value, places=2):
+    """
+    format a speed or statistic for display, values that cannot be found are shown as "-"
+        Args:
+            value (float): the value, nan if it cannot be found
+            places (int): the number of decimal places
+        Returns:
+            (str)
+    """
+    if np.isnan(value):
+        return "-"
 
-        for i, marker in enumerate(self._point_displacements):
-            speed = 0.0
-            for item in marker:
-                speed += item.get_speed()
+    return f"{value:.{places}f}"
 
-            speed /= float(len(marker))
+def perpendicular_distances(lines, scale):
+    """
+    find the distance of the position of each line along its unit normal,
+    as scenegraphitems.perpendicular_dist_to_position
+        Args:
+            lines (np.array): LINE_DTYPE rows
+            scale (float): the pixel scale
+        Returns:
+            (np.array) the distances
+    """
+    del_x = lines["x2"] - lines["x1"]
+    del_y = lines["y2"] - lines["y1"]
+    length = np.hypot(del_x, del_y)
 
-            averages.append(MarkerSpeed(i, MarkerTypes.POINT, speed))
+    # the normal of (dx, dy) is (dy, -dx), a line of zero length has no
+    # normal and gives nan as with QLineF.unitVector
+    with np.errstate(divide="ignore", invalid="ignore"):
+        normal_x = lines["pos_x"]*(del_y/length)*scale
+        normal_y = lines["pos_y"]*(-del_x/length)*scale
 
-        return averages
+    return np.hypot(normal_x, normal_y)
@@ -22,9 +22,29 @@ This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
 # pylint: disable = c-extension-no-member
 import enum
 import bisect
+import contextlib
 
+import numpy as np
 import PyQt5.QtCore as qc
 
+from cgt.util.config import UNDO_LIMIT
+from cgt.model.markerindex import MarkerIndex
+from cgt.model.undohistory import (UndoHistory, HistoryChange)
+from cgt.model.markerrecord import (MarkerRecord, marker_to_rows)
+from cgt.model.markertracks import make_marker_tracks
+from cgt.model.resultsdata import (LINE_DTYPE,
+                                   POINT_DTYPE,
+                                   REGION_DTYPE,
+                                   SEGMENT_DTYPE,
+                                   DRIFT_DTYPE,
+                                   drift_at_frames,
+                                   segmentation_for_region)
+from cgt.util.scenegraphitems import (copy_graphics_region,
+                                      copy_graphics_line,
+                                      copy_graphics_point,
+                                      rect_to_tuple,
+                                      g_line_to_tuple,
+                                      g_point_to_tuple)
 from cgt.util.markers import (ItemDataTypes,
                               MarkerTypes,
                               get_parent_hash,
@@ -32,7 +52,14 @@ from cgt.util.markers import (ItemDataTypes,
                               hash_graphics_line,
                               get_frame,
                               get_region,
-                              get_marker_type)
+                              get_marker_type,
+                              hash_marker_in_region,
+                              hash_indexed_region,
+                              hash_videointensitystats,
+                              hash_drift,
+                              hash_segmentation,
+                              hash_results_parts,
+                              DIGEST_MODULUS)
 
 class DataTypes(enum.IntEnum):
     """
@@ -50,14 +77,61 @@ class DataTypes(enum.IntEnum):
     ## a key frame
     KEY_FRAME = 3
 
+class ChangeTypes(enum.IntFlag):
+    """
+    define the parts of a project that can change, combined as flags,
+    each part is saved in its own file
+    """
+    ## the regions
+    REGIONS = 1
+
+    ## the line markers
+    LINES = 2
+
+    ## the point markers
+    POINTS = 4
+
+    ## the key frames, which are saved as part of the markers
+    KEY_FRAMES = 8
+
+    ## the video statistics
+    STATISTICS = 16
+
+    ## the project information, held by the project not the store
+    INFO = 32
+
+    ## the crystal segmentation of the regions
+    SEGMENTATION = 64
+
+    ## the stage drift of the frames
+    DRIFT = 128
+
+## all the parts held in the results store
+RESULTS_CHANGES = (ChangeTypes.REGIONS |
+                   ChangeTypes.LINES |
+                   ChangeTypes.POINTS |
+                   ChangeTypes.KEY_FRAMES |
+                   ChangeTypes.STATISTICS |
+                   ChangeTypes.SEGMENTATION |
+                   ChangeTypes.DRIFT)
+
+def marker_type_name(marker_type):
+    """
+    get the name of a type of marker used in the journal operations
+        Args:
+            marker_type (MarkerTypes): LINE or POINT
+        Returns:
+            (str) "line" or "point"
+    """
+    return "line" if marker_type == MarkerTypes.LINE else "point"
+
 class VideoAnalysisResultsStore(qc.QObject):
     """
     a storage class that records the results of a video analysis
     """
 
-    ## signal to indicate that the contents has changed
-    ## 0 any change
-    ## 1 Region added
+    ## signal to indicate that the contents has changed, the value is the
+    ## ChangeTypes flags of the parts changed, REGIONS (1) if a region changed
     data_changed = qc.pyqtSignal(int)
 
     def __init__(self, parent):
@@ -66,12 +140,18 @@ class VideoAnalysisResultsStore(qc.QObject):
         """
         super().__init__(parent)
 
-        ## store of lines
+        ## store of lines, markers not yet displayed may be MarkerRecords
         self._lines = []
 
-        ## store of points
+        ## store of points, markers not yet displayed may be MarkerRecords
         self._points = []
 
+        ## index of the line instance hash codes, parallel to the lines
+        self._line_index = MarkerIndex()
+
+        ## index of the point instance hash codes, parallel to the points
+        self._point_index = MarkerIndex()
+
         ## store of regions
         self._regions = []
 
@@ -81,9 +161,80 @@ class VideoAnalysisResultsStore(qc.QObject):
         ## storage for the intensity statistics of the video
         self._video_statistics = None
 
+        ## the crystal area, perimeter and centroid of each region in each frame,
+        ## SEGMENT_DTYPE rows or None
+        self._segmentation = None
+
+        ## digest of the crystal measurements
+        self._segmentation_digest = 0
+
+        ## the shift of the content of each frame from the reference frame,
+        ## DRIFT_DTYPE rows in order of frame or None
+        self._drift = None
+
+        ## digest of the stage drift
+        self._drift_digest = 0
+
+        ## the interpolated tracks of the markers of each region, keyed by
+        ## region index, with the digest of the region's markers when made
+        self._marker_tracks = {}
+
         ## flag to indicate store has been changed
         self._changed = False
 
+        ## the parts changed since the last save (ChangeTypes)
+        self._changed_parts = ChangeTypes(0)
+
+        ## running digest of all line and point instances, (sum modulo 2^64)
+        self._markers_digest = 0
+
+        ## running digests of the line and point instances of each region
+        self._region_marker_digests = {}
+
+        ## digests of the regions including their array index
+        self._region_digests = []
+
+        ## the rectangles of the regions as last stored, regions are edited in
+        ## place so these are needed to undo a change
+        self._region_rects = []
+
+        ## digest of the video statistics
+        self._statistics_digest = None
+
+        ## the journal of changes since the last save, or None
+        self._journal = None
+
+        ## the depth of nested batches of changes
+        self._batch_depth = 0
+
+        ## the parts changed in the current batch, not yet signalled
+        self._batch_changes = ChangeTypes(0)
+
+        ## the history of changes that can be undone, or None if not supported
+        self._history = UndoHistory(UNDO_LIMIT)
+
+        ## the items removed and markers changed by the undo or redo in
+        ## progress, None if changes are to be recorded in the history
+        self._history_change = None
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        group a number of changes so that data_changed is emitted once, with the
+        flags of all the parts changed, when the outermost batch ends
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0 and self._history is not None:
+                self._history.commit()
+            if self._batch_depth == 0 and self._batch_changes:
+                value = self._batch_changes
+                self._batch_changes = ChangeTypes(0)
+                self.data_changed.emit(int(value))
+
     def has_been_changed(self):
         """
         getter for the changed status
@@ -93,6 +244,14 @@ class VideoAnalysisResultsStore(qc.QObject):
         """
         return self._changed
 
+    def get_changed_parts(self):
+        """
+        getter for the parts changed since the last save
+            Returns:
+                (ChangeTypes) the flags
+        """
+        return self._changed_parts
+
     def reset_changed(self):
         """
         make the changed status false
@@ -101,17 +260,316 @@ class VideoAnalysisResultsStore(qc.QObject):
                 None
         """
         self._changed = False
+        self._changed_parts = ChangeTypes(0)
 
     def set_changed(self, value=0):
         """
         set the changed status to true
+            Args:
+                value (ChangeTypes): the parts changed, 0 for all parts
 
             Returns:
                 None
         """
-        self.data_changed.emit(value)
+        if value == 0:
+            value = RESULTS_CHANGES
+
+        self._changed_parts |= value
         self._changed = True
 
+        if self._batch_depth > 0:
+            self._batch_changes |= value
+        else:
+            self.data_changed.emit(int(value))
+
+    def set_journal(self, journal):
+        """
+        setter for the journal recording changes since the last save
+            Args:
+                journal (ProjectJournal): the journal, or None to stop recording
+        """
+        self._journal = journal
+
+    def get_journal(self):
+        """
+        getter for the journal
+            Returns:
+                (ProjectJournal) or None
+        """
+        return self._journal
+
+    def record_change(self, operation, **data):
+        """
+        append a change to the journal, if there is one, the journal is
+        compacted to a snapshot of the results when it becomes long
+            Args:
+                operation (str): the name of the method making the change
+                data (dict): the arguments needed to repeat the change
+        """
+        if self._journal is None:
+            return
+
+        self._journal.record(operation, data, self.get_results_digest())
+
+        if self._journal.needs_compaction():
+            self._journal.compact(self.make_journal_snapshot(), self.get_results_digest())
+
+    def record_undo(self, undo, redo):
+        """
+        add the inverse of a change to the history, the changes made in a batch
+        are undone together, the operations share the items of the store
+            Args:
+                undo ((str, tuple)): the method and arguments reversing the change
+                redo ((str, tuple)): the method and arguments repeating the change
+        """
+        if self._history is None or self._history_change is not None:
+            return
+
+        self._history.add(undo, redo)
+        if self._batch_depth == 0:
+            self._history.commit()
+
+    def can_undo(self):
+        """
+        test if there is a change that can be undone
+            Returns:
+                (bool)
+        """
+        return self._history is not None and self._history.can_undo()
+
+    def can_redo(self):
+        """
+        test if there is an undone change that can be redone
+            Returns:
+                (bool)
+        """
+        return self._history is not None and self._history.can_redo()
+
+    def clear_history(self):
+        """
+        discard the undo history, called once a project has been loaded
+        """
+        if self._history is not None:
+            self._history.clear()
+
+    def undo(self):
+        """
+        reverse the latest change in the history
+            Returns:
+                (HistoryChange) the items removed and markers changed, or None if
+                                there was nothing to undo
+        """
+        if not self.can_undo():
+            return None
+
+        return self.apply_history(self._history.undo())
+
+    def redo(self):
+        """
+        repeat the latest change undone
+            Returns:
+                (HistoryChange) the items removed and markers changed, or None if
+                                there was nothing to redo
+        """
+        if not self.can_redo():
+            return None
+
+        return self.apply_history(self._history.redo())
+
+    def apply_history(self, operations):
+        """
+        apply the operations of an undo or redo as one batch, each operation
+        records itself in the journal so the cost is that of the change
+            Args:
+                operations ([(str, tuple)]): the methods and their arguments
+            Returns:
+                (HistoryChange) the items removed and markers changed
+        """
+        change = HistoryChange([], [], ChangeTypes(0))
+        self._history_change = change
+        try:
+            with self.batch():
+                for name, args in operations:
+                    getattr(self, name)(*args)
+                change = change._replace(parts=self._batch_changes)
+        finally:
+            self._history_change = None
+
+        return change
+
+    def note_history_change(self, removed=(), marker=None):
+        """
+        note the graphics items affected by an undo or redo
+            Args:
+                removed ([QGraphicsItem]): items taken out of the store
+                marker ([QGraphicsItem]): a marker whose items have changed
+        """
+        if self._history_change is None:
+            return
+
+        self._history_change.removed.extend(removed)
+        if marker is not None and not isinstance(marker, MarkerRecord) and len(marker) > 0:
+            self._history_change.markers.append(marker)
+
+    def make_journal_snapshot(self):
+        """
+        get the regions and markers in a json compatible form
+            Returns:
+                (dict) the regions, lines and points, and the segmentation and drift if changed
+        """
+        snapshot = {"regions": [rect_to_tuple(x.rect()) for x in self._regions],
+                    "lines": self.get_marker_rows(MarkerTypes.LINE).tolist(),
+                    "points": self.get_marker_rows(MarkerTypes.POINT).tolist()}
+
+        # the segmentation and drift are large so they are only kept if they differ from the last save
+        if ChangeTypes.SEGMENTATION in self._changed_parts:
+            snapshot["segmentation"] = self._segmentation
+
+        if ChangeTypes.DRIFT in self._changed_parts:
+            snapshot["drift"] = self._drift
+
+        return snapshot
+
+    def clear_markers_and_regions(self):
+        """
+        remove all the regions, markers and key frames, with no change results call
+        """
+        self._lines = []
+        self._points = []
+        self._line_index.clear()
+        self._point_index.clear()
+        self._regions = []
+        self._key_frames = {}
+        self._markers_digest = 0
+        self._region_marker_digests = {}
+        self._region_digests = []
+        self._region_rects = []
+        self._marker_tracks = {}
+        self.clear_history()
+
+    def get_results_digest(self):
+        """
+        getter for a process independent hash of the results, maintained as
+        the contents changes, equal to markers.hash_results(self)
+            Returns:
+                (int) the hash code
+        """
+        regions = sum(self._region_digests) % DIGEST_MODULUS
+        return hash_results_parts(self._statistics_digest,
+                                  self._markers_digest,
+                                  regions,
+                                  self._segmentation_digest,
+                                  self._drift_digest)
+
+    def add_to_markers_digest(self, items):
+        """
+        include lines or points in the running digest
+            Args:
+                items ([QGraphicsItem]): the lines or points
+        """
+        total = self._markers_digest
+        for item in items:
+            code = hash_marker_in_region(item)
+            total += code
+            self.change_region_markers_digest(get_region(item), code)
+
+        self._markers_digest = total % DIGEST_MODULUS
+
+    def remove_from_markers_digest(self, items):
+        """
+        remove lines or points from the running digest
+            Args:
+                items ([QGraphicsItem]): the lines or points
+        """
+        total = self._markers_digest
+        for item in items:
+            code = hash_marker_in_region(item)
+            total -= code
+            self.change_region_markers_digest(get_region(item), -code)
+
+        self._markers_digest = total % DIGEST_MODULUS
+
+    def change_record_digest(self, record, sign):
+        """
+        include or remove the instances of a marker record in the running digests
+            Args:
+                record (MarkerRecord): the marker
+                sign (int): 1 to include, -1 to remove
+        """
+        change = sign*record.get_digest()
+        self._markers_digest = (self._markers_digest + change) % DIGEST_MODULUS
+        self.change_region_markers_digest(record.get_region(), change)
+
+    def change_region_markers_digest(self, region, change):
+        """
+        change the running digest of the markers of a region
+            Args:
+                region (int): the region index
+                change (int): the sum of the digests added less those removed
+        """
+        total = self._region_marker_digests.get(region, 0) + change
+        self._region_marker_digests[region] = total % DIGEST_MODULUS
+
+    def get_region_markers_digest(self, index):
+        """
+        getter for the digest of the line and point instances of a region,
+        equal to resultsdata.rows_digest of the region's rows
+            Args:
+                index (int): the region index
+            Returns:
+                (int) the digest, 0 if the region has no markers
+        """
+        return self._region_marker_digests.get(index, 0)
+
+    def update_region_digests(self, start=0):
+        """
+        recalculate the region digests from start to the end of the list
+            Args:
+                start (int): the first array index to be updated
+        """
+        del self._region_digests[start:]
+        del self._region_rects[start:]
+        for i in range(start, len(self._regions)):
+            self._region_digests.append(hash_indexed_region(self._regions[i], i))
+            self._region_rects.append(rect_to_tuple(self._regions[i].rect()))
+
+    def make_copy(self):
+        """
+        make an independent copy of the contents, so that background jobs
+        can read the results while the user continues editing
+            Returns:
+                (VideoAnalysisResultsStore): the copy, with no parent
+        """
+        store = VideoAnalysisResultsStore(None)
+
+        for region in self._regions:
+            store.add_region(copy_graphics_region(region))
+
+        # records are not changed so they can be shared
+        for marker in self._lines:
+            if isinstance(marker, MarkerRecord):
+                store.insert_marker_record(marker)
+            else:
+                store.insert_line_marker([copy_graphics_line(x) for x in marker])
+
+        for marker in self._points:
+            if isinstance(marker, MarkerRecord):
+                store.insert_marker_record(marker)
+            else:
+                store.insert_point_marker([copy_graphics_point(x) for x in marker])
+
+        for region_index, key_frames in self._key_frames.items():
+            for key_frame in key_frames:
+                store.add_key_frame(region_index, key_frame)
+
+        store.set_video_statistics(self._video_statistics)
+        store.set_segmentation(self._segmentation)
+        store.set_drift(self._drift)
+        store.reset_changed()
+        store.clear_history()
+
+        return store
+
     def get_video_statistics(self):
         """
         getter for the video statistics
@@ -127,7 +585,144 @@ class VideoAnalysisResultsStore(qc.QObject):
                 video_stats ([FrameStats]) the statistics
         """
         self._video_statistics = video_stats
-        self.set_changed()
+
+        self._statistics_digest = None
+        if video_stats is not None:
+            self._statistics_digest = hash_videointensitystats(video_stats)
+
+        self.set_changed(ChangeTypes.STATISTICS)
+        self.record_change("set_video_statistics", statistics=video_stats)
+
+    def get_segmentation(self):
+        """
+        getter for the crystal measurements
+            Returns:
+                (np.array) SEGMENT_DTYPE rows or None
+        """
+        return self._segmentation
+
+    def get_segmentation_for_region(self, index):
+        """
+        get the crystal measurements of a region
+            Args:
+                index (int): the region index
+            Returns:
+                (np.array) SEGMENT_DTYPE rows in order of frame, empty if none
+        """
+        return segmentation_for_region(self._segmentation, index)
+
+    def set_segmentation(self, segmentation):
+        """
+        setter for the crystal measurements, the rows are copied
+            Args:
+                segmentation (np.array): SEGMENT_DTYPE rows or None
+        """
+        if segmentation is not None:
+            segmentation = np.array(segmentation, dtype=SEGMENT_DTYPE)
+
+        self._segmentation = segmentation
+        self._segmentation_digest = hash_segmentation(segmentation)
+
+        self.set_changed(ChangeTypes.SEGMENTATION)
+        self.record_change("set_segmentation", segmentation=segmentation)
+
+    def get_drift(self):
+        """
+        getter for the stage drift
+            Returns:
+                (np.array) DRIFT_DTYPE rows in order of frame or None
+        """
+        return self._drift
+
+    def get_drift_digest(self):
+        """
+        getter for the digest of the stage drift
+            Returns:
+                (int) the digest, 0 if there is no drift
+        """
+        return self._drift_digest
+
+    def get_drift_offset(self, frame):
+        """
+        get the shift of the content of a frame from the reference frame
+            Args:
+                frame (int): the frame number
+            Returns:
+                (float, float) the x and y shift in pixels, zero if there is no drift
+        """
+        del_x, del_y = drift_at_frames(self._drift, [frame])
+        return float(del_x[0]), float(del_y[0])
+
+    def get_marker_tracks(self, index):
+        """
+        get the markers of a region interpolated between their key frames,
+        the tracks are kept until the region's markers change
+            Args:
+                index (int): the region index
+            Returns:
+                (MarkerTracks)
+        """
+        digest = self.get_region_markers_digest(index)
+        cached = self._marker_tracks.get(index)
+        if cached is not None and cached[0] == digest:
+            return cached[1]
+
+        tracks = make_marker_tracks(self, index)
+        self._marker_tracks[index] = (digest, tracks)
+
+        return tracks
+
+    def set_drift(self, drift):
+        """
+        setter for the stage drift, the rows are copied and sorted by frame
+            Args:
+                drift (np.array): DRIFT_DTYPE rows or None
+        """
+        if drift is not None:
+            drift = np.array(drift, dtype=DRIFT_DTYPE)
+            drift = drift[np.argsort(drift["frame"], kind="stable")]
+
+        self._drift = drift
+        self._drift_digest = hash_drift(drift)
+
+        self.set_changed(ChangeTypes.DRIFT)
+        self.record_change("set_drift", drift=drift)
+
+    def remove_region_segmentation(self, index):
+        """
+        remove the crystal measurements of a region and renumber those of the regions after it
+            Args:
+                index (int): the index of the region removed
+            Returns:
+                (np.array) the rows removed, None if there is no segmentation
+        """
+        if self._segmentation is None:
+            return None
+
+        in_region = self._segmentation["region"] == index
+        removed = self._segmentation[in_region]
+        self._segmentation = self._segmentation[~in_region]
+        self._segmentation["region"][self._segmentation["region"] > index] -= 1
+        self._segmentation_digest = hash_segmentation(self._segmentation)
+        self.set_changed(ChangeTypes.SEGMENTATION)
+
+        return removed
+
+    def restore_region_segmentation(self, index, rows):
+        """
+        put back the crystal measurements of a region, reversing remove_region_segmentation
+            Args:
+                index (int): the index of the region restored
+                rows (np.array): the rows removed, or None
+        """
+        if rows is None or self._segmentation is None:
+            return
+
+        segmentation = self._segmentation.copy()
+        segmentation["region"][segmentation["region"] >= index] += 1
+        self._segmentation = np.concatenate((segmentation, rows))
+        self._segmentation_digest = hash_segmentation(self._segmentation)
+        self.set_changed(ChangeTypes.SEGMENTATION)
 
     def replace_region(self, region, index):
         """
@@ -138,8 +733,26 @@ class VideoAnalysisResultsStore(qc.QObject):
             Throws:
                 IndexError: pop index out of range
         """
+        rect = rect_to_tuple(region.rect())
+        self.record_undo(("set_region_rect", (index, self._region_rects[index])),
+                         ("set_region_rect", (index, rect)))
+
         self._regions[index] = region
-        self.set_changed(1)
+        self._region_digests[index] = hash_indexed_region(region, index)
+        self._region_rects[index] = rect
+        self.set_changed(ChangeTypes.REGIONS)
+        self.record_change("replace_region", rect=rect, index=index)
+
+    def set_region_rect(self, index, rect):
+        """
+        move a region in place, used by undo as regions are edited in place
+            Args:
+                index (int): the array index of the region
+                rect ((float)): x, y, width and height
+        """
+        region = self._regions[index]
+        region.setRect(qc.QRectF(*rect))
+        self.replace_region(region, index)
 
     def remove_region(self, index):
         """
@@ -149,16 +762,109 @@ class VideoAnalysisResultsStore(qc.QObject):
             Throws:
                 IndexError: pop index out of range
         """
-        markers = []
-        markers.append(self.get_lines_for_region(index))
-        markers.append(self.get_points_for_region(index))
-        markers = [x for x in markers if x is not None]
+        region = self._regions[index]
+        key_frames = self._key_frames.get(index)
+        removed = []
+        for marker_type in (MarkerTypes.LINE, MarkerTypes.POINT):
+            markers, markers_index, _ = self.select_markers(marker_type)
+            region_markers = markers_index.get_region_markers(index)
+            removed.extend((marker_type, i, markers[i]) for i in region_markers)
+            self.note_history_change(removed=[y for i in region_markers
+                                              if not isinstance(markers[i], MarkerRecord)
+                                              for y in markers[i]])
+
+            for i in reversed(region_markers):
+                self.discard_marker(markers, markers_index, i)
+
+            for i in markers_index.remove_region(index):
+                self.renumber_marker(markers, i)
 
         self._regions.pop(index)
-        for marker in markers:
-            self.delete_marker(marker)
+        self.update_region_digests(index)
+        self.remove_region_key_frames(index)
+        segmentation = self.remove_region_segmentation(index)
+        self.record_undo(("restore_region", (index, region, removed, key_frames, segmentation)),
+                         ("remove_region", (index,)))
+
+        self.set_changed(ChangeTypes.REGIONS |
+                         ChangeTypes.LINES |
+                         ChangeTypes.POINTS |
+                         ChangeTypes.KEY_FRAMES)
+        self.record_change("remove_region", index=index)
 
-        self.set_changed(1)
+    def restore_region(self, index, region, removed, key_frames, segmentation=None):
+        """
+        put back a region, with its markers, key frames and segmentation, reversing remove_region
+            Args:
+                index (int): the array index of the region
+                region (QGraphicsRectItem): the region
+                removed ([(MarkerTypes, int, [])]): the type, array index and
+                                                    marker of each marker removed,
+                                                    in order of array index
+                key_frames ([int]): the key frames of the region or None
+                segmentation (np.array): the SEGMENT_DTYPE rows of the region or None
+        """
+        for marker_type in (MarkerTypes.LINE, MarkerTypes.POINT):
+            markers, markers_index, _ = self.select_markers(marker_type)
+            for i in markers_index.insert_region(index):
+                self.renumber_marker(markers, i, 1)
+
+        self._regions.insert(index, region)
+        self.update_region_digests(index)
+
+        self._key_frames = {(key + 1 if key >= index else key): frames
+                            for key, frames in self._key_frames.items()}
+        if key_frames is not None:
+            self._key_frames[index] = key_frames
+
+        self.restore_region_segmentation(index, segmentation)
+
+        # the markers record themselves, after the region they refer to
+        self.record_change("restore_region",
+                           index=index,
+                           rect=rect_to_tuple(region.rect()),
+                           key_frames=None if key_frames is None else list(key_frames),
+                           segmentation=segmentation)
+
+        for marker_type, i, marker in removed:
+            self.restore_marker(marker_type, i, marker)
+
+        self.set_changed(ChangeTypes.REGIONS |
+                         ChangeTypes.LINES |
+                         ChangeTypes.POINTS |
+                         ChangeTypes.KEY_FRAMES)
+
+    def renumber_marker(self, markers, index, step=-1):
+        """
+        change the region index of a marker, after a region with a lower
+        index has been removed or restored
+            Args:
+                markers ([]): the lines or points array
+                index (int): the array index of the marker
+                step (int): the change in the region index
+        """
+        marker = markers[index]
+        if isinstance(marker, MarkerRecord):
+            renumbered = marker.copy_with_region(marker.get_region() + step)
+            self.change_record_digest(marker, -1)
+            self.change_record_digest(renumbered, 1)
+            markers[index] = renumbered
+            return
+
+        self.remove_from_markers_digest(marker)
+        for item in marker:
+            item.setData(ItemDataTypes.REGION_INDEX, get_region(item) + step)
+        self.add_to_markers_digest(marker)
+
+    def remove_region_key_frames(self, index):
+        """
+        remove the key frames of a region and renumber those of the regions after it
+            Args:
+                index (int): the index of the region removed
+        """
+        self._key_frames = {(key - 1 if key > index else key): frames
+                            for key, frames in self._key_frames.items()
+                            if key != index}
 
     def get_regions(self):
         """
@@ -170,20 +876,309 @@ class VideoAnalysisResultsStore(qc.QObject):
 
     def get_lines(self):
         """
-        getter for the lines array
+        getter for the lines array, the graphics items of every line are made
             Returns:
                 the lines array [[QGraphicsLineItem]]
         """
+        for i in range(len(self._lines)):
+            self.build_marker(self._lines, i)
+
         return self._lines
 
     def get_points(self):
         """
-        getter for the points array
+        getter for the points array, the graphics items of every point are made
             Returns:
                 the points array [[QGraphicsLineItem]]
         """
+        for i in range(len(self._points)):
+            self.build_marker(self._points, i)
+
         return self._points
 
+    def get_line_marker(self, index):
+        """
+        getter for one line marker
+            Args:
+                index (int) the array index of the line marker
+            Returns:
+                [QGraphicsLineItem]
+        """
+        return self.build_marker(self._lines, index)
+
+    def get_point_marker(self, index):
+        """
+        getter for one point marker
+            Args:
+                index (int) the array index of the point marker
+            Returns:
+                [QGraphicsPathItem]
+        """
+        return self.build_marker(self._points, index)
+
+    @staticmethod
+    def build_marker(markers, index):
+        """
+        make the graphics items of a marker if it is held as a record
+            Args:
+                markers ([]): the lines or points array
+                index (int): the array index of the marker
+            Returns:
+                ([QGraphicsItem]) the marker
+        """
+        marker = markers[index]
+        if isinstance(marker, MarkerRecord):
+            marker = marker.build()
+            markers[index] = marker
+
+        return marker
+
+    @staticmethod
+    def find_marker_with_hash(markers_index, hash_code):
+        """
+        find the marker holding an item with a given hash code, without
+        building markers held as records
+            Args:
+                markers_index (MarkerIndex): the index of the lines or points
+                hash_code (int): the hash code of the item
+            Returns:
+                (int) the array index of the marker, or None if not found
+        """
+        found = markers_index.find(hash_code)
+        if found is None:
+            return None
+
+        return found[0]
+
+    @staticmethod
+    def remove_from_markers_index(markers_index, index, position):
+        """
+        remove one item from the index of the lines or points, the marker is
+        removed if it was the only item
+            Args:
+                markers_index (MarkerIndex): the index of the lines or points
+                index (int): the array index of the marker
+                position (int): the position of the item in the marker
+        """
+        hashes = markers_index.get_hashes(index)
+        if len(hashes) == 1:
+            markers_index.delete_marker(index)
+        else:
+            markers_index.set_marker(index, hashes[:position] + hashes[position+1:])
+
+    def discard_marker(self, markers, markers_index, index):
+        """
+        delete a marker and remove it from the digest
+            Args:
+                markers ([]): the lines or points array
+                markers_index (MarkerIndex): the index of the lines or points
+                index (int): the array index of the marker
+        """
+        marker = markers[index]
+        if isinstance(marker, MarkerRecord):
+            self.change_record_digest(marker, -1)
+        else:
+            self.remove_from_markers_digest(marker)
+
+        del markers[index]
+        markers_index.delete_marker(index)
+
+    def select_markers(self, marker_type):
+        """
+        get the array and index of the lines or points
+            Args:
+                marker_type (MarkerTypes): LINE or POINT
+            Returns:
+                ([], MarkerIndex, ChangeTypes) the markers, their index and the change flag
+        """
+        if marker_type == MarkerTypes.LINE:
+            return self._lines, self._line_index, ChangeTypes.LINES
+
+        return self._points, self._point_index, ChangeTypes.POINTS
+
+    def take_item(self, marker_type, index, position):
+        """
+        remove one item from a marker, the marker is removed if it becomes empty
+            Args:
+                marker_type (MarkerTypes): LINE or POINT
+                index (int): the array index of the marker
+                position (int): the position of the item in the marker
+        """
+        markers, markers_index, change = self.select_markers(marker_type)
+        marker = self.build_marker(markers, index)
+        hash_code = markers_index.get_hashes(index)[position]
+        item = marker.pop(position)
+
+        self.remove_from_markers_digest([item])
+        self.remove_from_markers_index(markers_index, index, position)
+        if len(marker) == 0:
+            del markers[index]
+
+        self.note_history_change(removed=[item], marker=marker)
+        self.set_changed(change)
+        self.record_change("remove_" + marker_type_name(marker_type), hash=hash_code)
+
+    def restore_item(self, marker_type, index, position, item):
+        """
+        put back an item removed from a marker, reversing take_item
+            Args:
+                marker_type (MarkerTypes): LINE or POINT
+                index (int): the array index of the marker
+                position (int): the position of the item in the marker
+                item (QGraphicsItem): the line or point
+        """
+        markers, markers_index, change = self.select_markers(marker_type)
+        marker = self.build_marker(markers, index)
+        marker.insert(position, item)
+
+        hash_code = (hash_graphics_line(item) if marker_type == MarkerTypes.LINE
+                     else hash_graphics_point(item))
+        hashes = markers_index.get_hashes(index)
+        markers_index.set_marker(index, hashes[:position] + [hash_code] + hashes[position:])
+        self.add_to_markers_digest([item])
+
+        self.note_history_change(marker=marker)
+        self.set_changed(change)
+
+        # the journal finds the marker by the parent, which must be in the marker
+        parent = get_parent_hash(item)
+        if parent not in hashes:
+            parent = hashes[max(position - 1, 0)]
+        values = (g_line_to_tuple(item) if marker_type == MarkerTypes.LINE
+                  else g_point_to_tuple(item))
+        self.record_change("add_" + marker_type_name(marker_type), values=values, parent=parent)
+
+    def take_marker(self, marker_type, index):
+        """
+        remove a whole marker
+            Args:
+                marker_type (MarkerTypes): LINE or POINT
+                index (int): the array index of the marker
+        """
+        markers, markers_index, change = self.select_markers(marker_type)
+        marker = markers[index]
+        values = marker_to_rows(marker_type, marker, 0)[0].tolist()[1:]
+        self.discard_marker(markers, markers_index, index)
+
+        if not isinstance(marker, MarkerRecord):
+            self.note_history_change(removed=marker)
+        self.set_changed(change)
+        self.record_change("delete_marker", type=int(marker_type), values=values)
+
+    def restore_marker(self, marker_type, index, marker):
+        """
+        put back a whole marker, reversing take_marker
+            Args:
+                marker_type (MarkerTypes): LINE or POINT
+                index (int): the array index of the marker
+                marker ([QGraphicsItem] or MarkerRecord): the marker
+        """
+        markers, markers_index, change = self.select_markers(marker_type)
+        markers.insert(index, marker)
+
+        if isinstance(marker, MarkerRecord):
+            markers_index.insert_marker(index, marker.get_item_hashes(), marker.get_region())
+            self.change_record_digest(marker, 1)
+        else:
+            hash_item = hash_graphics_line if marker_type == MarkerTypes.LINE else hash_graphics_point
+            markers_index.insert_marker(index,
+                                        [hash_item(x) for x in marker],
+                                        get_region(marker[0]))
+            self.add_to_markers_digest(marker)
+
+        self.note_history_change(marker=marker)
+        self.set_changed(change)
+        self.record_change("restore_marker",
+                           type=int(marker_type),
+                           index=index,
+                           rows=marker_to_rows(marker_type, marker, 0).tolist())
+
+    def record_item_removal(self, marker_type, index, position):
+        """
+        record the inverse of removing one item from a marker, before it is removed
+            Args:
+                marker_type (MarkerTypes): LINE or POINT
+                index (int): the array index of the marker
+                position (int): the position of the item in the marker
+        """
+        marker = self.select_markers(marker_type)[0][index]
+        item = marker[position]
+        if len(marker) == 1:
+            self.record_undo(("restore_marker", (marker_type, index, [item])),
+                             ("take_marker", (marker_type, index)))
+        else:
+            self.record_undo(("restore_item", (marker_type, index, position, item)),
+                             ("take_item", (marker_type, index, position)))
+
+    def set_item_parents(self, parents):
+        """
+        set the parent hash codes of items, the item hash codes are unchanged
+            Args:
+                parents ([(QGraphicsItem, str)]): the items and their parent hash codes
+        """
+        for item, parent in parents:
+            item.setData(ItemDataTypes.PARENT_HASH, parent)
+
+    def get_marker_rows(self, marker_type):
+        """
+        get all the lines or points as one array, in the layout of the csv files
+        with the array index as ID, without making any graphics items
+            Args:
+                marker_type (MarkerTypes): LINE or POINT
+            Returns:
+                (np.array) LINE_DTYPE or POINT_DTYPE rows
+        """
+        if marker_type == MarkerTypes.LINE:
+            markers = self._lines
+            dtype = LINE_DTYPE
+        else:
+            markers = self._points
+            dtype = POINT_DTYPE
+
+        if len(markers) == 0:
+            return np.empty(0, dtype=dtype)
+
+        return np.concatenate([marker_to_rows(marker_type, x, i) for i, x in enumerate(markers)])
+
+    def get_marker_rows_for_region(self, marker_type, index):
+        """
+        get the rows of each line or point marker in a region, without
+        making any graphics items
+            Args:
+                marker_type (MarkerTypes): LINE or POINT
+                index (int): the region index
+            Returns:
+                ([np.array]) LINE_DTYPE or POINT_DTYPE rows of each marker,
+                             with the array index as ID
+        """
+        if marker_type == MarkerTypes.LINE:
+            markers = self._lines
+            markers_index = self._line_index
+        else:
+            markers = self._points
+            markers_index = self._point_index
+
+        return [marker_to_rows(marker_type, markers[i], i)
+                for i in markers_index.get_region_markers(index)]
+
+    def get_region_rows(self):
+        """
+        get the regions as one array, in the layout of the csv file
+            Returns:
+                (np.array) REGION_DTYPE rows in order of index
+        """
+        return np.array([tuple(rect_to_tuple(x.rect())) for x in self._regions],
+                        dtype=REGION_DTYPE)
+
+    def count_unbuilt_markers(self):
+        """
+        get the number of markers whose graphics items have not been made
+            Returns:
+                (int)
+        """
+        markers = self._lines + self._points
+        return sum(1 for x in markers if isinstance(x, MarkerRecord))
+
     def get_key_frames(self, region_index):
         """
         get the list of key frames for a region_index
@@ -205,6 +1200,9 @@ class VideoAnalysisResultsStore(qc.QObject):
             Returns:
                 array of key-frames [int]
         """
+        if isinstance(self._points[index], MarkerRecord):
+            return self._points[index].get_frames()
+
         key_frames = []
         for point in self._points[index]:
             key_frames.append(get_frame(point))
@@ -219,6 +1217,9 @@ class VideoAnalysisResultsStore(qc.QObject):
             Returns:
                 array of key-frames [int]
         """
+        if isinstance(self._lines[index], MarkerRecord):
+            return self._lines[index].get_frames()
+
         key_frames = []
         for line in self._lines[index]:
             key_frames.append(get_frame(line))
@@ -234,12 +1235,28 @@ class VideoAnalysisResultsStore(qc.QObject):
         """
         if region_index not in self._key_frames.keys():
             self._key_frames[region_index] = [frame_number]
-            self.set_changed()
+        elif frame_number not in self._key_frames[region_index]:
+            bisect.insort(self._key_frames[region_index], frame_number)
+        else:
             return
 
-        if frame_number not in self._key_frames[region_index]:
-            bisect.insort(self._key_frames[region_index], frame_number)
-            self.set_changed()
+        self.set_changed(ChangeTypes.KEY_FRAMES)
+        self.record_undo(("remove_key_frame", (region_index, frame_number)),
+                         ("add_key_frame", (region_index, frame_number)))
+
+    def remove_key_frame(self, region_index, frame_number):
+        """
+        remove a key frame, reversing add_key_frame
+            Args:
+                region_index (int) the array index of the region
+                frame_number (int) the key_frame number
+        """
+        frames = self._key_frames[region_index]
+        frames.remove(frame_number)
+        if len(frames) == 0:
+            del self._key_frames[region_index]
+
+        self.set_changed(ChangeTypes.KEY_FRAMES)
 
     def add_region(self, region):
         """
@@ -248,30 +1265,65 @@ class VideoAnalysisResultsStore(qc.QObject):
                 region (QRect) the region
         """
         self._regions.append(region)
-        self.set_changed(1)
+        self._region_digests.append(hash_indexed_region(region, len(self._regions)-1))
+        self._region_rects.append(rect_to_tuple(region.rect()))
+        self.set_changed(ChangeTypes.REGIONS)
+        self.record_undo(("remove_region", (len(self._regions)-1,)),
+                         ("add_region", (region,)))
+        self.record_change("add_region", rect=rect_to_tuple(region.rect()))
 
     def add_point(self, point):
         """
         add a new point
             Args:
                 point (QGraphicsPathItem) the path item
+            Returns:
+                the previous point of the marker, or None
+        """
+        with self.batch():
+            return self.append_point(point)
+
+    def append_point(self, point):
+        """
+        add a new point, recording the inverse in the history
+            Args:
+                point (QGraphicsPathItem) the path item
+            Returns:
+                the previous point of the marker, or None
         """
         if get_parent_hash(point) == "p":
             self._points.append([point])
+            self._point_index.append_marker([hash_graphics_point(point)], get_region(point))
+            self.add_to_markers_digest([point])
             self.add_key_frame(get_region(point), get_frame(point))
-            self.set_changed()
+            self.set_changed(ChangeTypes.POINTS)
+            self.record_change("add_point", values=g_point_to_tuple(point), parent="p")
+
+            index = len(self._points) - 1
+            self.record_undo(("take_marker", (MarkerTypes.POINT, index)),
+                             ("restore_marker", (MarkerTypes.POINT, index, self._points[index])))
             return None
 
         index = self.find_list_for_new_point(point)
         if index is None:
             raise LookupError("Graphics path with parent hash not matching any in store")
 
-        self._points[index].append(point)
+        self.build_marker(self._points, index).append(point)
+        self.add_to_markers_digest([point])
         self._points[index].sort(key=get_frame)
         self.add_key_frame(get_region(point), get_frame(point))
-        self.set_changed()
+        self.set_changed(ChangeTypes.POINTS)
+        self.record_change("add_point",
+                           values=g_point_to_tuple(point),
+                           parent=get_parent_hash(point))
 
         tmp = self._points[index].index(point)
+        hashes = self._point_index.get_hashes(index)
+        self._point_index.set_marker(index, hashes[:tmp] + [hash_graphics_point(point)] + hashes[tmp:])
+
+        self.record_undo(("take_item", (MarkerTypes.POINT, index, tmp)),
+                         ("restore_item", (MarkerTypes.POINT, index, tmp, point)))
+
         if tmp > 0:
             return self._points[index][tmp-1]
 
@@ -281,24 +1333,54 @@ class VideoAnalysisResultsStore(qc.QObject):
         """
         add a new line
             Args:
-                point (QGraphicsLineItem) the line item
+                line (QGraphicsLineItem) the line item
+            Returns:
+                the previous line of the marker, or None
+        """
+        with self.batch():
+            return self.append_line(line)
+
+    def append_line(self, line):
+        """
+        add a new line, recording the inverse in the history
+            Args:
+                line (QGraphicsLineItem) the line item
+            Returns:
+                the previous line of the marker, or None
         """
         if get_parent_hash(line) == "p":
             self._lines.append([line])
+            self._line_index.append_marker([hash_graphics_line(line)], get_region(line))
+            self.add_to_markers_digest([line])
             self.add_key_frame(get_region(line), get_frame(line))
-            self.set_changed()
+            self.set_changed(ChangeTypes.LINES)
+            self.record_change("add_line", values=g_line_to_tuple(line), parent="p")
+
+            index = len(self._lines) - 1
+            self.record_undo(("take_marker", (MarkerTypes.LINE, index)),
+                             ("restore_marker", (MarkerTypes.LINE, index, self._lines[index])))
             return None
 
         index = self.find_list_for_new_line(line)
         if index is None:
             raise LookupError("Graphics item with parent hash not matching any in store")
 
-        self._lines[index].append(line)
+        self.build_marker(self._lines, index).append(line)
+        self.add_to_markers_digest([line])
         self._lines[index].sort(key=get_frame)
         self.add_key_frame(get_region(line), get_frame(line))
-        self.set_changed()
+        self.set_changed(ChangeTypes.LINES)
+        self.record_change("add_line",
+                           values=g_line_to_tuple(line),
+                           parent=get_parent_hash(line))
 
         tmp = self._lines[index].index(line)
+        hashes = self._line_index.get_hashes(index)
+        self._line_index.set_marker(index, hashes[:tmp] + [hash_graphics_line(line)] + hashes[tmp:])
+
+        self.record_undo(("take_item", (MarkerTypes.LINE, index, tmp)),
+                         ("restore_item", (MarkerTypes.LINE, index, tmp, line)))
+
         if tmp > 0:
             return self._lines[index][tmp-1]
 
@@ -309,12 +1391,34 @@ class VideoAnalysisResultsStore(qc.QObject):
         add a new marker to the lines with no change results call
         """
         self._lines.append(marker)
+        self._line_index.append_marker([hash_graphics_line(x) for x in marker],
+                                       get_region(marker[0]))
+        self.add_to_markers_digest(marker)
 
     def insert_point_marker(self, marker):
         """
         add a new marker to the points with no change results call
         """
         self._points.append(marker)
+        self._point_index.append_marker([hash_graphics_point(x) for x in marker],
+                                        get_region(marker[0]))
+        self.add_to_markers_digest(marker)
+
+    def insert_marker_record(self, record):
+        """
+        add a marker, whose graphics items are made when first needed,
+        with no change results call
+            Args:
+                record (MarkerRecord): the marker
+        """
+        if record.get_marker_type() == MarkerTypes.LINE:
+            self._lines.append(record)
+            self._line_index.append_marker(record.get_item_hashes(), record.get_region())
+        else:
+            self._points.append(record)
+            self._point_index.append_marker(record.get_item_hashes(), record.get_region())
+
+        self.change_record_digest(record, 1)
 
     def line_frame_number_unique(self, line):
         """
@@ -345,12 +1449,7 @@ class VideoAnalysisResultsStore(qc.QObject):
                 LookupError if there is no match
         """
         hash_code = get_parent_hash(line)
-        for i, _ in enumerate(self._lines):
-            for line_move in self._lines[i]:
-                if hash_graphics_line(line_move) == hash_code:
-                    return i
-
-        return None
+        return self.find_marker_with_hash(self._line_index, hash_code)
 
     def find_list_for_old_line(self, line):
         """
@@ -363,12 +1462,7 @@ class VideoAnalysisResultsStore(qc.QObject):
                 LookupError if there is no match
         """
         target = hash_graphics_line(line)
-        for i, markers in enumerate(self._lines):
-            hashes = [hash_graphics_line(x) for x in markers]
-            if target in hashes:
-                return i
-
-        return None
+        return self.find_marker_with_hash(self._line_index, target)
 
     def find_list_for_new_point(self, point):
         """
@@ -381,12 +1475,7 @@ class VideoAnalysisResultsStore(qc.QObject):
                 LookupError if there is no match
         """
         hash_code = get_parent_hash(point)
-        for i, _ in enumerate(self._points):
-            for point_move in self._points[i]:
-                if hash_graphics_point(point_move) == hash_code:
-                    return i
-
-        return None
+        return self.find_marker_with_hash(self._point_index, hash_code)
 
     def find_list_for_old_point(self, point):
         """
@@ -399,12 +1488,7 @@ class VideoAnalysisResultsStore(qc.QObject):
                 LookupError if there is no match
         """
         target = hash_graphics_point(point)
-        for i, markers in enumerate(self._points):
-            hashes = [hash_graphics_point(x) for x in markers]
-            if target in hashes:
-                return i
-
-        return None
+        return self.find_marker_with_hash(self._point_index, target)
 
     def delete_marker(self, marker):
         """
@@ -416,13 +1500,19 @@ class VideoAnalysisResultsStore(qc.QObject):
 
         if m_type == MarkerTypes.LINE:
             index = self.find_list_for_old_line(marker)
-            del self._lines[index]
-            self.set_changed()
+            self.record_undo(("restore_marker", (m_type, index, self._lines[index])),
+                             ("take_marker", (m_type, index)))
+            self.discard_marker(self._lines, self._line_index, index)
+            self.set_changed(ChangeTypes.LINES)
+            self.record_change("delete_marker", type=int(m_type), values=g_line_to_tuple(marker))
 
         if m_type == MarkerTypes.POINT:
             index = self.find_list_for_old_point(marker)
-            del self._points[index]
-            self.set_changed()
+            self.record_undo(("restore_marker", (m_type, index, self._points[index])),
+                             ("take_marker", (m_type, index)))
+            self.discard_marker(self._points, self._point_index, index)
+            self.set_changed(ChangeTypes.POINTS)
+            self.record_change("delete_marker", type=int(m_type), values=g_point_to_tuple(marker))
 
     def remove_point(self, hash_code):
         """
@@ -432,20 +1522,19 @@ class VideoAnalysisResultsStore(qc.QObject):
             Returns:
                 None if line was one frame, else remaining lines
         """
-        point_index = None
-        marker_index = None
-
-        for i, points in enumerate(self._points):
-            for j, point in enumerate(points):
-                if hash_graphics_point(point) == hash_code:
-                    marker_index = j
-                    point_index = i
-
-        if point_index is None or marker_index is None:
+        found = self._point_index.find(hash_code)
+        if found is None:
             return None
 
-        del self._points[point_index][marker_index]
-        self.set_changed()
+        point_index, marker_index = found
+        points = self.build_marker(self._points, point_index)
+        self.record_item_removal(MarkerTypes.POINT, point_index, marker_index)
+
+        self.remove_from_markers_digest([points[marker_index]])
+        del points[marker_index]
+        self.remove_from_markers_index(self._point_index, point_index, marker_index)
+        self.set_changed(ChangeTypes.POINTS)
+        self.record_change("remove_point", hash=hash_code)
 
         if len(self._points[point_index]) == 0:
             del self._points[point_index]
@@ -461,20 +1550,19 @@ class VideoAnalysisResultsStore(qc.QObject):
             Returns:
                 None if line was one frame, else remaining lines
         """
-        line_index = None
-        marker_index = None
-
-        for i, lines in enumerate(self._lines):
-            for j, line in enumerate(lines):
-                if hash_graphics_line(line) == hash_code:
-                    marker_index = j
-                    line_index = i
-
-        if line_index is None or marker_index is None:
+        found = self._line_index.find(hash_code)
+        if found is None:
             return None
 
-        del self._lines[line_index][marker_index]
-        self.set_changed()
+        line_index, marker_index = found
+        lines = self.build_marker(self._lines, line_index)
+        self.record_item_removal(MarkerTypes.LINE, line_index, marker_index)
+
+        self.remove_from_markers_digest([lines[marker_index]])
+        del lines[marker_index]
+        self.remove_from_markers_index(self._line_index, line_index, marker_index)
+        self.set_changed(ChangeTypes.LINES)
+        self.record_change("remove_line", hash=hash_code)
 
         if len(self._lines[line_index]) == 0:
             del self._lines[line_index]
@@ -490,10 +1578,16 @@ class VideoAnalysisResultsStore(qc.QObject):
                 index (int) the array index of the list holding the line
         """
         root_hash = None
+        values = g_line_to_tuple(line)
 
         if get_parent_hash(line) == 'p':
             if len(self._lines[index]) == 1:
+                self.record_item_removal(MarkerTypes.LINE, index, 0)
+                self.remove_from_markers_digest(self._lines[index])
                 del self._lines[index]
+                self._line_index.delete_marker(index)
+                self.set_changed(ChangeTypes.LINES)
+                self.record_change("delete_line", values=values)
                 return
 
             root_hash = 'p'
@@ -503,6 +1597,8 @@ class VideoAnalysisResultsStore(qc.QObject):
         p_hash = hash_graphics_line(line)
 
         children = [x for x in self._lines[index] if get_parent_hash(x) == p_hash]
+        position = self._lines[index].index(line)
+        old_parents = [(x, get_parent_hash(x)) for x in children]
 
         if len(children) > 0:
             new_p = children.pop(0)
@@ -512,8 +1608,20 @@ class VideoAnalysisResultsStore(qc.QObject):
             for child in children:
                 child.setData(ItemDataTypes.PARENT_HASH, p_hash)
 
-        self._lines[index].remove(line)
-        self.set_changed()
+        new_parents = [(x, get_parent_hash(x)) for x, _ in old_parents]
+        # the rewiring and removal are undone as one step
+        with self.batch():
+            self.record_undo(("set_item_parents", (old_parents,)),
+                             ("set_item_parents", (new_parents,)))
+            self.record_item_removal(MarkerTypes.LINE, index, position)
+
+        # the parent hash is not part of an item's hash code, so the
+        # rewiring above leaves the index unchanged
+        del self._lines[index][position]
+        self.remove_from_markers_index(self._line_index, index, position)
+        self.remove_from_markers_digest([line])
+        self.set_changed(ChangeTypes.LINES)
+        self.record_change("delete_line", values=values)
 
     def delete_point(self, point, index):
         """
@@ -523,10 +1631,16 @@ class VideoAnalysisResultsStore(qc.QObject):
                 index (int) the array index of the list holding the point
         """
         root_hash = None
+        values = g_point_to_tuple(point)
 
         if get_parent_hash(point) == 'p':
             if len(self._points[index]) == 1:
+                self.record_item_removal(MarkerTypes.POINT, index, 0)
+                self.remove_from_markers_digest(self._points[index])
                 del self._points[index]
+                self._point_index.delete_marker(index)
+                self.set_changed(ChangeTypes.POINTS)
+                self.record_change("delete_point", values=values)
                 return
 
             root_hash = 'p'
@@ -536,6 +1650,8 @@ class VideoAnalysisResultsStore(qc.QObject):
         p_hash = hash_graphics_point(point)
 
         children = [x for x in self._points[index] if get_parent_hash(x) == p_hash]
+        position = self._points[index].index(point)
+        old_parents = [(x, get_parent_hash(x)) for x in children]
 
         if len(children) > 0:
             new_p = children.pop(0)
@@ -545,22 +1661,32 @@ class VideoAnalysisResultsStore(qc.QObject):
             for child in children:
                 child.setData(ItemDataTypes.PARENT_HASH, p_hash)
 
-        self._points[index].remove(point)
-        self.set_changed()
+        new_parents = [(x, get_parent_hash(x)) for x, _ in old_parents]
+        # the rewiring and removal are undone as one step
+        with self.batch():
+            self.record_undo(("set_item_parents", (old_parents,)),
+                             ("set_item_parents", (new_parents,)))
+            self.record_item_removal(MarkerTypes.POINT, index, position)
+
+        # the parent hash is not part of an item's hash code, so the
+        # rewiring above leaves the index unchanged
+        del self._points[index][position]
+        self.remove_from_markers_index(self._point_index, index, position)
+        self.remove_from_markers_digest([point])
+        self.set_changed(ChangeTypes.POINTS)
+        self.record_change("delete_point", values=values)
 
     def get_lines_for_region(self, index):
         """
-        get a list of lines associated with a region
+        get a list of lines associated with a region, the graphics
+        items of the region's lines are made
             Args:
                 index (int) array index of region
             Returns:
                 list of lines [line], or None if none found
         """
-        tmp = []
-
-        for line in self._lines:
-            if get_region(line[0]) == index:
-                tmp.append(line)
+        tmp = [self.build_marker(self._lines, i)
+               for i in self._line_index.get_region_markers(index)]
 
         if len(tmp) > 0:
             return tmp
@@ -569,17 +1695,15 @@ class VideoAnalysisResultsStore(qc.QObject):
 
     def get_points_for_region(self, index):
         """
-        get a list of points associated with a region
+        get a list of points associated with a region, the graphics
+        items of the region's points are made
             Args:
                 index (int) array index of region
             Returns:
                 list of points [points], or None if none found
         """
-        tmp = []
-
-        for point in self._points:
-            if get_region(point[0]) == index:
-                tmp.append(point)
+        tmp = [self.build_marker(self._points, i)
+               for i in self._point_index.get_region_markers(index)]
 
         if len(tmp) > 0:
             return tmp
@@ -594,10 +1718,10 @@ class VideoAnalysisResultsStore(qc.QObject):
             Returns:
                 True if markers defined else False
         """
-        if len(self.get_points_for_region(index)) > 0:
+        if self.get_points_for_region(index) is not None:
             return True
 
-        if len(self.get_lines_for_region(index)) > 0:
+        if self.get_lines_for_region(index) is not None:
             return True
 
         return False
@@ -608,10 +1732,10 @@ class VideoAnalysisResultsStore(qc.QObject):
             Args:
                 pens (PenStore): the holder of the pens
         """
-        for marker in self._lines:
-            for line in marker:
-                line.setPen(pens.get_display_pen())
-
-        for marker in self._points:
-            for point in marker:
-                point.setPen(pens.get_display_pen())
+        for markers in (self._lines, self._points):
+            for i, marker in enumerate(markers):
+                if isinstance(marker, MarkerRecord):
+                    markers[i] = marker.copy_with_pen(pens.get_display_pen())
+                else:
+                    for item in marker:
+                        item.setPen(pens.get_display_pen())
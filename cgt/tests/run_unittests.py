@@ -18,8 +18,23 @@ This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
 import unittest
 
 from cgt.tests.test_io import TestIO
+from cgt.tests.test_batchjobs import TestBatchJobs
+from cgt.tests.test_binaryproject import TestBinaryProject
+from cgt.tests.test_htmlreport import TestHtmlReport
 from cgt.tests.test_project import TestProject
+from cgt.tests.test_projectjournal import TestProjectJournal
 from cgt.tests.test_results import TestResults
+from cgt.tests.test_resultsdata import TestResultsData
+from cgt.tests.test_reportrender import TestReportRender
+from cgt.tests.test_sqliteresultsstore import TestSQLiteResultsStore
+from cgt.tests.test_speedscache import TestSpeedsCache
+from cgt.tests.test_templatematching import TestTemplateMatching
+from cgt.tests.test_kymograph import TestKymograph
+from cgt.tests.test_changedetection import TestChangeDetection
+from cgt.tests.test_segmentation import TestSegmentation
+from cgt.tests.test_drift import TestDrift
+from cgt.tests.test_markertracks import TestMarkerTracks
+from cgt.tests.test_enhancement import TestEnhancement
 from cgt.tests.test_velocities import (TestDisplacements, TestVelocities)
 from cgt.tests.test_videocontrols import TestVideoControls
 
@@ -32,6 +47,34 @@ def make_suite():
     suite = unittest.TestSuite()
 
     suite.addTest(TestIO('test_write_read'))
+    suite.addTest(TestIO('test_lazy_read'))
+    suite.addTest(TestIO('test_changed_only'))
+
+    suite.addTest(TestBatchJobs('test_speeds'))
+    suite.addTest(TestBatchJobs('test_report'))
+    suite.addTest(TestBatchJobs('test_failure'))
+
+    suite.addTest(TestBinaryProject('test_round_trip'))
+    suite.addTest(TestBinaryProject('test_atomic_save'))
+    suite.addTest(TestBinaryProject('test_newest_format'))
+
+    suite.addTest(TestProjectJournal('test_replay'))
+    suite.addTest(TestProjectJournal('test_compaction'))
+    suite.addTest(TestProjectJournal('test_undo'))
+    suite.addTest(TestProjectJournal('test_partial_entry'))
+
+    suite.addTest(TestSQLiteResultsStore('test_editing'))
+    suite.addTest(TestSQLiteResultsStore('test_lazy_records'))
+    suite.addTest(TestSQLiteResultsStore('test_remove_region'))
+    suite.addTest(TestSQLiteResultsStore('test_transaction'))
+
+    suite.addTest(TestHtmlReport('test_snapshot'))
+    suite.addTest(TestHtmlReport('test_make_report'))
+    suite.addTest(TestHtmlReport('test_cancel_report'))
+    suite.addTest(TestHtmlReport('test_report_error'))
+    suite.addTest(TestHtmlReport('test_compact_report'))
+    suite.addTest(TestHtmlReport('test_embedded_report'))
+    suite.addTest(TestHtmlReport('test_segmentation_report'))
 
     suite.addTest(TestProject('test_create_project'))
     suite.addTest(TestProject('test_add_data'))
@@ -40,10 +83,62 @@ def make_suite():
     suite.addTest(TestResults('test_state_with_new_data'))
     suite.addTest(TestResults('test_add_region'))
     suite.addTest(TestResults('test_add_keyframe'))
+    suite.addTest(TestResults('test_results_digest'))
+    suite.addTest(TestResults('test_digest_deterministic'))
+    suite.addTest(TestResults('test_hash_index'))
+    suite.addTest(TestResults('test_batch'))
+    suite.addTest(TestResults('test_undo_redo'))
+
+    suite.addTest(TestResultsData('test_copy'))
+    suite.addTest(TestResultsData('test_speeds'))
+    suite.addTest(TestResultsData('test_without_qt'))
+
+    suite.addTest(TestReportRender('test_render_pool'))
+    suite.addTest(TestReportRender('test_downscale'))
+    suite.addTest(TestReportRender('test_qimage_to_array'))
+
+    suite.addTest(TestSpeedsCache('test_hits'))
+    suite.addTest(TestSpeedsCache('test_copies'))
+    suite.addTest(TestSpeedsCache('test_size'))
+
+    suite.addTest(TestTemplateMatching('test_correlation'))
+    suite.addTest(TestTemplateMatching('test_tracking'))
+    suite.addTest(TestTemplateMatching('test_lost'))
+
+    suite.addTest(TestKymograph('test_sampling'))
+    suite.addTest(TestKymograph('test_many_lines'))
+    suite.addTest(TestKymograph('test_normal_profile'))
+    suite.addTest(TestKymograph('test_fit'))
+
+    suite.addTest(TestChangeDetection('test_energies'))
+    suite.addTest(TestChangeDetection('test_suggestions'))
+
+    suite.addTest(TestSegmentation('test_otsu'))
+    suite.addTest(TestSegmentation('test_labels'))
+    suite.addTest(TestSegmentation('test_measure'))
+    suite.addTest(TestSegmentation('test_frames'))
+    suite.addTest(TestSegmentation('test_store'))
+    suite.addTest(TestSegmentation('test_persistence'))
+    suite.addTest(TestDrift('test_downsample'))
+    suite.addTest(TestDrift('test_estimate'))
+    suite.addTest(TestDrift('test_segments'))
+    suite.addTest(TestDrift('test_compensate'))
+    suite.addTest(TestDrift('test_store'))
+    suite.addTest(TestDrift('test_persistence'))
+    suite.addTest(TestMarkerTracks('test_points'))
+    suite.addTest(TestMarkerTracks('test_lines'))
+    suite.addTest(TestMarkerTracks('test_store'))
+    suite.addTest(TestMarkerTracks('test_export'))
+    suite.addTest(TestEnhancement('test_tables'))
+    suite.addTest(TestEnhancement('test_enhance'))
+    suite.addTest(TestEnhancement('test_median'))
+    suite.addTest(TestEnhancement('test_project'))
 
     suite.addTest(TestDisplacements('test_velocity'))
 
     suite.addTest(TestVelocities('test_calculator'))
+    suite.addTest(TestVelocities('test_fitted_speeds'))
+    suite.addTest(TestVelocities('test_all_regions'))
 
     suite.addTest(TestVideoControls('test_initial_state'))
     suite.addTest(TestVideoControls('test_one_frame_forward'))
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+module test_batchjobs provides unit tests for processing projects without the GUI
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk
+"""
+import unittest
+import tempfile
+import pathlib
+import csv
+
+from cgt.io import batchjobs
+from cgt.io.htmlreport import (ReportMaker, ReportSnapshot)
+from cgt.io.writecsvreports import save_csv_project
+from cgt.model.cgtproject import CGTProject
+from cgt.model.speedscache import SpeedsCache
+from cgt.tests.makeresults import (make_results_object, get_test_values)
+from cgt.tests.test_htmlreport import ImageReader
+from cgt.util import config
+
+class ImageDataSource(batchjobs.BatchDataSource):
+    """
+    batch data source providing plain images, in place of a video file
+    """
+
+    def get_enhanced_reader(self):
+        """
+        getter for the video reader
+        """
+        return ImageReader()
+
+class TestBatchJobs(unittest.TestCase):
+    """
+    tests of the batch processing of projects
+    """
+
+    def setUp(self):
+        """
+        save two projects
+        """
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._project_dirs = []
+
+        values = get_test_values()
+        for i in range(2):
+            path = pathlib.Path(self._tmp_dir.name).joinpath(f"project_{i}")
+            path.mkdir()
+
+            project = CGTProject()
+            project.init_new_project()
+            project["results"] = make_results_object()
+            project["resolution"] = values.scale
+            project["frame_rate"] = values.fps
+            project["proj_full_path"] = str(path)
+            project["proj_name"] = f"testing_{i}"
+            save_csv_project(project)
+
+            self._project_dirs.append(str(path))
+
+    def tearDown(self):
+        """
+        clean up
+        """
+        self._tmp_dir.cleanup()
+
+    def test_speeds(self):
+        """
+        test the speeds files are written by parallel workers
+        """
+        results = batchjobs.run_batch(self._project_dirs, [batchjobs.SPEEDS], 2)
+
+        message = "batch job failed"
+        self.assertTrue(all(x.success for x in results), message)
+        message = "results not in order of directories"
+        self.assertEqual([x.project_dir for x in results], self._project_dirs, message)
+
+        values = get_test_values()
+        for project_dir in self._project_dirs:
+            files = list(pathlib.Path(project_dir).glob("*_speeds.csv"))
+            self.assertEqual(len(files), 1, "speeds file not written")
+
+            with files[0].open('r', encoding="UTF-8") as fin:
+                rows = list(csv.reader(fin))
+
+            message = "wrong number of speeds"
+            self.assertEqual(len(rows), 3, message)
+            speeds = {x[2]: float(x[3]) for x in rows[1:]}
+            message = "wrong speed"
+            self.assertAlmostEqual(speeds["LINE"], values.line_speed, places=4, msg=message)
+            self.assertAlmostEqual(speeds["POINT"], values.point_speed, places=4, msg=message)
+
+    def test_report(self):
+        """
+        test the report of a batch job is made from a project as read, with the
+        speeds found through the data source's cache
+        """
+        project, _ = batchjobs.load_project(self._project_dirs[0])
+        source = ImageDataSource(project)
+        cache = source.get_speeds_cache()
+
+        message = "cache not over the project's results"
+        self.assertIsInstance(cache, SpeedsCache, message)
+        self.assertIs(cache, source.get_speeds_cache(), message)
+
+        workers = config.REPORT_WORKERS
+        config.REPORT_WORKERS = 1
+        try:
+            report_file = ReportMaker().save_html_report(ReportSnapshot(source))
+        finally:
+            config.REPORT_WORKERS = workers
+
+        message = "report not written"
+        self.assertTrue(pathlib.Path(report_file).exists(), message)
+        message = "speeds not found through the cache"
+        self.assertTrue(cache.get_statistics().misses > 0, message)
+
+    def test_failure(self):
+        """
+        test a project that cannot be read is reported and does not stop the batch
+        """
+        missing = str(pathlib.Path(self._tmp_dir.name).joinpath("missing"))
+        results = batchjobs.run_batch([missing, self._project_dirs[0]], [batchjobs.SPEEDS], 1)
+
+        message = "missing project not reported as failure"
+        self.assertFalse(results[0].success, message)
+        message = "failure stopped the batch"
+        self.assertTrue(results[1].success, message)
+
+if __name__ == "__main__":
+    unittest.main()
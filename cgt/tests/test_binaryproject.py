@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+module test_binaryproject provides unit tests for saving projects as a single binary file
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk
+"""
+import unittest
+import tempfile
+import pathlib
+import os
+
+from cgt.gui.penstore import PenStore
+from cgt.io import binaryproject
+from cgt.io.writecsvreports import save_csv_project
+from cgt.model.cgtproject import CGTProject
+from cgt.model.videoanalysisresultsstore import VideoAnalysisResultsStore
+from cgt.util.framestats import (FrameStats, VideoIntensityStats)
+from cgt.util.markers import hash_results
+from cgt.tests.makeresults import make_results_object
+
+class TestBinaryProject(unittest.TestCase):
+    """
+    tests of the binary project file
+    """
+
+    def setUp(self):
+        """
+        make a project in a temporary directory
+        """
+        self._tmp_dir = tempfile.TemporaryDirectory()
+
+        stats = VideoIntensityStats([0.0, 128.0, 256.0])
+        stats.append_frame(FrameStats(100.5, 10.25, [3.0, 7.0]))
+        stats.append_frame(FrameStats(101.5, 11.25, [4.0, 6.0]))
+
+        self._project = CGTProject()
+        self._project.init_new_project()
+        self._project["results"] = make_results_object()
+        self._project["results"].set_video_statistics(stats)
+        self._project["resolution"] = 0.8
+        self._project["frame_rate"] = 10.0
+        self._project["proj_full_path"] = self._tmp_dir.name
+        self._project["proj_name"] = "testing"
+
+    def tearDown(self):
+        """
+        clean up
+        """
+        self._tmp_dir.cleanup()
+
+    def read_back(self):
+        """
+        read the project directory
+            Returns:
+                (CGTProject, str) the project and the format read
+        """
+        project = CGTProject()
+        project["results"] = VideoAnalysisResultsStore(None)
+        project_format = binaryproject.read_project(self._tmp_dir.name, project, PenStore())
+
+        return project, project_format
+
+    def test_round_trip(self):
+        """
+        test a project is read back unchanged
+        """
+        binaryproject.save_binary_project(self._project)
+
+        contents = [x.name for x in pathlib.Path(self._tmp_dir.name).iterdir()]
+        message = "wrong files written"
+        self.assertEqual(contents, ["CGT_testing_project.cgtz"], message)
+
+        project, project_format = self.read_back()
+        message = "wrong format read"
+        self.assertEqual(project_format, binaryproject.BINARY_FORMAT, message)
+
+        original = self._project["results"]
+        results = project["results"]
+        message = "results not read back"
+        self.assertEqual(results.get_results_digest(), original.get_results_digest(), message)
+        self.assertEqual(hash_results(results), original.get_results_digest(), message)
+
+        for i in range(len(original.get_regions())):
+            message = "wrong key frames"
+            self.assertEqual(results.get_key_frames(i), original.get_key_frames(i), message)
+
+        message = "wrong project information"
+        self.assertEqual(project["start_user"], self._project["start_user"], message)
+        self.assertAlmostEqual(project["frame_rate"], 10.0, msg=message)
+
+    def test_atomic_save(self):
+        """
+        test a failed save leaves the previous file in place
+        """
+        out_file = binaryproject.save_binary_project(self._project)
+        size = out_file.stat().st_size
+
+        self._project["results"].get_regions()[0] = None
+        with self.assertRaises(AttributeError):
+            binaryproject.save_binary_project(self._project)
+
+        contents = [x.name for x in pathlib.Path(self._tmp_dir.name).iterdir()]
+        message = "temporary file not removed"
+        self.assertEqual(contents, [out_file.name], message)
+        message = "previous file changed"
+        self.assertEqual(out_file.stat().st_size, size, message)
+
+    def test_newest_format(self):
+        """
+        test the format saved last is read
+        """
+        out_file = binaryproject.save_binary_project(self._project)
+        save_csv_project(self._project)
+
+        # make the csv files newer than the binary file
+        time = out_file.stat().st_mtime
+        os.utime(out_file, (time - 10.0, time - 10.0))
+
+        project, project_format = self.read_back()
+        message = "csv files not read"
+        self.assertEqual(project_format, binaryproject.CSV_FORMAT, message)
+        self.assertEqual(project["results"].get_results_digest(),
+                         self._project["results"].get_results_digest(),
+                         message)
+
+        binaryproject.save_binary_project(project)
+        _, project_format = self.read_back()
+        message = "binary file not read"
+        self.assertEqual(project_format, binaryproject.BINARY_FORMAT, message)
+
+if __name__ == "__main__":
+    unittest.main()
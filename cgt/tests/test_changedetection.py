@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk
+"""
+import unittest
+
+import numpy as np
+
+from cgt.io.keyframesuggester import bounding_rect
+from cgt.util.changedetection import (ChangeDetector,
+                                      region_indices,
+                                      suggest_key_frames)
+
+def make_frames(count, speed=0.5, noise=2.0):
+    """
+    make frames with an edge moving right in the left half and noise on a
+    flat background in the right half
+        Args:
+            count (int): the number of frames
+            speed (float): the columns the edge moves per frame
+            noise (float): the standard deviation of the noise
+        Yields:
+            (int, np.array) the frame number and the frame
+    """
+    generator = np.random.default_rng(11)
+    cols = np.arange(100)[np.newaxis, :].repeat(60, axis=0)
+    for frame in range(count):
+        image = np.where(cols < 10.0 + speed*frame, 200.0, 50.0)
+        image[:, 50:] = 120.0
+        image += generator.normal(0.0, noise, image.shape)
+        yield frame, np.clip(np.rint(image), 0, 255).astype(np.uint8)
+
+class TestChangeDetection(unittest.TestCase):
+    """
+    tests of key frame suggestion by change detection
+    """
+
+    def test_energies(self):
+        """
+        test the energies of all regions found together match each region alone
+        """
+        rects = [(0, 0, 50, 60), (50, 10, 30, 20), (90, 50, 20, 20)]
+        frames = list(make_frames(6))
+
+        detector = ChangeDetector(rects, threshold=1.0e9)
+        for frame, image in frames:
+            detector.add_frame(frame, image)
+        energies = detector.get_energies()
+
+        message = "wrong energies"
+        for i, (left, top, width, height) in enumerate(rects):
+            first = frames[0][1][top:top + height, left:left + width].astype(np.float64)
+            for j, (_, image) in enumerate(frames):
+                crop = image[top:top + height, left:left + width].astype(np.float64)
+                self.assertAlmostEqual(energies[j, i], np.mean((crop - first)**2),
+                                       places=3, msg=message)
+
+        message = "region not clipped to frame"
+        _, counts = region_indices(rects, (60, 100))
+        self.assertEqual(counts.tolist(), [3000, 600, 100], message)
+
+        message = "wrong bounding rectangle"
+        self.assertEqual(bounding_rect(rects), (0, 0, 110, 70), message)
+
+    def test_suggestions(self):
+        """
+        test key frames are suggested where the edge has moved, and not for noise
+        """
+        suggestions = suggest_key_frames(make_frames(60),
+                                         [(0, 0, 50, 60), (50, 0, 50, 60)],
+                                         threshold=200.0)
+
+        message = "moving edge not found"
+        self.assertGreater(len(suggestions[0]), 0, message)
+
+        message = "suggestions too close, reference not renewed"
+        self.assertTrue(np.all(np.diff(suggestions[0]) >= 2), message)
+
+        message = "key frame suggested for noise"
+        self.assertEqual(suggestions[1], [], message)
+
+        message = "region outside frame accepted"
+        with self.assertRaises(ValueError, msg=message):
+            suggest_key_frames(make_frames(2), [(200, 0, 10, 10)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk
+"""
+import unittest
+import tempfile
+
+import numpy as np
+
+from cgt.gui.penstore import PenStore
+from cgt.io import binaryproject
+from cgt.io.driftmaker import (estimate_video_drift, segment_bounds)
+from cgt.io.readcsvreports import read_csv_project
+from cgt.io.writecsvreports import save_csv_project
+from cgt.model.cgtproject import CGTProject
+from cgt.model.resultsdata import (DRIFT_DTYPE, LINE_DTYPE, POINT_DTYPE, ResultsData)
+from cgt.model.speedscache import SpeedsCache
+from cgt.model.velocitiescalculator import (SpeedsTable, compensate_drift)
+from cgt.model.videoanalysisresultsstore import VideoAnalysisResultsStore
+from cgt.tests.makeresults import (make_results_object, get_test_values)
+from cgt.util.drift import (downsample, estimate_drift)
+from cgt.util.markers import hash_results
+
+def make_scene(shape=(96, 128), seed=3):
+    """
+    make a smooth textured image, larger than the frames cut from it
+        Args:
+            shape ((int, int)): the rows and columns
+            seed (int): the seed of the random texture
+        Returns:
+            (np.array) the image as float
+    """
+    noise = np.random.default_rng(seed).random((shape[0]//4 + 2, shape[1]//4 + 2))
+    rows = np.linspace(0.0, noise.shape[0] - 1.001, shape[0])
+    cols = np.linspace(0.0, noise.shape[1] - 1.001, shape[1])
+    top = np.floor(rows).astype(int)
+    left = np.floor(cols).astype(int)
+    del_y = (rows - top)[:, np.newaxis]
+    del_x = (cols - left)[np.newaxis, :]
+
+    return (noise[top][:, left]*(1.0 - del_y)*(1.0 - del_x) +
+            noise[top + 1][:, left]*del_y*(1.0 - del_x) +
+            noise[top][:, left + 1]*(1.0 - del_y)*del_x +
+            noise[top + 1][:, left + 1]*del_y*del_x)*200.0
+
+def make_frames(shifts, size=64):
+    """
+    make frames cut from a scene, the content of each moved by a shift
+        Args:
+            shifts ([(int, int)]): the x and y shift of each frame
+            size (int): the side of the frames
+        Returns:
+            ([(int, np.array)]) the frame numbers and uint8 frames
+    """
+    scene = make_scene()
+    frames = []
+    for frame, (del_x, del_y) in enumerate(shifts):
+        top = 16 - del_y
+        left = 32 - del_x
+        frames.append((frame, scene[top:top + size, left:left + size].astype(np.uint8)))
+
+    return frames
+
+class ListReader():
+    """
+    a source of frames held in a list, in place of a video
+    """
+
+    def __init__(self, frames):
+        """
+        initialize the object
+            Args:
+                frames ([(int, np.array)]): the frame numbers and frames
+        """
+        ## the frames
+        self._frames = frames
+
+    def read_frames(self, start, end):
+        """
+        generate a run of frames
+            Args:
+                start (int): the first frame
+                end (int): the last frame
+            Yields:
+                (int, np.array) the frame number and frame
+        """
+        for frame in self._frames[start:end + 1]:
+            yield frame
+
+class TestDrift(unittest.TestCase):
+    """
+    tests of the estimation and compensation of stage drift
+    """
+
+    def test_downsample(self):
+        """
+        test blocks are averaged and the partial blocks dropped
+        """
+        image = np.arange(30, dtype=np.float32).reshape(5, 6)
+
+        message = "wrong reduction"
+        expected = [[3.5, 5.5, 7.5], [15.5, 17.5, 19.5]]
+        np.testing.assert_allclose(downsample(image, 2), expected, err_msg=message)
+
+        message = "stack not reduced image by image"
+        reduced = downsample(np.stack((image, image + 1.0)), 2)
+        np.testing.assert_allclose(reduced[1], np.array(expected) + 1.0, err_msg=message)
+
+    def test_estimate(self):
+        """
+        test known shifts are recovered, to a pixel from reduced frames
+        """
+        shifts = [(0, 0), (3, -2), (-5, 4), (7, 7), (-8, -3), (1, 0)]
+        frames = make_frames(shifts)
+
+        for factor, tolerance in ((1, 0.25), (4, 1.0)):
+            numbers, offsets = estimate_drift(iter(frames), factor=factor, batch=4)
+
+            message = f"wrong frames at factor {factor}"
+            np.testing.assert_array_equal(numbers, np.arange(len(shifts)), err_msg=message)
+
+            message = f"wrong shifts at factor {factor}"
+            np.testing.assert_allclose(offsets, shifts, atol=tolerance, err_msg=message)
+
+        message = "no frames not an empty result"
+        numbers, offsets = estimate_drift(iter([]))
+        self.assertEqual((len(numbers), offsets.shape), (0, (0, 2)), message)
+
+    def test_segments(self):
+        """
+        test parallel runs give the shifts of one serial run
+        """
+        message = "wrong runs"
+        self.assertEqual(segment_bounds(0, 9, 3), [(0, 2), (3, 6), (7, 9)], message)
+        self.assertEqual(segment_bounds(0, 1, 4), [(0, 0), (1, 1)], message)
+
+        shifts = [(x//2, -(x//3)) for x in range(11)]
+        frames = make_frames(shifts)
+        _, serial = estimate_drift(iter(frames), factor=2)
+
+        counts = []
+        drift = estimate_video_drift(ListReader(frames), 0, 10, segments=3, factor=2,
+                                     progress=counts.append)
+
+        message = "parallel drift differs from serial"
+        np.testing.assert_array_equal(drift["frame"], np.arange(11), err_msg=message)
+        np.testing.assert_allclose(drift["x"], serial[:, 0], err_msg=message)
+        np.testing.assert_allclose(drift["y"], serial[:, 1], err_msg=message)
+
+        message = "progress not reported"
+        self.assertTrue(len(counts) > 0, message)
+
+    def test_compensate(self):
+        """
+        test a point moving only with the stage has no speed once compensated
+        """
+        points = np.zeros(3, dtype=POINT_DTYPE)
+        points["x"] = 10.0
+        points["y"] = 20.0
+        points["pos_x"] = [0.0, 4.0, 8.0]
+        points["pos_y"] = [0.0, -2.0, -4.0]
+        points["frame"] = [0, 10, 20]
+
+        drift = np.zeros(2, dtype=DRIFT_DTYPE)
+        drift["frame"] = [0, 20]
+        drift["x"] = [0.0, 8.0]
+        drift["y"] = [0.0, -4.0]
+
+        message = "drift not removed"
+        compensated = compensate_drift(points, drift)
+        np.testing.assert_allclose(compensated["pos_x"], 0.0, err_msg=message)
+        np.testing.assert_allclose(compensated["pos_y"], 0.0, atol=1.0e-12, err_msg=message)
+
+        message = "rows given were changed"
+        self.assertEqual(points["pos_x"][2], 8.0, message)
+
+        values = get_test_values()
+        no_lines = np.empty(0, dtype=LINE_DTYPE)
+
+        message = "uncompensated point has no speed"
+        table = SpeedsTable(no_lines, points, values.fps, values.scale)
+        self.assertTrue(table.get_average_speeds()["speed"][0] > 0.0, message)
+
+        message = "compensated point has speed"
+        table = SpeedsTable(no_lines, points, values.fps, values.scale, drift)
+        np.testing.assert_allclose(table.get_average_speeds()["speed"], 0.0, atol=1.0e-9,
+                                   err_msg=message)
+
+    def test_store(self):
+        """
+        test the drift is held by the store and its copies and changes the speeds
+        """
+        store = make_results_object()
+        cache = SpeedsCache()
+        cache.set_results(store)
+        store.data_changed.connect(cache.data_changed)
+        values = get_test_values()
+
+        before = cache.get_speeds(0, store, values.fps, values.scale).get_average_speeds()
+        before = [x.speed for x in before]
+        undrifted = store.get_results_digest()
+
+        drift = np.zeros(2, dtype=DRIFT_DTYPE)
+        drift["frame"] = [500, 0]
+        drift["x"] = [25.0, 0.0]
+        drift["y"] = [-10.0, 0.0]
+        store.set_drift(drift)
+
+        message = "drift not sorted by frame"
+        np.testing.assert_array_equal(store.get_drift()["frame"], [0, 500], err_msg=message)
+
+        message = "wrong interpolated offset"
+        self.assertEqual(store.get_drift_offset(250), (12.5, -5.0), message)
+
+        message = "results digest not changed by the drift"
+        drifted = store.get_results_digest()
+        self.assertNotEqual(drifted, undrifted, message)
+        self.assertEqual(hash_results(store), drifted, message)
+
+        message = "copies do not hold the drift"
+        data = ResultsData.from_store(store)
+        self.assertEqual(data.get_drift_digest(), store.get_drift_digest(), message)
+        self.assertEqual(data.get_results_digest(), drifted, message)
+        self.assertEqual(store.make_copy().get_drift_digest(), store.get_drift_digest(), message)
+
+        message = "speeds not found again"
+        after = cache.get_speeds(0, store, values.fps, values.scale).get_average_speeds()
+        after = [x.speed for x in after]
+        self.assertEqual(cache.get_statistics().misses, 2, message)
+
+        message = "speeds not changed by the drift"
+        self.assertNotEqual(before, after, message)
+
+        store.set_drift(None)
+        message = "drift not removed"
+        self.assertIsNone(store.get_drift(), message)
+        self.assertEqual(store.get_drift_digest(), 0, message)
+        self.assertEqual(store.get_results_digest(), undrifted, message)
+
+    def test_persistence(self):
+        """
+        test the drift is saved and read back as csv and binary files
+        """
+        drift = np.zeros(3, dtype=DRIFT_DTYPE)
+        drift["frame"] = [0, 1, 2]
+        drift["x"] = [0.0, 0.25, -1.5]
+        drift["y"] = [0.0, 2.75, 3.125]
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            project = CGTProject()
+            project.init_new_project()
+            project["results"] = make_results_object()
+            project["results"].set_drift(drift)
+            project["resolution"] = 0.8
+            project["frame_rate"] = 10.0
+            project["proj_full_path"] = tmp_dir
+            project["proj_name"] = "testing"
+
+            for save in (save_csv_project, binaryproject.save_binary_project):
+                save(project)
+
+                read_back = CGTProject()
+                read_back["results"] = VideoAnalysisResultsStore(None)
+                if save is save_csv_project:
+                    read_csv_project(tmp_dir, read_back, PenStore())
+                else:
+                    binaryproject.read_project(tmp_dir, read_back, PenStore())
+
+                message = f"drift not read back by {save.__name__}"
+                read_drift = read_back["results"].get_drift()
+                for name in DRIFT_DTYPE.names:
+                    np.testing.assert_array_equal(read_drift[name], drift[name], err_msg=message)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk
+"""
+import pathlib
+import unittest
+
+import numpy as np
+
+from cgt.io.enhancementmaker import (enhanced_video_path, sample_frames, use_enhanced_video)
+from cgt.model.cgtproject import CGTProject
+from cgt.tests.test_drift import ListReader
+from cgt.util.enhancement import (GLOBAL, NO_EQUALISATION, WINDOWED, ContrastEnhancer,
+                                  EnhanceSettings, equalisation_lut, gamma_lut,
+                                  temporal_median)
+
+def make_frames(count=12, shape=(40, 60), seed=5):
+    """
+    make dim, low contrast frames, brighter on the right
+        Args:
+            count (int): the number of frames
+            shape ((int, int)): the rows and columns
+            seed (int): the seed of the random noise
+        Returns:
+            ([(int, np.array)]) the frame numbers and uint8 frames
+    """
+    rng = np.random.default_rng(seed)
+    ramp = np.linspace(40.0, 90.0, shape[1])[np.newaxis, :]
+    frames = []
+    for number in range(count):
+        image = ramp + rng.normal(0.0, 4.0, shape)
+        frames.append((number, np.clip(image, 0, 255).astype(np.uint8)))
+
+    return frames
+
+class TestEnhancement(unittest.TestCase):
+    """
+    tests of the contrast enhancement of frames
+    """
+
+    def test_tables(self):
+        """
+        test the equalisation and gamma look up tables
+        """
+        counts = np.zeros(256)
+        counts[50:100] = 10.0
+
+        lut = equalisation_lut(counts)
+        message = "equalisation not monotone"
+        self.assertTrue(np.all(np.diff(lut) >= 0.0), message)
+
+        message = "equalisation does not span the grey levels"
+        self.assertEqual((lut[50], lut[99]), (0.0, 255.0), message)
+
+        message = "clipping not limiting the slope"
+        clipped = equalisation_lut(counts, clip=3.0)
+        self.assertTrue(clipped[99] - clipped[50] < lut[99] - lut[50], message)
+
+        message = "empty histogram not the identity"
+        np.testing.assert_array_equal(equalisation_lut(np.zeros(256)), np.arange(256),
+                                      err_msg=message)
+
+        message = "wrong gamma"
+        np.testing.assert_allclose(gamma_lut(1.0), np.arange(256), err_msg=message)
+        self.assertTrue(gamma_lut(2.0)[64] > 64.0, message)
+        self.assertEqual((gamma_lut(2.0)[0], gamma_lut(2.0)[255]), (0.0, 255.0), message)
+
+        with self.assertRaises(ValueError):
+            gamma_lut(0.0)
+
+    def test_enhance(self):
+        """
+        test each equalisation raises the local contrast of every frame alike
+        """
+        frames = make_frames()
+        samples = [x[1] for x in frames[::4]]
+        image = frames[1][1]
+
+        message = "no equalisation changed the frame"
+        enhancer = ContrastEnhancer(EnhanceSettings(NO_EQUALISATION, 1.0, 8, 1), samples)
+        np.testing.assert_array_equal(enhancer.enhance(image), image, err_msg=message)
+
+        for equalisation in (GLOBAL, WINDOWED):
+            enhancer = ContrastEnhancer(EnhanceSettings(equalisation, 1.0, 4, 1), samples)
+            result = enhancer.enhance(image)
+
+            message = f"{equalisation} equalisation did not raise the local contrast"
+            self.assertEqual(result.dtype, np.uint8, message)
+            patch = (slice(10, 30), slice(20, 40))
+            self.assertTrue(result[patch].std() > 2.0*image[patch].std(), message)
+
+            message = f"{equalisation} equalisation lost the left to right ramp"
+            self.assertTrue(result[:, -5:].mean() > result[:, :5].mean(), message)
+
+        message = "global equalisation differs from its table"
+        enhancer = ContrastEnhancer(EnhanceSettings(GLOBAL, 1.0, 4, 1), samples)
+        lut = equalisation_lut(np.bincount(np.stack(samples).reshape(-1), minlength=256))
+        np.testing.assert_array_equal(enhancer.enhance(image), np.round(lut).astype(np.uint8)[image],
+                                      err_msg=message)
+
+        with self.assertRaises(ValueError):
+            enhancer.enhance(image[:10])
+        with self.assertRaises(ValueError):
+            ContrastEnhancer(EnhanceSettings("unknown", 1.0, 4, 1), samples)
+
+    def test_median(self):
+        """
+        test the temporal median, cut short at the ends and alike in parts
+        """
+        frames = make_frames(count=9, shape=(4, 5))
+        stack = np.stack([x[1] for x in frames]).astype(np.float64)
+
+        median = list(temporal_median(iter(frames), 3, 0, 8))
+        message = "wrong frames"
+        self.assertEqual([x[0] for x in median], list(range(9)), message)
+
+        message = "wrong median"
+        for number, image in median:
+            window = stack[max(number - 1, 0):number + 2]
+            expected = np.round(np.median(window, axis=0)).astype(np.uint8)
+            np.testing.assert_array_equal(image, expected, err_msg=f"{message} {number}")
+
+        message = "median of part differs from the whole"
+        part = list(temporal_median(iter(frames[2:8]), 3, 3, 6))
+        self.assertEqual([x[0] for x in part], [3, 4, 5, 6], message)
+        for number, image in part:
+            np.testing.assert_array_equal(image, median[number][1], err_msg=message)
+
+        message = "median of one frame not the frames"
+        single = list(temporal_median(iter(frames), 1, 2, 4))
+        self.assertEqual([x[0] for x in single], [2, 3, 4], message)
+        np.testing.assert_array_equal(single[0][1], frames[2][1], err_msg=message)
+
+    def test_project(self):
+        """
+        test the samples read and the project updated to use the enhanced video
+        """
+        frames = make_frames()
+        message = "wrong samples"
+        samples = sample_frames(ListReader(frames), 0, 11, 4)
+        self.assertEqual(len(samples), 4, message)
+        np.testing.assert_array_equal(samples[-1], frames[11][1], err_msg=message)
+
+        project = CGTProject()
+        project.init_new_project()
+        project["proj_full_path"] = pathlib.Path("project")
+        project["enhanced_video"] = pathlib.Path("videos", "growth.avi")
+
+        video = enhanced_video_path(project)
+        message = "wrong enhanced video path"
+        self.assertEqual(video, pathlib.Path("project", "growth_enhanced.avi"), message)
+
+        use_enhanced_video(project, video)
+        message = "original video not kept as the raw video"
+        self.assertEqual(project["raw_video"], pathlib.Path("videos", "growth.avi"), message)
+        self.assertEqual(project["raw_video_no_extension"], "growth", message)
+
+        message = "enhanced video not used"
+        self.assertEqual(project["enhanced_video"], video, message)
+        self.assertEqual(project["enhanced_video_no_path"], "growth_enhanced.avi", message)
+
+        message = "enhanced video not made from the raw video"
+        self.assertEqual(enhanced_video_path(project), video, message)
+        use_enhanced_video(project, video)
+        self.assertEqual(project["raw_video"], pathlib.Path("videos", "growth.avi"), message)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+module test_htmlreport provides unit tests for the making of html reports
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk
+"""
+# set up linting conditions
+# pylint: disable = c-extension-no-member
+import unittest
+import tempfile
+import pathlib
+import json
+
+import numpy as np
+from PIL import Image
+
+import PyQt5.QtCore as qc
+import PyQt5.QtGui as qg
+import PyQt5.QtWidgets as qw
+
+from cgt.gui.penstore import PenStore
+from cgt.io.htmlreport import (ReportMaker,
+                               ReportOptions,
+                               ReportSnapshot,
+                               count_report_images)
+from cgt.io.reportrender import RenderCancelled
+from cgt.model.cgtproject import CGTProject
+from cgt.model.resultsdata import SEGMENT_DTYPE
+from cgt.model.speedscache import SpeedsCache
+from cgt.tests.makeresults import make_results_object
+from cgt.util import config
+
+class ImageVideoData():
+    """
+    video data for a video of plain images
+    """
+
+    def get_frame_count(self):
+        """
+        getter for the number of frames
+        """
+        return 400
+
+class ImageReader():
+    """
+    a video reader providing plain images, in place of a video file
+    """
+
+    def get_image(self, frame):
+        """
+        get the image for a frame
+            Args:
+                frame (int): the frame number
+            Returns:
+                (QImage)
+        """
+        image = qg.QImage(301, 250, qg.QImage.Format_RGB888)
+        image.fill(qg.QColor(frame%256, 100, 100))
+        return image
+
+    def get_video_data(self):
+        """
+        getter for the video data
+        """
+        return ImageVideoData()
+
+class ReportDataSource():
+    """
+    holder of the data in the manner of the main window
+    """
+
+    def __init__(self, directory):
+        """
+        make a project
+            Args:
+                directory (str): the project directory
+        """
+        self._project = CGTProject()
+        self._project.init_new_project()
+        self._project["results"] = make_results_object()
+        self._project["resolution"] = 0.8
+        self._project["resolution_units"] = "um"
+        self._project["frame_rate"] = 10.0
+        self._project["proj_full_path"] = directory
+        self._project["enhanced_video_no_path"] = "video.avi"
+        self._speeds_cache = SpeedsCache()
+
+    def get_project(self):
+        """
+        getter for the project
+        """
+        return self._project
+
+    def get_results(self):
+        """
+        getter for the results
+        """
+        return self._project["results"]
+
+    def get_enhanced_reader(self):
+        """
+        getter for the video reader
+        """
+        return ImageReader()
+
+    def get_pens(self):
+        """
+        getter for the pens
+        """
+        return PenStore()
+
+    def get_speeds_cache(self):
+        """
+        getter for the cache of region speeds
+        """
+        return self._speeds_cache
+
+class TestHtmlReport(unittest.TestCase):
+    """
+    tests of the html report maker
+    """
+
+    def setUp(self):
+        """
+        make a temporary project
+        """
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._source = ReportDataSource(self._tmp_dir.name)
+        self._workers = config.REPORT_WORKERS
+        config.REPORT_WORKERS = 1
+
+    def tearDown(self):
+        """
+        clean up
+        """
+        config.REPORT_WORKERS = self._workers
+        self._tmp_dir.cleanup()
+
+    def test_snapshot(self):
+        """
+        test the snapshot is independent of the original
+        """
+        snapshot = ReportSnapshot(self._source)
+        digest = snapshot.get_results().get_results_digest()
+
+        message = "snapshot digest differs from original"
+        self.assertEqual(digest, self._source.get_results().get_results_digest(), message)
+
+        region = qw.QGraphicsRectItem(qc.QRectF(0, 0, 10, 10))
+        self._source.get_results().add_region(region)
+
+        message = "snapshot changed with original"
+        self.assertEqual(digest, snapshot.get_results().get_results_digest(), message)
+        self.assertEqual(len(snapshot.get_results().get_regions()), 2, message)
+
+    def test_make_report(self):
+        """
+        test a report is made with relative image links and progress for each image
+        """
+        progress = []
+        maker = ReportMaker()
+        maker.images_completed.connect(lambda done, total: progress.append((done, total)))
+
+        html_file = maker.save_html_report(ReportSnapshot(self._source))
+
+        total = count_report_images(self._source.get_results())
+        message = "wrong progress reported"
+        self.assertEqual(progress[-1], (total, total), message)
+        self.assertEqual(len(progress), total, message)
+
+        report_dir = html_file.parent
+        images = list(report_dir.joinpath("images").glob("*.png"))
+        message = "wrong number of images"
+        self.assertEqual(len(images), total, message)
+
+        html = html_file.read_text(encoding="UTF-8")
+        message = "image links not relative"
+        self.assertIn("src=\"images/region_0.png\"", html, message)
+        self.assertNotIn(self._tmp_dir.name, html, message)
+
+        with report_dir.joinpath("results_hash.json").open('r', encoding="UTF-8") as fin:
+            data = json.load(fin)
+        message = "wrong results hash"
+        self.assertEqual(data["results_hash"],
+                         self._source.get_results().get_results_digest(),
+                         message)
+
+        leftovers = [x for x in pathlib.Path(self._tmp_dir.name).iterdir() if x != report_dir]
+        message = "temporary directories not removed"
+        self.assertEqual(leftovers, [], message)
+
+    def test_cancel_report(self):
+        """
+        test a cancelled report does not replace the existing report
+        """
+        report_dir = pathlib.Path(self._tmp_dir.name).joinpath("report")
+        report_dir.mkdir()
+        old_file = report_dir.joinpath("report.html")
+        old_file.write_text("old report", encoding="UTF-8")
+
+        maker = ReportMaker()
+        maker.images_completed.connect(lambda done, total: maker.cancel())
+
+        with self.assertRaises(RenderCancelled):
+            maker.save_html_report(ReportSnapshot(self._source))
+
+        message = "existing report replaced by cancelled report"
+        self.assertEqual(old_file.read_text(encoding="UTF-8"), "old report", message)
+
+        contents = list(pathlib.Path(self._tmp_dir.name).iterdir())
+        message = "temporary directories not removed"
+        self.assertEqual(contents, [report_dir], message)
+
+    def test_report_error(self):
+        """
+        test an unexpected error in the background report is signalled
+        """
+        def broken_build(data_source, report_dir, html_name):
+            raise KeyError("missing")
+
+        maker = ReportMaker(ReportSnapshot(self._source))
+        maker.build_report = broken_build
+        failures = []
+        finished = []
+        maker.report_failed.connect(failures.append)
+        maker.report_finished.connect(finished.append)
+
+        maker.run()
+
+        message = "unexpected error not signalled"
+        self.assertEqual(len(failures), 1, message)
+        self.assertIn("KeyError", failures[0], message)
+
+        message = "failed report signalled as finished"
+        self.assertEqual(finished, [], message)
+
+        contents = list(pathlib.Path(self._tmp_dir.name).iterdir())
+        message = "temporary directories not removed"
+        self.assertEqual([x for x in contents if x.name.startswith(".report_new_")], [], message)
+
+    def test_compact_report(self):
+        """
+        test a compact report has lazily loaded thumbnails linked to the full size frames
+        """
+        options = ReportOptions(compact=True, frame_format="jpg", thumbnail_width=100)
+        html_file = ReportMaker(options=options).save_html_report(ReportSnapshot(self._source))
+
+        images_dir = html_file.parent.joinpath("images")
+        frames = sorted(x.name for x in images_dir.glob("*.jpg"))
+        thumbs = sorted(x.name for x in images_dir.joinpath("thumbs").glob("*.jpg"))
+        message = "thumbnails do not match frames"
+        self.assertGreater(len(frames), 0, message)
+        self.assertEqual(frames, thumbs, message)
+
+        message = "graphs not png"
+        self.assertTrue(images_dir.joinpath("speeds_graph_region_0.png").exists(), message)
+
+        with Image.open(images_dir.joinpath("thumbs", "regions_start.jpg")) as thumb:
+            message = "thumbnail too wide"
+            self.assertLessEqual(thumb.width, 100, message)
+
+        html = html_file.read_text(encoding="UTF-8")
+        link = ("<a href=\"images/regions_start.jpg\" target=\"_blank\">"
+                "<img src=\"images/thumbs/regions_start.jpg\" width=\"30%\" loading=\"lazy\"></a>")
+        message = "thumbnail not linked to full image"
+        self.assertIn(link, html, message)
+
+    def test_embedded_report(self):
+        """
+        test an embedded report is a single html file
+        """
+        options = ReportOptions(embed=True, frame_format="webp")
+        html_file = ReportMaker(options=options).save_html_report(ReportSnapshot(self._source))
+
+        message = "embedded report has more than one file"
+        self.assertEqual(sorted(x.name for x in html_file.parent.iterdir()),
+                         sorted([html_file.name, "results_hash.json"]),
+                         message)
+
+        html = html_file.read_text(encoding="UTF-8")
+        message = "images not embedded"
+        self.assertNotIn("src=\"images/", html, message)
+        self.assertIn("src=\"data:image/webp;base64,", html, message)
+        self.assertIn("src=\"data:image/png;base64,", html, message)
+
+    def test_segmentation_report(self):
+        """
+        test the crystal area graph is only made for regions that have been segmented
+        """
+        rows = np.zeros(3, dtype=SEGMENT_DTYPE)
+        rows["region"] = 1
+        rows["frame"] = [0, 1, 2]
+        rows["area"] = [100.0, 120.0, 150.0]
+        rows["perimeter"] = [35.0, 39.0, 43.0]
+        self._source.get_results().set_segmentation(rows)
+
+        html_file = ReportMaker().save_html_report(ReportSnapshot(self._source))
+
+        images_dir = html_file.parent.joinpath("images")
+        total = count_report_images(self._source.get_results())
+        message = "wrong number of images"
+        self.assertEqual(len(list(images_dir.glob("*.png"))), total, message)
+
+        message = "wrong crystal area graphs"
+        self.assertEqual([x.name for x in images_dir.glob("segmentation_graph_*.png")],
+                         ["segmentation_graph_region_1.png"],
+                         message)
+
+        html = html_file.read_text(encoding="UTF-8")
+        message = "crystal area graph not in report"
+        self.assertIn("src=\"images/segmentation_graph_region_1.png\"", html, message)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,6 +20,7 @@ import unittest
 import tempfile
 import pathlib
 import getpass
+import os
 
 from cgt.gui.penstore import PenStore
 from cgt.io.writecsvreports import save_csv_project
@@ -27,7 +28,8 @@ from cgt.io.readcsvreports import read_csv_project
 from cgt.model.cgtproject import CGTProject
 from cgt.model.videoanalysisresultsstore import VideoAnalysisResultsStore
 from cgt.util.scenegraphitems import compare_lines, compare_points
-from cgt.tests.makeresults import make_results_object
+from cgt.util.markers import hash_results
+from cgt.tests.makeresults import (make_results_object, make_region)
 
 class TestIO(unittest.TestCase):
     """
@@ -65,6 +67,89 @@ class TestIO(unittest.TestCase):
         self.assert_file_names(pathlib.Path(self._tmp_dir.name))
         self.run_test_input()
 
+    def test_lazy_read(self):
+        """
+        test the graphics items are made only for the regions requested
+        """
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._project["proj_full_path"] = self._tmp_dir.name
+        self._project["proj_name"] = "testing"
+        save_csv_project(self._project)
+
+        project = CGTProject()
+        project["results"] = VideoAnalysisResultsStore(None)
+        read_csv_project(self._project["proj_full_path"], project, PenStore())
+        results = project["results"]
+
+        message = "markers built on reading"
+        self.assertEqual(results.count_unbuilt_markers(), 2, message)
+
+        message = "digest of unbuilt markers wrong"
+        self.assertEqual(results.get_results_digest(),
+                         self._project["results"].get_results_digest(),
+                         message)
+
+        results.get_lines_for_region(1)
+        message = "wrong markers built"
+        self.assertEqual(results.count_unbuilt_markers(), 1, message)
+        self.assertEqual(len(results.get_points_for_region(0)), 1, message)
+        self.assertEqual(results.count_unbuilt_markers(), 0, message)
+
+        message = "digest changed by building markers"
+        self.assertEqual(results.get_results_digest(), hash_results(results), message)
+
+    def test_changed_only(self):
+        """
+        test only the files of changed parts are rewritten
+        """
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._project["proj_full_path"] = self._tmp_dir.name
+        self._project["proj_name"] = "testing"
+        save_csv_project(self._project)
+        self._project.reset_changed()
+
+        dir_path = pathlib.Path(self._tmp_dir.name)
+        self.rewritten_files(dir_path)
+        self._project["notes"] = "new notes"
+        save_csv_project(self._project, changed_only=True)
+        self._project.reset_changed()
+        message = "wrong files saved after notes changed"
+        self.assertEqual(self.rewritten_files(dir_path),
+                         ["CGT_testing_project_info.csv"],
+                         message)
+
+        self._project["results"].add_region(make_region(5, 5, 10, 10))
+        save_csv_project(self._project, changed_only=True)
+        self._project.reset_changed()
+        message = "wrong files saved after region added"
+        self.assertEqual(self.rewritten_files(dir_path),
+                         ["CGT_testing_regions.csv"],
+                         message)
+
+        (dir_path / "CGT_testing_lines.csv").unlink()
+        save_csv_project(self._project, changed_only=True)
+        message = "missing file not saved"
+        self.assertEqual(self.rewritten_files(dir_path),
+                         ["CGT_testing_lines.csv"],
+                         message)
+
+        self.assert_file_names(dir_path)
+
+    @staticmethod
+    def rewritten_files(dir_path):
+        """
+        find the files written since the last call, by setting their times into the past
+            Args:
+                dir_path (pathlib.Path): the directory holding the output files
+            Returns:
+                ([str]) the sorted names of the files
+        """
+        names = [x.name for x in dir_path.iterdir() if x.stat().st_mtime > 1000.0]
+        for file in dir_path.iterdir():
+            os.utime(file, (1000.0, 1000.0))
+
+        return sorted(names)
+
     def run_test_input(self):
         """
         read and test the output files
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk
+"""
+import unittest
+
+import numpy as np
+
+from cgt.util.kymograph import (ProfileLine,
+                                KymographBuilder,
+                                build_kymographs,
+                                normal_profile,
+                                fit_kymograph_edge)
+
+def make_edge_frames(count, start=40.0, speed=0.2, shape=(60, 100)):
+    """
+    make frames of a vertical edge moving to the right at a steady speed
+        Args:
+            count (int): the number of frames
+            start (float): the column of the edge in frame 0
+            speed (float): the columns moved per frame
+            shape ((int, int)): the rows and columns of the frames
+        Yields:
+            (int, np.array) the frame number and the frame
+    """
+    cols = np.arange(shape[1])[np.newaxis, :].repeat(shape[0], axis=0)
+    for frame in range(count):
+        yield frame, np.where(cols < start + speed*frame, 200, 50).astype(np.uint8)
+
+class TestKymograph(unittest.TestCase):
+    """
+    tests of kymograph building and fitting
+    """
+
+    def test_sampling(self):
+        """
+        test bilinear sampling is exact on a linear image
+        """
+        rows, cols = np.mgrid[0:40, 0:50]
+        image = 2.0*cols + 3.0*rows + 1.0
+        line = ProfileLine(2.5, 3.25, 30.5, 20.75)
+
+        builder = KymographBuilder([line], image.shape, spacing=0.5)
+        builder.add_frame(7, image)
+        kymograph = builder.get_kymographs()[0]
+
+        steps = np.arange(kymograph.shape[1])*0.5/np.hypot(28.0, 17.5)
+        expected = 2.0*(2.5 + 28.0*steps) + 3.0*(3.25 + 17.5*steps) + 1.0
+
+        message = "wrong samples"
+        np.testing.assert_allclose(kymograph[0], expected, rtol=1.0e-5, err_msg=message)
+
+        message = "wrong frame numbers"
+        self.assertEqual(builder.get_frames().tolist(), [7], message)
+
+        message = "wrong size frame accepted"
+        with self.assertRaises(ValueError, msg=message):
+            builder.add_frame(8, image[:-1])
+
+    def test_many_lines(self):
+        """
+        test building several kymographs in one pass matches building each alone
+        """
+        lines = [ProfileLine(10.0, 30.0, 90.0, 30.0),
+                 ProfileLine(20.0, 5.0, 80.0, 55.0),
+                 ProfileLine(50.0, 50.0, 50.0, 10.0)]
+
+        frames, together = build_kymographs(make_edge_frames(30), lines)
+
+        message = "wrong frames"
+        self.assertEqual(frames.tolist(), list(range(30)), message)
+
+        message = "kymographs differ when built together"
+        for line, kymograph in zip(lines, together):
+            _, alone = build_kymographs(make_edge_frames(30), [line])
+            np.testing.assert_array_equal(kymograph, alone[0], err_msg=message)
+
+        message = "wrong shape"
+        self.assertEqual(together[0].shape, (30, 81), message)
+
+    def test_normal_profile(self):
+        """
+        test the profile across a line
+        """
+        profile = normal_profile(10.0, 20.0, 10.0, 60.0, 30.0)
+
+        message = "profile not along normal through midpoint"
+        np.testing.assert_allclose(profile, (-5.0, 40.0, 25.0, 40.0), err_msg=message)
+
+        message = "line of zero length accepted"
+        with self.assertRaises(ValueError, msg=message):
+            normal_profile(1.0, 1.0, 1.0, 1.0, 10.0)
+
+    def test_fit(self):
+        """
+        test fitting the track of a moving edge
+        """
+        line = ProfileLine(0.0, 30.0, 99.0, 30.0)
+        _, kymographs = build_kymographs(make_edge_frames(100, 30.0, 0.25), [line])
+
+        # points chosen roughly on the edge
+        fit = fit_kymograph_edge(kymographs[0], (0.0, 31.0), (99.0, 53.0))
+
+        message = "wrong slope"
+        self.assertAlmostEqual(fit.slope, 0.25, delta=0.01, msg=message)
+
+        message = "wrong intercept"
+        self.assertAlmostEqual(fit.intercept, 29.5, delta=1.0, msg=message)
+
+        message = "wrong number of rows fitted"
+        self.assertEqual(len(fit.positions), 100, message)
+
+        message = "points in one frame accepted"
+        with self.assertRaises(ValueError, msg=message):
+            fit_kymograph_edge(kymographs[0], (10.0, 31.0), (10.0, 53.0))
+
+if __name__ == "__main__":
+    unittest.main()
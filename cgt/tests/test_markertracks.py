@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk
+"""
+# set up linting conditions
+# pylint: disable = c-extension-no-member
+import csv
+import unittest
+import tempfile
+
+import numpy as np
+
+from cgt.gui.penstore import PenStore
+from cgt.io.writecsvreports import (csv_file_path, save_csv_marker_tracks)
+from cgt.model.cgtproject import CGTProject
+from cgt.model.markertracks import (MarkerTracks, make_marker_tracks)
+from cgt.model.resultsdata import (LINE_DTYPE, POINT_DTYPE, ResultsData)
+from cgt.util.markers import (ItemDataTypes, MarkerTypes, hash_graphics_point)
+from cgt.util.scenegraphitems import list_to_g_point
+from cgt.tests.makeresults import make_results_object
+
+def make_point(marker_id, frames, positions, region=0):
+    """
+    make the rows of a point marker at the origin
+        Args:
+            marker_id (int): the ID
+            frames ([int]): the key frames
+            positions ([(float, float)]): the position at each key frame
+            region (int): the region index
+        Returns:
+            (np.array) POINT_DTYPE rows
+    """
+    rows = np.zeros(len(frames), dtype=POINT_DTYPE)
+    rows["ID"] = marker_id
+    rows["x"] = 10.0
+    rows["y"] = 20.0
+    rows["pos_x"] = [x[0] for x in positions]
+    rows["pos_y"] = [x[1] for x in positions]
+    rows["frame"] = frames
+    rows["region"] = region
+
+    return rows
+
+class TestMarkerTracks(unittest.TestCase):
+    """
+    tests of the interpolation of markers between key frames
+    """
+
+    def test_points(self):
+        """
+        test points are interpolated within their key frames only
+        """
+        first = make_point(0, [0, 10, 20], [(0.0, 0.0), (20.0, -10.0), (20.0, 0.0)])
+        second = make_point(1, [15, 5], [(4.0, 4.0), (-6.0, -6.0)])
+        tracks = MarkerTracks([], [first, second])
+
+        message = "wrong frame range"
+        self.assertEqual(tracks.get_frame_range(), (0, 20), message)
+
+        points = tracks.points_at(5)
+        message = "wrong markers at frame"
+        np.testing.assert_array_equal(points["ID"], [0, 1], err_msg=message)
+
+        message = "wrong positions"
+        np.testing.assert_allclose(points["x"], [20.0, 4.0], err_msg=message)
+        np.testing.assert_allclose(points["y"], [15.0, 14.0], err_msg=message)
+
+        points = tracks.points_at(np.array([3, 16, 21]))
+        message = "markers outside their key frames included"
+        np.testing.assert_array_equal(points["frame"], [3, 16], err_msg=message)
+        np.testing.assert_array_equal(points["ID"], [0, 0], err_msg=message)
+        np.testing.assert_allclose(points["x"], [16.0, 30.0], err_msg=message)
+        np.testing.assert_allclose(points["y"], [17.0, 16.0], err_msg=message)
+
+        message = "no lines not empty"
+        self.assertEqual(len(tracks.lines_at(5)), 0, message)
+
+    def test_lines(self):
+        """
+        test lines move and turn the shorter way between key frames
+        """
+        rows = np.zeros(2, dtype=LINE_DTYPE)
+        rows["x1"] = [-10.0, -10.0*np.cos(np.radians(20.0))]
+        rows["y1"] = [0.0, 10.0*np.sin(np.radians(20.0))]
+        rows["x2"] = -rows["x1"]
+        rows["y2"] = -rows["y1"]
+        rows["pos_y"] = [0.0, 8.0]
+        rows["frame"] = [0, 4]
+        tracks = MarkerTracks([rows], [])
+
+        lines = tracks.lines_at(np.array([0, 2, 4]))
+
+        message = "key frames not reproduced"
+        np.testing.assert_allclose(lines["x1"][[0, 2]], rows["x1"], err_msg=message)
+        np.testing.assert_allclose(lines["y2"][[0, 2]], rows["y2"] + rows["pos_y"], err_msg=message)
+
+        message = "line did not turn the shorter way"
+        np.testing.assert_allclose(lines["angle"], [0.0, 170.0, 160.0], err_msg=message)
+
+        message = "wrong centre or length"
+        middle = lines[1]
+        self.assertAlmostEqual(0.5*(middle["y1"] + middle["y2"]), 4.0, msg=message)
+        length = np.hypot(middle["x2"] - middle["x1"], middle["y2"] - middle["y1"])
+        self.assertAlmostEqual(length, 20.0, msg=message)
+
+        message = "perpendicular distance not interpolated"
+        self.assertAlmostEqual(middle["distance"], 0.5*lines[2]["distance"], msg=message)
+
+    def test_store(self):
+        """
+        test the store's tracks are kept until the region's markers change
+        """
+        store = make_results_object()
+
+        tracks = store.get_marker_tracks(0)
+        message = "tracks not kept"
+        self.assertIs(store.get_marker_tracks(0), tracks, message)
+
+        message = "tracks differ from those of a copy"
+        data = make_marker_tracks(ResultsData.from_store(store), 0)
+        frames = np.arange(tracks.get_frame_range()[0], tracks.get_frame_range()[1] + 1)
+        for name in ("x", "y", "frame"):
+            np.testing.assert_array_equal(tracks.points_at(frames)[name],
+                                          data.points_at(frames)[name],
+                                          err_msg=message)
+        for name in ("x1", "y1", "x2", "y2", "angle"):
+            np.testing.assert_array_equal(tracks.lines_at(frames)[name],
+                                          data.lines_at(frames)[name],
+                                          err_msg=message)
+
+        message = "key frame positions not reproduced"
+        for marker in store.get_marker_rows_for_region(MarkerTypes.POINT, 0):
+            points = tracks.points_at(marker["frame"])
+            points = points[points["ID"] == marker["ID"][0]]
+            np.testing.assert_allclose(points["x"], marker["x"] + marker["pos_x"], err_msg=message)
+
+        pen = PenStore().get_display_pen()
+        parent = "p"
+        with store.batch():
+            for row in ([1, 10, 10, 0, 0, 50, 0], [1, 10, 10, 30, 40, 150, 0]):
+                point = list_to_g_point(row, pen)
+                point.setData(ItemDataTypes.PARENT_HASH, parent)
+                store.add_point(point)
+                parent = hash_graphics_point(point)
+
+        message = "tracks not remade after the markers changed"
+        changed = store.get_marker_tracks(0)
+        self.assertIsNot(changed, tracks, message)
+        self.assertEqual(len(changed.points_at(100)), len(tracks.points_at(100)) + 1, message)
+
+    def test_export(self):
+        """
+        test the tracks of every region are written as csv files
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            project = CGTProject()
+            project.init_new_project()
+            project["results"] = make_results_object()
+            project["proj_full_path"] = tmp_dir
+            project["proj_name"] = "testing"
+
+            save_csv_marker_tracks(project)
+
+            results = project["results"]
+            for name, marker_type in (("line_tracks.csv", MarkerTypes.LINE),
+                                      ("point_tracks.csv", MarkerTypes.POINT)):
+                with open(csv_file_path(project, name), encoding="UTF-8") as fin:
+                    rows = list(csv.reader(fin))[1:]
+
+                expected = 0
+                for index in range(len(results.get_regions())):
+                    for marker in results.get_marker_rows_for_region(marker_type, index):
+                        expected += int(marker["frame"].max() - marker["frame"].min()) + 1
+
+                message = f"wrong number of rows in {name}"
+                self.assertEqual(len(rows), expected, message)
+
+if __name__ == "__main__":
+    unittest.main()
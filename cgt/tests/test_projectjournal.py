@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+module test_projectjournal provides unit tests for the journal of unsaved changes
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk
+"""
+import unittest
+import tempfile
+
+from cgt.gui.penstore import PenStore
+from cgt.io import (binaryproject, projectjournal)
+from cgt.model.cgtproject import CGTProject
+from cgt.model.videoanalysisresultsstore import VideoAnalysisResultsStore
+from cgt.util import config
+from cgt.util.framestats import (FrameStats, VideoIntensityStats)
+from cgt.util.markers import (ItemDataTypes, hash_graphics_line, hash_results)
+from cgt.util.scenegraphitems import (list_to_g_line, list_to_g_point)
+from cgt.tests.makeresults import (make_results_object, make_region)
+
+class TestProjectJournal(unittest.TestCase):
+    """
+    tests of the journal of unsaved changes
+    """
+
+    def setUp(self):
+        """
+        save a project in a temporary directory
+        """
+        self._tmp_dir = tempfile.TemporaryDirectory()
+
+        project = CGTProject()
+        project.init_new_project()
+        project["results"] = make_results_object()
+        project["resolution"] = 0.8
+        project["frame_rate"] = 10.0
+        project["proj_full_path"] = self._tmp_dir.name
+        project["proj_name"] = "testing"
+        binaryproject.save_project(project)
+
+        ## the saved results digest
+        self._saved_digest = project["results"].get_results_digest()
+
+        ## the pens
+        self._pens = PenStore()
+
+        ## the project being edited
+        self._project = self.read_back()
+
+        ## the journal
+        self._journal = projectjournal.ProjectJournal(projectjournal.journal_file(self._project),
+                                                      self._saved_digest)
+        self._project["results"].set_journal(self._journal)
+
+        ## the configured compaction length
+        self._compact_entries = config.JOURNAL_COMPACT_ENTRIES
+
+    def tearDown(self):
+        """
+        clean up
+        """
+        config.JOURNAL_COMPACT_ENTRIES = self._compact_entries
+        self._journal.close(delete=False)
+        self._tmp_dir.cleanup()
+
+    def read_back(self):
+        """
+        read the saved project
+            Returns:
+                (CGTProject)
+        """
+        project = CGTProject()
+        project["results"] = VideoAnalysisResultsStore(None)
+        binaryproject.read_project(self._tmp_dir.name, project, self._pens)
+
+        return project
+
+    def make_changes(self):
+        """
+        make one of each type of change to the edited results
+        """
+        results = self._project["results"]
+        pen = self._pens.get_display_pen()
+
+        results.add_region(make_region(5, 5, 10, 10))
+        results.replace_region(make_region(0, 0, 110, 60), 0)
+
+        parent = results.get_line_marker(0)[-1]
+        line = list_to_g_line([0, 20, 20, 20, 220, 80, 0, 250, 1], pen)
+        line.setData(ItemDataTypes.PARENT_HASH, hash_graphics_line(parent))
+        results.add_line(line)
+
+        point = list_to_g_point([0, 5, 5, 0, 0, 10, 2], pen)
+        point.setData(ItemDataTypes.PARENT_HASH, "p")
+        results.add_point(point)
+
+        results.delete_marker(results.get_point_marker(0)[1])
+
+        stats = VideoIntensityStats([0.0, 128.0, 256.0])
+        stats.append_frame(FrameStats(100.5, 10.25, [3.0, 7.0]))
+        results.set_video_statistics(stats)
+
+    def replay(self):
+        """
+        replay the journal on the saved project
+            Returns:
+                (CGTProject, int, int) the project, the entries applied and the number in the journal
+        """
+        self._journal.flush()
+        project = self.read_back()
+        entries, total = projectjournal.replay_journal(self._journal.get_file_path(),
+                                                       project["results"],
+                                                       self._pens)
+
+        return project, len(entries), total
+
+    def test_replay(self):
+        """
+        test the journal recreates the edited results
+        """
+        self.make_changes()
+        project, applied, total = self.replay()
+
+        message = "wrong number of entries"
+        self.assertEqual(applied, 6, message)
+        self.assertEqual(total, 6, message)
+
+        digest = self._project["results"].get_results_digest()
+        message = "replay did not reproduce the changes"
+        self.assertEqual(project["results"].get_results_digest(), digest, message)
+        self.assertEqual(hash_results(project["results"]), digest, message)
+
+    def test_compaction(self):
+        """
+        test a compacted journal recreates the edited results
+        """
+        config.JOURNAL_COMPACT_ENTRIES = 4
+        self.make_changes()
+        project, applied, total = self.replay()
+
+        message = "journal not compacted"
+        self.assertEqual(total, 3, message)
+        self.assertEqual(applied, total, message)
+
+        digest = self._project["results"].get_results_digest()
+        message = "compacted journal did not reproduce the changes"
+        self.assertEqual(project["results"].get_results_digest(), digest, message)
+
+    def test_undo(self):
+        """
+        test undone and redone changes are journalled as entries, not snapshots
+        """
+        config.JOURNAL_COMPACT_ENTRIES = 1000
+        results = self._project["results"]
+        self.make_changes()
+
+        line = results.get_line_marker(0)[1]
+        results.delete_line(line, 0)
+        results.remove_region(1)
+        results.delete_marker(results.get_point_marker(0)[0])
+
+        digests = [results.get_results_digest()]
+        while results.undo() is not None:
+            digests.append(results.get_results_digest())
+        for _ in range(3):
+            results.redo()
+
+        project, applied, total = self.replay()
+
+        message = "undo and redo compacted the journal"
+        with open(self._journal.get_file_path(), encoding="UTF-8") as fin:
+            self.assertNotIn('"op":"snapshot"', fin.read(), message)
+
+        message = "journal entries not all applied"
+        self.assertEqual(applied, total, message)
+
+        message = "changes not undone"
+        self.assertTrue(len(set(digests)) > 3, message)
+
+        digest = results.get_results_digest()
+        message = "replay did not reproduce the undone and redone changes"
+        self.assertEqual(project["results"].get_results_digest(), digest, message)
+        self.assertEqual(hash_results(project["results"]), digest, message)
+
+    def test_partial_entry(self):
+        """
+        test an entry left incomplete by a crash is ignored
+        """
+        self.make_changes()
+        self._journal.flush()
+
+        with open(self._journal.get_file_path(), "a", encoding="UTF-8") as fout:
+            fout.write('{"op":"add_region","data":{"rect":[1')
+
+        _, applied, total = self.replay()
+
+        message = "incomplete entry not ignored"
+        self.assertEqual(applied, 6, message)
+        self.assertEqual(total, 6, message)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+module test_reportrender provides unit tests for the parallel rendering
+of report images
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk
+"""
+# set up linting conditions
+# pylint: disable = c-extension-no-member
+import unittest
+import tempfile
+import pathlib
+
+import numpy as np
+import matplotlib.image as mpimg
+
+import PyQt5.QtGui as qg
+
+from cgt.io.reportrender import (RenderPool,
+                                 render_displacements_png,
+                                 save_image_array,
+                                 downscale_array)
+from cgt.util.images import qimage_to_rgb_nparray
+
+class TestReportRender(unittest.TestCase):
+    """
+    tests of the report rendering functions
+    """
+
+    def setUp(self):
+        """
+        make a temporary directory
+        """
+        self._tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """
+        clean up
+        """
+        self._tmp_dir.cleanup()
+
+    def test_render_pool(self):
+        """
+        test rendering graphs and images on worker processes
+        """
+        path = pathlib.Path(self._tmp_dir.name)
+        image = np.zeros((10, 20, 3), dtype=np.uint8)
+        image[:, :, 0] = 255
+
+        graphs = [str(path.joinpath(f"graph_{i}.png")) for i in range(3)]
+        with RenderPool(2) as pool:
+            for i, name in enumerate(graphs):
+                pool.submit(render_displacements_png, name, [([0, 10], [0.0, 5.0])], [], i)
+            pool.submit(save_image_array, str(path.joinpath("image.png")), image)
+
+        for name in graphs:
+            self.assertTrue(pathlib.Path(name).exists(), "graph not rendered")
+
+        read_back = mpimg.imread(str(path.joinpath("image.png")))
+        self.assertEqual(read_back.shape[:2], (10, 20), "image has wrong size")
+        self.assertAlmostEqual(float(read_back[0, 0, 0]), 1.0, msg="image has wrong colour")
+
+    def test_downscale(self):
+        """
+        test reducing an image by averaging blocks of pixels
+        """
+        image = np.zeros((9, 10, 3), dtype=np.uint8)
+        image[:, 1::2, 1] = 200
+
+        small = downscale_array(image, 5)
+        self.assertEqual(small.shape, (4, 5, 3), "reduced image has wrong shape")
+        self.assertTrue(np.all(small[:, :, 1] == 100), "reduced image has wrong values")
+
+        same = downscale_array(image, 10)
+        self.assertIs(same, image, "small image reduced")
+
+    def test_qimage_to_array(self):
+        """
+        test the conversion of an image with padded lines to an array
+        """
+        image = qg.QImage(7, 5, qg.QImage.Format_RGB32)
+        image.fill(qg.QColor(10, 20, 30))
+
+        array = qimage_to_rgb_nparray(image)
+
+        self.assertEqual(array.shape, (5, 7, 3), "array has wrong shape")
+        self.assertTrue(np.all(array[:, :, 0] == 10), "red channel wrong")
+        self.assertTrue(np.all(array[:, :, 2] == 30), "blue channel wrong")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -25,8 +25,21 @@ import unittest
 import PyQt5.QtCore as qc
 import PyQt5.QtWidgets as qw
 
-from cgt.tests.makeresults import make_results_object
-from cgt.model.videoanalysisresultsstore import VideoAnalysisResultsStore
+from cgt.gui.penstore import PenStore
+from cgt.tests.makeresults import (make_results_object, make_test_lines, make_test_points)
+from cgt.util.config import UNDO_LIMIT
+from cgt.util.markers import (ItemDataTypes,
+                              MarkerTypes,
+                              hash_results,
+                              hash_qpointf,
+                              hash_graphics_line,
+                              hash_graphics_point)
+from cgt.util.scenegraphitems import (list_to_g_line, list_to_g_point)
+from cgt.model.markerindex import MarkerIndex
+from cgt.model.videoanalysisresultsstore import (VideoAnalysisResultsStore, ChangeTypes)
+
+## the digest of the point (1.0, 2.0), fixed for all processes and platforms
+DIGEST_ONE_TWO = 11436109940410289552
 
 class TestResults(unittest.TestCase):
     """
@@ -89,6 +102,226 @@ class TestResults(unittest.TestCase):
         message = "key frame wrong"
         self.assertEqual(frame, frames[0], message)
 
+    def test_results_digest(self):
+        """
+        test the incremental digest matches a full recalculation
+        """
+        message = "incremental digest differs from full calculation"
+        self.assertEqual(self._store.get_results_digest(), hash_results(self._store), message)
+
+        before = self._store.get_results_digest()
+        region = self.add_region()
+        self.assertEqual(self._store.get_results_digest(), hash_results(self._store), message)
+        message = "adding a region did not change the digest"
+        self.assertNotEqual(self._store.get_results_digest(), before, message)
+
+        region.setRect(qc.QRectF(5, 5, 60, 60))
+        self._store.replace_region(region, 2)
+        message = "incremental digest differs from full calculation after edit"
+        self.assertEqual(self._store.get_results_digest(), hash_results(self._store), message)
+
+        self._store.remove_region(2)
+        message = "digest not restored by removing region"
+        self.assertEqual(self._store.get_results_digest(), before, message)
+
+        line = self._store.get_lines()[0][1]
+        self._store.remove_line(hash_graphics_line(line))
+        message = "incremental digest differs from full calculation after remove"
+        self.assertEqual(self._store.get_results_digest(), hash_results(self._store), message)
+
+    def test_digest_deterministic(self):
+        """
+        test that digests do not depend on the process
+        """
+        message = "digest of point has changed"
+        self.assertEqual(hash_qpointf(qc.QPointF(1.0, 2.0)), DIGEST_ONE_TWO, message)
+
+        message = "negative zero changes the digest"
+        self.assertEqual(hash_qpointf(qc.QPointF(-0.0, 0)), hash_qpointf(qc.QPointF(0.0, 0.0)), message)
+
+    def test_hash_index(self):
+        """
+        test the hash index finds the same markers as a search of the items
+        """
+        pen = PenStore().get_display_pen()
+        self._store.insert_line_marker(make_test_lines())
+        self._store.insert_point_marker(make_test_points())
+        self.assert_index("index wrong after inserting")
+
+        parent = hash_graphics_line(self._store.get_line_marker(1)[0])
+        line = list_to_g_line([0, 20, 20, 20, 220, 90, 0, 100, 0], pen)
+        line.setData(ItemDataTypes.PARENT_HASH, parent)
+        self._store.add_line(line)
+        point = list_to_g_point([0, 5, 5, 0, 0, 10, 0], pen)
+        point.setData(ItemDataTypes.PARENT_HASH, "p")
+        self._store.add_point(point)
+        self.assert_index("index wrong after adding")
+
+        self._store.delete_line(line, self._store.find_list_for_old_line(line))
+        self._store.remove_point(hash_graphics_point(self._store.get_point_marker(0)[0]))
+        self.assert_index("index wrong after deleting items")
+
+        self._store.delete_marker(self._store.get_line_marker(0)[0])
+        self.assert_index("index wrong after deleting a marker")
+
+        message = "deleted line still found"
+        self.assertIsNone(self._store.find_list_for_old_line(line), message)
+
+        index = MarkerIndex()
+        index.append_marker([1, 2], 0)
+        index.append_marker([3, 2, 2], 1)
+        index.append_marker([4], 1)
+        index.delete_marker(0)
+        message = "duplicate hash not relocated"
+        self.assertEqual(index.find(2), (0, 2), message)
+        self.assertEqual(index.find(4), (1, 0), message)
+        index.set_marker(0, [3])
+        self.assertIsNone(index.find(2), message)
+
+        message = "region markers not renumbered"
+        self.assertEqual(index.get_region_markers(1), [0, 1], message)
+        self.assertEqual(index.remove_region(0), [0, 1], message)
+        self.assertEqual(index.get_region_markers(0), [0, 1], message)
+
+    def test_batch(self):
+        """
+        test the changes in a batch are signalled once, when the batch ends
+        """
+        signals = []
+        self._store.data_changed.connect(signals.append)
+
+        with self._store.batch():
+            self.add_region()
+            with self._store.batch():
+                self._store.add_key_frame(2, 10)
+                self._store.add_key_frame(2, 20)
+
+            message = "changes signalled during batch"
+            self.assertEqual(signals, [], message)
+
+        message = "changes not merged into one signal"
+        self.assertEqual(signals, [ChangeTypes.REGIONS | ChangeTypes.KEY_FRAMES], message)
+
+        with self.assertRaises(IndexError):
+            with self._store.batch():
+                self._store.remove_region(2)
+                self._store.remove_region(5)
+
+        message = "changes not signalled after exception"
+        self.assertEqual(len(signals), 2, message)
+        self.assertTrue(signals[1] & ChangeTypes.REGIONS, message)
+
+        self._store.add_key_frame(0, 10)
+        message = "change outside batch not signalled"
+        self.assertEqual(signals[2], ChangeTypes.KEY_FRAMES, message)
+
+    def test_undo_redo(self):
+        """
+        test undo reverses each change and redo repeats it
+        """
+        pen = PenStore().get_display_pen()
+        self._store.clear_history()
+        states = [self.results_state()]
+
+        parent = self._store.get_line_marker(0)[0]
+        line = list_to_g_line([0, 20, 20, 20, 220, 90, 0, 150, 0], pen)
+        line.setData(ItemDataTypes.PARENT_HASH, hash_graphics_line(parent))
+        self._store.add_line(line)
+        states.append(self.results_state())
+
+        point = list_to_g_point([0, 5, 5, 0, 0, 10, 1], pen)
+        point.setData(ItemDataTypes.PARENT_HASH, "p")
+        self._store.add_point(point)
+        states.append(self.results_state())
+
+        self._store.delete_line(parent, 0)
+        states.append(self.results_state())
+
+        self._store.remove_point(hash_graphics_point(self._store.get_point_marker(0)[0]))
+        states.append(self.results_state())
+
+        self._store.delete_marker(self._store.get_line_marker(0)[0])
+        states.append(self.results_state())
+
+        region = self.add_region()
+        states.append(self.results_state())
+
+        region.setRect(qc.QRectF(5, 5, 60, 60))
+        self._store.replace_region(region, 2)
+        states.append(self.results_state())
+
+        with self._store.batch():
+            self._store.remove_region(0)
+            self._store.remove_region(0)
+        states.append(self.results_state())
+
+        for state in reversed(states[:-1]):
+            self._store.undo()
+            message = "undo did not restore the results"
+            self.assertEqual(self.results_state(), state, message)
+            self.assert_index(message)
+
+        message = "undo past the start of the history"
+        self.assertIsNone(self._store.undo(), message)
+
+        for state in states[1:]:
+            self._store.redo()
+            message = "redo did not repeat the change"
+            self.assertEqual(self.results_state(), state, message)
+            self.assert_index(message)
+
+        self._store.undo()
+        self._store.add_key_frame(0, 500)
+        message = "new change did not clear the redo history"
+        self.assertFalse(self._store.can_redo(), message)
+
+        self._store.clear_history()
+        for i in range(UNDO_LIMIT + 5):
+            self._store.add_key_frame(0, 1000 + i)
+        count = 0
+        while self._store.undo() is not None:
+            count += 1
+        message = "history longer than its limit"
+        self.assertEqual(count, UNDO_LIMIT, message)
+
+    def results_state(self):
+        """
+        get a summary of the results for comparison
+            Returns:
+                (tuple) the digest, the marker rows, the parent hash codes and the key frames
+        """
+        key_frames = [self._store.get_key_frames(i) for i in range(len(self._store.get_regions()))]
+        parents = [[x.data(ItemDataTypes.PARENT_HASH) for x in y]
+                   for y in self._store.get_lines() + self._store.get_points()]
+
+        return (self._store.get_results_digest(),
+                self._store.get_marker_rows(MarkerTypes.LINE).tolist(),
+                self._store.get_marker_rows(MarkerTypes.POINT).tolist(),
+                parents,
+                [list(x) if x is not None else None for x in key_frames])
+
+    def assert_index(self, message):
+        """
+        assert every stored item is found in the first marker holding its hash
+            Args:
+                message (str): the failure message
+        """
+        lines = [[hash_graphics_line(x) for x in y] for y in self._store.get_lines()]
+        for marker in self._store.get_lines():
+            for line in marker:
+                target = hash_graphics_line(line)
+                first = next(i for i, x in enumerate(lines) if target in x)
+                self.assertEqual(self._store.find_list_for_old_line(line), first, message)
+
+        points = [[hash_graphics_point(x) for x in y] for y in self._store.get_points()]
+        for marker in self._store.get_points():
+            for point in marker:
+                target = hash_graphics_point(point)
+                first = next(i for i, x in enumerate(points) if target in x)
+                self.assertEqual(self._store.find_list_for_old_point(point), first, message)
+
+        self.assertEqual(self._store.get_results_digest(), hash_results(self._store), message)
+
     def add_region(self):
         """
         add a region
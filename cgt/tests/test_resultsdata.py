@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+module test_resultsdata provides unit tests for the results held as arrays
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk
+"""
+import unittest
+import subprocess
+import sys
+
+import numpy as np
+
+from cgt.gui.penstore import PenStore
+from cgt.model.markerrecord import MarkerRecord
+from cgt.model.resultsdata import ResultsData
+from cgt.model.velocitiescalculator import calculate_speeds
+from cgt.util.markers import MarkerTypes
+from cgt.tests.makeresults import (make_results_object, get_test_values)
+
+class TestResultsData(unittest.TestCase):
+    """
+    tests of the results held as arrays
+    """
+
+    def setUp(self):
+        """
+        copy a results store
+        """
+        ## the store
+        self._store = make_results_object()
+
+        ## the copy
+        self._data = ResultsData.from_store(self._store)
+
+    def test_copy(self):
+        """
+        test the copy holds the same results as the store
+        """
+        message = "wrong digest"
+        self.assertEqual(self._data.get_results_digest(),
+                         self._store.get_results_digest(),
+                         message)
+
+        message = "wrong markers in region"
+        self.assertEqual(len(self._data.get_marker_rows_for_region(MarkerTypes.LINE, 1)), 1, message)
+        self.assertEqual(self._data.get_marker_rows_for_region(MarkerTypes.LINE, 0), [], message)
+        for region in range(2):
+            for marker_type in (MarkerTypes.LINE, MarkerTypes.POINT):
+                stored = self._store.get_marker_rows_for_region(marker_type, region)
+                copied = self._data.get_marker_rows_for_region(marker_type, region)
+                self.assertEqual(len(stored), len(copied), message)
+                for first, second in zip(stored, copied):
+                    np.testing.assert_array_equal(first, second, err_msg=message)
+
+        message = "wrong key frames"
+        self.assertEqual(self._data.get_key_frames(0), [100, 200, 300], message)
+
+    def test_speeds(self):
+        """
+        test the speeds found from the copy match those from the store
+        """
+        values = get_test_values()
+        for region in range(2):
+            stored = calculate_speeds(region, self._store, values.fps, values.scale)
+            copied = calculate_speeds(region, self._data, values.fps, values.scale)
+
+            message = "speeds differ"
+            self.assertEqual(stored.get_average_speeds(), copied.get_average_speeds(), message)
+
+        message = "markers made when finding speeds"
+        rows = self._data.get_marker_rows(MarkerTypes.LINE)
+        self._store.insert_marker_record(MarkerRecord(MarkerTypes.LINE,
+                                                      rows,
+                                                      PenStore().get_display_pen()))
+        calculate_speeds(1, self._store, values.fps, values.scale)
+        self.assertEqual(self._store.count_unbuilt_markers(), 1, message)
+
+    def test_without_qt(self):
+        """
+        test the array model and speed calculations do not import Qt
+        """
+        code = ("import sys\n"
+                "import cgt.model.resultsdata, cgt.model.velocitiescalculator\n"
+                "sys.exit('PyQt5' in sys.modules)\n")
+        result = subprocess.run([sys.executable, "-c", code], check=False)
+
+        message = "Qt imported"
+        self.assertEqual(result.returncode, 0, message)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk
+"""
+import unittest
+import tempfile
+
+import numpy as np
+
+from cgt.gui.penstore import PenStore
+from cgt.io import binaryproject
+from cgt.io.readcsvreports import read_csv_project
+from cgt.io.writecsvreports import save_csv_project
+from cgt.model.cgtproject import CGTProject
+from cgt.model.resultsdata import (SEGMENT_DTYPE, ResultsData)
+from cgt.model.videoanalysisresultsstore import VideoAnalysisResultsStore
+from cgt.tests.makeresults import make_results_object
+from cgt.util.markers import hash_results
+from cgt.util.segmentation import (label_components,
+                                   measure_crystal,
+                                   otsu_threshold,
+                                   segment_frames)
+
+def make_disc(radius, centre, shape=(80, 80), bright=200, dark=40):
+    """
+    make a grayscale image of a disc on a plain background
+        Args:
+            radius (float): the radius of the disc
+            centre ((float, float)): the x and y of the centre
+            shape ((int, int)): the rows and columns of the image
+            bright (int): the grey level of the disc
+            dark (int): the grey level of the background
+        Returns:
+            (np.array) the image as uint8
+    """
+    rows, cols = np.mgrid[0:shape[0], 0:shape[1]]
+    inside = (cols + 0.5 - centre[0])**2 + (rows + 0.5 - centre[1])**2 < radius**2
+
+    return np.where(inside, bright, dark).astype(np.uint8)
+
+class TestSegmentation(unittest.TestCase):
+    """
+    tests of the segmentation measuring the crystals in regions
+    """
+
+    def test_otsu(self):
+        """
+        test the threshold separates two grey levels
+        """
+        image = make_disc(20.0, (40.0, 40.0))
+
+        threshold = otsu_threshold(image)
+
+        message = "threshold does not separate the levels"
+        self.assertTrue(40 < threshold < 200, message)
+
+    def test_labels(self):
+        """
+        test the connected components are found, diagonal neighbours are not connected
+        """
+        mask = np.array([[1, 1, 0, 0, 1],
+                         [0, 1, 0, 1, 1],
+                         [0, 0, 1, 0, 0],
+                         [1, 0, 0, 0, 1],
+                         [1, 1, 0, 1, 1]], dtype=bool)
+
+        expected = np.array([[0, 0, -1, -1, 4],
+                             [-1, 0, -1, 4, 4],
+                             [-1, -1, 12, -1, -1],
+                             [15, -1, -1, -1, 19],
+                             [15, 15, -1, 19, 19]])
+
+        message = "wrong labels"
+        np.testing.assert_array_equal(label_components(mask), expected, err_msg=message)
+
+    def test_measure(self):
+        """
+        test the area, perimeter and centroid of a disc
+        """
+        image = make_disc(20.0, (35.0, 42.0))
+        image[2:5, 2:5] = 200
+
+        area, perimeter, centre_x, centre_y = measure_crystal(image, 120.0)
+
+        message = "wrong area"
+        self.assertAlmostEqual(area, np.pi*400.0, delta=0.02*np.pi*400.0, msg=message)
+
+        message = "wrong perimeter"
+        self.assertAlmostEqual(perimeter, np.pi*40.0, delta=0.05*np.pi*40.0, msg=message)
+
+        message = "wrong centroid"
+        self.assertAlmostEqual(centre_x, 35.0, delta=0.1, msg=message)
+        self.assertAlmostEqual(centre_y, 42.0, delta=0.1, msg=message)
+
+        message = "dark crystal not found"
+        area, _, centre_x, _ = measure_crystal(255 - image, 120.0, bright=False)
+        self.assertAlmostEqual(area, np.pi*400.0, delta=0.02*np.pi*400.0, msg=message)
+        self.assertAlmostEqual(centre_x, 35.0, delta=0.1, msg=message)
+
+        message = "empty mask not reported"
+        area, perimeter, centre_x, _ = measure_crystal(image, 250.0)
+        self.assertEqual((area, perimeter), (0.0, 0.0), message)
+        self.assertTrue(np.isnan(centre_x), message)
+
+    def test_frames(self):
+        """
+        test a growing disc is measured in two regions over a run of frames
+        """
+        def frames():
+            for frame in range(5):
+                image = np.full((60, 120), 40, dtype=np.uint8)
+                image[:, :60] = make_disc(10.0 + 2.0*frame, (30.0, 30.0), (60, 60))
+                image[:, 60:] = make_disc(10.0, (25.0, 30.0), (60, 60))
+                yield frame, image
+
+        rows = np.array(segment_frames(frames(), [(0, 0, 60, 60), (60, 0, 60, 60)]),
+                        dtype=SEGMENT_DTYPE)
+
+        message = "wrong number of rows"
+        self.assertEqual(len(rows), 10, message)
+
+        message = "growth not measured"
+        growing = rows[rows["region"] == 0]
+        expected = np.pi*(10.0 + 2.0*growing["frame"])**2
+        np.testing.assert_allclose(growing["area"], expected, rtol=0.05, err_msg=message)
+
+        message = "fixed crystal changed"
+        fixed = rows[rows["region"] == 1]
+        np.testing.assert_allclose(fixed["area"], fixed["area"][0], err_msg=message)
+        np.testing.assert_allclose(fixed["centroid_x"], 25.0, atol=0.1, err_msg=message)
+
+        message = "region outside the frame accepted"
+        with self.assertRaises(ValueError, msg=message):
+            segment_frames(frames(), [(200, 0, 10, 10)])
+
+    def test_store(self):
+        """
+        test the measurements follow the removal and restoring of regions
+        """
+        store = make_results_object()
+        unsegmented = store.get_results_digest()
+        rows = np.zeros(6, dtype=SEGMENT_DTYPE)
+        rows["region"] = [0, 0, 0, 1, 1, 1]
+        rows["frame"] = [2, 0, 1, 0, 1, 2]
+        rows["area"] = [3.0, 1.0, 2.0, 10.0, 11.0, 12.0]
+        store.set_segmentation(rows)
+
+        message = "results digest not changed by the segmentation"
+        segmented = store.get_results_digest()
+        self.assertNotEqual(segmented, unsegmented, message)
+        self.assertEqual(hash_results(store), segmented, message)
+        self.assertEqual(ResultsData.from_store(store).get_results_digest(), segmented, message)
+
+        message = "region's rows not in order of frame"
+        np.testing.assert_array_equal(store.get_segmentation_for_region(0)["area"],
+                                      [1.0, 2.0, 3.0],
+                                      err_msg=message)
+
+        store.remove_region(0)
+        message = "rows not renumbered"
+        np.testing.assert_array_equal(store.get_segmentation_for_region(0)["area"],
+                                      [10.0, 11.0, 12.0],
+                                      err_msg=message)
+        self.assertEqual(len(store.get_segmentation_for_region(1)), 0, message)
+
+        message = "results digest not following the removal"
+        self.assertEqual(store.get_results_digest(), hash_results(store), message)
+
+        store.undo()
+        message = "rows not restored"
+        np.testing.assert_array_equal(store.get_segmentation_for_region(0)["area"],
+                                      [1.0, 2.0, 3.0],
+                                      err_msg=message)
+        np.testing.assert_array_equal(store.get_segmentation_for_region(1)["area"],
+                                      [10.0, 11.0, 12.0],
+                                      err_msg=message)
+
+        message = "results digest not restored"
+        self.assertEqual(store.get_results_digest(), segmented, message)
+
+        store.set_segmentation(None)
+        message = "results digest not restored by removing the segmentation"
+        self.assertEqual(store.get_results_digest(), unsegmented, message)
+        store.set_segmentation(rows)
+
+        message = "copy does not hold the rows"
+        copy = store.make_copy()
+        np.testing.assert_array_equal(copy.get_segmentation(), store.get_segmentation(),
+                                      err_msg=message)
+
+    def test_persistence(self):
+        """
+        test the measurements are saved and read back as csv and binary files
+        """
+        rows = np.zeros(4, dtype=SEGMENT_DTYPE)
+        rows["region"] = [0, 0, 1, 1]
+        rows["frame"] = [0, 1, 0, 1]
+        rows["area"] = [1.0, 2.0, 3.0, 4.0]
+        rows["perimeter"] = [4.0, 5.5, 6.5, 7.5]
+        rows["centroid_x"] = [10.5, 10.25, np.nan, 3.0]
+        rows["centroid_y"] = [20.5, 20.75, np.nan, 4.0]
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            project = CGTProject()
+            project.init_new_project()
+            project["results"] = make_results_object()
+            project["results"].set_segmentation(rows)
+            project["resolution"] = 0.8
+            project["frame_rate"] = 10.0
+            project["proj_full_path"] = tmp_dir
+            project["proj_name"] = "testing"
+
+            for save in (save_csv_project, binaryproject.save_binary_project):
+                save(project)
+
+                read_back = CGTProject()
+                read_back["results"] = VideoAnalysisResultsStore(None)
+                if save is save_csv_project:
+                    read_csv_project(tmp_dir, read_back, PenStore())
+                else:
+                    binaryproject.read_project(tmp_dir, read_back, PenStore())
+
+                message = f"segmentation not read back by {save.__name__}"
+                segmentation = read_back["results"].get_segmentation()
+                for name in SEGMENT_DTYPE.names:
+                    np.testing.assert_array_equal(segmentation[name], rows[name], err_msg=message)
+
+if __name__ == "__main__":
+    unittest.main()
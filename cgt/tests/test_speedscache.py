@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk
+"""
+# set up linting conditions
+# pylint: disable = c-extension-no-member
+
+import unittest
+
+from cgt.gui.penstore import PenStore
+from cgt.model.resultsdata import ResultsData
+from cgt.model.speedscache import SpeedsCache
+from cgt.model.velocitiescalculator import calculate_speeds
+from cgt.util.markers import (ItemDataTypes, hash_graphics_point)
+from cgt.util.scenegraphitems import list_to_g_point
+from cgt.tests.makeresults import (make_results_object, get_test_values)
+
+class TestSpeedsCache(unittest.TestCase):
+    """
+    tests of the cache of region speeds
+    """
+
+    def setUp(self):
+        """
+        make a store and a cache connected to it
+        """
+        ## the store
+        self._store = make_results_object()
+
+        ## the cache
+        self._cache = SpeedsCache()
+        self._cache.set_results(self._store)
+        self._store.data_changed.connect(self._cache.data_changed)
+
+        ## the frame rate and scale
+        self._values = get_test_values()
+
+    def get_speeds(self, region, results=None):
+        """
+        get the speeds of a region from the cache
+            Args:
+                region (int): the region index
+                results (VideoAnalysisResultsStore): the results, None for the store
+            Returns:
+                (VelocitiesCalculator)
+        """
+        if results is None:
+            results = self._store
+
+        return self._cache.get_speeds(region, results, self._values.fps, self._values.scale)
+
+    def add_point(self, region):
+        """
+        add a point marker to a region
+            Args:
+                region (int): the region index
+        """
+        pen = PenStore().get_display_pen()
+        parent = "p"
+        with self._store.batch():
+            for row in ([1, 10, 10, 0, 0, 50, region], [1, 10, 10, 30, 40, 150, region]):
+                point = list_to_g_point(row, pen)
+                point.setData(ItemDataTypes.PARENT_HASH, parent)
+                self._store.add_point(point)
+                parent = hash_graphics_point(point)
+
+    def test_hits(self):
+        """
+        test entries are reused until the region's markers change
+        """
+        first = self.get_speeds(1)
+        second = self.get_speeds(1)
+
+        message = "wrong statistics"
+        self.assertEqual(self._cache.get_statistics()[:4], (1, 1, 0, 0), message)
+
+        message = "cached speeds differ"
+        expected = calculate_speeds(1, self._store, self._values.fps, self._values.scale)
+        self.assertEqual(first.get_average_speeds(), expected.get_average_speeds(), message)
+        self.assertEqual(second.get_average_speeds(), expected.get_average_speeds(), message)
+
+        self.get_speeds(0)
+        self.add_point(0)
+        self.get_speeds(1)
+
+        message = "unchanged region not found by digest"
+        self.assertEqual(self._cache.get_statistics()[:4], (2, 2, 1, 1), message)
+
+        message = "changed region found"
+        speeds = self.get_speeds(0)
+        self.assertEqual(self._cache.get_statistics().misses, 3, message)
+
+        message = "changed region has wrong speeds"
+        expected = calculate_speeds(0, self._store, self._values.fps, self._values.scale)
+        self.assertEqual(speeds.get_average_speeds(), expected.get_average_speeds(), message)
+        self.assertEqual(len(speeds.get_average_speeds()), 2, message)
+
+    def test_copies(self):
+        """
+        test copies of the store use the entries of the store
+        """
+        self.get_speeds(0)
+        self.get_speeds(1)
+
+        message = "copy of store not found by digest"
+        self.get_speeds(0, self._store.make_copy())
+        self.get_speeds(1, ResultsData.from_store(self._store))
+        self.assertEqual(self._cache.get_statistics()[:3], (2, 2, 2), message)
+
+        message = "region digests differ"
+        data = ResultsData.from_store(self._store)
+        for region in range(2):
+            self.assertEqual(self._store.get_region_markers_digest(region),
+                             data.get_region_markers_digest(region),
+                             message)
+
+    def test_size(self):
+        """
+        test the least recently used entry is removed when the cache is full
+        """
+        cache = SpeedsCache(2)
+        for scale in (1.0, 2.0, 3.0, 1.0):
+            cache.get_speeds(0, self._store, self._values.fps, scale)
+
+        statistics = cache.get_statistics()
+        message = "wrong size"
+        self.assertEqual(statistics.size, 2, message)
+
+        message = "oldest entry not removed"
+        self.assertEqual(statistics.misses, 4, message)
+
+        cache.clear()
+        message = "cache not cleared"
+        self.assertEqual(cache.get_statistics().size, 0, message)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+module test_sqliteresultsstore provides unit tests for the results store held in sqlite
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk
+"""
+import unittest
+
+import numpy as np
+
+from cgt.gui.penstore import PenStore
+from cgt.model.markerrecord import (MarkerRecord, marker_to_rows)
+from cgt.model.sqliteresultsstore import SQLiteResultsStore
+from cgt.model.videoanalysisresultsstore import VideoAnalysisResultsStore
+from cgt.util.markers import (ItemDataTypes,
+                              MarkerTypes,
+                              hash_graphics_line,
+                              hash_graphics_point,
+                              hash_results)
+from cgt.util.scenegraphitems import (list_to_g_line, list_to_g_point)
+from cgt.tests.makeresults import (make_regions, make_test_lines, make_test_points)
+
+class TestSQLiteResultsStore(unittest.TestCase):
+    """
+    tests of the results store held in sqlite, against the store held in lists
+    """
+
+    def setUp(self):
+        """
+        make a store of each type with the same contents
+        """
+        ## the pen
+        self._pen = PenStore().get_display_pen()
+
+        ## the store held in lists
+        self._memory = VideoAnalysisResultsStore(None)
+
+        ## the store held in sqlite
+        self._sqlite = SQLiteResultsStore(None)
+
+        for store in (self._memory, self._sqlite):
+            for region in make_regions():
+                store.add_region(region)
+            store.insert_line_marker(make_test_lines())
+            store.insert_point_marker(make_test_points())
+
+    def make_line(self, values, parent):
+        """
+        make a line
+            Args:
+                values ([float]): x1, y1, x2, y2, pos_x, pos_y, frame, region
+                parent (int or str): the parent hash
+            Returns:
+                (QGraphicsLineItem)
+        """
+        line = list_to_g_line([0] + values, self._pen)
+        line.setData(ItemDataTypes.PARENT_HASH, parent)
+        return line
+
+    def make_point(self, values, parent):
+        """
+        make a point
+            Args:
+                values ([float]): x, y, pos_x, pos_y, frame, region
+                parent (int or str): the parent hash
+            Returns:
+                (QGraphicsPathItem)
+        """
+        point = list_to_g_point([0] + values, self._pen)
+        point.setData(ItemDataTypes.PARENT_HASH, parent)
+        return point
+
+    def assert_same(self, message):
+        """
+        assert the two stores hold the same results
+            Args:
+                message (str): the failure message
+        """
+        digest = self._memory.get_results_digest()
+        self.assertEqual(self._sqlite.get_results_digest(), digest, message)
+        self.assertEqual(hash_results(self._sqlite), digest, message)
+
+        for marker_type in (MarkerTypes.LINE, MarkerTypes.POINT):
+            np.testing.assert_array_equal(self._sqlite.get_marker_rows(marker_type),
+                                          self._memory.get_marker_rows(marker_type),
+                                          err_msg=message)
+
+    def test_editing(self):
+        """
+        test the stores agree after each type of change
+        """
+        self.assert_same("stores differ after loading")
+
+        for store in (self._memory, self._sqlite):
+            parent = hash_graphics_line(store.get_line_marker(0)[-1])
+            previous = store.add_line(self.make_line([20, 20, 20, 220, 90, 0, 250, 1], parent))
+            message = "wrong previous line"
+            self.assertEqual(hash_graphics_line(previous), parent, message)
+
+            store.add_point(self.make_point([5, 5, 0, 0, 10, 1], "p"))
+        self.assert_same("stores differ after adding")
+
+        for store in (self._memory, self._sqlite):
+            point = store.get_point_marker(0)[0]
+            store.delete_point(point, store.find_list_for_old_point(point))
+            message = "parent not rewired"
+            self.assertEqual(store.get_point_marker(0)[0].data(ItemDataTypes.PARENT_HASH),
+                             point.data(ItemDataTypes.PARENT_HASH),
+                             message)
+        self.assert_same("stores differ after deleting a point")
+
+        for store in (self._memory, self._sqlite):
+            remaining = store.remove_line(hash_graphics_line(store.get_line_marker(0)[1]))
+            message = "wrong remaining lines"
+            self.assertEqual(len(remaining), 2, message)
+        self.assert_same("stores differ after removing a line")
+
+        for store in (self._memory, self._sqlite):
+            store.delete_marker(store.get_point_marker(1)[0])
+            message = "wrong number of markers"
+            self.assertIsNone(store.get_points_for_region(1), message)
+        self.assert_same("stores differ after deleting a marker")
+
+        message = "wrong index found"
+        point = self._sqlite.get_point_marker(0)[-1]
+        self.assertEqual(self._sqlite.find_list_for_old_point(point), 0, message)
+        self.assertIsNone(self._sqlite.find_list_for_new_point(point), message)
+
+    def test_lazy_records(self):
+        """
+        test markers inserted as records are built only when requested
+        """
+        store = SQLiteResultsStore(None)
+        for region in make_regions():
+            store.add_region(region)
+
+        lines = make_test_lines()
+        points = make_test_points()
+        store.insert_marker_record(MarkerRecord(MarkerTypes.LINE,
+                                                marker_to_rows(MarkerTypes.LINE, lines, 0),
+                                                self._pen))
+        store.insert_marker_record(MarkerRecord(MarkerTypes.POINT,
+                                                marker_to_rows(MarkerTypes.POINT, points, 0),
+                                                self._pen))
+
+        message = "markers built on insertion"
+        self.assertEqual(store.count_unbuilt_markers(), 2, message)
+        message = "wrong digest of records"
+        self.assertEqual(store.get_results_digest(), self._memory.get_results_digest(), message)
+
+        built = store.get_points_for_region(0)
+        message = "wrong markers built"
+        self.assertEqual(store.count_unbuilt_markers(), 1, message)
+        self.assertEqual([hash_graphics_point(x) for x in built[0]],
+                         [hash_graphics_point(x) for x in points],
+                         message)
+
+        message = "items not kept"
+        self.assertIs(store.get_points_for_region(0)[0][0], built[0][0], message)
+        self.assertEqual(store.get_key_frames_for_lines(0), [50, 150], message)
+
+    def test_remove_region(self):
+        """
+        test removing a region deletes its markers and renumbers those after it
+        """
+        lines = make_test_lines()
+        for store in (self._memory, self._sqlite):
+            store.insert_marker_record(MarkerRecord(MarkerTypes.LINE,
+                                                    marker_to_rows(MarkerTypes.LINE, lines, 0),
+                                                    self._pen))
+            store.add_key_frame(0, 100)
+            store.add_key_frame(1, 50)
+            store.remove_region(0)
+        self.assert_same("stores differ after removing a region")
+
+        for store in (self._memory, self._sqlite):
+            message = "markers of removed region not deleted"
+            self.assertIsNone(store.get_points_for_region(0), message)
+            self.assertEqual(len(store.get_regions()), 1, message)
+
+            message = "markers not renumbered"
+            markers = store.get_lines_for_region(0)
+            self.assertEqual(len(markers), 2, message)
+            for marker in markers:
+                for line in marker:
+                    self.assertEqual(line.data(ItemDataTypes.REGION_INDEX), 0, message)
+            self.assertIsNone(store.get_lines_for_region(1), message)
+
+            message = "key frames not renumbered"
+            self.assertEqual(store.get_key_frames(0), [50], message)
+            self.assertIsNone(store.get_key_frames(1), message)
+
+    def test_transaction(self):
+        """
+        test a failed transaction leaves the store unchanged
+        """
+        digest = self._sqlite.get_results_digest()
+        with self.assertRaises(LookupError):
+            self._sqlite.add_line(self.make_line([1, 1, 2, 2, 0, 0, 5, 0], 12345))
+
+        message = "failed change altered store"
+        self.assertEqual(self._sqlite.get_results_digest(), digest, message)
+        self.assertEqual(len(self._sqlite.get_lines()), 1, message)
+
+        with self.assertRaises(RuntimeError):
+            with self._sqlite.transaction():
+                self._sqlite.insert_line_marker(make_test_lines())
+                raise RuntimeError("abandon")
+
+        self.assertEqual(len(self._sqlite.get_lines()), 1, message)
+        self.assertEqual(self._sqlite.get_results_digest(), digest, message)
+        self.assertEqual(self._sqlite.count_unbuilt_markers(), 0, message)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk
+"""
+import unittest
+
+import numpy as np
+
+from cgt.io.autotracker import track_frames
+from cgt.util.templatematching import (TemplateTracker,
+                                       normalised_cross_correlation)
+
+def make_scene(shift_x, shift_y, size=120):
+    """
+    make a textured grayscale image translated by a distance
+        Args:
+            shift_x (float): the move to the right
+            shift_y (float): the move down
+            size (int): the number of rows and columns
+        Returns:
+            (np.array) the image as uint8
+    """
+    rows, cols = np.mgrid[0:size, 0:size]
+    cols = cols - shift_x
+    rows = rows - shift_y
+    image = (100.0 + 40.0*np.sin(cols/5.0)*np.cos(rows/7.0)
+             + 30.0*np.sin((cols + 2.0*rows)/9.0)
+             + 80.0*np.exp(-((cols - 50.0)**2 + (rows - 55.0)**2)/32.0))
+
+    return np.rint(image).astype(np.uint8)
+
+class TestTemplateMatching(unittest.TestCase):
+    """
+    tests of the template matching used to auto-track markers
+    """
+
+    def test_correlation(self):
+        """
+        test the FFT correlation matches a direct calculation
+        """
+        generator = np.random.default_rng(3)
+        image = generator.random((30, 40))*255.0
+        template = image[8:19, 12:21]
+
+        scores = normalised_cross_correlation(image, template)
+        expected = np.zeros(scores.shape)
+        centred = template - template.mean()
+        for row in range(scores.shape[0]):
+            for col in range(scores.shape[1]):
+                window = image[row:row + template.shape[0], col:col + template.shape[1]]
+                window = window - window.mean()
+                expected[row, col] = (np.sum(window*centred)/
+                                      np.sqrt(np.sum(window**2)*np.sum(centred**2)))
+
+        message = "correlation wrong"
+        np.testing.assert_allclose(scores, expected, atol=1.0e-9, err_msg=message)
+
+        message = "template not found"
+        self.assertEqual(np.unravel_index(np.argmax(scores), scores.shape), (8, 12), message)
+
+        message = "template larger than image accepted"
+        with self.assertRaises(ValueError, msg=message):
+            normalised_cross_correlation(template, image)
+
+    def test_tracking(self):
+        """
+        test a feature is followed through frames moving by fractions of a pixel
+        """
+        frames = ((k, make_scene(0.3*k, 0.2*k)) for k in range(51))
+        proposals = track_frames(frames, (50.0, 55.0), 10)
+
+        message = "wrong proposal frames"
+        self.assertEqual([x.frame for x in proposals], [10, 20, 30, 40, 50], message)
+
+        message = "wrong position"
+        for proposal in proposals:
+            self.assertAlmostEqual(proposal.x, 0.3*proposal.frame, delta=0.25, msg=message)
+            self.assertAlmostEqual(proposal.y, 0.2*proposal.frame, delta=0.25, msg=message)
+
+        message = "move not projected on normal"
+        frames = ((k, make_scene(0.3*k, 0.2*k)) for k in range(21))
+        proposals = track_frames(frames, (50.0, 55.0), 20, normal=(0.0, 1.0))
+        self.assertEqual(proposals[0].x, 0.0, message)
+        self.assertAlmostEqual(proposals[0].y, 4.0, delta=0.25, msg=message)
+
+    def test_lost(self):
+        """
+        test tracking stops when the feature can no longer be found
+        """
+        generator = np.random.default_rng(5)
+        frames = [(k, make_scene(0.5*k, 0.0)) for k in range(11)]
+        frames += [(k, (generator.random((120, 120))*255.0).astype(np.uint8))
+                   for k in range(11, 21)]
+
+        proposals = track_frames(iter(frames), (50.0, 55.0), 5)
+
+        message = "proposals made after the feature was lost"
+        self.assertEqual([x.frame for x in proposals], [5, 10], message)
+
+        message = "marker at edge of frame accepted"
+        with self.assertRaises(ValueError, msg=message):
+            TemplateTracker(frames[0][1], (3.0, 60.0))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,9 +20,16 @@ specific language governing permissions and limitations under the License.
 
 import unittest
 
+import numpy as np
+
 from cgt.util.markers import MarkerTypes
-from cgt.model.velocitiescalculator import (ScreenDisplacement,
-                                            VelocitiesCalculator)
+from cgt.model.markerrecord import marker_to_rows
+from cgt.model.velocitiescalculator import (DISPLACEMENT_DTYPE,
+                                            ScreenDisplacement,
+                                            SpeedsTable,
+                                            VelocitiesCalculator,
+                                            calculate_speeds,
+                                            calculate_all_speeds)
 import cgt.tests.makeresults as mkres
 
 class TestDisplacements(unittest.TestCase):
@@ -89,8 +96,8 @@ class TestVelocities(unittest.TestCase):
         self._lines = mkres.make_test_lines()
         self._test_values = mkres.get_test_values()
 
-        self._calculator = VelocitiesCalculator([self._lines],
-                                                [self._points],
+        self._calculator = VelocitiesCalculator([marker_to_rows(MarkerTypes.LINE, self._lines, 0)],
+                                                [marker_to_rows(MarkerTypes.POINT, self._points, 0)],
                                                 self._test_values.fps,
                                                 self._test_values.scale)
 
@@ -123,5 +130,86 @@ class TestVelocities(unittest.TestCase):
                                        places=4,
                                        msg=message)
 
+    def test_fitted_speeds(self):
+        """
+        ensure the least-squares speeds match a fit of each marker on its own
+        """
+        fits = self._calculator.get_fitted_speeds()
+
+        message = "fits not in order of averages"
+        self.assertEqual([(x.ID, x.m_type) for x in fits],
+                         [(x.ID, x.m_type) for x in self._calculator.get_average_speeds()],
+                         message)
+
+        message = "fit of uniform motion is wrong"
+        point = [x for x in fits if x.m_type is MarkerTypes.POINT][0]
+        self.assertAlmostEqual(self._test_values.point_speed, point.speed, places=4, msg=message)
+        self.assertAlmostEqual(point.r_squared, 1.0, places=6, msg=message)
+        self.assertAlmostEqual(point.std_error, 0.0, places=6, msg=message)
+
+        message = "fit of two samples has a standard error"
+        line = [x for x in fits if x.m_type is MarkerTypes.LINE][0]
+        self.assertAlmostEqual(self._test_values.line_speed, line.speed, places=4, msg=message)
+        self.assertTrue(np.isnan(line.std_error), message)
+
+        fps = self._test_values.fps
+        generator = np.random.default_rng(10)
+        rows = []
+        for marker in range(20):
+            count = generator.integers(3, 8)
+            frames = np.sort(generator.choice(1000, count + 1, replace=False))
+            lengths = generator.normal(3.0, 2.0, count)
+            for k in range(count):
+                rows.append((marker%3, 1, marker, frames[k], frames[k+1], lengths[k], 0.0))
+        displacements = np.array(rows, dtype=DISPLACEMENT_DTYPE)
+        displacements = displacements[np.lexsort((displacements["region"],))]
+
+        message = "batched fit differs from fit of one marker"
+        for fit in SpeedsTable.make_fits(displacements, fps):
+            rows = displacements[displacements["ID"] == fit["ID"]]
+            times = np.append(rows["start"][0], rows["end"])/fps
+            distances = np.append(0.0, np.cumsum(rows["length"]))
+            coefficients, covariance = np.polyfit(times, distances, 1, cov=True)
+            predicted = np.polyval(coefficients, times)
+            r_squared = 1.0 - (np.sum((distances - predicted)**2)/
+                               np.sum((distances - distances.mean())**2))
+
+            self.assertAlmostEqual(fit["speed"], abs(coefficients[0]), places=6, msg=message)
+            self.assertAlmostEqual(fit["std_error"], np.sqrt(covariance[0, 0]), places=6, msg=message)
+            self.assertAlmostEqual(fit["r_squared"], r_squared, places=6, msg=message)
+
+    def test_all_regions(self):
+        """
+        ensure the speeds of all regions found together match those of each region
+        """
+        store = mkres.make_results_object()
+        fps = self._test_values.fps
+        scale = self._test_values.scale
+        table = calculate_all_speeds(store, fps, scale)
+
+        message = "averages not in order of region"
+        regions = table.get_average_speeds()["region"].tolist()
+        self.assertEqual(regions, sorted(regions), message)
+
+        for region in range(len(store.get_regions())):
+            single = calculate_speeds(region, store, fps, scale)
+            view = table.get_calculator(region)
+            view.process_latest_data()
+
+            message = f"average speeds differ in region {region}"
+            self.assertEqual(single.get_average_speeds(), view.get_average_speeds(), message)
+
+            message = f"marker counts differ in region {region}"
+            self.assertEqual(single.number_markers(), view.number_markers(), message)
+
+            message = f"displacements differ in region {region}"
+            for first, second in ((single.get_line_displacements(), view.get_line_displacements()),
+                                  (single.get_point_displacements(), view.get_point_displacements())):
+                self.assertEqual([[(x.get_start(), x.get_end(), x.get_length()) for x in y]
+                                  for y in first],
+                                 [[(x.get_start(), x.get_end(), x.get_length()) for x in y]
+                                  for y in second],
+                                 message)
+
 if __name__ == "__main__":
     unittest.main()
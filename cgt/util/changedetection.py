@@ -0,0 +1,169 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+suggestion of key frames by change detection, each region is compared with
+its appearance in its last key frame and a new key frame is suggested when
+the mean squared difference passes a threshold
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+import numpy as np
+
+from cgt.util import config
+
+def region_indices(rects, shape):
+    """
+    find the flat indices of the pixels of a number of regions of a frame
+        Args:
+            rects ([(int, int, int, int)]): the left, top, width and height of each region
+            shape ((int, int)): the rows and columns of the frame
+        Returns:
+            (np.array, np.array) the indices of every region's pixels, one region after
+                another, and the number of pixels in each region
+    """
+    rows, cols = shape
+    indices = []
+    for left, top, width, height in rects:
+        left = min(max(int(left), 0), cols)
+        top = min(max(int(top), 0), rows)
+        right = min(left + max(int(width), 0), cols)
+        bottom = min(top + max(int(height), 0), rows)
+        region_rows, region_cols = np.mgrid[top:bottom, left:right]
+        indices.append((region_rows*cols + region_cols).reshape(-1))
+
+    counts = np.array([len(x) for x in indices], dtype=np.int64)
+
+    return np.concatenate(indices), counts
+
+class ChangeDetector():
+    """
+    follow the change of any number of regions through a stream of frames,
+    the pixels of all regions are gathered and compared in one operation
+    """
+
+    def __init__(self, rects, threshold=None):
+        """
+        initialize the object
+            Args:
+                rects ([(int, int, int, int)]): the left, top, width and height of each region
+                threshold (float): the mean squared difference, in grey levels, at which a key
+                                   frame is suggested, None for config.KEY_FRAME_CHANGE_THRESHOLD
+        """
+        ## the regions
+        self._rects = list(rects)
+
+        ## the mean squared difference at which a key frame is suggested
+        self._threshold = config.KEY_FRAME_CHANGE_THRESHOLD if threshold is None else threshold
+
+        ## the flat indices of the pixels of all regions, made from the first frame
+        self._indices = None
+
+        ## the start of each region in the gathered pixels
+        self._starts = None
+
+        ## the number of pixels in each region
+        self._counts = None
+
+        ## the pixels of each region in its last key frame
+        self._reference = None
+
+        ## the number of each frame added
+        self._frames = []
+
+        ## the difference of each region from its last key frame, for each frame added
+        self._energies = []
+
+        ## the suggested key frames of each region
+        self._suggestions = [[] for _ in self._rects]
+
+    def add_frame(self, frame, image):
+        """
+        compare a frame with the last key frame of each region, the first
+        frame added is the first key frame of every region
+            Args:
+                frame (int): the frame number
+                image (np.array): the grayscale frame
+            Throws:
+                ValueError if a region has no pixels in the frame
+        """
+        if self._indices is None:
+            self._indices, self._counts = region_indices(self._rects, image.shape)
+            if np.any(self._counts == 0):
+                raise ValueError("a region lies outside the frame")
+            self._starts = np.concatenate(([0], np.cumsum(self._counts)[:-1]))
+
+        pixels = np.asarray(image).reshape(-1)[self._indices].astype(np.float32)
+        self._frames.append(frame)
+
+        if self._reference is None:
+            self._reference = pixels
+            self._energies.append(np.zeros(len(self._rects)))
+            return
+
+        energies = np.add.reduceat((pixels - self._reference)**2, self._starts)/self._counts
+        self._energies.append(energies)
+
+        changed = energies > self._threshold
+        if np.any(changed):
+            for region in np.flatnonzero(changed):
+                self._suggestions[region].append(frame)
+            renew = np.repeat(changed, self._counts)
+            self._reference[renew] = pixels[renew]
+
+    def get_frames(self):
+        """
+        getter for the numbers of the frames added
+            Returns:
+                (np.array)
+        """
+        return np.array(self._frames, dtype=np.int64)
+
+    def get_energies(self):
+        """
+        getter for the differences from the last key frames
+            Returns:
+                (np.array) frames by regions, the mean squared difference of each region
+        """
+        if len(self._energies) == 0:
+            return np.empty((0, len(self._rects)))
+
+        return np.stack(self._energies)
+
+    def get_suggestions(self):
+        """
+        getter for the suggested key frames
+            Returns:
+                ([[int]]) for each region the frames at which it had changed
+                    enough from its previous key frame
+        """
+        return [list(x) for x in self._suggestions]
+
+def suggest_key_frames(frames, rects, threshold=None):
+    """
+    suggest key frames for a number of regions in one pass over the frames
+        Args:
+            frames (iterator): (frame number, np.array) pairs, grayscale frames of one shape
+            rects ([(int, int, int, int)]): the left, top, width and height of each region
+            threshold (float): the mean squared difference at which a key frame is
+                               suggested, None for config.KEY_FRAME_CHANGE_THRESHOLD
+        Returns:
+            ([[int]]) for each region the suggested key frames
+    """
+    detector = ChangeDetector(rects, threshold)
+    for frame, image in frames:
+        detector.add_frame(frame, image)
+
+    return detector.get_suggestions()
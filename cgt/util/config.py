@@ -22,3 +22,93 @@ USE_FFMPEG_LOG = False
 
 ## save statistics analyser logs to file
 STATS_ANALYSER_LOG = False
+
+## append the time taken to write each project file to a log file
+SAVE_TIMING_LOG = False
+
+## the format in which projects are saved, "csv" files or a single "binary" file
+PROJECT_FORMAT = "csv"
+
+## the storage of results while a project is open, "memory" lists or an "sqlite" database
+RESULTS_STORE = "memory"
+
+## number of processes rendering report images, None for one per cpu
+REPORT_WORKERS = None
+
+## reports show thumbnails of video frames, linked to full size images
+REPORT_COMPACT = False
+
+## reports are a single html file with the images embedded
+REPORT_EMBED = False
+
+## the file type of video frames in compact or embedded reports, jpg or webp
+REPORT_FRAME_FORMAT = "jpg"
+
+## the maximum width of the thumbnails in compact reports, in pixels
+REPORT_THUMBNAIL_WIDTH = 320
+
+## the number of journal entries after which the journal is compacted to a snapshot
+JOURNAL_COMPACT_ENTRIES = 1000
+
+## the maximum number of changes to the results that can be undone
+UNDO_LIMIT = 100
+
+## the maximum number of region speed calculations held in the speeds cache
+SPEEDS_CACHE_SIZE = 64
+
+## the half width, in pixels, of the template cut around a marker for auto-tracking
+TRACK_TEMPLATE_RADIUS = 16
+
+## the distance, in pixels, a tracked marker is searched for around its position in the previous frame
+TRACK_SEARCH_RADIUS = 8
+
+## the normalised cross-correlation below which a tracked marker is taken as lost
+TRACK_MIN_SCORE = 0.5
+
+## the default number of frames between the key frames proposed by auto-tracking
+TRACK_FRAME_STEP = 50
+
+## the length, in pixels, of the profiles across line markers used for kymographs by batch jobs
+KYMOGRAPH_PROFILE_LENGTH = 100
+
+## the distance, in samples, either side of the user's track searched for the edge in a kymograph
+KYMOGRAPH_FIT_BAND = 5
+
+## the mean squared difference, in grey levels, from a region's last key frame at which a new one is suggested
+KEY_FRAME_CHANGE_THRESHOLD = 25.0
+
+## if True the crystals are segmented as brighter than their background, else darker
+SEGMENT_BRIGHT_CRYSTAL = True
+
+## the factor by which frames are reduced before their stage drift is found by phase correlation
+DRIFT_DOWNSAMPLE = 4
+
+## the number of frames whose drift is found together in one stacked transform
+DRIFT_BATCH = 32
+
+## the number of runs of frames whose drift is found in parallel, each from its own decode
+DRIFT_SEGMENTS = 4
+
+## the number of frames sampled through a video to make the contrast enhancement's look up tables
+ENHANCE_SAMPLE_FRAMES = 8
+
+## the number of runs of frames enhanced in parallel, each with its own decode and encode
+ENHANCE_SEGMENTS = 4
+
+## the codec of the enhanced video, intra-frame so the runs can be joined without encoding again
+ENHANCE_CODEC = "mjpeg"
+
+## the quality of the enhanced video's frames, 2 (best) to 31
+ENHANCE_QUALITY = 2
+
+## the default equalisation of the enhanced video, "global", "windowed" or "none"
+ENHANCE_EQUALISATION = "global"
+
+## the default gamma of the enhanced video, above 1 brightens the mid tones
+ENHANCE_GAMMA = 1.0
+
+## the number of windows along the longer side of the frames for windowed equalisation
+ENHANCE_TILES = 8
+
+## the default number of frames in the temporal median of the enhanced video, 1 for none
+ENHANCE_MEDIAN = 1
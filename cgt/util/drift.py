@@ -0,0 +1,248 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+estimation of the drift of the sample stage by FFT phase correlation of
+downsampled frames against a reference frame, the frames are correlated in
+batches so each batch costs one stacked forward and inverse transform
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+import numpy as np
+
+from cgt.util import config
+
+def downsample(image, factor):
+    """
+    reduce an image by averaging square blocks of pixels, rows and columns
+    that do not fill a block are dropped
+        Args:
+            image (np.array): the grayscale image, or a stack of them
+            factor (int): the side of the blocks
+        Returns:
+            (np.array) the reduced image as float32
+    """
+    image = np.asarray(image, dtype=np.float32)
+    if factor <= 1:
+        return image
+
+    rows = (image.shape[-2]//factor)*factor
+    cols = (image.shape[-1]//factor)*factor
+    blocks = image[..., :rows, :cols].reshape(image.shape[:-2] +
+                                             (rows//factor, factor, cols//factor, factor))
+
+    return blocks.mean(axis=(-3, -1))
+
+def peak_offsets(surfaces):
+    """
+    find the position of the peak of each of a stack of phase correlation
+    surfaces, refined from the peak and its larger neighbour by the method
+    of Foroosh et al. (2002), positions past half the size wrap round to
+    negative offsets
+        Args:
+            surfaces (np.array): correlation surfaces, number by rows by columns
+        Returns:
+            (np.array) the x and y offset of each peak, number by 2
+    """
+    count, rows, cols = surfaces.shape
+    peak_row, peak_col = np.divmod(surfaces.reshape(count, -1).argmax(axis=1), cols)
+    index = np.arange(count)
+
+    offsets = np.empty((count, 2))
+    for axis, (peak, size) in enumerate(((peak_col, cols), (peak_row, rows))):
+        if axis == 0:
+            centre = surfaces[index, peak_row, peak]
+            before = surfaces[index, peak_row, (peak - 1)%size]
+            after = surfaces[index, peak_row, (peak + 1)%size]
+        else:
+            centre = surfaces[index, peak, peak_col]
+            before = surfaces[index, (peak - 1)%size, peak_col]
+            after = surfaces[index, (peak + 1)%size, peak_col]
+
+        side = np.where(after >= before, 1.0, -1.0)
+        neighbour = np.maximum(after, before)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = neighbour/(neighbour + centre)
+            step = np.where((step >= 0.0) & (step < 1.0), step, neighbour/(neighbour - centre))
+        step = np.where(np.isfinite(step), np.clip(step, 0.0, 0.5), 0.0)
+
+        position = peak + side*step
+        offsets[:, axis] = np.where(position > size/2.0, position - size, position)
+
+    return offsets
+
+class PhaseCorrelator():
+    """
+    find the shifts of images relative to a reference by phase correlation,
+    the windowed spectrum of the reference is found once
+    """
+
+    def __init__(self, reference, factor=1):
+        """
+        initialize the object
+            Args:
+                reference (np.array): the grayscale reference image
+                factor (int): the images are reduced by this factor before correlation
+            Throws:
+                ValueError if the reduced reference is smaller than 4 by 4
+        """
+        ## the factor by which images are reduced
+        self._factor = max(int(factor), 1)
+
+        small = downsample(reference, self._factor)
+        if small.shape[0] < 4 or small.shape[1] < 4:
+            raise ValueError("the frames are too small for the drift to be found")
+
+        ## the shape of the reduced images
+        self._shape = small.shape
+
+        ## the window suppressing the edges of the images
+        self._window = np.outer(np.hanning(small.shape[0]),
+                                np.hanning(small.shape[1])).astype(np.float32)
+
+        ## the conjugate of the windowed spectrum of the reference
+        self._reference = np.conj(self.spectra(small[np.newaxis]))[0]
+
+    def spectra(self, images):
+        """
+        find the windowed spectra of a stack of reduced images
+            Args:
+                images (np.array): number by rows by columns
+            Returns:
+                (np.array) the half spectra
+        """
+        centred = images - images.mean(axis=(1, 2), keepdims=True)
+        return np.fft.rfft2(centred*self._window)
+
+    def reduce(self, image):
+        """
+        reduce an image ready for measuring
+            Args:
+                image (np.array): a grayscale image the size of the reference
+            Returns:
+                (np.array) the reduced image
+        """
+        return downsample(image, self._factor)
+
+    def measure(self, images):
+        """
+        find the shifts of a stack of reduced images
+            Args:
+                images (np.array): images made by reduce, number by rows by columns
+            Returns:
+                (np.array) the x and y shift of the content of each image
+                    from the reference, in the pixels of the full images, number by 2
+        """
+        cross = self.spectra(images)*self._reference
+        cross /= np.maximum(np.abs(cross), 1.0e-12)
+        surfaces = np.fft.irfft2(cross, s=self._shape)
+
+        return peak_offsets(surfaces)*self._factor
+
+class DriftEstimator():
+    """
+    find the drift of a stream of frames from a reference frame, the
+    frames are held until a batch is full then correlated together
+    """
+
+    def __init__(self, reference, factor=None, batch=None):
+        """
+        initialize the object
+            Args:
+                reference (np.array): the grayscale reference frame
+                factor (int): the reduction of frames before correlation, None for config.DRIFT_DOWNSAMPLE
+                batch (int): the number of frames correlated together, None for config.DRIFT_BATCH
+        """
+        if factor is None:
+            factor = config.DRIFT_DOWNSAMPLE
+
+        ## the correlator holding the reference
+        self._correlator = PhaseCorrelator(reference, factor)
+
+        ## the number of frames correlated together
+        self._batch = config.DRIFT_BATCH if batch is None else max(int(batch), 1)
+
+        ## the reduced frames waiting to be correlated
+        self._waiting = []
+
+        ## the numbers of the frames
+        self._frames = []
+
+        ## the shifts found for each batch
+        self._offsets = []
+
+    def add_frame(self, frame, image):
+        """
+        add a frame, the batch is correlated when it is full
+            Args:
+                frame (int): the frame number
+                image (np.array): the grayscale frame, the size of the reference
+        """
+        self._frames.append(frame)
+        self._waiting.append(self._correlator.reduce(image))
+        if len(self._waiting) >= self._batch:
+            self.flush()
+
+    def flush(self):
+        """
+        correlate the frames waiting
+        """
+        if len(self._waiting) == 0:
+            return
+
+        self._offsets.append(self._correlator.measure(np.stack(self._waiting)))
+        self._waiting = []
+
+    def get_frames(self):
+        """
+        getter for the numbers of the frames added
+            Returns:
+                (np.array)
+        """
+        return np.array(self._frames, dtype=np.int64)
+
+    def get_offsets(self):
+        """
+        get the shifts of all the frames added
+            Returns:
+                (np.array) the x and y shift of the content of each frame from the reference, number by 2
+        """
+        self.flush()
+        if len(self._offsets) == 0:
+            return np.empty((0, 2))
+
+        return np.concatenate(self._offsets)
+
+def estimate_drift(frames, reference=None, factor=None, batch=None):
+    """
+    find the drift of a sequence of frames in one pass
+        Args:
+            frames (iterator): (frame number, np.array) pairs, grayscale frames of one shape
+            reference (np.array): the reference frame, None to use the first frame
+            factor (int): the reduction of frames before correlation, None for config.DRIFT_DOWNSAMPLE
+            batch (int): the number of frames correlated together, None for config.DRIFT_BATCH
+        Returns:
+            (np.array, np.array) the frame numbers and the x and y shift of each from the reference
+    """
+    estimator = None
+    for frame, image in frames:
+        if estimator is None:
+            estimator = DriftEstimator(image if reference is None else reference, factor, batch)
+        estimator.add_frame(frame, image)
+
+    if estimator is None:
+        return np.empty(0, dtype=np.int64), np.empty((0, 2))
+
+    return estimator.get_frames(), estimator.get_offsets()
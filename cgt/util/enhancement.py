@@ -0,0 +1,257 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+contrast enhancement of grayscale frames by global or windowed histogram
+equalisation and gamma, applied as look up tables found once from sampled
+frames, with an optional median over time
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+from collections import (deque, namedtuple)
+
+import numpy as np
+
+## the settings of an enhancement, equalisation is one of EQUALISATIONS,
+## gamma above 1 brightens the mid tones, tiles is the number of windows
+## along the longer side of the frames for windowed equalisation and median
+## is the number of frames in the temporal median, 1 for none
+EnhanceSettings = namedtuple("EnhanceSettings", ["equalisation", "gamma", "tiles", "median"])
+
+## equalisation using the histogram of the whole frame
+GLOBAL = "global"
+
+## equalisation using the histograms of windows, blended between their centres
+WINDOWED = "windowed"
+
+## no equalisation, gamma only
+NO_EQUALISATION = "none"
+
+## the kinds of equalisation
+EQUALISATIONS = (GLOBAL, WINDOWED, NO_EQUALISATION)
+
+def equalisation_lut(counts, clip=None):
+    """
+    make the look up table equalising a histogram, if a clip is given counts
+    above clip times the mean are cut and spread evenly over all grey levels
+        Args:
+            counts (np.array): the count of each of the 256 grey levels
+            clip (float): the limit as a multiple of the mean count, None for no limit
+        Returns:
+            (np.array) the new value of each grey level, float in [0, 255]
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    total = counts.sum()
+    if total == 0.0:
+        return np.arange(256, dtype=np.float64)
+
+    if clip is not None:
+        limit = max(clip*total/256.0, 1.0)
+        excess = np.maximum(counts - limit, 0.0).sum()
+        counts = np.minimum(counts, limit) + excess/256.0
+
+    cumulative = np.cumsum(counts)
+    lowest = cumulative[np.flatnonzero(counts)[0]]
+    if total <= lowest:
+        return np.arange(256, dtype=np.float64)
+
+    return np.clip((cumulative - lowest)/(total - lowest), 0.0, 1.0)*255.0
+
+def gamma_lut(gamma):
+    """
+    make the look up table of a gamma correction
+        Args:
+            gamma (float): the gamma, above 1 brightens the mid tones
+        Returns:
+            (np.array) the new value of each grey level, float in [0, 255]
+        Throws:
+            ValueError if gamma is not positive
+    """
+    if gamma <= 0.0:
+        raise ValueError("gamma must be positive")
+
+    return 255.0*(np.arange(256, dtype=np.float64)/255.0)**(1.0/gamma)
+
+def tile_blend(size, count):
+    """
+    find, along one side of a frame, the windows either side of each pixel
+    and the weight of the second, windows are blended between their centres
+        Args:
+            size (int): the number of pixels
+            count (int): the number of windows
+        Returns:
+            (np.array, np.array, np.array) the first and second window of each pixel and the weight
+    """
+    position = (np.arange(size) + 0.5)*count/size - 0.5
+    first = np.clip(np.floor(position).astype(np.int64), 0, count - 1)
+    second = np.minimum(first + 1, count - 1)
+    weight = np.clip(position - first, 0.0, 1.0).astype(np.float32)
+
+    return first, second, weight
+
+class ContrastEnhancer():
+    """
+    enhance grayscale frames of a fixed size, the tables are made once from
+    sample frames so every frame, and every part of a video, is treated alike
+    """
+
+    ## the limit, as a multiple of the mean count, on the histograms of windows
+    WINDOW_CLIP = 3.0
+
+    def __init__(self, settings, samples):
+        """
+        initialize the object
+            Args:
+                settings (EnhanceSettings): the enhancement
+                samples ([np.array]): grayscale frames of the video, uint8
+            Throws:
+                ValueError if there are no samples, the gamma is not positive or
+                           the equalisation is unknown
+        """
+        if len(samples) == 0:
+            raise ValueError("frames are needed to make the enhancement")
+        if settings.equalisation not in EQUALISATIONS:
+            raise ValueError(f"unknown equalisation {settings.equalisation}")
+
+        samples = np.stack([np.asarray(x, dtype=np.uint8) for x in samples])
+        gamma = gamma_lut(settings.gamma)
+
+        ## the shape of the frames
+        self._shape = samples.shape[1:]
+
+        ## the look up table of global equalisation or gamma only
+        self._lut = None
+
+        ## the flattened look up tables of the windows, and for each corner the
+        ## offsets of its window's table and the weights, for windowed equalisation
+        self._windows = None
+
+        if settings.equalisation == GLOBAL:
+            lut = gamma[np.round(equalisation_lut(np.bincount(samples.reshape(-1),
+                                                              minlength=256))).astype(np.int64)]
+            self._lut = np.round(lut).astype(np.uint8)
+        elif settings.equalisation == NO_EQUALISATION:
+            self._lut = np.round(gamma).astype(np.uint8)
+        else:
+            self.make_windows(samples, max(int(settings.tiles), 1), gamma)
+
+    def make_windows(self, samples, tiles, gamma):
+        """
+        make the tables of the windows and the blending of each pixel
+            Args:
+                samples (np.array): the sample frames, number by rows by columns
+                tiles (int): the number of windows along the longer side
+                gamma (np.array): the gamma look up table
+        """
+        rows, cols = self._shape
+        side = max(rows, cols)/tiles
+        counts = (max(int(round(rows/side)), 1), max(int(round(cols/side)), 1))
+
+        row_edges = np.linspace(0, rows, counts[0] + 1).round().astype(np.int64)
+        col_edges = np.linspace(0, cols, counts[1] + 1).round().astype(np.int64)
+        luts = np.empty((counts[0], counts[1], 256), dtype=np.float32)
+        for i in range(counts[0]):
+            for j in range(counts[1]):
+                window = samples[:, row_edges[i]:row_edges[i + 1], col_edges[j]:col_edges[j + 1]]
+                lut = equalisation_lut(np.bincount(window.reshape(-1), minlength=256),
+                                       ContrastEnhancer.WINDOW_CLIP)
+                luts[i, j] = gamma[np.round(lut).astype(np.int64)]
+
+        top, bottom, del_y = tile_blend(rows, counts[0])
+        left, right, del_x = tile_blend(cols, counts[1])
+        del_y = del_y[:, np.newaxis]
+        del_x = del_x[np.newaxis, :]
+
+        corners = []
+        for row, row_weight in ((top, 1.0 - del_y), (bottom, del_y)):
+            for col, col_weight in ((left, 1.0 - del_x), (right, del_x)):
+                offsets = (row[:, np.newaxis]*counts[1] + col[np.newaxis, :])*256
+                corners.append((offsets.astype(np.int64), row_weight*col_weight))
+
+        self._windows = (luts.reshape(-1), corners)
+
+    def get_shape(self):
+        """
+        getter for the shape of the frames
+            Returns:
+                (int, int) the rows and columns
+        """
+        return self._shape
+
+    def enhance(self, image):
+        """
+        enhance a frame
+            Args:
+                image (np.array): the grayscale frame, uint8 of the shape of the samples
+            Returns:
+                (np.array) the enhanced frame, uint8
+            Throws:
+                ValueError if the frame is the wrong shape
+        """
+        image = np.asarray(image, dtype=np.uint8)
+        if image.shape != self._shape:
+            raise ValueError("frame is not the size of the sample frames")
+
+        if self._lut is not None:
+            return self._lut[image]
+
+        luts, corners = self._windows
+        result = np.zeros(self._shape, dtype=np.float32)
+        for offsets, weights in corners:
+            result += luts[offsets + image]*weights
+
+        return np.clip(np.round(result), 0, 255).astype(np.uint8)
+
+def temporal_median(frames, size, start, end):
+    """
+    find the median of each pixel over a run of frames centred on each frame,
+    the run is cut short at the ends of the frames given
+        Args:
+            frames (iterator): (frame number, np.array) pairs in order, including
+                               the frames needed either side of start and end
+            size (int): the number of frames in the run, 1 or less for no median
+            start (int): the first frame wanted
+            end (int): the last frame wanted
+        Yields:
+            (int, np.array) the frame number and the median, uint8
+    """
+    half = max(int(size), 1)//2
+    if half == 0:
+        for number, image in frames:
+            if start <= number <= end:
+                yield number, image
+        return
+
+    buffer = deque()
+
+    def median_of(ready):
+        while buffer[0][0] < ready - half:
+            buffer.popleft()
+        stack = np.stack([x[1] for x in buffer if x[0] <= ready + half])
+        return np.round(np.median(stack, axis=0)).astype(np.uint8)
+
+    last = None
+    for number, image in frames:
+        buffer.append((number, image))
+        last = number
+        ready = number - half
+        if start <= ready <= end:
+            yield ready, median_of(ready)
+
+    if last is None:
+        return
+
+    for ready in range(max(last - half + 1, start), min(last, end) + 1):
+        yield ready, median_of(ready)
@@ -104,3 +104,28 @@ def qimage_to_nparray(image):
 
     # make a deep copy so the array will survive when image deleted
     return array.copy()
+
+def qimage_to_rgb_nparray(image):
+    """
+    convert a QImage of any format to an RGB np array
+        Args:
+            image (QImage) the image
+        Returns:
+            np array (uint8) the array (height, width, 3)
+    """
+    image = image.convertToFormat(qg.QImage.Format_RGB888)
+
+    width = image.width()
+    height = image.height()
+    stride = image.bytesPerLine()
+
+    # get pointer to pixels and set size in bytes, lines may be padded
+    bits = image.constBits()
+    bits.setsize(height*stride)
+
+    array = np.ndarray(shape=(height, stride),
+                       dtype=np.uint8,
+                       buffer=bits)
+
+    # make a deep copy so the array will survive when image deleted
+    return array[:, :3*width].reshape(height, width, 3).copy()
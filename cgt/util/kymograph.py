@@ -0,0 +1,237 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+kymographs, the intensity along a profile line in every frame of a video
+stacked into an image, and the fitting of the track of an edge in them
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from cgt.util import config
+
+## a straight line along which intensities are sampled, in the pixel
+## coordinates of the frames, sampling runs from (x1, y1) to (x2, y2)
+ProfileLine = namedtuple("ProfileLine", ["x1", "y1", "x2", "y2"])
+
+## the straight track of an edge in a kymograph, slope is in samples per
+## frame, the intercept is the position in the first frame of the kymograph,
+## frames and positions are the edge found in each frame
+KymographFit = namedtuple("KymographFit",
+                          ["slope", "intercept", "std_error", "frames", "positions"])
+
+def normal_profile(x1, y1, x2, y2, length):
+    """
+    make a profile line across a line, centred on its midpoint
+        Args:
+            x1 (float): the x of the start of the line
+            y1 (float): the y of the start of the line
+            x2 (float): the x of the end of the line
+            y2 (float): the y of the end of the line
+            length (float): the length of the profile
+        Returns:
+            (ProfileLine) the profile, along the line's normal (dy, -dx)
+        Throws:
+            ValueError if the line has no length
+    """
+    del_x = x2 - x1
+    del_y = y2 - y1
+    line_length = np.hypot(del_x, del_y)
+    if line_length == 0.0:
+        raise ValueError("a line of zero length has no normal")
+
+    half = 0.5*length/line_length
+    mid_x = 0.5*(x1 + x2)
+    mid_y = 0.5*(y1 + y2)
+
+    return ProfileLine(float(mid_x - half*del_y),
+                       float(mid_y + half*del_x),
+                       float(mid_x + half*del_y),
+                       float(mid_y - half*del_x))
+
+def profile_samples(line, spacing=1.0):
+    """
+    find the sample points along a profile line
+        Args:
+            line (ProfileLine): the line
+            spacing (float): the distance between samples in pixels
+        Returns:
+            (np.array, np.array) the x and y of the samples, at least two
+    """
+    length = np.hypot(line.x2 - line.x1, line.y2 - line.y1)
+    if length < spacing:
+        steps = np.array([0.0, 1.0])
+    else:
+        steps = np.arange(int(np.floor(length/spacing)) + 1)*spacing/length
+
+    return line.x1 + steps*(line.x2 - line.x1), line.y1 + steps*(line.y2 - line.y1)
+
+class KymographBuilder():
+    """
+    build kymographs along any number of profile lines from one stream of
+    frames, the bilinear sampling indices and weights of all the lines are
+    found once so each frame costs one gather and one weighted sum
+    """
+
+    def __init__(self, lines, shape, spacing=1.0):
+        """
+        initialize the object
+            Args:
+                lines ([ProfileLine]): the profile lines
+                shape ((int, int)): the rows and columns of the frames
+                spacing (float): the distance between samples in pixels
+        """
+        rows, cols = shape
+
+        samples = [profile_samples(x, spacing) for x in lines]
+
+        ## the number of samples along each line
+        self._counts = [len(x[0]) for x in samples]
+
+        x_values = np.clip(np.concatenate([x[0] for x in samples]), 0.0, cols - 1.0)
+        y_values = np.clip(np.concatenate([x[1] for x in samples]), 0.0, rows - 1.0)
+
+        # the top left of each sample's pixel square, kept one from the edge
+        left = np.minimum(np.floor(x_values).astype(np.int64), max(cols - 2, 0))
+        top = np.minimum(np.floor(y_values).astype(np.int64), max(rows - 2, 0))
+        right = np.minimum(left + 1, cols - 1)
+        bottom = np.minimum(top + 1, rows - 1)
+        del_x = x_values - left
+        del_y = y_values - top
+
+        ## the flat indices of the four pixels around each sample
+        self._indices = np.stack((top*cols + left,
+                                  top*cols + right,
+                                  bottom*cols + left,
+                                  bottom*cols + right))
+
+        ## the bilinear weights of the four pixels
+        self._weights = np.stack(((1.0 - del_x)*(1.0 - del_y),
+                                  del_x*(1.0 - del_y),
+                                  (1.0 - del_x)*del_y,
+                                  del_x*del_y))
+
+        ## the number of pixels in a frame
+        self._size = rows*cols
+
+        ## the samples of each frame added
+        self._rows = []
+
+        ## the number of each frame added
+        self._frames = []
+
+    def add_frame(self, frame, image):
+        """
+        sample a frame along all the lines
+            Args:
+                frame (int): the frame number
+                image (np.array): the grayscale frame, of the shape given at initialization
+            Throws:
+                ValueError if the image is the wrong size
+        """
+        flat = np.asarray(image).reshape(-1)
+        if len(flat) != self._size:
+            raise ValueError("frame is not the size of the kymograph's frames")
+
+        self._rows.append(np.einsum("ij,ij->j", flat[self._indices], self._weights)
+                          .astype(np.float32))
+        self._frames.append(frame)
+
+    def get_frames(self):
+        """
+        getter for the frame numbers of the rows of the kymographs
+            Returns:
+                (np.array)
+        """
+        return np.array(self._frames, dtype=np.int64)
+
+    def get_kymographs(self):
+        """
+        getter for the kymographs
+            Returns:
+                ([np.array]) for each line an array of frames by samples
+        """
+        if len(self._rows) == 0:
+            return [np.empty((0, x), dtype=np.float32) for x in self._counts]
+
+        return np.split(np.stack(self._rows), np.cumsum(self._counts)[:-1], axis=1)
+
+def build_kymographs(frames, lines, spacing=1.0):
+    """
+    build kymographs along a number of profile lines in one pass over the frames
+        Args:
+            frames (iterator): (frame number, np.array) pairs, grayscale frames of one shape
+            lines ([ProfileLine]): the profile lines
+            spacing (float): the distance between samples in pixels
+        Returns:
+            (np.array, [np.array]) the frame numbers, and for each line a kymograph of frames by samples
+    """
+    builder = None
+    for frame, image in frames:
+        if builder is None:
+            builder = KymographBuilder(lines, image.shape, spacing)
+        builder.add_frame(frame, image)
+
+    if builder is None:
+        return np.empty(0, dtype=np.int64), [np.empty((0, 0), dtype=np.float32) for _ in lines]
+
+    return builder.get_frames(), builder.get_kymographs()
+
+def fit_kymograph_edge(kymograph, start, end, band=None):
+    """
+    fit a straight track to an edge in a kymograph, the edge is taken in
+    each row as the steepest change of intensity within a band around the
+    straight line between two points chosen on it
+        Args:
+            kymograph (np.array): frames by samples
+            start ((float, float)): the row and sample of a point on the edge
+            end ((float, float)): the row and sample of a later point on the edge
+            band (int): the distance searched either side, None for config.KYMOGRAPH_FIT_BAND
+        Returns:
+            (KymographFit) slope in samples per row, the intercept at row 0, the standard
+                error of the slope, nan if fewer than three rows, and the edge in each row
+        Throws:
+            ValueError if the points are in the same row
+    """
+    if band is None:
+        band = config.KYMOGRAPH_FIT_BAND
+
+    first = int(round(min(start[0], end[0])))
+    last = int(round(max(start[0], end[0])))
+    first = max(first, 0)
+    last = min(last, kymograph.shape[0] - 1)
+    if last <= first:
+        raise ValueError("the points must be in different frames")
+
+    rows = np.arange(first, last + 1)
+    guide = start[1] + (rows - start[0])*(end[1] - start[1])/(end[0] - start[0])
+
+    gradient = np.abs(np.gradient(kymograph[first:last + 1].astype(np.float64), axis=1))
+    columns = np.arange(kymograph.shape[1])
+    outside = np.abs(columns[np.newaxis, :] - guide[:, np.newaxis]) > band
+    gradient[outside] = -1.0
+    positions = np.argmax(gradient, axis=1).astype(np.float64)
+
+    if len(rows) > 3:
+        coefficients, covariance = np.polyfit(rows, positions, 1, cov=True)
+        std_error = float(np.sqrt(covariance[0, 0]))
+    else:
+        coefficients = np.polyfit(rows, positions, 1)
+        std_error = float("nan")
+
+    return KymographFit(float(coefficients[0]), float(coefficients[1]), std_error, rows, positions)
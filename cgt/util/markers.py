@@ -17,6 +17,10 @@ This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
 @author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
 """
 import enum
+import hashlib
+import struct
+
+import numpy as np
 
 class MarkerTypes(enum.IntEnum):
     """
@@ -53,6 +57,58 @@ class ItemDataTypes(enum.IntEnum):
     ## for a cross the centre point
     CROSS_CENTRE = 4
 
+## the number of bytes in a digest, (64 bit unsigned integers)
+DIGEST_SIZE = 8
+
+## modulus used to combine digests of unordered collections
+DIGEST_MODULUS = 2**(8*DIGEST_SIZE)
+
+def canonical_bytes(values):
+    """
+    convert a sequence of values to a byte string that does not depend
+    on the process or platform
+        Args:
+            values (iterable): int, float, str, bool or None values
+        Returns:
+            (bytes) the canonical representation
+    """
+    parts = []
+    for value in values:
+        if value is None:
+            parts.append(b'n')
+        elif isinstance(value, int):
+            parts.append(b'i' + value.to_bytes(16, "little", signed=True))
+        elif isinstance(value, str):
+            encoded = value.encode("UTF-8")
+            parts.append(b's' + struct.pack("<I", len(encoded)) + encoded)
+        else:
+            # adding 0.0 converts -0.0 to 0.0
+            parts.append(b'f' + struct.pack("<d", float(value) + 0.0))
+
+    return b''.join(parts)
+
+def digest_values(*values):
+    """
+    find a process independent hash code for a sequence of values
+        Args:
+            values: int, float, str, bool or None values
+        Returns:
+            (int) unsigned 64 bit blake2b digest of the values
+    """
+    code = hashlib.blake2b(canonical_bytes(values), digest_size=DIGEST_SIZE)
+    return int.from_bytes(code.digest(), "little")
+
+def combine_digests(digests):
+    """
+    combine the digests of the members of an unordered collection, the
+    result can be updated by adding or subtracting the digests of members
+        Args:
+            digests (iterable): the digests (int)
+        Returns:
+            (int) the combined digest
+    """
+    return sum(digests) % DIGEST_MODULUS
+
 def hash_marker(marker):
     """
     find hash code for marker
@@ -77,13 +133,31 @@ def hash_graphics_line(line):
         Args:
             line (QGraphicsLineItem) the line
         Returns:
-            hash of tuple (line hash, position hash, frame)
+            digest of (type, x1, x2, y1, y2, position x, position y, frame)
+    """
+    q_line = line.line()
+    position = line.pos()
+    return hash_line_values(q_line.x1(),
+                            q_line.y1(),
+                            q_line.x2(),
+                            q_line.y2(),
+                            position.x(),
+                            position.y(),
+                            line.data(ItemDataTypes.FRAME_NUMBER))
+
+def hash_line_values(x1, y1, x2, y2, pos_x, pos_y, frame):
+    """
+    the hash function for lines applied to the values of a line, equal to
+    hash_graphics_line of a QGraphicsLineItem holding the values
+        Args:
+            x1, y1, x2, y2 (float): the end points
+            pos_x, pos_y (float): the position
+            frame (int): the frame number
+        Returns:
+            (int) hash code
     """
-    hashes = (hash_qlinef(line.line()),
-                          hash_qpointf(line.pos()),
-                          hash(line.data(ItemDataTypes.FRAME_NUMBER)))
-
-    return hash(hashes)
+    # pylint: disable = invalid-name
+    return digest_values(MarkerTypes.LINE, x1, x2, y1, y2, pos_x, pos_y, frame)
 
 def hash_graphics_point(point):
     """
@@ -91,13 +165,29 @@ def hash_graphics_point(point):
         Args:
             line (QGraphicsPathItem) the line
         Returns:
-            hash of tuple (centre hash, position hash, frame number)
+            digest of (type, centre x, centre y, position x, position y, frame)
     """
-    hashes = (hash_qpointf(point.data(ItemDataTypes.CROSS_CENTRE)),
-              hash_qpointf(point.pos()),
-              hash(point.data(ItemDataTypes.FRAME_NUMBER)))
+    centre = point.data(ItemDataTypes.CROSS_CENTRE)
+    position = point.pos()
+    return hash_point_values(centre.x(),
+                             centre.y(),
+                             position.x(),
+                             position.y(),
+                             point.data(ItemDataTypes.FRAME_NUMBER))
 
-    return hash(hashes)
+def hash_point_values(x, y, pos_x, pos_y, frame):
+    """
+    the hash function for points applied to the values of a point, equal to
+    hash_graphics_point of a QGraphicsPathItem holding the values
+        Args:
+            x, y (float): the centre of the cross
+            pos_x, pos_y (float): the position
+            frame (int): the frame number
+        Returns:
+            (int) hash code
+    """
+    # pylint: disable = invalid-name
+    return digest_values(MarkerTypes.POINT, x, y, pos_x, pos_y, frame)
 
 def hash_qlinef(line):
     """
@@ -105,10 +195,9 @@ def hash_qlinef(line):
         Args:
             line (QLineF) the line
         Returns:
-            hash of tuple formed from end point coordinates (x1, x2, y1, y2)
+            digest of end point coordinates (x1, x2, y1, y2)
     """
-    coords = (line.x1(), line.x2(), line.y1(), line.y2())
-    return hash(coords)
+    return digest_values(line.x1(), line.x2(), line.y1(), line.y2())
 
 def hash_qpointf(point):
     """
@@ -116,10 +205,9 @@ def hash_qpointf(point):
         Args:
             point (QpointF) the point
         Returns:
-            hash of tuple formed from end point coordinates (x, y)
+            digest of coordinates (x, y)
     """
-    coords = (point.x(), point.y())
-    return hash(coords)
+    return digest_values(point.x(), point.y())
 
 def hash_framestats(stats):
     """
@@ -127,28 +215,60 @@ def hash_framestats(stats):
         Return:
             (int) hash code
     """
-    items = []
-    items.append(stats.mean)
-    items.append(stats.std_deviation)
-    for count in stats.bin_counts:
-        items.append(count)
-
-    return hash(tuple(items))
+    return digest_values(stats.mean, stats.std_deviation, *stats.bin_counts)
 
 def hash_videointensitystats(stats):
     """
-    get hashcode for a complet set of video stats
+    get hashcode for a complet set of video stats, the frames are
+    fed to the digest one at a time to avoid a large temporary
         Return:
             (int) hash code
     """
-    items = []
+    code = hashlib.blake2b(digest_size=DIGEST_SIZE)
     for stat in stats.get_frames():
-        items.append(hash_framestats(stat))
+        code.update(canonical_bytes([stat.mean, stat.std_deviation]))
+        code.update(canonical_bytes(stat.bin_counts))
+
+    code.update(canonical_bytes(stats.get_bins()))
+
+    return int.from_bytes(code.digest(), "little")
 
-    for s_bin in stats.get_bins():
-        items.append(hash(s_bin))
+def hash_drift(drift):
+    """
+    get hash code for the stage drift of a video
+        Args:
+            drift (np.array): rows with frame, x and y columns
+        Returns:
+            (int) hash code, 0 for None
+    """
+    if drift is None:
+        return 0
+
+    code = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for name in ("frame", "x", "y"):
+        code.update(canonical_bytes(drift[name].tolist()))
 
-    return hash(tuple(items))
+    return int.from_bytes(code.digest(), "little")
+
+def hash_segmentation(segmentation):
+    """
+    get hash code for the crystal measurements of the regions, independent
+    of the order of the rows
+        Args:
+            segmentation (np.array): rows with region, frame, area, perimeter
+                                     and centroid columns
+        Returns:
+            (int) hash code, 0 for None
+    """
+    if segmentation is None:
+        return 0
+
+    order = np.lexsort((segmentation["frame"], segmentation["region"]))
+    code = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    for name in ("region", "frame", "area", "perimeter", "centroid_x", "centroid_y"):
+        code.update(canonical_bytes(segmentation[name][order].tolist()))
+
+    return int.from_bytes(code.digest(), "little")
 
 def hash_graphics_region(region):
     """
@@ -159,32 +279,103 @@ def hash_graphics_region(region):
             (int) hash code
     """
     rect = region.rect()
-    tmp = (hash_qpointf(rect.topLeft()), hash_qpointf(rect.bottomRight()))
-    return hash(tmp)
+    return hash_region_values(rect.x(), rect.y(), rect.width(), rect.height())
+
+def hash_region_values(x, y, width, height):
+    """
+    the hash function for regions applied to the values of a rectangle,
+    equal to hash_graphics_region of a QGraphicsRectItem holding the values
+        Args:
+            x, y (float): the top left corner
+            width, height (float): the size
+        Returns:
+            (int) hash code
+    """
+    return digest_values(MarkerTypes.REGION, x, y, x + width, y + height)
+
+def hash_indexed_region(region, index):
+    """
+    get hash code for a region that includes its array index
+        Args:
+            region (QGraphicsRectItem): the region
+            index (int): the array index of the region
+        Returns:
+            (int) hash code
+    """
+    return digest_values(hash_graphics_region(region), index)
+
+def hash_marker_in_region(marker):
+    """
+    get hash code for a line or point that includes its region index,
+    used for results content rather than the identity of the marker
+        Args:
+            marker (QGraphicsItem): the line or point
+        Returns:
+            (int) hash code
+    """
+    return hash_in_region(hash_marker(marker), get_region(marker))
+
+def hash_in_region(hash_code, region):
+    """
+    combine the hash code of a line or point with its region index
+        Args:
+            hash_code (int): the hash code of the marker
+            region (int): the region index
+        Returns:
+            (int) hash code
+    """
+    return digest_values(hash_code, region)
+
+def hash_results_parts(statistics, markers, regions, segmentation=0, drift=0):
+    """
+    combine the digests of the parts of a results store, the segmentation and
+    drift are only included if present so the digests of results without them
+    are unchanged
+        Args:
+            statistics (int): digest of the video statistics, or None
+            markers (int): combined digest of all line and point instances
+            regions (int): combined digest of all the indexed regions
+            segmentation (int): digest of the crystal measurements, 0 if none
+            drift (int): digest of the stage drift, 0 if none
+        Returns:
+            (int) hash code
+    """
+    if segmentation == 0 and drift == 0:
+        return digest_values(statistics, markers, regions)
+
+    return digest_values(statistics, markers, regions, segmentation, drift)
 
 def hash_results(results):
     """
-    find hash of results store
+    find hash of results store by walking all of its contents,
+    VideoAnalysisResultsStore.get_results_digest provides the same
+    value maintained incrementally
         Return:
             (int) hash code
     """
-    items = []
+    stats_digest = None
     stats = results.get_video_statistics()
     if stats is not None:
-        items.append(hash_videointensitystats(stats))
+        stats_digest = hash_videointensitystats(stats)
 
+    markers = []
     for marker in results.get_lines():
         for line in marker:
-            items.append(hash_graphics_line(line))
+            markers.append(hash_marker_in_region(line))
 
     for marker in results.get_points():
         for point in marker:
-            items.append(hash_graphics_point(point))
+            markers.append(hash_marker_in_region(point))
 
-    for region in results.get_regions():
-        items.append(hash_graphics_region(region))
+    regions = []
+    for i, region in enumerate(results.get_regions()):
+        regions.append(hash_indexed_region(region, i))
 
-    return hash(tuple(items))
+    return hash_results_parts(stats_digest,
+                              combine_digests(markers),
+                              combine_digests(regions),
+                              hash_segmentation(results.get_segmentation()),
+                              hash_drift(results.get_drift()))
 
 def get_marker_type(item):
     """
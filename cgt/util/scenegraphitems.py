@@ -375,6 +375,19 @@ def get_rect_even_dimensions(rect_item, even_dimensions=True):
         rect.setHeight(height+1)
 
     return rect
+
+def drift_rect(rect, offset):
+    """
+    move a rectangle with the stage drift of a frame, to the nearest pixel,
+    so a crop of the frame shows the same part of the sample as the reference frame
+        Args:
+            rect (QRect): the rectangle in the reference frame
+            offset ((float, float)): the x and y drift of the frame
+        Returns:
+            (QRect) the moved rectangle
+    """
+    return rect.translated(int(round(offset[0])), int(round(offset[1])))
+
 def compare_lines(first, second):
     """
     compare the lines withing two line items
@@ -392,3 +405,51 @@ def compare_points(first, second):
             second (QGraphicsLineItem)
     """
     return get_point_of_point(first) == get_point_of_point(second)
+
+def copy_graphics_region(region):
+    """
+    make an independent copy of a region, not in any scene
+        Args:
+            region (QGraphicsRectItem): the region
+        Returns:
+            (QGraphicsRectItem): the copy
+    """
+    item = qw.QGraphicsRectItem(region.rect())
+    item.setPos(region.pos())
+    item.setPen(region.pen())
+
+    return item
+
+def copy_graphics_line(line):
+    """
+    make an independent copy of a line marker, including its data, not in any scene
+        Args:
+            line (QGraphicsLineItem): the line
+        Returns:
+            (QGraphicsLineItem): the copy
+    """
+    item = qw.QGraphicsLineItem(line.line())
+    item.setPos(line.pos())
+    item.setPen(line.pen())
+    item.setZValue(line.zValue())
+    for data_type in ItemDataTypes:
+        item.setData(data_type, line.data(data_type))
+
+    return item
+
+def copy_graphics_point(point):
+    """
+    make an independent copy of a point marker, including its data, not in any scene
+        Args:
+            point (QGraphicsPathItem): the point
+        Returns:
+            (QGraphicsPathItem): the copy
+    """
+    item = qw.QGraphicsPathItem(point.path())
+    item.setPos(point.pos())
+    item.setPen(point.pen())
+    item.setZValue(point.zValue())
+    for data_type in ItemDataTypes:
+        item.setData(data_type, point.data(data_type))
+
+    return item
@@ -0,0 +1,215 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+segmentation of the crystal in each region of a video by a threshold and
+connected components, measuring its area, perimeter and centroid in every frame,
+scipy.ndimage is used for the labelling if it is installed
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+# set up linting conditions
+# pylint: disable = import-error
+import numpy as np
+
+try:
+    from scipy import ndimage
+except ImportError:
+    ndimage = None
+
+## the factor taking the length of the pixel edges around a shape to an
+## estimate of the length of its smooth boundary, the mean over all directions
+PERIMETER_FACTOR = np.pi/4.0
+
+def otsu_threshold(image):
+    """
+    find the grey level best separating the two classes of pixel in an image
+        Args:
+            image (np.array): the uint8 grayscale image
+        Returns:
+            (float) the threshold, pixels above it are in the upper class
+    """
+    counts = np.bincount(np.asarray(image, dtype=np.uint8).reshape(-1), minlength=256)
+    levels = np.arange(256, dtype=np.float64)
+
+    lower_count = np.cumsum(counts).astype(np.float64)
+    lower_sum = np.cumsum(counts*levels)
+    upper_count = lower_count[-1] - lower_count
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lower_mean = lower_sum/lower_count
+        upper_mean = (lower_sum[-1] - lower_sum)/upper_count
+        between = lower_count*upper_count*(lower_mean - upper_mean)**2
+
+    between[~np.isfinite(between)] = -1.0
+
+    return float(np.argmax(between)) + 0.5
+
+def label_components(mask):
+    """
+    label the 4-connected components of a mask, each pixel of a component is
+    given the flat index of the component's first pixel, by repeated minimum
+    propagation from the neighbours with pointer jumping
+        Args:
+            mask (np.array): the boolean mask
+        Returns:
+            (np.array) the labels of the pixels, -1 outside the mask
+    """
+    if ndimage is not None:
+        labels, _ = ndimage.label(mask)
+        flat = labels.reshape(-1)
+        firsts = np.full(flat.max() + 1, -1, dtype=np.int64)
+        indices = np.flatnonzero(flat)
+        firsts[flat[indices[::-1]]] = indices[::-1]
+        return np.where(mask, firsts[labels], -1)
+
+    rows, cols = mask.shape
+    unset = rows*cols
+    labels = np.where(mask, np.arange(unset).reshape(rows, cols), unset)
+
+    while True:
+        smallest = labels.copy()
+        np.minimum(smallest[1:, :], labels[:-1, :], out=smallest[1:, :])
+        np.minimum(smallest[:-1, :], labels[1:, :], out=smallest[:-1, :])
+        np.minimum(smallest[:, 1:], labels[:, :-1], out=smallest[:, 1:])
+        np.minimum(smallest[:, :-1], labels[:, 1:], out=smallest[:, :-1])
+        smallest[~mask] = unset
+
+        flat = smallest.reshape(-1)
+        inside = flat < unset
+        flat[inside] = flat[flat[inside]]
+
+        if np.array_equal(smallest, labels):
+            break
+        labels = smallest
+
+    return np.where(mask, labels, -1)
+
+def measure_crystal(image, threshold, bright=True):
+    """
+    find the crystal in an image as the largest connected component on its
+    side of a threshold, and measure it
+        Args:
+            image (np.array): the grayscale image of a region
+            threshold (float): the grey level separating crystal and background
+            bright (bool): if True the crystal is brighter than the background
+        Returns:
+            (float, float, float, float) the area and perimeter in pixels and the x and
+                y of the centroid, the centroid is nan if there is no crystal
+    """
+    mask = image > threshold if bright else image < threshold
+    if not np.any(mask):
+        return (0.0, 0.0, np.nan, np.nan)
+
+    labels = label_components(mask)
+    inside = labels.reshape(-1)
+    largest = np.argmax(np.bincount(inside[inside >= 0]))
+    crystal = labels == largest
+
+    rows, cols = np.nonzero(crystal)
+    padded = np.pad(crystal, 1)
+    edges = (np.count_nonzero(padded[1:, :] != padded[:-1, :]) +
+             np.count_nonzero(padded[:, 1:] != padded[:, :-1]))
+
+    # pixel (row, col) covers [col, col + 1) in the region's scene coordinates
+    return (float(len(rows)),
+            float(edges)*PERIMETER_FACTOR,
+            float(cols.mean()) + 0.5,
+            float(rows.mean()) + 0.5)
+
+class CrystalSegmenter():
+    """
+    measure the crystal in each of a number of regions of a stream of frames,
+    the threshold of each region is fixed from the first frame if not given
+    """
+
+    def __init__(self, rects, threshold=None, bright=True):
+        """
+        initialize the object
+            Args:
+                rects ([(int, int, int, int)]): the left, top, width and height of each region
+                threshold (float): the grey level separating crystal and background,
+                                   None to find each region's by Otsu's method
+                bright (bool): if True the crystal is brighter than the background
+        """
+        ## the regions
+        self._rects = [tuple(int(y) for y in x) for x in rects]
+
+        ## the threshold of each region, found from the first frame if None
+        self._thresholds = None if threshold is None else [threshold]*len(self._rects)
+
+        ## True if the crystal is brighter than the background
+        self._bright = bright
+
+        ## the region, frame, area, perimeter and centroid of each measurement
+        self._rows = []
+
+    def get_thresholds(self):
+        """
+        getter for the thresholds of the regions
+            Returns:
+                ([float]) or None if no frame has been added
+        """
+        return self._thresholds
+
+    def add_frame(self, frame, image):
+        """
+        measure the crystal in every region of a frame
+            Args:
+                frame (int): the frame number
+                image (np.array): the grayscale frame
+            Throws:
+                ValueError if a region has no pixels in the frame
+        """
+        crops = []
+        for left, top, width, height in self._rects:
+            crop = image[max(top, 0):max(top + height, 0), max(left, 0):max(left + width, 0)]
+            if crop.size == 0:
+                raise ValueError("a region lies outside the frame")
+            crops.append(crop)
+
+        if self._thresholds is None:
+            self._thresholds = [otsu_threshold(x) for x in crops]
+
+        for region, (crop, threshold) in enumerate(zip(crops, self._thresholds)):
+            self._rows.append((region, frame, *measure_crystal(crop, threshold, self._bright)))
+
+    def get_rows(self):
+        """
+        getter for the measurements
+            Returns:
+                ([(int, int, float, float, float, float)]) the region, frame,
+                    area, perimeter and centroid x and y, in order of frame
+        """
+        return self._rows
+
+def segment_frames(frames, rects, threshold=None, bright=True):
+    """
+    measure the crystal in a number of regions in one pass over the frames
+        Args:
+            frames (iterator): (frame number, np.array) pairs, grayscale frames of one shape
+            rects ([(int, int, int, int)]): the left, top, width and height of each region
+            threshold (float): the grey level separating crystal and background,
+                               None to find each region's by Otsu's method
+            bright (bool): if True the crystal is brighter than the background
+        Returns:
+            ([(int, int, float, float, float, float)]) the region, frame, area,
+                perimeter and centroid x and y
+    """
+    segmenter = CrystalSegmenter(rects, threshold, bright)
+    for frame, image in frames:
+        segmenter.add_frame(frame, image)
+
+    return segmenter.get_rows()
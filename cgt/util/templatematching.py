@@ -0,0 +1,235 @@
+## -*- coding: utf-8 -*-
+"""
+Created on 19 October 2026
+
+template matching by FFT based normalised cross-correlation, used to follow
+a marker through the frames of a region
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License. You may obtain a copy of the
+License at http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+
+This work was funded by Joanna Leng's EPSRC funded RSE Fellowship (EP/R025819/1)
+
+@copyright 2026
+@author: j.h.pickering@leeds.ac.uk and j.leng@leeds.ac.uk
+"""
+import numpy as np
+
+from cgt.util import config
+
+def template_spectrum(template, shape):
+    """
+    find the conjugate spectrum of a template, less its mean, padded to
+    the shape of the images it is to be matched against
+        Args:
+            template (np.array): the template
+            shape (tuple): the rows and columns of the images
+        Returns:
+            (np.array) the spectrum
+    """
+    template = np.asarray(template, dtype=np.float64)
+    return np.conj(np.fft.rfft2(template - template.mean(), shape))
+
+def window_sums(image, rows, cols):
+    """
+    find the sum of the image in every window of a given size, using an integral image
+        Args:
+            image (np.array): the image
+            rows (int): the number of rows in a window
+            cols (int): the number of columns in a window
+        Returns:
+            (np.array) the sums, one for each position of the window within the image
+    """
+    integral = np.zeros((image.shape[0] + 1, image.shape[1] + 1))
+    integral[1:, 1:] = image.cumsum(axis=0).cumsum(axis=1)
+
+    return (integral[rows:, cols:] - integral[:-rows, cols:]
+            - integral[rows:, :-cols] + integral[:-rows, :-cols])
+
+def normalised_cross_correlation(image, template, spectrum=None):
+    """
+    find the normalised cross-correlation of a template at every position
+    where it lies wholly within an image, the correlation is found by FFT and
+    the normalisation from integral images
+        Args:
+            image (np.array): the grayscale image
+            template (np.array): the grayscale template, no larger than the image
+            spectrum (np.array): the template_spectrum for the shape of the image, None to find it
+        Returns:
+            (np.array) the coefficients, in [-1, 1], 0 where the image or template is flat
+        Throws:
+            ValueError if the template is larger than the image
+    """
+    image = np.asarray(image, dtype=np.float64)
+    template = np.asarray(template, dtype=np.float64)
+
+    t_rows, t_cols = template.shape
+    rows = image.shape[0] - t_rows + 1
+    cols = image.shape[1] - t_cols + 1
+    if rows < 1 or cols < 1:
+        raise ValueError("template larger than image")
+
+    if spectrum is None:
+        spectrum = template_spectrum(template, image.shape)
+
+    # the template has zero mean so the image's mean adds nothing
+    numerator = np.fft.irfft2(np.fft.rfft2(image)*spectrum, image.shape)[:rows, :cols]
+
+    sums = window_sums(image, t_rows, t_cols)
+    variances = window_sums(image**2, t_rows, t_cols) - sums**2/template.size
+    template_norm = np.sqrt(np.sum((template - template.mean())**2))
+    denominator = np.sqrt(np.maximum(variances, 0.0))*template_norm
+
+    scores = np.zeros((rows, cols))
+    flat = denominator <= 1.0e-6*max(template_norm, 1.0)
+    scores[~flat] = numerator[~flat]/denominator[~flat]
+
+    return np.clip(scores, -1.0, 1.0)
+
+def find_peak(scores):
+    """
+    find the position of the largest score, refined to a fraction of a
+    pixel by fitting a parabola through its neighbours in each direction
+        Args:
+            scores (np.array): the scores
+        Returns:
+            (float, float, float) the row, the column and the score
+    """
+    row, col = np.unravel_index(np.argmax(scores), scores.shape)
+    peak = scores[row, col]
+
+    offsets = []
+    for index, size, line in ((row, scores.shape[0], scores[:, col]),
+                              (col, scores.shape[1], scores[row, :])):
+        offset = 0.0
+        if 0 < index < size - 1:
+            curvature = line[index - 1] - 2.0*peak + line[index + 1]
+            if curvature < 0.0:
+                offset = 0.5*(line[index - 1] - line[index + 1])/curvature
+        offsets.append(offset)
+
+    return row + offsets[0], col + offsets[1], float(peak)
+
+class TemplateTracker():
+    """
+    follow a feature through a sequence of frames by matching a template,
+    cut around the feature, within a window around its last position
+    """
+
+    def __init__(self, frame, centre, radius=None, search=None, min_score=None):
+        """
+        initialize the object
+            Args:
+                frame (np.array): the grayscale frame in which the feature is defined
+                centre ((float, float)): the x and y of the feature in the frame
+                radius (int): half width of the template, None for config.TRACK_TEMPLATE_RADIUS
+                search (int): the furthest the feature moves between frames,
+                              None for config.TRACK_SEARCH_RADIUS
+                min_score (float): the score below which the feature is lost,
+                                   None for config.TRACK_MIN_SCORE
+            Throws:
+                ValueError if the template does not fit in the frame
+        """
+        ## half width of the template
+        self._radius = config.TRACK_TEMPLATE_RADIUS if radius is None else radius
+
+        ## the furthest the feature is searched for from its last position
+        self._search = config.TRACK_SEARCH_RADIUS if search is None else search
+
+        ## the score below which the feature is lost
+        self._min_score = config.TRACK_MIN_SCORE if min_score is None else min_score
+
+        ## the x and y of the feature
+        self._position = np.array(centre, dtype=np.float64)
+
+        ## the score of the latest match
+        self._score = 1.0
+
+        ## the template
+        self._template = None
+
+        ## the offset of the feature from the centre pixel of the template
+        self._fraction = np.zeros(2)
+
+        ## the template spectra for each shape of search window
+        self._spectra = {}
+
+        self.refresh_template(frame)
+
+        if self._template is None:
+            raise ValueError("marker too close to the edge of the region to track")
+
+    def get_position(self):
+        """
+        getter for the position of the feature
+            Returns:
+                (np.array) the x and y
+        """
+        return self._position.copy()
+
+    def get_score(self):
+        """
+        getter for the score of the latest match
+            Returns:
+                (float)
+        """
+        return self._score
+
+    def refresh_template(self, frame):
+        """
+        cut a new template around the current position, to follow gradual
+        changes in the appearance of the feature, the template is kept if
+        the new one would not fit in the frame
+            Args:
+                frame (np.array): the grayscale frame
+        """
+        col, row = np.rint(self._position).astype(int)
+        if (row - self._radius < 0 or col - self._radius < 0 or
+                row + self._radius >= frame.shape[0] or col + self._radius >= frame.shape[1]):
+            return
+
+        self._template = np.array(frame[row - self._radius:row + self._radius + 1,
+                                        col - self._radius:col + self._radius + 1],
+                                  dtype=np.float64)
+        self._fraction = self._position - np.array([col, row])
+        self._spectra.clear()
+
+    def track(self, frame):
+        """
+        find the feature in the next frame
+            Args:
+                frame (np.array): the grayscale frame
+            Returns:
+                (np.array) the new x and y of the feature, None if it is lost
+        """
+        col, row = np.rint(self._position).astype(int)
+        reach = self._radius + self._search
+        top = max(row - reach, 0)
+        left = max(col - reach, 0)
+        window = frame[top:row + reach + 1, left:col + reach + 1]
+
+        if window.shape[0] < self._template.shape[0] or window.shape[1] < self._template.shape[1]:
+            return None
+
+        spectrum = self._spectra.get(window.shape)
+        if spectrum is None:
+            spectrum = template_spectrum(self._template, window.shape)
+            self._spectra[window.shape] = spectrum
+
+        peak_row, peak_col, score = find_peak(normalised_cross_correlation(window,
+                                                                           self._template,
+                                                                           spectrum))
+        self._score = score
+        if score < self._min_score:
+            return None
+
+        self._position = np.array([left + peak_col + self._radius,
+                                   top + peak_row + self._radius]) + self._fraction
+
+        return self.get_position()